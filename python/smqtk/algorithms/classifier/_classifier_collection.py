@@ -261,5 +261,55 @@ class ClassifierCollection (SmqtkObject, Configurable):
                     )
         return d_classifications
 
-    # TODO(paul.tunison): Classify many descriptors method when the need
-    #   arises (see updated vectorized Classifier API).
+    def classify_elements(self, descr_iter, labels=None,
+                          factory=DFLT_CLASSIFIER_FACTORY, overwrite=False):
+        """
+        Apply all stored classifiers to many descriptor elements at once.
+
+        Each classifier is applied to the whole batch of descriptors through
+        its vectorized ``classify_elements`` method instead of once per
+        descriptor.
+
+        :param descr_iter: Descriptor elements to classify.
+        :type descr_iter:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        :param labels: One or more labels of stored classifiers to use for
+            classifying the given descriptors.  If None, use all stored
+            classifiers.
+        :type labels: Iterable[str]
+
+        :param factory: Classification element factory.
+        :type factory: ClassificationElementFactory
+
+        :param overwrite: Force re-computation of the classification of the
+            input descriptors.
+        :type overwrite: bool
+
+        :raises smqtk.exceptions.MissingLabelError: Some or all of the
+            requested labels are missing.
+
+        :return: List of result dictionaries, parallel to the input
+            descriptors, of classifier labels to classification elements.
+        :rtype: list[dict[str, smqtk.representation.ClassificationElement]]
+
+        """
+        descriptors = list(descr_iter)
+        results = [{} for _ in descriptors]
+        with self._label_to_classifier_lock:
+            if labels is not None:
+                # If we're missing some of the requested labels, complain
+                missing_labels = set(labels) - self.labels()
+                if missing_labels:
+                    raise MissingLabelError(missing_labels)
+            else:
+                labels = list(self._label_to_classifier)
+
+            for label in labels:
+                classifier = self._label_to_classifier[label]
+                c_elems = classifier.classify_elements(
+                    descriptors, factory=factory, overwrite=overwrite
+                )
+                for r, c_elem in zip(results, c_elems):
+                    r[label] = c_elem
+        return results
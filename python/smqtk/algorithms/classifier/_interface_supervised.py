@@ -1,5 +1,9 @@
 import abc
 
+import numpy
+
+from smqtk.representation import DescriptorElement
+
 from ._interface_classifier import Classifier
 
 
@@ -56,6 +60,107 @@ class SupervisedClassifier (Classifier):
 
         return self._train(class_examples, **extra_params)
 
+    @staticmethod
+    def _class_examples_to_arrays(class_examples):
+        """
+        Convert a mapping of class labels to descriptor element examples into
+        a combined matrix of example vectors with a parallel list of labels.
+
+        :param class_examples: Dictionary mapping class labels to iterables of
+            DescriptorElement training examples.
+        :type class_examples: dict[collections.Hashable,
+                 collections.Iterable[smqtk.representation.DescriptorElement]]
+
+        :return: Matrix of example vectors, one per row, and the list of
+            labels parallel to the matrix rows.
+        :rtype: (numpy.ndarray, list[collections.Hashable])
+        """
+        vec_list = []
+        label_list = []
+        for label, examples in class_examples.items():
+            label_vectors = \
+                DescriptorElement.get_many_vectors(examples)
+            # ``is`` or ``count`` method messes up when elements are np arrays.
+            none_count = len([e for e in label_vectors if e is None])
+            assert none_count == 0, \
+                "Some descriptor elements for label {} did not contain " \
+                "vectors! (n={})".format(label, none_count)
+            vec_list.extend(label_vectors)
+            label_list.extend([label] * len(label_vectors))
+        return numpy.vstack(vec_list), label_list
+
+    def supports_partial_train(self):
+        """
+        :return: If this instance supports incrementally updating its model
+            with additional examples via ``partial_train``. This is False
+            unless an implementation overrides ``_partial_train``.
+        :rtype: bool
+        """
+        return False
+
+    def partial_train(self, class_examples, **extra_params):
+        """
+        Incrementally update the supervised classifier model with additional
+        examples, or train a new model if none is loaded yet.
+
+        Unlike ``train``, an existing model is not an error here: the given
+        examples are added to what the model has already learned instead of
+        replacing it. Given examples should be new to the model, and labels
+        may be omitted if they have no new examples. Examples cannot be
+        "unlearned" this way; a model should be trained anew if previous
+        examples are removed or re-labeled.
+
+        :param class_examples: Dictionary mapping class labels to iterables of
+            new DescriptorElement training examples.
+        :type class_examples: dict[collections.Hashable,
+                 collections.Iterable[smqtk.representation.DescriptorElement]]
+
+        :param extra_params: Dictionary with extra parameters for training.
+        :type extra_params: dict[basestring, object]
+
+        :raises NotImplementedError: This implementation does not support
+            incremental training.
+        :raises ValueError: There were no class examples provided.
+        :raises ValueError: Less than 2 classes were given when no model is
+            loaded yet.
+
+        """
+        if not self.supports_partial_train():
+            raise NotImplementedError("%s does not support incremental "
+                                      "training." % self.__class__.__name__)
+
+        if not class_examples:
+            raise ValueError("No class examples were provided.")
+        elif not self.has_model() and len(class_examples) < 2:
+            raise ValueError("Need 2 or more classes for initial training. "
+                             "Given %d." % len(class_examples))
+
+        return self._partial_train(class_examples, **extra_params)
+
+    def _partial_train(self, class_examples, **extra_params):
+        """
+        Internal method that incrementally updates the classifier
+        implementation's model with additional examples, or trains a new model
+        if none is loaded yet.
+
+        Implementations supporting incremental training should override this
+        method as well as ``supports_partial_train``.
+
+        When no model is loaded, the class labels will have already been
+        checked to contain at least two classes.
+
+        :param class_examples: Dictionary mapping class labels to iterables of
+            new DescriptorElement training examples.
+        :type class_examples: dict[collections.Hashable,
+                 collections.Iterable[smqtk.representation.DescriptorElement]]
+
+        :param extra_params: Dictionary with extra parameters for training.
+        :type extra_params: None | dict[basestring, object]
+
+        """
+        raise NotImplementedError("%s does not support incremental training."
+                                  % self.__class__.__name__)
+
     @abc.abstractmethod
     def _train(self, class_examples, **extra_params):
         """
@@ -0,0 +1,81 @@
+import numpy as np
+from sklearn.linear_model import SGDClassifier
+
+from smqtk.algorithms import SupervisedClassifier
+
+
+class SkLearnSGDClassifier (SGDClassifier, SupervisedClassifier):
+    """
+    Classifier implementation using Scikit Learn's SGDClassifier, a linear
+    classifier trained with stochastic gradient descent.
+
+    This classifier supports incremental training via ``partial_train``,
+    where the model is updated with a pass over only the new examples given.
+    Labels not seen when the model was first trained cannot be added
+    incrementally.
+
+    Classification confidences come from ``predict_proba`` for losses that
+    support it (e.g. "log" or "modified_huber"). For other losses, a logistic
+    function of the decision function is used.
+
+    See ``sklearn.linear_model.SGDClassifier`` documentation for more
+    details.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        # scikit-learn is a dependency of SMQTK
+        return True
+
+    def get_config(self):
+        return self.get_params()
+
+    def has_model(self):
+        try:
+            return self.coef_ is not None
+        except AttributeError:
+            return False
+
+    def get_labels(self):
+        return self.classes_.tolist()
+
+    def supports_partial_train(self):
+        return True
+
+    def _train(self, class_examples, **extra_params):
+        vec_mat, label_list = self._class_examples_to_arrays(class_examples)
+        self.fit(vec_mat, label_list)
+
+    def _partial_train(self, class_examples, **extra_params):
+        vec_mat, label_list = self._class_examples_to_arrays(class_examples)
+        classes = None
+        if not self.has_model():
+            # All labels must be known on the first call.
+            classes = np.unique(label_list)
+        self.partial_fit(vec_mat, label_list, classes=classes)
+
+    def _classify_arrays(self, array_iter):
+        # Collect arrays for prediction.
+        # - Collect into numpy.ndarray if not already one.
+        if isinstance(array_iter, np.ndarray):
+            mat = array_iter
+        else:
+            # Expand out input iterable of arrays into a large matrix for
+            # prediction.
+            mat = np.array(list(array_iter))
+        class_list = self.classes_.tolist()
+        try:
+            proba_mat = self.predict_proba(mat)
+        except AttributeError:
+            # Loss does not provide probability estimates.
+            scores = self.decision_function(mat)
+            if scores.ndim == 1:
+                # Binary case: score is of the second class.
+                p1 = 1. / (1. + np.exp(-scores))
+                proba_mat = np.column_stack([1. - p1, p1])
+            else:
+                # One-vs-rest: normalize per-class logistic scores.
+                proba_mat = 1. / (1. + np.exp(-scores))
+                proba_mat /= proba_mat.sum(axis=1)[:, np.newaxis]
+        for proba in proba_mat:
+            yield dict(zip(class_list, proba))
@@ -2,7 +2,7 @@ import abc
 from collections import deque
 
 from smqtk.algorithms import SmqtkAlgorithm
-from smqtk.representation import DescriptorElementFactory
+from smqtk.representation import DescriptorElement, DescriptorElementFactory
 from smqtk.representation.descriptor_element.local_elements import \
     DescriptorMemoryElement
 from smqtk.utils import ContentTypeValidator
@@ -72,7 +72,7 @@ class DescriptorGenerator (SmqtkAlgorithm, ContentTypeValidator):
 
     def generate_elements(self, data_iter,
                           descr_factory=DFLT_DESCRIPTOR_FACTORY,
-                          overwrite=False):
+                          overwrite=False, d_elem_batch=100):
         """
         Generate DescriptorElement instances for the input data elements,
         generating new descriptors for those elements that need them, or
@@ -119,6 +119,11 @@ class DescriptorGenerator (SmqtkAlgorithm, ContentTypeValidator):
             generate descriptors for all input data elements, overwriting the
             vectors previously stored in the factory-produces descriptor
             elements.
+        :param int d_elem_batch:
+            The number of computed vectors to collect before setting the whole
+            batch's vectors to their descriptor elements at once via the
+            ``DescriptorElement.set_many_vectors`` method. Descriptor elements
+            are yielded once their batch's vectors are set.
 
         :raises RuntimeError: Descriptor extraction failure of some kind.
         :raises ValueError: Given data element content was not of a valid type
@@ -133,6 +138,11 @@ class DescriptorGenerator (SmqtkAlgorithm, ContentTypeValidator):
         """
         log_debug = self._log.debug
 
+        if d_elem_batch <= 0:
+            self._log.warning("Descriptor element batching value <= 0, "
+                              "defaulting to using value of 1.")
+            d_elem_batch = 1
+
         # Parallel lists of (uuid, DescriptorElement, already-computed) triples
         #   for formulating the return yielding.
         # Using deques so we can efficiently popleft off of them in the below
@@ -189,6 +199,26 @@ class DescriptorGenerator (SmqtkAlgorithm, ContentTypeValidator):
 
             end_of_iter[0] = last_i
 
+        # Descriptor elements to yield once the vectors of the current batch
+        #   are set, in order, and the parallel lists of elements and vectors
+        #   of the current batch.
+        #: :type: list[smqtk.representation.DescriptorElement]
+        yield_batch = []
+        set_batch_elems = []
+        set_batch_vecs = []
+
+        def set_batch():
+            """ Set the vectors of the current batch, returning the elements
+            to yield. """
+            if set_batch_elems:
+                log_debug("Setting {} computed vectors"
+                          .format(len(set_batch_elems)))
+                DescriptorElement.set_many_vectors(list(set_batch_elems),
+                                                   list(set_batch_vecs))
+            batch = list(yield_batch)
+            del yield_batch[:], set_batch_elems[:], set_batch_vecs[:]
+            return batch
+
         descr_vec_iter = self.generate_arrays(iter_tocompute_data())
         for v_i, v in enumerate(descr_vec_iter):
             # These pops would fail with an IndexError if there is nothing left
@@ -204,18 +234,26 @@ class DescriptorGenerator (SmqtkAlgorithm, ContentTypeValidator):
             # ``v`` should be be used to populate the next DescriptorElement
             # with an associated "already_computed" flag of False.
             while v_already_computed:
-                yield v_descr_elem
+                yield_batch.append(v_descr_elem)
                 # We clearly have a descriptor vector from the result of
                 # computation so there should logically be some future element
                 # in which to store this result.
                 v_descr_elem, v_already_computed = elem_and_status_q.popleft()
 
-            # Assign the current computed descriptor vector to the current
-            # element that should be set to.
-            log_debug("Setting computed vector {} to element UUID {}"
+            # Queue the current computed descriptor vector to be set to the
+            # current element that should be set to.
+            log_debug("Batching computed vector {} for element UUID {}"
                       .format(v_i, v_descr_elem.uuid()))
-            v_descr_elem.set_vector(v)
-            yield v_descr_elem
+            yield_batch.append(v_descr_elem)
+            set_batch_elems.append(v_descr_elem)
+            set_batch_vecs.append(v)
+            if len(set_batch_elems) >= d_elem_batch:
+                for e in set_batch():
+                    yield e
+
+        # Set the vectors of the final partial batch.
+        for e in set_batch():
+            yield e
 
         # At this point, the ``iter_tocompute_data()`` iterator should have
         #   completed due to the ``self.generate_arrays`` method iterating
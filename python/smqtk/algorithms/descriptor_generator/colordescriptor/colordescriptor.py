@@ -1,5 +1,6 @@
 from __future__ import division, print_function
 import abc
+import hashlib
 import logging
 import json
 import math
@@ -11,6 +12,7 @@ import os.path as osp
 import subprocess
 import sys
 import tempfile
+import threading
 
 import numpy
 import six
@@ -59,6 +61,18 @@ class ColorDescriptor_Base (DescriptorGenerator):
     # its accessible on the PATH.
     EXE = 'colorDescriptor'
 
+    # Number of data elements whose low-level descriptors are extracted and
+    # then quantized together in ``_generate_arrays``.
+    QUANTIZE_BATCH_SIZE = 64
+
+    # Maximum number of intermediate values (descriptors * codes * dimensions)
+    # held at once when quantizing with histogram intersection.
+    HIK_BLOCK_ELEMENTS = 2 ** 24
+
+    # Number of spatial pyramid regions: the whole image, 4 quadrants and 3
+    # horizontal bands.
+    SP_REGIONS = 8
+
     @classmethod
     def is_usable(cls):
         """
@@ -205,11 +219,29 @@ class ColorDescriptor_Base (DescriptorGenerator):
 
         self.parallel = parallel
 
-        # Cannot pre-load FLANN stuff because odd things happen when processing/
-        # threading. Loading index file is fast anyway.
+        # The FLANN index is loaded on first use and then shared between
+        # threads, with queries serialized by the lock.
+        self._flann = None
+        self._flann_lock = threading.RLock()
+
         self._codebook = None
         if self.has_model:
             self._codebook = numpy.load(self.codebook_filepath)
+        # Digest of the current codebook and distance metric, computed on
+        # first use.
+        self._codebook_digest = None
+
+    def __getstate__(self):
+        # The loaded FLANN index and its lock cannot be pickled. The index is
+        # loaded again on first use after unpickling.
+        state = dict(self.__dict__)
+        state['_flann'] = None
+        del state['_flann_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._flann_lock = threading.RLock()
 
     def get_config(self):
         """
@@ -472,169 +504,347 @@ class ColorDescriptor_Base (DescriptorGenerator):
                 json.dump(flann_params, ofile, indent=4, sort_keys=True)
 
         # save generation results to class for immediate feature computation use
-        self._codebook = codebook
+        with self._flann_lock:
+            self._codebook = codebook
+            self._codebook_digest = None
+            self._flann = flann
 
-    def _compute_one_descriptor(self, data):
+    def _get_flann_index(self):
         """
-        Given some kind of data, process and return a feature vector as a Numpy
-        array.
+        Get the FLANN index over the current codebook, loading it from file on
+        first use.
 
-        :raises RuntimeError: Feature extraction failure of some kind.
+        :return: Loaded FLANN index.
+        :rtype: pyflann.FLANN
 
-        :param data: Some kind of input data for the feature descriptor. This is
-            descriptor dependent.
-        :type data: smqtk.representation.DataElement
+        """
+        with self._flann_lock:
+            if self._flann is None:
+                self._log.debug("Loading FLANN index: %s",
+                                self.flann_index_filepath)
+                pyflann.set_distance_type(self._flann_distance_metric)
+                flann = pyflann.FLANN()
+                flann.load_index(self.flann_index_filepath, self._codebook)
+                self._flann = flann
+            return self._flann
 
-        :return: Feature vector. This is a histogram of N bins where N is the
-            number of centroids in the codebook. Bin values is percent
-            composition, not absolute counts.
+    @staticmethod
+    def _hik_nearest_codes(descriptors, codebook, k=1,
+                           block_elements=HIK_BLOCK_ELEMENTS):
+        """
+        Find the ``k`` codes most similar to each descriptor by histogram
+        intersection, computed directly in blocks of descriptors.
+
+        :param descriptors: Matrix of descriptors, one per row.
+        :type descriptors: numpy.ndarray
+
+        :param codebook: Matrix of codes, one per row.
+        :type codebook: numpy.ndarray
+
+        :param k: Number of most similar codes to find per descriptor. This is
+            clamped to the size of the codebook.
+        :type k: int
+
+        :param block_elements: Maximum number of intermediate values to hold
+            at once, which determines how many descriptors are compared to the
+            codebook at a time.
+        :type block_elements: int
+
+        :return: Matrix of code indices, one row of ``k`` indices per
+            descriptor. When ``k`` is greater than 1, the indices in a row are
+            not ordered by similarity.
         :rtype: numpy.ndarray
 
         """
-        checkpoint_filepath = self._get_checkpoint_feature_file(data)
-        # if osp.isfile(checkpoint_filepath):
-        #     return numpy.load(checkpoint_filepath)
+        n = descriptors.shape[0]
+        k = min(k, codebook.shape[0])
+        idxs = numpy.empty((n, k), dtype=numpy.intp)
+        block = max(1, int(block_elements // max(1, codebook.size)))
+        for s in range(0, n, block):
+            b = descriptors[s:s+block]
+            sim = numpy.minimum(b[:, numpy.newaxis, :],
+                                codebook[numpy.newaxis, :, :]).sum(axis=2)
+            if k == 1:
+                idxs[s:s+block, 0] = sim.argmax(axis=1)
+            else:
+                idxs[s:s+block] = \
+                    numpy.argpartition(-sim, k-1, axis=1)[:, :k]
+        return idxs
 
-        if not self.has_model:
-            raise RuntimeError("No model currently loaded! Check the existence "
-                               "or, or generate, model files!\n"
-                               "Codebook path: %s\n"
-                               "FLANN Index path: %s"
-                               % (self.codebook_filepath,
-                                  self.flann_index_filepath))
+    def _quantize(self, descriptors, k=1):
+        """
+        Find the ``k`` nearest codebook codes to each given descriptor.
 
-        self._log.debug("Computing descriptors for data UID[%s]...",
-                        data.uuid())
-        info, descriptors = self._generate_descriptor_matrices({data})
+        :param descriptors: Matrix of descriptors, one per row.
+        :type descriptors: numpy.ndarray
 
-        # Load FLANN components
-        pyflann.set_distance_type(self._flann_distance_metric)
-        flann = pyflann.FLANN()
-        flann.load_index(self.flann_index_filepath, self._codebook)
+        :param k: Number of nearest codes to find per descriptor.
+        :type k: int
 
-        if not self._use_sp:
-            ###
-            # Codebook Quantization
-            #
-            # - loaded the model at class initialization if we had one
-            self._log.debug("Quantizing descriptors")
+        :return: Matrix of code indices, one row of ``k`` indices per
+            descriptor.
+        :rtype: numpy.ndarray
 
-            try:
-                # If the distance method is HIK, we need to treat it special
-                # since that method produces a similarity score, not a distance
-                # score.
-                #
-                if self._flann_distance_metric == 'hik':
-                    # This searches for all NN instead of minimum between n and
-                    # the number of descriptors and keeps the last one because
-                    # hik is a similarity score and not a distance, which is
-                    # also why the values in dists is flipped below.
-                    #: :type: (numpy.ndarray, numpy.ndarray)
-                    idxs = flann.nn_index(descriptors,
-                                          self._codebook.shape[0])[0]
-                    # Only keep the last index for each descriptor return
-                    idxs = numpy.array([i_array[-1] for i_array in idxs])
-                else:
-                    #: :type: (numpy.ndarray, numpy.ndarray)
-                    idxs = flann.nn_index(descriptors, 1)[0]
-            except AssertionError:
-
-                self._log.error("Codebook shape  : %s", self._codebook.shape)
-                self._log.error("Descriptor shape: %s", descriptors.shape)
-
-                raise
-
-            # Create histogram
-            # - Using explicit bin slots to prevent numpy from automatically
-            #   creating tightly constrained bins. This would otherwise cause
-            #   histograms between two inputs to be non-comparable (unaligned
-            #   bins).
-            # - See numpy note about ``bins`` to understand why the +1 is
-            #   necessary
+        """
+        if not descriptors.shape[0]:
+            return numpy.empty((0, k), dtype=numpy.intp)
+        try:
+            if self._flann_distance_metric == 'hik':
+                # HIK is a similarity score and not a distance, so instead of
+                # querying FLANN for the full ordering of codes and keeping the
+                # last ones, directly pick the most similar codes.
+                return self._hik_nearest_codes(descriptors, self._codebook, k,
+                                               self.HIK_BLOCK_ELEMENTS)
+            flann = self._get_flann_index()
+            with self._flann_lock:
+                # FLANN dispatches on the global distance type, which other
+                # instances may have changed.
+                pyflann.set_distance_type(self._flann_distance_metric)
+                #: :type: (numpy.ndarray, numpy.ndarray)
+                idxs = flann.nn_index(descriptors, k)[0]
+            # A single neighbor is returned as a flat array.
+            return idxs.reshape(descriptors.shape[0], k)
+        except AssertionError:
+            self._log.error("Codebook shape  : %s", self._codebook.shape)
+            self._log.error("Descriptor shape: %s", descriptors.shape)
+            raise
+
+    def _build_histograms(self, positions, idxs):
+        """
+        Build the feature vectors for a batch of data elements from the
+        codebook quantization of their descriptors.
+
+        Histogram bins of all elements are counted together in a single
+        ``numpy.bincount`` pass.
+
+        :param positions: Matrices of descriptor (x, y) positions, one per
+            element.
+        :type positions: list[numpy.ndarray]
+
+        :param idxs: Matrices of nearest code indices for each element's
+            descriptors, one row per descriptor.
+        :type idxs: list[numpy.ndarray]
+
+        :return: Feature vectors in parallel association with the input
+            matrices. Without spatial pyramids, this is a histogram of N bins
+            where N is the number of centroids in the codebook. With spatial
+            pyramids, this is the concatenation of the histograms of the whole
+            image and of its three horizontal bands. Bin values are percent
+            composition, not absolute counts.
+        :rtype: list[numpy.ndarray]
+
+        """
+        n_codes = self._codebook.shape[0]
+        if not self._use_sp:
             # - Learned from spatial implementation that we could feed multiple
             #   neighbors per descriptor into here, leading to a more populated
             #   histogram.
             #   - Could also possibly weight things based on dist from
             #     descriptor?
-            #: :type: numpy.core.multiarray.ndarray
-            h = numpy.histogram(idxs,  # indices are all integers
-                                bins=numpy.arange(self._codebook.shape[0]+1))[0]
-            # self._log.debug("Quantization histogram: %s", h)
-            # Normalize histogram into relative frequencies
-            # - Not using /= on purpose. h is originally int32 coming out of
-            #   histogram. /= would keep int32 type when we want it to be
-            #   transformed into a float type by the division.
-            if h.sum():
-                # noinspection PyAugmentAssignment
-                h = h / float(h.sum())
-            else:
-                h = numpy.zeros(h.shape, h.dtype)
-            # self._log.debug("Normalized histogram: %s", h)
-
+            counts = [i.size for i in idxs]
+            elem = numpy.repeat(numpy.arange(len(idxs)), counts)
+            flat = elem * n_codes
+            if len(flat):
+                flat += numpy.concatenate([i.ravel() for i in idxs])
+            #: :type: numpy.ndarray
+            h = numpy.bincount(flat, minlength=len(idxs) * n_codes) \
+                .reshape(len(idxs), n_codes).astype(float)
+            # Normalize histograms into relative frequencies
+            sums = h.sum(axis=1, keepdims=True)
+            numpy.divide(h, sums, out=h, where=sums > 0)
         else:
-            ###
-            # Spatial Pyramid Quantization
-            #
-            self._log.debug("Quantizing descriptors using spatial pyramid")
-            ##
-            # Quantization factor - number of nearest codes to be saved
-            q_factor = 10
             ##
-            # Concatenating spatial information to descriptor vectors to format:
-            #   [ x y <descriptor> ]
-            self._log.debug("Creating combined descriptor matrix")
-            m = numpy.concatenate((info[:, :2],
-                                   descriptors), axis=1)
-            ##
-            # Creating quantized vectors, consisting vector:
-            #   [ x y c_1 ... c_qf dist_1 ... dist_qf ]
-            # which has a total size of 2+(qf*2)
+            # Build spatial pyramid from descriptor positions + near code
+            # indices.
             #
-            # Sangmin's code included the distances in the quantized vector, but
-            # then also passed this vector into numpy's histogram function with
-            # integral bins, causing the [0,1] to be heavily populated, which
-            # doesn't make sense to do.
-            #   idxs, dists = flann.nn_index(m[:, 2:], q_factor)
-            #   q = numpy.concatenate([m[:, :2], idxs, dists], axis=1)
-            self._log.debug("Computing nearest neighbors")
-            if self._flann_distance_metric == 'hik':
-                # Query full ordering of code indices
-                idxs = flann.nn_index(m[:, 2:], self._codebook.shape[0])[0]
-                # Extract the right-side block for use in building histogram
-                # Order doesn't actually matter in the current implementation
-                #   because index relative position is not being weighted.
-                idxs = idxs[:, -q_factor:]
-            else:
-                idxs = flann.nn_index(m[:, 2:], q_factor)[0]
-            self._log.debug("Creating quantization matrix")
-            # This matrix consists of descriptor (x,y) position + near code
-            #   indices.
-            q = numpy.concatenate([m[:, :2], idxs], axis=1)
-            ##
-            # Build spatial pyramid from quantized matrix
-            self._log.debug("Building spatial pyramid histograms")
-            hist_sp = self._build_sp_hist(q, self._codebook.shape[0])
+            # Sangmin's code included the distances in the quantized vector,
+            # but then also passed this vector into numpy's histogram function
+            # with integral bins, causing the [0,1] to be heavily populated,
+            # which doesn't make sense to do.
+            hist_sp = self._build_sp_hists(positions, idxs, n_codes)
             ##
-            # Combine each quadrants into single vector
-            self._log.debug("Combining global+thirds into final histogram.")
+            # Combine global+thirds into single vector
             f = sys.float_info.min  # so as we don't div by 0 accidentally
+            hist = hist_sp[:, [0, 5, 6, 7], :].astype(float)
+            hist /= hist.sum(axis=2, keepdims=True) + f
+            h = hist.reshape(len(idxs), -1)
+            sums = h.sum(axis=1, keepdims=True)
+            numpy.divide(h, sums, out=h, where=sums > 0)
+        return list(h)
+
+    def _build_histogram(self, info, idxs):
+        """
+        Build the feature vector for one data element from the codebook
+        quantization of its descriptors.
+
+        See ``_build_histograms`` for details.
 
-            def rf_norm(hist):
-                return hist / (float(hist.sum()) + f)
-            h = numpy.concatenate([rf_norm(hist_sp[0]),
-                                   rf_norm(hist_sp[5]),
-                                   rf_norm(hist_sp[6]),
-                                   rf_norm(hist_sp[7])],
-                                  axis=1)
-            # noinspection PyAugmentAssignment
-            h /= h.sum()
+        :param info: Info matrix of the element's descriptors, whose first two
+            columns are descriptor (x, y) positions.
+        :type info: numpy.ndarray
 
-        self._log.debug("Saving checkpoint feature file")
-        if not osp.isdir(osp.dirname(checkpoint_filepath)):
-            safe_create_dir(osp.dirname(checkpoint_filepath))
-        numpy.save(checkpoint_filepath, h)
+        :param idxs: Matrix of nearest code indices for the element's
+            descriptors, one row per descriptor.
+        :type idxs: numpy.ndarray
+
+        :return: Feature vector.
+        :rtype: numpy.ndarray
+
+        """
+        return self._build_histograms([info[:, :2]], [idxs])[0]
 
-        return h
+    def _get_checkpoint_assignment_file(self, data, q_factor):
+        """
+        Return the standard path to a data element's codebook assignment
+        checkpoint file, containing its descriptor positions and nearest code
+        indices.
+
+        :param data: Data element
+        :type data: smqtk.representation.DataElement
+
+        :param q_factor: Number of nearest codes assigned per descriptor.
+        :type q_factor: int
+
+        :return: Standard path to where the assignment checkpoint file for
+            this given data element.
+        :rtype: str
+
+        """
+        return osp.join(self._get_checkpoint_dir(data),
+                        "%s.assign.%s.%d.npz" % (str(data.uuid()),
+                                                 self._get_codebook_digest(),
+                                                 q_factor))
+
+    def _get_codebook_digest(self):
+        """
+        Get a digest of the current codebook and FLANN distance metric, which
+        together determine codebook assignments, so that assignment
+        checkpoints of another model are not used.
+
+        :return: Hex digest string.
+        :rtype: str
+
+        """
+        if self._codebook_digest is None:
+            codebook = numpy.ascontiguousarray(self._codebook)
+            h = hashlib.sha1(repr((self._flann_distance_metric,
+                                   codebook.shape,
+                                   codebook.dtype.str)).encode('utf-8'))
+            h.update(codebook.tobytes())
+            self._codebook_digest = h.hexdigest()[:16]
+        return self._codebook_digest
+
+    def _get_assignments(self, data_batch, q_factor):
+        """
+        Get the descriptor positions and nearest codebook code indices for a
+        batch of data elements.
+
+        Assignments are loaded from each element's assignment checkpoint file
+        when present. Otherwise, low-level descriptors are extracted for each
+        element in parallel and then quantized against the codebook all
+        together, and the results saved as checkpoints.
+
+        :raises RuntimeError: Feature extraction failure of some kind.
+
+        :param data_batch: Data elements to get assignments for.
+        :type data_batch: list[smqtk.representation.DataElement]
+
+        :param q_factor: Number of nearest codes to assign per descriptor.
+        :type q_factor: int
+
+        :return: Lists of descriptor position matrices and code index
+            matrices, each in parallel association with the input data
+            elements.
+        :rtype: (list[numpy.ndarray], list[numpy.ndarray])
+
+        """
+        positions = [None] * len(data_batch)
+        idxs = [None] * len(data_batch)
+        to_compute = []
+        for i, data in enumerate(data_batch):
+            fp = self._get_checkpoint_assignment_file(data, q_factor)
+            if osp.isfile(fp):
+                with numpy.load(fp) as npz:
+                    positions[i] = npz['positions']
+                    idxs[i] = npz['idxs']
+            else:
+                to_compute.append(i)
+        if not to_compute:
+            return positions, idxs
+
+        self._log.debug("Computing descriptors for %d data elements...",
+                        len(to_compute))
+        # Each extraction shells out to colorDescriptor, so threads suffice.
+        #: :type: list[(numpy.ndarray, numpy.ndarray)]
+        matrices = list(parallel_map(
+            lambda i: self._generate_descriptor_matrices({data_batch[i]}),
+            to_compute,
+            cores=self.parallel, use_multiprocessing=False, ordered=True
+        ))
+
+        # Quantize descriptors of all elements in one query.
+        self._log.debug("Quantizing descriptors")
+        counts = [(d.shape[0] if d.size else 0) for _, d in matrices]
+        non_empty = [d for _, d in matrices if d.size]
+        if non_empty:
+            all_idxs = self._quantize(numpy.vstack(non_empty), q_factor)
+        else:
+            all_idxs = numpy.empty((0, q_factor), dtype=numpy.intp)
+        offsets = numpy.cumsum([0] + counts)
+
+        for j, (i, (info, _)) in enumerate(zip(to_compute, matrices)):
+            if counts[j]:
+                positions[i] = info[:, :2]
+            else:
+                positions[i] = numpy.empty((0, 2))
+            idxs[i] = all_idxs[offsets[j]:offsets[j+1]]
+            fp = self._get_checkpoint_assignment_file(data_batch[i], q_factor)
+            # Write then rename so that partially written files are never
+            # read as checkpoints.
+            tmp = fp + '.tmp.npz'
+            numpy.savez(tmp, positions=positions[i], idxs=idxs[i])
+            os.rename(tmp, fp)
+        return positions, idxs
+
+    def _compute_descriptors(self, data_batch):
+        """
+        Compute feature vectors for a batch of data elements.
+
+        Codebook assignments of each element's low-level descriptors are
+        gotten via ``_get_assignments``, so features may be cheaply re-built
+        from checkpointed assignments, and then histograms are built for the
+        whole batch together.
+
+        :raises RuntimeError: Feature extraction failure of some kind.
+
+        :param data_batch: Data elements to describe.
+        :type data_batch: list[smqtk.representation.DataElement]
+
+        :return: Feature vectors in parallel association with the input data
+            elements.
+        :rtype: list[numpy.ndarray]
+
+        """
+        if not self.has_model:
+            raise RuntimeError("No model currently loaded! Check the existence "
+                               "or, or generate, model files!\n"
+                               "Codebook path: %s\n"
+                               "FLANN Index path: %s"
+                               % (self.codebook_filepath,
+                                  self.flann_index_filepath))
+
+        # Quantization factor for spatial pyramids is the number of nearest
+        # codes to be saved.
+        q_factor = 10 if self._use_sp else 1
+        positions, idxs = self._get_assignments(data_batch, q_factor)
+        vectors = self._build_histograms(positions, idxs)
+
+        for data, h in zip(data_batch, vectors):
+            checkpoint_filepath = self._get_checkpoint_feature_file(data)
+            if not osp.isdir(osp.dirname(checkpoint_filepath)):
+                safe_create_dir(osp.dirname(checkpoint_filepath))
+            numpy.save(checkpoint_filepath, h)
+        return vectors
 
     def _generate_arrays(self, data_iter):
         """
@@ -654,12 +864,89 @@ class ColorDescriptor_Base (DescriptorGenerator):
             input data elements.
         :rtype: collections.Iterable[numpy.ndarray]
         """
-        return parallel_map(self._compute_one_descriptor, data_iter,
-                            cores=self.parallel, use_multiprocessing=True,
-                            ordered=True)
+        batch = []
+        for data in data_iter:
+            batch.append(data)
+            if len(batch) >= self.QUANTIZE_BATCH_SIZE:
+                for h in self._compute_descriptors(batch):
+                    yield h
+                batch = []
+        if batch:
+            for h in self._compute_descriptors(batch):
+                yield h
 
-    @staticmethod
-    def _build_sp_hist(feas, bins):
+    @classmethod
+    def _build_sp_hists(cls, positions, idxs, bins):
+        """
+        Build spatial pyramid histograms for a batch of elements from their
+        quantized descriptors.
+
+        Every (element, region, code) triple is mapped to a single flat bin
+        index, and all bins are counted together in one ``numpy.bincount``
+        pass. Each descriptor belongs to 3 regions: the whole image, one of
+        the 4 quadrants split at the middle of the element's maximum x and y
+        positions, and one of the 3 horizontal bands split at thirds of the
+        element's maximum y position.
+
+        NOTES:
+            - See encode_FLANN.py for original implementation this was adapted
+                from.
+
+        :param positions: Matrices of descriptor (x, y) positions, one per
+            element.
+        :type positions: list[numpy.ndarray]
+
+        :param idxs: Matrices of code indices of each element's descriptors,
+            one row per descriptor.
+        :type idxs: list[numpy.ndarray]
+
+        :param bins: number of bins for the spatial histograms. This should
+            probably be the size of the codebook used when generating quantized
+            descriptors.
+        :type bins: int
+
+        :return: Array of shape ``[elements, 8, bins]`` of the histograms of
+            the global, 4 quadrant and 3 band regions of each element, in that
+            order.
+        :rtype: numpy.ndarray
+
+        """
+        n_elem = len(positions)
+        n_bins = n_elem * cls.SP_REGIONS * bins
+        counts = numpy.array([len(i) for i in idxs], dtype=numpy.intp)
+        if not counts.sum():
+            return numpy.zeros((n_elem, cls.SP_REGIONS, bins),
+                               dtype=numpy.intp)
+        non_empty = numpy.flatnonzero(counts)
+        xy = numpy.concatenate([positions[i] for i in non_empty])
+        codes = numpy.concatenate([idxs[i] for i in non_empty])
+        cordx = xy[:, 0]
+        cordy = xy[:, 1]
+
+        # Per-descriptor maximum positions of their element.
+        starts = numpy.concatenate([[0], numpy.cumsum(counts[non_empty])[:-1]])
+        rep = counts[non_empty]
+        maxx = numpy.repeat(numpy.maximum.reduceat(cordx, starts), rep)
+        maxy = numpy.repeat(numpy.maximum.reduceat(cordy, starts), rep)
+
+        # 4 quadrants: regions 1-4
+        midx = numpy.ceil(maxx / 2)
+        midy = numpy.ceil(maxy / 2)
+        quad = 1 + (cordx >= midx) + 2 * (cordy >= midy)
+        # 3 layers: regions 5-7
+        ythird = numpy.ceil(maxy / 3)
+        layer = 5 + (cordy > ythird) + (cordy > 2 * ythird)
+
+        # Flat [element, region] index of each descriptor's 3 regions.
+        elem = numpy.repeat(non_empty, rep) * cls.SP_REGIONS
+        regions = numpy.stack([elem, elem + quad, elem + layer], axis=1)
+        flat = regions[:, :, numpy.newaxis] * bins + \
+            codes[:, numpy.newaxis, :]
+        return numpy.bincount(flat.ravel(), minlength=n_bins) \
+            .reshape(n_elem, cls.SP_REGIONS, bins)
+
+    @classmethod
+    def _build_sp_hist(cls, feas, bins):
         """
         Build spatial pyramid from quantized data. We expect feature matrix
         to be in the following format:
@@ -668,9 +955,7 @@ class ColorDescriptor_Base (DescriptorGenerator):
              [ ... ]
              ... ]
 
-        NOTES:
-            - See encode_FLANN.py for original implementation this was adapted
-                from.
+        See ``_build_sp_hists`` for details.
 
         :param feas: Feature matrix with the above format.
         :type feas: numpy.core.multiarray.ndarray
@@ -685,62 +970,8 @@ class ColorDescriptor_Base (DescriptorGenerator):
         :rtype: numpy.core.multiarray.ndarray
 
         """
-        bins = numpy.arange(0, bins+1)
-        cordx = feas[:, 0]
-        cordy = feas[:, 1]
-        feas = feas[:, 2:]
-
-        # hard quantization
-        # global histogram
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_g = numpy.histogram(feas, bins=bins)[0]
-        hist_sp_g = hist_sp_g[numpy.newaxis]
-        # 4 quadrants
-        # noinspection PyTypeChecker
-        midx = numpy.ceil(cordx.max()/2)
-        # noinspection PyTypeChecker
-        midy = numpy.ceil(cordy.max()/2)
-        lx = cordx < midx
-        rx = cordx >= midx
-        uy = cordy < midy
-        dy = cordy >= midy
-        # logging.error("LXUI: %s,%s", lx.__repr__(), uy.__repr__())
-        # logging.error("Length LXUI: %s,%s", lx.shape, uy.shape)
-        # logging.error("feas dimensions: %s", feas.shape)
-
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_q1 = numpy.histogram(feas[lx & uy], bins=bins)[0]
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_q2 = numpy.histogram(feas[rx & uy], bins=bins)[0]
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_q3 = numpy.histogram(feas[lx & dy], bins=bins)[0]
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_q4 = numpy.histogram(feas[rx & dy], bins=bins)[0]
-        hist_sp_q1 = hist_sp_q1[numpy.newaxis]
-        hist_sp_q2 = hist_sp_q2[numpy.newaxis]
-        hist_sp_q3 = hist_sp_q3[numpy.newaxis]
-        hist_sp_q4 = hist_sp_q4[numpy.newaxis]
-
-        # 3 layers
-        # noinspection PyTypeChecker
-        ythird = numpy.ceil(cordy.max()/3)
-        l1 = cordy <= ythird
-        l2 = (cordy > ythird) & (cordy <= 2*ythird)
-        l3 = cordy > 2*ythird
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_l1 = numpy.histogram(feas[l1], bins=bins)[0]
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_l2 = numpy.histogram(feas[l2], bins=bins)[0]
-        #: :type: numpy.core.multiarray.ndarray
-        hist_sp_l3 = numpy.histogram(feas[l3], bins=bins)[0]
-        hist_sp_l1 = hist_sp_l1[numpy.newaxis]
-        hist_sp_l2 = hist_sp_l2[numpy.newaxis]
-        hist_sp_l3 = hist_sp_l3[numpy.newaxis]
-        # concatenate
-        hist_sp = numpy.vstack((hist_sp_g, hist_sp_q1, hist_sp_q2,
-                                hist_sp_q3, hist_sp_q4, hist_sp_l1,
-                                hist_sp_l2, hist_sp_l3))
-        return hist_sp
+        return cls._build_sp_hists([feas[:, :2]],
+                                   [feas[:, 2:].astype(numpy.intp)], bins)[0]
 
     def _get_data_temp_path(self, de):
         """
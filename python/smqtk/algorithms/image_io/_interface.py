@@ -4,6 +4,48 @@ import numpy
 
 from smqtk.algorithms import SmqtkAlgorithm
 from smqtk.utils import ContentTypeValidator
+from smqtk.utils.image import crop_in_bounds
+
+
+def check_pixel_crop(pixel_crop):
+    """
+    Check that a pixel crop bounding box has a non-zero volume and integer
+    coordinates.
+
+    :param smqtk.representation.AxisAlignedBoundingBox pixel_crop:
+        Pixel crop bounding box to check.
+
+    :raises ValueError: The bounding box was zero volume or not fully
+        represented by integers.
+    """
+    if pixel_crop.hypervolume == 0:
+        raise ValueError("Volume of crop bounding box must be greater "
+                         "than 0. Given: {}".format(pixel_crop))
+    elif not issubclass(pixel_crop.dtype.type, numpy.integer):
+        raise ValueError("Crop bounding box must be composed of "
+                         "integer coordinates. Given bounding box "
+                         "with dtype {}.".format(pixel_crop.dtype.type))
+
+
+def crop_matrix(mat, pixel_crop):
+    """
+    Get the view of an image matrix within a pixel crop region.
+
+    :param numpy.ndarray mat: Image matrix in [height, width, ...] format.
+    :param smqtk.representation.AxisAlignedBoundingBox pixel_crop:
+        Pixel crop region within the image.
+
+    :raises RuntimeError: The crop region was not within the image.
+
+    :return: View of the cropped region of the matrix.
+    :rtype: numpy.ndarray
+    """
+    if not crop_in_bounds(pixel_crop, mat.shape[1], mat.shape[0]):
+        raise RuntimeError("Crop provided not within input image. "
+                           "Image shape: {}, crop: {}"
+                           .format(mat.shape[1::-1], pixel_crop))
+    (x0, y0), (x1, y1) = pixel_crop.min_vertex, pixel_crop.max_vertex
+    return mat[y0:y1, x0:x1, ...]
 
 
 class ImageReader (SmqtkAlgorithm, ContentTypeValidator):
@@ -107,13 +149,7 @@ class ImageReader (SmqtkAlgorithm, ContentTypeValidator):
 
         """
         if pixel_crop:
-            if pixel_crop.hypervolume == 0:
-                raise ValueError("Volume of crop bounding box must be greater "
-                                 "than 0. Given: {}".format(pixel_crop))
-            elif not issubclass(pixel_crop.dtype.type, numpy.integer):
-                raise ValueError("Crop bounding box must be composed of "
-                                 "integer coordinates. Given bounding box "
-                                 "with dtype {}.".format(pixel_crop.dtype.type))
+            check_pixel_crop(pixel_crop)
 
         try:
             # If the given data element looks like a MatrixDataElement, simply
@@ -125,6 +161,117 @@ class ImageReader (SmqtkAlgorithm, ContentTypeValidator):
             self.raise_valid_element(data_element)
             return self._load_as_matrix(data_element, pixel_crop=pixel_crop)
 
+    def get_image_size(self, data_element):
+        """
+        Get the pixel width and height of the image in the given data element.
+
+        Like ``load_as_matrix``, the size of the ``matrix`` property is used
+        when the given DataElement instance defines one.
+
+        :param smqtk.representation.DataElement data_element:
+            DataElement containing image data.
+
+        :raises ValueError: The given ``data_element`` was not of a valid
+            content type.
+
+        :return: Image width and height in pixels.
+        :rtype: (int, int)
+
+        """
+        try:
+            mat = self._get_matrix_property(data_element)
+        except AttributeError:
+            self.raise_valid_element(data_element)
+            return self._get_image_size(data_element)
+        return mat.shape[1], mat.shape[0]
+
+    def load_tiles(self, data_element, tiles):
+        """
+        Load the image matrices of multiple pixel regions of the given data
+        element.
+
+        Matrices are yielded as they are loaded, in the order of the given
+        tiles. Implementations that can read regions of an image without
+        loading the whole image (see ``_load_tiles``) then only need to hold
+        the pixels of one tile in memory at a time.
+
+        :param smqtk.representation.DataElement data_element:
+            DataElement to load image data from.
+        :param tiles: Pixel regions to load from the given data. Each must
+            represent a valid, integer aligned sub-region within the image.
+            See :func:`smqtk.utils.image.tile_grid` for generating a grid of
+            tiles over an image.
+        :type tiles:
+            collections.Iterable[smqtk.representation.AxisAlignedBoundingBox]
+
+        :raises RuntimeError: A tile did not specify a valid sub-region of the
+            image.
+        :raises ValueError: The given ``data_element`` was not of a valid
+            content type, or a tile was zero volume or not fully represented
+            by integers.
+
+        :return: Iterator of image matrices parallel to the given tiles.
+        :rtype: collections.Iterator[numpy.ndarray]
+
+        """
+        tiles = list(tiles)
+        for t in tiles:
+            check_pixel_crop(t)
+
+        try:
+            mat = self._get_matrix_property(data_element)
+        except AttributeError:
+            self.raise_valid_element(data_element)
+            return self._load_tiles(data_element, tiles)
+        return (crop_matrix(mat, t) for t in tiles)
+
+    def _get_image_size(self, data_element):
+        """
+        Internal method to get the pixel width and height of the image in the
+        given data element.
+
+        By default, this loads the whole image matrix. Implementations that
+        can read the image size without reading pixel data should override
+        this method.
+
+        :param smqtk.representation.DataElement data_element:
+            DataElement containing image data.
+
+        :return: Image width and height in pixels.
+        :rtype: (int, int)
+
+        """
+        mat = self._load_as_matrix(data_element)
+        return mat.shape[1], mat.shape[0]
+
+    def _load_tiles(self, data_element, tiles):
+        """
+        Internal method to load the image matrices of multiple pixel regions
+        of the given data element.
+
+        By default, this loads the whole image matrix once and yields views of
+        it for each tile. Implementations that can read regions of an image
+        directly should override this method.
+
+        Pre-conditions:
+            - Tiles have a non-zero volume and are composed of integer types.
+
+        :param smqtk.representation.DataElement data_element:
+            DataElement to load image data from.
+        :param list[smqtk.representation.AxisAlignedBoundingBox] tiles:
+            Pixel regions to load from the given data.
+
+        :raises RuntimeError: A tile did not specify a valid sub-region of the
+            image.
+
+        :return: Iterator of image matrices parallel to the given tiles.
+        :rtype: collections.Iterator[numpy.ndarray]
+
+        """
+        mat = self._load_as_matrix(data_element)
+        for t in tiles:
+            yield crop_matrix(mat, t)
+
     @abc.abstractmethod
     def _load_as_matrix(self, data_element, pixel_crop=None):
         """
@@ -1,14 +1,18 @@
 import collections
 from contextlib import contextmanager
 from distutils.version import LooseVersion
+import itertools
 import tempfile
+import threading
 import warnings
+import weakref
 
 import numpy as np
 import six
 from six.moves import range
 
 from smqtk.algorithms import ImageReader
+from smqtk.representation.data_element.file_element import DataFileElement
 from smqtk.utils.image import crop_in_bounds
 
 try:
@@ -187,6 +191,155 @@ def load_dataset_vsimem(data_element):
                                .format(tmp_vsimem_path, data_element))
 
 
+# Maximum number of virtual files kept for reuse by ``load_dataset_direct``.
+VSIMEM_POOL_SIZE = 8
+
+# Maximum size in bytes of content for which a virtual file is kept for reuse.
+# Virtual files that held more are unlinked, so that the pool does not retain
+# the memory of the largest elements loaded.
+VSIMEM_POOL_MAX_BYTES = 64 * 1024 * 1024
+
+# Paths of virtual files free for reuse.
+_VSIMEM_POOL = []
+_VSIMEM_POOL_LOCK = threading.Lock()
+_VSIMEM_PATH_COUNTER = itertools.count()
+
+# Weak references to datasets open on pooled virtual files, whose callbacks
+# release the virtual files once the datasets are gone.
+_VSIMEM_DATASET_REFS = set()
+
+
+def _acquire_vsimem_path():
+    """
+    :return: Path of a virtual file from the pool, or a new path if the pool
+        is empty.
+    :rtype: str
+    """
+    with _VSIMEM_POOL_LOCK:
+        if _VSIMEM_POOL:
+            return _VSIMEM_POOL.pop()
+        return '/vsimem/smqtk_pool_{}'.format(next(_VSIMEM_PATH_COUNTER))
+
+
+def _release_vsimem_path(path, nbytes):
+    """
+    Return a virtual file path to the pool, or unlink the virtual file if the
+    pool is full or the virtual file held too many bytes.
+
+    :param str path: Virtual file path to release.
+    :param int nbytes: Number of bytes written to the virtual file.
+    """
+    if nbytes <= VSIMEM_POOL_MAX_BYTES:
+        with _VSIMEM_POOL_LOCK:
+            if len(_VSIMEM_POOL) < VSIMEM_POOL_SIZE:
+                _VSIMEM_POOL.append(path)
+                return
+    gdal.Unlink(path)
+
+
+def _release_vsimem_path_on_close(gdal_ds, path, nbytes):
+    """
+    Release a virtual file path once the dataset opened on it is no longer
+    referenced, and so closed.
+
+    :param gdal.Dataset gdal_ds: Dataset opened on the virtual file.
+    :param str path: Virtual file path to release.
+    :param int nbytes: Number of bytes written to the virtual file.
+    """
+    def release(ref):
+        _VSIMEM_DATASET_REFS.discard(ref)
+        _release_vsimem_path(path, nbytes)
+    _VSIMEM_DATASET_REFS.add(weakref.ref(gdal_ds, release))
+
+
+def clear_vsimem_pool():
+    """
+    Unlink the virtual files kept for reuse by ``load_dataset_direct``,
+    freeing their memory.
+    """
+    with _VSIMEM_POOL_LOCK:
+        paths = list(_VSIMEM_POOL)
+        del _VSIMEM_POOL[:]
+    for p in paths:
+        gdal.Unlink(p)
+
+
+def _write_vsimem(path, b):
+    """
+    Write bytes to the virtual file at the given path, reusing the virtual
+    file's memory allocation if it already exists.
+
+    :param str path: Virtual file path.
+    :param bytes b: Bytes to write.
+
+    :raises RuntimeError: Failed to open or write to the virtual file.
+    """
+    # Opening an existing virtual file for update, rather than creating it
+    # anew, keeps its allocation when it is truncated to a shorter length.
+    fp = gdal.VSIFOpenL(path, 'r+b')
+    if fp is None:
+        fp = gdal.VSIFOpenL(path, 'wb')
+    if fp is None:
+        raise RuntimeError("Failed to open virtual file '{}'.".format(path))
+    try:
+        if gdal.VSIFWriteL(b, 1, len(b), fp) != len(b):
+            raise RuntimeError("Failed to write {} bytes to virtual file "
+                               "'{}'.".format(len(b), path))
+        gdal.VSIFTruncateL(fp, len(b))
+    finally:
+        gdal.VSIFCloseL(fp)
+
+
+@contextmanager
+def load_dataset_direct(data_element):
+    """
+    Load GDAL Dataset from element, avoiding intermediate copies of its bytes
+    where possible.
+
+    ``DataFileElement`` instances are opened directly by file path, so GDAL
+    reads only the parts of the file it needs. The bytes of other elements
+    are written into one of a pool of reused virtual files, avoiding disk
+    I/O and the re-allocation of virtual file memory for each element. With
+    GDAL versions before 2, other elements are loaded via a temporary file as
+    ``load_dataset_tempfile`` does.
+
+    Virtual files are returned to the pool once the datasets yielded are no
+    longer referenced, so references to them should not be kept after exiting
+    this context. Virtual files that held more than ``VSIMEM_POOL_MAX_BYTES``
+    are unlinked instead of pooled.
+
+    :param smqtk.representation.DataElement data_element:
+        Element to load dataset from.
+
+    :return: GDAL Dataset
+    :rtype: gdal.Dataset
+
+    """
+    if isinstance(data_element, DataFileElement):
+        # File elements return their own file path as their "temp" file
+        # when not given a temporary directory.
+        yield gdal.Open(data_element.write_temp())
+    elif LooseVersion(osgeo.__version__).version[0] < 2:
+        with load_dataset_tempfile(data_element) as gdal_ds:
+            yield gdal_ds
+    else:
+        vsimem_path = _acquire_vsimem_path()
+        try:
+            b = data_element.get_bytes()
+            nbytes = len(b)
+            _write_vsimem(vsimem_path, b)
+            del b
+            gdal_ds = gdal.Open(vsimem_path)
+        except Exception:
+            gdal.Unlink(vsimem_path)
+            raise
+        if gdal_ds is None:
+            _release_vsimem_path(vsimem_path, nbytes)
+        else:
+            _release_vsimem_path_on_close(gdal_ds, vsimem_path, nbytes)
+        yield gdal_ds
+
+
 ###############################################################################
 # Base GDAL reader classes
 
@@ -198,9 +351,11 @@ class GdalImageReader (ImageReader):
     [height, width] for single channel imagery.
     """
 
+    LOAD_METHOD_DIRECT = 'direct'
     LOAD_METHOD_TEMPFILE = 'tempfile'
     LOAD_METHOD_VSIMEM = 'vsimem'
     LOAD_METHOD_CONTEXTMANAGERS = {
+        LOAD_METHOD_DIRECT: load_dataset_direct,
         LOAD_METHOD_TEMPFILE: load_dataset_tempfile,
         LOAD_METHOD_VSIMEM: load_dataset_vsimem,
     }
@@ -232,7 +387,7 @@ class GdalImageReader (ImageReader):
             return False
         return True
 
-    def __init__(self, load_method=LOAD_METHOD_TEMPFILE, channel_order=None):
+    def __init__(self, load_method=LOAD_METHOD_DIRECT, channel_order=None):
         """
         Use GDAL to read raster image pixel data and returns an image matrix in
         the format native to the input data.
@@ -255,6 +410,15 @@ class GdalImageReader (ImageReader):
         Load methods
         ------------
 
+        ``direct`` (default)
+        ^^^^^^^^^^^^^^^^^^^^
+        Loader that opens ``DataFileElement`` instances directly by their file
+        path and writes the bytes of other elements into one of a pool of
+        reused in-memory virtual files (see :func:`load_dataset_direct`).
+        This avoids disk I/O for non-file elements and any copy of file
+        elements. With GDAL versions before 2, non-file elements are loaded
+        as with the ``tempfile`` method.
+
         ``tempfile``
         ^^^^^^^^^^^^
         Loader that writes the DataElement's bytes to a temporary file on
@@ -376,6 +540,81 @@ class GdalImageReader (ImageReader):
         """
         return get_gdal_driver_supported_mimetypes()
 
+    def _get_band_indices(self, gdal_ds):
+        """
+        Get the 1-based indices of the dataset's raster bands to read, in
+        order, according to the configured channel order.
+
+        :param gdal.Dataset gdal_ds: Dataset to read bands from.
+
+        :raises RuntimeError: The dataset did not provide the bands required
+            to satisfy the configured channel order.
+
+        :return: Band indices to read, or None if all bands are to be read in
+            their native order.
+        :rtype: None | list[int]
+
+        """
+        if self._channel_order is None:
+            return None
+        # Map raster bands from CI value to band index.
+        # - GDAL uses 1-based indexing.
+        band_ci_to_idx = {
+            gdal_ds.GetRasterBand(b_i).GetColorInterpretation(): b_i
+            for b_i in range(1, gdal_ds.RasterCount+1)
+        }
+        gci_diff = \
+            set(self._channel_order_gci).difference(band_ci_to_idx)
+        if gci_diff:
+            raise RuntimeError(
+                "Data element did not provide channels required to "
+                "satisfy requested channel order {}.  "
+                "Data had bands: {} (missing {})."
+                .format(map_gci_list_to_names(self._channel_order_gci),
+                        map_gci_list_to_names(band_ci_to_idx),
+                        map_gci_list_to_names(gci_diff)))
+        return [band_ci_to_idx[gci] for gci in self._channel_order_gci]
+
+    @staticmethod
+    def _read_window(gdal_ds, band_idxs, xywh):
+        """
+        Read a pixel window of a dataset into an image matrix.
+
+        :param gdal.Dataset gdal_ds: Dataset to read from.
+        :param None | list[int] band_idxs: Band indices to read, in order, or
+            None to read all bands.
+        :param list[int] xywh: Window upper-left x and y position, width and
+            height in pixels.
+
+        :return: Image matrix of the window in [height, width, channel]
+            format, or [height, width] if only one band is read.
+        :rtype: np.ndarray
+
+        """
+        if band_idxs is not None:
+            # Initialize a matrix to read band image data into
+            # TODO: Handle when there are no bands?
+            band_dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
+                gdal_ds.GetRasterBand(1).DataType
+            )
+            if len(band_idxs) > 1:
+                img_mat = np.ndarray([xywh[3], xywh[2], len(band_idxs)],
+                                     dtype=band_dtype)
+                for i, b_i in enumerate(band_idxs):
+                    #: :type: gdal.Band
+                    b = gdal_ds.GetRasterBand(b_i)
+                    b.ReadAsArray(*xywh, buf_obj=img_mat[:, :, i])
+            else:
+                img_mat = np.ndarray([xywh[3], xywh[2]], dtype=band_dtype)
+                b = gdal_ds.GetRasterBand(band_idxs[0])
+                b.ReadAsArray(*xywh, buf_obj=img_mat)
+        else:
+            img_mat = gdal_ds.ReadAsArray(*xywh)
+            if img_mat.ndim > 2:
+                # Transpose into [height, width, channel] format.
+                img_mat = img_mat.transpose(1, 2, 0)
+        return img_mat
+
     def _load_as_matrix(self, data_element, pixel_crop=None):
         """
         Internal method to be implemented that attempts loading an image
@@ -423,46 +662,69 @@ class GdalImageReader (ImageReader):
 
             # Select specific channels if they are present in this dataset, or
             # just get all of them
-            if self._channel_order is not None:
-                # Map raster bands from CI value to band index.
-                # - GDAL uses 1-based indexing.
-                band_ci_to_idx = {
-                    gdal_ds.GetRasterBand(b_i).GetColorInterpretation(): b_i
-                    for b_i in range(1, gdal_ds.RasterCount+1)
-                }
-                gci_diff = \
-                    set(self._channel_order_gci).difference(band_ci_to_idx)
-                if gci_diff:
-                    raise RuntimeError(
-                        "Data element did not provide channels required to "
-                        "satisfy requested channel order {}.  "
-                        "Data had bands: {} (missing {})."
-                        .format(map_gci_list_to_names(self._channel_order_gci),
-                                map_gci_list_to_names(band_ci_to_idx),
-                                map_gci_list_to_names(gci_diff)))
-                # Initialize a matrix to read band image data into
-                # TODO: Handle when there are no bands?
-                band_dtype = gdal_array.GDALTypeCodeToNumericTypeCode(
-                    gdal_ds.GetRasterBand(1).DataType
-                )
-                if len(self._channel_order_gci) > 1:
-                    img_mat = np.ndarray([xywh[3], xywh[2],
-                                          len(self._channel_order_gci)],
-                                         dtype=band_dtype)
-                    for i, gci in enumerate(self._channel_order_gci):
-                        #: :type: gdal.Band
-                        b = gdal_ds.GetRasterBand(band_ci_to_idx[gci])
-                        b.ReadAsArray(*xywh, buf_obj=img_mat[:, :, i])
-                else:
-                    img_mat = np.ndarray([xywh[3], xywh[2]],
-                                         dtype=band_dtype)
-                    gci = self._channel_order_gci[0]
-                    b = gdal_ds.GetRasterBand(band_ci_to_idx[gci])
-                    b.ReadAsArray(*xywh, buf_obj=img_mat)
-            else:
-                img_mat = gdal_ds.ReadAsArray(*xywh)
-                if img_mat.ndim > 2:
-                    # Transpose into [height, width, channel] format.
-                    img_mat = img_mat.transpose(1, 2, 0)
+            img_mat = self._read_window(gdal_ds,
+                                        self._get_band_indices(gdal_ds), xywh)
 
         return img_mat
+
+    def _get_image_size(self, data_element):
+        """
+        Internal method to get the pixel width and height of the image in the
+        given data element.
+
+        This implementation reads the raster size of the GDAL dataset without
+        reading any pixel data.
+
+        :param smqtk.representation.DataElement data_element:
+            DataElement containing image data.
+
+        :return: Image width and height in pixels.
+        :rtype: (int, int)
+
+        """
+        if data_element.is_empty():
+            raise ValueError("{} cannot load 0-sized data (no bytes in {})."
+                             .format(self.name, data_element))
+        load_cm = self.LOAD_METHOD_CONTEXTMANAGERS[self._load_method]
+        with load_cm(data_element) as gdal_ds:  # type: gdal.Dataset
+            return gdal_ds.RasterXSize, gdal_ds.RasterYSize
+
+    def _load_tiles(self, data_element, tiles):
+        """
+        Internal method to load the image matrices of multiple pixel regions
+        of the given data element.
+
+        This implementation opens the GDAL dataset once and reads each tile's
+        window directly from it, so only the pixels of the tile currently
+        being read are loaded into memory.
+
+        Pre-conditions:
+            - Tiles have a non-zero volume and are composed of integer types.
+
+        :param smqtk.representation.DataElement data_element:
+            DataElement to load image data from.
+        :param list[smqtk.representation.AxisAlignedBoundingBox] tiles:
+            Pixel regions to load from the given data.
+
+        :raises RuntimeError: A tile did not specify a valid sub-region of the
+            image.
+
+        :return: Iterator of image matrices parallel to the given tiles.
+        :rtype: collections.Iterator[np.ndarray]
+
+        """
+        if data_element.is_empty():
+            raise ValueError("{} cannot load 0-sized data (no bytes in {})."
+                             .format(self.name, data_element))
+        load_cm = self.LOAD_METHOD_CONTEXTMANAGERS[self._load_method]
+        with load_cm(data_element) as gdal_ds:  # type: gdal.Dataset
+            img_width = gdal_ds.RasterXSize
+            img_height = gdal_ds.RasterYSize
+            band_idxs = self._get_band_indices(gdal_ds)
+            for t in tiles:
+                if not crop_in_bounds(t, img_width, img_height):
+                    raise RuntimeError("Tile provided not within input image. "
+                                       "Image shape: {}, tile: {}"
+                                       .format((img_width, img_height), t))
+                xywh = t.min_vertex.tolist() + t.deltas.tolist()
+                yield self._read_window(gdal_ds, band_idxs, xywh)
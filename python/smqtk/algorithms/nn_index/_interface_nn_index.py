@@ -116,6 +116,69 @@ class NearestNeighborsIndex (SmqtkAlgorithm):
             raise ValueError("No index currently set to query from!")
         return self._nn(d, n)
 
+    def nn_many(self, descriptors, n=1):
+        """
+        Return the nearest `N` neighbors to each of the given descriptor
+        elements.
+
+        :raises ValueError: One or more input query descriptors have no vector
+            set.
+        :raises ValueError: Current index is empty.
+
+        :param descriptors: Descriptor elements to compute the neighbors of.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        :param n: Number of nearest neighbors to find for each descriptor.
+        :type n: int
+
+        :return: List, parallel to the input descriptors, of tuples of nearest
+            N DescriptorElement instances and a tuple of the distance values
+            to those neighbors.
+        :rtype: list[(tuple[smqtk.representation.DescriptorElement],
+                      tuple[float])]
+
+        """
+        descriptors = list(descriptors)
+        for d in descriptors:
+            if not d.has_vector():
+                raise ValueError("Query descriptor did not have a vector set! "
+                                 "(UID=%s)" % (d.uuid(),))
+        if not descriptors:
+            return []
+        elif not self.count():
+            raise ValueError("No index currently set to query from!")
+        return list(self._nn_many(descriptors, n))
+
+    def _nn_many(self, descriptors, n=1):
+        """
+        Internal method to return the nearest `N` neighbors to each of the
+        given descriptor elements.
+
+        This default implementation calls ``_nn`` for each descriptor.
+        Implementations that can query many vectors at once should override
+        this method.
+
+        When this internal method is called, we have already checked that
+        there is a vector in each descriptor and our index is not empty.
+
+        :param descriptors: Descriptor elements to compute the neighbors of.
+        :type descriptors:
+            list[smqtk.representation.DescriptorElement]
+
+        :param n: Number of nearest neighbors to find for each descriptor.
+        :type n: int
+
+        :return: Iterable, parallel to the input descriptors, of tuples of
+            nearest N DescriptorElement instances and a tuple of the distance
+            values to those neighbors.
+        :rtype: collections.Iterable[
+            (tuple[smqtk.representation.DescriptorElement], tuple[float])]
+
+        """
+        for d in descriptors:
+            yield self._nn(d, n)
+
     @abc.abstractmethod
     def count(self):
         """
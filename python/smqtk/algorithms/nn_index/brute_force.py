@@ -0,0 +1,671 @@
+from __future__ import division
+
+from itertools import groupby
+import os
+from os import path as osp
+import threading
+
+import numpy as np
+from six.moves import cPickle as pickle, range, zip
+
+from smqtk.algorithms.nn_index import NearestNeighborsIndex
+from smqtk.exceptions import ReadOnlyError
+from smqtk.representation import DescriptorSet
+from smqtk.representation.descriptor_element import DescriptorElement
+from smqtk.utils.configuration import (
+    from_config_dict,
+    make_default_config,
+    to_config_dict
+)
+from smqtk.utils.dict import merge_dict
+from smqtk.utils.file import safe_create_dir
+from smqtk.utils.parallel import parallel_map
+
+
+CHUNK_SIZE = 5000
+
+# Storage type of indexed vectors.
+VECTOR_DTYPE = np.float32
+
+
+def _merge_top_k(rows, dists, k):
+    """
+    Select the ``k`` smallest distances of each query.
+
+    :param rows: (M, C) candidate rows of each query.
+    :type rows: np.ndarray
+
+    :param dists: (M, C) distances of the candidate rows.
+    :type dists: np.ndarray
+
+    :param k: Number of rows to select per query.
+    :type k: int
+
+    :return: (M, min(k, C)) rows and distances of each query, in order of
+        increasing distance.
+    :rtype: (np.ndarray, np.ndarray)
+    """
+    q_idx = np.arange(dists.shape[0])[:, None]
+    if k < dists.shape[1]:
+        part = np.argpartition(dists, k - 1, axis=1)[:, :k]
+        rows, dists = rows[q_idx, part], dists[q_idx, part]
+    order = np.argsort(dists, axis=1, kind='mergesort')
+    return rows[q_idx, order], dists[q_idx, order]
+
+
+class BruteForceNearestNeighborsIndex (NearestNeighborsIndex):
+    """
+    Exact nearest-neighbors index that computes the distance of queries to
+    every indexed vector.
+
+    Indexed vectors are kept in one contiguous float32 matrix, optionally
+    memory-mapped from file. Queries are compared to blocks of matrix rows
+    in parallel threads, with euclidean and cosine distances computed via
+    matrix products (``||a||^2 - 2ab + ||b||^2`` and ``ab / ||a||||b||``)
+    against pre-computed row norms. The nearest rows of each block are
+    selected with ``argpartition`` and merged.
+
+    Distances are those of the ``LSHNearestNeighborIndex`` distance methods of
+    the same names.
+    """
+
+    DISTANCE_METHODS = ('euclidean', 'cosine', 'hik')
+
+    @classmethod
+    def is_usable(cls):
+        return True
+
+    @classmethod
+    def get_default_config(cls):
+        """
+        Generate and return a default configuration dictionary for this class.
+        This will be primarily used for generating what the configuration
+        dictionary would look like for this class without instantiating it.
+
+        By default, we observe what this class's constructor takes as
+        arguments, turning those argument names into configuration dictionary
+        keys. If any of those arguments have defaults, we will add those
+        values into the configuration dictionary appropriately. The dictionary
+        returned should only contain JSON compliant value types.
+
+        It is not be guaranteed that the configuration dictionary returned
+        from this method is valid for construction of an instance of this
+        class.
+
+        :return: Default configuration dictionary for the class.
+        :rtype: dict
+
+        """
+        default = super(BruteForceNearestNeighborsIndex,
+                        cls).get_default_config()
+        default['descriptor_set'] = \
+            make_default_config(DescriptorSet.get_impls())
+        return default
+
+    @classmethod
+    def from_config(cls, config_dict, merge_default=True):
+        """
+        Instantiate a new instance of this class given the configuration
+        JSON-compliant dictionary encapsulating initialization arguments.
+
+        This method should not be called via super unless and instance of the
+        class is desired.
+
+        :param config_dict: JSON compliant dictionary encapsulating
+            a configuration.
+        :type config_dict: dict
+
+        :param merge_default: Merge the given configuration on top of the
+            default provided by ``get_default_config``.
+        :type merge_default: bool
+
+        :return: Constructed instance from the provided config.
+        :rtype: BruteForceNearestNeighborsIndex
+
+        """
+        if merge_default:
+            cfg = cls.get_default_config()
+            merge_dict(cfg, config_dict)
+        else:
+            cfg = config_dict
+
+        cfg['descriptor_set'] = \
+            from_config_dict(cfg['descriptor_set'],
+                             DescriptorSet.get_impls())
+
+        return super(BruteForceNearestNeighborsIndex, cls).from_config(
+            cfg, False
+        )
+
+    def __init__(self, descriptor_set, index_filepath=None,
+                 vectors_filepath=None, distance_method='euclidean',
+                 block_size=16384, cores=None, read_only=False,
+                 pickle_protocol=pickle.HIGHEST_PROTOCOL):
+        """
+        Initialize the index. Does not contain a queryable index until one is
+        built via the ``build_index`` method, or loaded from existing model
+        files.
+
+        :param descriptor_set: Index in which DescriptorElements will be
+            stored.
+        :type descriptor_set: smqtk.representation.DescriptorSet
+
+        :param index_filepath: Optional file location to load/store the UIDs
+            and norms of the indexed vectors when initialized and/or built.
+
+            If not configured, no model files are written to or loaded from
+            disk.
+        :type index_filepath: None | str
+
+        :param vectors_filepath: Optional file location to store the matrix
+            of indexed vectors at when built, which is memory-mapped when
+            loaded. If not configured, the vector matrix is kept in memory and,
+            when loading an existing index, gathered from the descriptor set.
+        :type vectors_filepath: None | str
+
+        :param distance_method: Distance method, one of "euclidean", "cosine"
+            or "hik".
+        :type distance_method: str
+
+        :param block_size: Number of matrix rows to compare queries against at
+            a time.
+        :type block_size: int
+
+        :param cores: Number of threads comparing blocks of rows in parallel.
+            All available cores are used if None.
+        :type cores: None | int
+
+        :param read_only: If True, modifying the index raises a
+            ``ReadOnlyError``.
+        :type read_only: bool
+
+        :param pickle_protocol: The protocol version to be used by the pickle
+            module to serialize the index file.
+        :type pickle_protocol: int
+
+        :raises ValueError: Invalid distance method or block size.
+
+        """
+        super(BruteForceNearestNeighborsIndex, self).__init__()
+
+        self._descriptor_set = descriptor_set
+
+        def normpath(p):
+            return (p and osp.abspath(osp.expanduser(p))) or p
+
+        self._index_filepath = normpath(index_filepath)
+        self._vectors_filepath = normpath(vectors_filepath)
+
+        if distance_method not in self.DISTANCE_METHODS:
+            raise ValueError("Invalid distance method '%s'. Options: %s"
+                             % (distance_method, self.DISTANCE_METHODS))
+        self._distance_method = distance_method
+        if block_size < 1:
+            raise ValueError("The block size must be positive.")
+        self._block_size = block_size
+        self._cores = cores
+        self._read_only = read_only
+        self._pickle_protocol = pickle_protocol
+
+        # Lock for model component access.
+        self._model_lock = threading.RLock()
+
+        # Model components, set when built or loaded.
+        #: :type: list[collections.Hashable]
+        self._uuids = []  # Descriptor UID of each vector row
+        #: :type: dict[collections.Hashable, int]
+        self._uid2row = {}
+        #: :type: None | np.ndarray
+        self._vectors = None  # (N, d) indexed vectors
+        #: :type: None | np.ndarray
+        self._sq_norms = None  # (N,) squared L2 norms of indexed vectors
+        # In-memory matrix and norms over-allocated by updates, whose first
+        # N rows are the indexed vectors and norms, so that appending is
+        # amortized constant time.
+        #: :type: None | (np.ndarray, np.ndarray)
+        self._buffers = None
+
+        if self._index_filepath and osp.isfile(self._index_filepath):
+            self._log.debug("Found existing model files. Loading.")
+            self._load_model()
+
+    def get_config(self):
+        return {
+            "descriptor_set": to_config_dict(self._descriptor_set),
+            "index_filepath": self._index_filepath,
+            "vectors_filepath": self._vectors_filepath,
+            "distance_method": self._distance_method,
+            "block_size": self._block_size,
+            "cores": self._cores,
+            "read_only": self._read_only,
+            "pickle_protocol": self._pickle_protocol,
+        }
+
+    def _load_model(self):
+        self._log.debug("Loading index: %s", self._index_filepath)
+        # noinspection PyTypeChecker
+        with open(self._index_filepath, "rb") as f:
+            index = pickle.load(f)
+        if self._vectors_filepath and osp.isfile(self._vectors_filepath):
+            self._log.debug("Memory-mapping vectors: %s",
+                            self._vectors_filepath)
+            vectors = np.load(self._vectors_filepath, mmap_mode='r')
+        elif index['uuids']:
+            self._log.debug("Gathering vectors from descriptor set")
+            vectors = np.vstack(DescriptorElement.get_many_vectors(
+                list(self._descriptor_set.get_many_descriptors(
+                    index['uuids']
+                ))
+            )).astype(VECTOR_DTYPE)
+        else:
+            vectors = None
+        self._set_model(index['uuids'], vectors, index['sq_norms'])
+
+    def _save_model(self):
+        if self._index_filepath:
+            self._log.debug("Caching index: %s", self._index_filepath)
+            safe_create_dir(osp.dirname(self._index_filepath))
+            index = {
+                "uuids": self._uuids,
+                "sq_norms": self._sq_norms,
+            }
+            # noinspection PyTypeChecker
+            with open(self._index_filepath, "wb") as f:
+                pickle.dump(index, f, self._pickle_protocol)
+
+    def _set_model(self, uuids, vectors, sq_norms=None):
+        """
+        Set the indexed vectors and their descriptor UIDs, computing the
+        squared norms of the vectors if not given.
+        """
+        if vectors is not None and sq_norms is None:
+            sq_norms = np.empty(len(vectors), VECTOR_DTYPE)
+            for beg in range(0, len(vectors), CHUNK_SIZE):
+                v = np.asarray(vectors[beg:beg + CHUNK_SIZE])
+                sq_norms[beg:beg + CHUNK_SIZE] = np.einsum('ij,ij->i', v, v)
+        with self._model_lock:
+            self._uuids = uuids
+            self._uid2row = dict((uid, i) for i, uid in enumerate(uuids))
+            self._vectors = vectors
+            self._sq_norms = sq_norms
+            self._buffers = None
+
+    def _write_vectors(self, n, d, fill):
+        """
+        Create a new vector matrix, filled by the given function.
+
+        When a vectors file is configured, the matrix is written to a
+        temporary file that replaces the configured file when complete, so
+        any currently memory-mapped vectors remain valid until then.
+
+        :param n: Number of rows.
+        :type n: int
+
+        :param d: Vector dimension.
+        :type d: int
+
+        :param fill: Function filling the given (n, d) matrix.
+        :type fill: (np.ndarray) -> None
+
+        :return: New matrix, memory-mapped if a vectors file is configured.
+        :rtype: np.ndarray
+        """
+        if not self._vectors_filepath:
+            vectors = np.empty((n, d), VECTOR_DTYPE)
+            fill(vectors)
+            return vectors
+        safe_create_dir(osp.dirname(self._vectors_filepath))
+        tmp_fp = self._vectors_filepath + '.tmp.npy'
+        vectors = np.lib.format.open_memmap(tmp_fp, mode='w+',
+                                            dtype=VECTOR_DTYPE, shape=(n, d))
+        fill(vectors)
+        vectors.flush()
+        del vectors
+        os.rename(tmp_fp, self._vectors_filepath)
+        return np.load(self._vectors_filepath, mmap_mode='r')
+
+    def count(self):
+        """
+        :return: Number of elements in this index.
+        :rtype: int
+        """
+        with self._model_lock:
+            return len(self._uuids)
+
+    def _check_writable(self):
+        if self._read_only:
+            raise ReadOnlyError("Cannot modify container attributes due to "
+                                "being in read-only mode.")
+
+    def _build_index(self, descriptors):
+        """
+        Internal method to be implemented by sub-classes to build the index
+        with the given descriptor data elements.
+
+        Subsequent calls to this method should rebuild the current index.  This
+        method shall not add to the existing index nor raise an exception to as
+        to protect the current index.
+
+        :param descriptors: Iterable of descriptor elements to build index
+            over.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        """
+        with self._model_lock:
+            self._check_writable()
+            self._log.info("Building new brute-force index")
+            self._descriptor_set.clear()
+            self._descriptor_set.add_many_descriptors(descriptors)
+
+            n = self._descriptor_set.count()
+            d = next(self._descriptor_set.iterdescriptors()).vector().size
+            uuids = []
+
+            def fill(vectors):
+                # Gather vectors in chunks of descriptors from the set.
+                for k, g in groupby(
+                        enumerate(self._descriptor_set.iterdescriptors()),
+                        lambda pair: pair[0] // CHUNK_SIZE):
+                    chunk = [desc for _, desc in g]
+                    uuids.extend(desc.uuid() for desc in chunk)
+                    vectors[k * CHUNK_SIZE:k * CHUNK_SIZE + len(chunk)] = \
+                        DescriptorElement.get_many_vectors(chunk)
+
+            self._set_model(uuids, self._write_vectors(n, d, fill))
+            self._save_model()
+
+    def _update_index(self, descriptors):
+        """
+        Internal method to be implemented by sub-classes to additively update
+        the current index with the one or more descriptor elements given.
+
+        If no index exists yet, a new one should be created using the given
+        descriptors.
+
+        New descriptors are appended to the vector matrix, replacing the rows
+        of any indexed descriptors with the same UIDs. Only the squared norms
+        of the given descriptors' vectors are computed. When no rows are
+        replaced and no vectors file is configured, the new rows are written
+        to spare rows of the matrix, so that appending is amortized constant
+        time per descriptor. Otherwise the matrix is copied, so that searches
+        in progress are not affected.
+
+        :param descriptors: Iterable of descriptor elements to add to this
+            index.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        """
+        with self._model_lock:
+            self._check_writable()
+            if self._vectors is None:
+                self.build_index(descriptors)
+                return
+            # Later duplicates of a UID replace earlier ones.
+            new = dict((d.uuid(), d) for d in descriptors)
+            if not new:
+                return
+            new_uuids = list(new)
+            new_vectors = np.vstack(DescriptorElement.get_many_vectors(
+                [new[uid] for uid in new_uuids]
+            )).astype(VECTOR_DTYPE)
+            new_sq_norms = np.einsum('ij,ij->i', new_vectors, new_vectors)
+            self._descriptor_set.add_many_descriptors(new.values())
+
+            is_new = np.array([uid not in self._uid2row for uid in new_uuids])
+            appended_uuids = [uid for uid, a in zip(new_uuids, is_new) if a]
+            replaced_rows = [self._uid2row[uid]
+                             for uid, a in zip(new_uuids, is_new) if not a]
+            old_vectors = self._vectors
+            n_old, d = old_vectors.shape
+            n = n_old + len(appended_uuids)
+            self._log.debug("Appending %d and replacing %d vectors",
+                            len(appended_uuids), len(replaced_rows))
+
+            if not replaced_rows and not self._vectors_filepath:
+                # Rows past the current N are not seen by searches in
+                # progress, so they are written in place.
+                if self._buffers is None or n > len(self._buffers[0]):
+                    cap = max(n, 2 * n_old)
+                    vector_buf = np.empty((cap, d), VECTOR_DTYPE)
+                    vector_buf[:n_old] = old_vectors
+                    sq_norm_buf = np.empty(cap, VECTOR_DTYPE)
+                    sq_norm_buf[:n_old] = self._sq_norms
+                    self._buffers = (vector_buf, sq_norm_buf)
+                vector_buf, sq_norm_buf = self._buffers
+                vector_buf[n_old:n] = new_vectors
+                sq_norm_buf[n_old:n] = new_sq_norms
+                vectors, sq_norms = vector_buf[:n], sq_norm_buf[:n]
+            else:
+                sq_norms = np.empty(n, VECTOR_DTYPE)
+                sq_norms[:n_old] = self._sq_norms
+                sq_norms[replaced_rows] = new_sq_norms[~is_new]
+                sq_norms[n_old:] = new_sq_norms[is_new]
+
+                def fill(vectors_):
+                    for beg in range(0, n_old, CHUNK_SIZE):
+                        end = min(beg + CHUNK_SIZE, n_old)
+                        vectors_[beg:end] = old_vectors[beg:end]
+                    vectors_[replaced_rows] = new_vectors[~is_new]
+                    vectors_[n_old:] = new_vectors[is_new]
+
+                vectors = self._write_vectors(n, d, fill)
+                self._buffers = None
+
+            # Rows of indexed UIDs are unchanged, so UIDs are appended in
+            # place, as searches in progress only look up their own rows.
+            for row, uid in enumerate(appended_uuids, n_old):
+                self._uid2row[uid] = row
+            self._uuids.extend(appended_uuids)
+            self._vectors = vectors
+            self._sq_norms = sq_norms
+            self._save_model()
+
+    def _remove_from_index(self, uids):
+        """
+        Internal method to be implemented by sub-classes to partially remove
+        descriptors from this index associated with the given UIDs.
+
+        :param uids: Iterable of UIDs of descriptors to remove from this index.
+        :type uids: collections.Iterable[collections.Hashable]
+
+        :raises KeyError: One or more UIDs provided do not match any stored
+            descriptors.
+
+        """
+        with self._model_lock:
+            self._check_writable()
+            uids = set(uids)
+            for uid in uids:
+                if uid not in self._uid2row:
+                    raise KeyError(uid)
+            self._descriptor_set.remove_many_descriptors(uids)
+
+            keep = np.ones(len(self._uuids), bool)
+            keep[[self._uid2row[uid] for uid in uids]] = False
+            uuids = [uid for uid, k in zip(self._uuids, keep) if k]
+            if not uuids:
+                self._set_model([], None)
+                if self._vectors_filepath and \
+                        osp.isfile(self._vectors_filepath):
+                    os.remove(self._vectors_filepath)
+                self._save_model()
+                return
+            old_vectors = self._vectors
+
+            def fill(vectors):
+                offset = 0
+                for beg in range(0, len(keep), CHUNK_SIZE):
+                    rows = np.asarray(old_vectors[beg:beg + CHUNK_SIZE])
+                    rows = rows[keep[beg:beg + CHUNK_SIZE]]
+                    vectors[offset:offset + len(rows)] = rows
+                    offset += len(rows)
+
+            vectors = self._write_vectors(len(uuids), old_vectors.shape[1],
+                                          fill)
+            self._set_model(uuids, vectors)
+            self._save_model()
+
+    def _block_distances(self, q, q_sq_norms, vectors, sq_norms):
+        """
+        Compute the distances between queries and a block of indexed vectors,
+        or values that order the same for euclidean and cosine distances.
+
+        :param q: (M, d) query vectors.
+        :type q: np.ndarray
+
+        :param q_sq_norms: (M,) squared norms of the query vectors.
+        :type q_sq_norms: np.ndarray
+
+        :param vectors: (B, d) block of indexed vectors.
+        :type vectors: np.ndarray
+
+        :param sq_norms: (B,) squared norms of the block's vectors.
+        :type sq_norms: np.ndarray
+
+        :return: (M, B) distances.
+        :rtype: np.ndarray
+        """
+        if self._distance_method == 'euclidean':
+            # Squared distances.
+            d = q.dot(vectors.T)
+            d *= -2
+            d += q_sq_norms[:, None]
+            d += sq_norms[None, :]
+            return d
+        elif self._distance_method == 'cosine':
+            # Negative cosine similarities. Zero vectors are treated as
+            # orthogonal to everything.
+            norms = np.sqrt(sq_norms)
+            norms[norms == 0] = 1
+            q_norms = np.sqrt(q_sq_norms)
+            q_norms[q_norms == 0] = 1
+            d = q.dot(vectors.T)
+            d /= q_norms[:, None]
+            d /= norms[None, :]
+            return -d
+        else:
+            d = np.empty((len(q), len(vectors)), VECTOR_DTYPE)
+            for i, q_vec in enumerate(q):
+                d[i] = np.minimum(vectors, q_vec).sum(axis=1)
+            return 1. - d
+
+    def _finish_distances(self, d):
+        """
+        Convert values from ``_block_distances`` to distances.
+        """
+        d = d.astype(np.float64)
+        if self._distance_method == 'euclidean':
+            return np.sqrt(np.maximum(d, 0))
+        elif self._distance_method == 'cosine':
+            # As ``smqtk.utils.metrics.cosine_distance`` for positive vectors.
+            return 2 * np.arccos(np.clip(-d, -1, 1)) / np.pi
+        return d
+
+    def _search(self, q, n, vectors, sq_norms):
+        """
+        Find the nearest indexed rows to each query.
+
+        :param q: (M, d) query vectors.
+        :type q: np.ndarray
+
+        :param n: Number of nearest neighbors to find.
+        :type n: int
+
+        :param vectors: (N, d) indexed vectors.
+        :type vectors: np.ndarray
+
+        :param sq_norms: (N,) squared norms of the indexed vectors.
+        :type sq_norms: np.ndarray
+
+        :return: (M, k) nearest rows of each query and their distances, in
+            order of increasing distance, where k is the lesser of ``n`` and
+            the index size.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        q = np.asarray(q, VECTOR_DTYPE)
+        q_sq_norms = np.einsum('ij,ij->i', q, q)
+        bs = self._block_size
+
+        def block_top_k(beg):
+            block = np.asarray(vectors[beg:beg + bs])
+            d = self._block_distances(q, q_sq_norms, block,
+                                      sq_norms[beg:beg + bs])
+            rows = np.arange(beg, beg + len(block))[None, :] \
+                .repeat(len(q), 0)
+            return _merge_top_k(rows, d, n)
+
+        starts = range(0, len(vectors), bs)
+        if len(starts) == 1:
+            results = [block_top_k(0)]
+        else:
+            results = list(parallel_map(
+                block_top_k, starts, cores=self._cores,
+                use_multiprocessing=False, ordered=True,
+                name='brute_force_nn',
+            ))
+        rows, d = _merge_top_k(np.hstack([r for r, _ in results]),
+                               np.hstack([d for _, d in results]), n)
+        return rows, self._finish_distances(d)
+
+    def _nn(self, d, n=1):
+        """
+        Internal method to be implemented by sub-classes to return the nearest
+        `N` neighbors to the given descriptor element.
+
+        When this internal method is called, we have already checked that there
+        is a vector in ``d`` and our index is not empty.
+
+        :param d: Descriptor element to compute the neighbors of.
+        :type d: smqtk.representation.DescriptorElement
+
+        :param n: Number of nearest neighbors to find.
+        :type n: int
+
+        :return: Tuple of nearest N DescriptorElement instances, and a tuple of
+            the distance values to those neighbors.
+        :rtype: (tuple[smqtk.representation.DescriptorElement], tuple[float])
+
+        """
+        return next(iter(self._nn_many([d], n)))
+
+    def _nn_many(self, descriptors, n=1):
+        """
+        Internal method to return the nearest `N` neighbors to each of the
+        given descriptor elements.
+
+        All queries are compared to each block of rows together. Neighbor
+        descriptors of all queries are retrieved from the descriptor set
+        together.
+
+        :param descriptors: Descriptor elements to compute the neighbors of.
+        :type descriptors:
+            list[smqtk.representation.DescriptorElement]
+
+        :param n: Number of nearest neighbors to find for each descriptor.
+        :type n: int
+
+        :return: Iterable, parallel to the input descriptors, of tuples of
+            nearest N DescriptorElement instances and a tuple of the distance
+            values to those neighbors.
+        :rtype: collections.Iterable[
+            (tuple[smqtk.representation.DescriptorElement], tuple[float])]
+
+        """
+        q = np.vstack(DescriptorElement.get_many_vectors(descriptors))
+        # Model components are replaced by updates, or only appended to past
+        # the rows they had.
+        with self._model_lock:
+            uuids, vectors, sq_norms = \
+                self._uuids, self._vectors, self._sq_norms
+        rows, dists = self._search(q, n, vectors, sq_norms)
+        r_uuids = [uuids[r] for r in rows.ravel()]
+        neighbors = list(self._descriptor_set.get_many_descriptors(r_uuids))
+        k = rows.shape[1]
+        for i, q_dists in enumerate(dists):
+            yield (tuple(neighbors[i * k:(i + 1) * k]),
+                   tuple(q_dists.tolist()))
+
+
+NN_INDEX_CLASS = BruteForceNearestNeighborsIndex
@@ -2,15 +2,18 @@ from __future__ import absolute_import, division, print_function
 
 import collections
 from copy import deepcopy
+import itertools
 import json
 import multiprocessing
+from multiprocessing.pool import ThreadPool
 import numpy as np
 import os
+import re
 import six
 import tempfile
 import warnings
 
-from six.moves import zip, filter
+from six.moves import zip, cPickle as pickle
 
 from smqtk.algorithms.nn_index import NearestNeighborsIndex
 from smqtk.exceptions import ReadOnlyError
@@ -20,6 +23,8 @@ from smqtk.representation import (
     KeyValueStore,
 )
 from smqtk.representation.descriptor_element import DescriptorElement
+from smqtk.representation.descriptor_element.lazy_element import \
+    LazyDescriptorElement
 from smqtk.utils import metrics
 from smqtk.utils.configuration import \
     make_default_config, from_config_dict, to_config_dict
@@ -37,10 +42,67 @@ except ImportError as ex:
 # TODO: Add metric constructor option, append to ``faiss.METRIC_{}`` for
 #       library constant.
 # TODO: Add flag for optional memory mapping of index file.
-# TODO: Options to "train" with up to configured N descriptors instead of
-#       everything (maybe too many input).
-# TODO: Add parameter for updating index in batches for when loading all
-#       descriptors as a matrix into memory is too much.
+
+
+def _iter_chunks(iterable, chunk_size):
+    """
+    :return: Iterator of lists of at most ``chunk_size`` consecutive items of
+        the given iterable.
+    :rtype: collections.Iterator[list]
+    """
+    it = iter(iterable)
+    chunk = list(itertools.islice(it, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(itertools.islice(it, chunk_size))
+
+
+def _single_type(types):
+    """
+    :param types: Descriptor type strings, where None is an unknown type.
+    :type types: collections.Iterable[None | str]
+
+    :return: The type string if all the given ones are the same, otherwise
+        None.
+    :rtype: None | str
+    """
+    types = set(types)
+    return types.pop() if len(types) == 1 else None
+
+
+def _reservoir_update(sample, n_seen, data, rng):
+    """
+    Update a uniform random sample of rows (reservoir sampling) with new rows
+    of data, in place.
+
+    :param sample: Sample matrix of at most ``k`` rows, where the first
+        ``min(n_seen, k)`` rows are filled.
+    :type sample: np.ndarray
+
+    :param n_seen: Number of rows seen before ``data``.
+    :type n_seen: int
+
+    :param data: New rows of data.
+    :type data: np.ndarray
+
+    :param rng: Random number generator to use.
+    :type rng: np.random.RandomState
+
+    :return: Number of rows seen including ``data``.
+    :rtype: int
+    """
+    k = sample.shape[0]
+    n_fill = max(0, min(k - n_seen, len(data)))
+    sample[n_seen:n_seen + n_fill] = data[:n_fill]
+    rest = data[n_fill:]
+    if len(rest):
+        # Each remaining row replaces a random sample row with probability
+        # k / (number of rows seen so far).
+        seen = n_seen + n_fill + np.arange(1, len(rest) + 1)
+        j = (rng.random_sample(len(rest)) * seen).astype(np.int64)
+        keep = j < k
+        sample[j[keep]] = rest[keep]
+    return n_seen + len(data)
 
 
 class FaissNearestNeighborsIndex (NearestNeighborsIndex):
@@ -160,7 +222,8 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
     def __init__(self, descriptor_set, idx2uid_kvs, uid2idx_kvs,
                  index_element=None, index_param_element=None,
                  read_only=False, factory_string='IDMap,Flat',
-                 ivf_nprobe=1, use_gpu=False, gpu_id=0, random_seed=None):
+                 ivf_nprobe=1, use_gpu=False, gpu_id=0, random_seed=None,
+                 train_sample_size=None, build_chunk_size=None):
         """
         Initialize FAISS index properties. Does not contain a queryable index
         until one is built via the ``build_index`` method, or loaded from
@@ -221,6 +284,23 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
             seed.
         :type random_seed: int | None
 
+        :param train_sample_size: Optional maximum number of descriptors to
+            train the index on. When given, a uniform random sample of this
+            many descriptors is used for training instead of all descriptors
+            built over.
+        :type train_sample_size: int | None
+
+        :param build_chunk_size: Optional number of descriptors to add to the
+            index at a time when building. When given, the index is built
+            without loading all descriptors into memory: descriptors are
+            first staged in chunks of this size to a temporary file while
+            sampling training data, then read back to add to the descriptor
+            set and the index. Index-UID mapping insertions of each chunk run
+            in the background while the next chunk is added. This should be
+            combined with ``train_sample_size``, otherwise all descriptors are
+            still gathered in memory for training.
+        :type build_chunk_size: int | None
+
         [1]: https://github.com/facebookresearch/faiss/wiki/High-level-interface-and-auto-tuning#index-factory
 
         """
@@ -245,8 +325,21 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
         self.random_seed = None
         if random_seed is not None:
             self.random_seed = int(random_seed)
+        self.train_sample_size = None
+        if train_sample_size is not None:
+            self.train_sample_size = int(train_sample_size)
+            if self.train_sample_size < 1:
+                raise ValueError("train_sample_size must be >= 1.")
+        self.build_chunk_size = None
+        if build_chunk_size is not None:
+            self.build_chunk_size = int(build_chunk_size)
+            if self.build_chunk_size < 1:
+                raise ValueError("build_chunk_size must be >= 1.")
         # Index value for the next added element.  Reset to 0 on a build.
         self._next_index = 0
+        # Type string of all indexed descriptors, if known to be the same.
+        #: :type: None | str
+        self._descriptor_type = None
 
         # Place-holder for option GPU resource reference. Just exist for the
         # duration of the index converted with it.
@@ -277,6 +370,8 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
             "random_seed": self.random_seed,
             "use_gpu": self._use_gpu,
             "gpu_id": self._gpu_id,
+            "train_sample_size": self.train_sample_size,
+            "build_chunk_size": self.build_chunk_size,
         }
         if self._index_element:
             config['index_element'] = to_config_dict(
@@ -361,6 +456,8 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
                 self.read_only = state["read_only"]
                 self.random_seed = state["random_seed"]
                 self._next_index = state["next_index"]
+                # Not stored by older versions.
+                self._descriptor_type = state.get("descriptor_type")
 
                 # Check that descriptor-set and kvstore instances match up in
                 # size.
@@ -414,6 +511,7 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
                     "read_only": self.read_only,
                     "random_seed": self.random_seed,
                     "next_index": self._next_index,
+                    "descriptor_type": self._descriptor_type,
                 }
                 # Using UTF-8 due to recommendation (of either 8, 16 or 32) by
                 # the ``json.loads`` method documentation.
@@ -439,6 +537,10 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
         if self.read_only:
             raise ReadOnlyError("Cannot modify read-only index.")
 
+        if self.build_chunk_size is not None:
+            self._build_index_chunked(descriptors)
+            return
+
         self._log.info("Building new FAISS index")
 
         # We need to fork the iterator, so stick the elements in a list
@@ -452,7 +554,7 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
         faiss_index = self._index_factory_wrapper(d, self.factory_string)
         self._log.info("Training FAISS index")
         # noinspection PyArgumentList
-        faiss_index.train(data)
+        faiss_index.train(self._train_sample(data))
         # TODO(john.moeller): This will raise an exception on flat indexes.
         # There's a solution which involves wrapping the index in an
         # IndexIDMap, but it doesn't work because of a bug in FAISS. So for
@@ -493,9 +595,149 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
                 "New idx2uid map size doesn't match data size."
 
             self._next_index = n
+            self._descriptor_type = _single_type(d.type() for d in desc_list)
 
             self._save_faiss_model()
 
+    def _train_sample(self, data):
+        """
+        :param data: (n, d) matrix of all vectors to build over.
+        :type data: np.ndarray
+
+        :return: Rows of the given data to train on, sampled down to the
+            configured training sample size if necessary.
+        :rtype: np.ndarray
+        """
+        if (self.train_sample_size is None or
+                len(data) <= self.train_sample_size):
+            return data
+        rng = np.random.RandomState(self.random_seed)
+        idxs = np.sort(rng.choice(len(data), self.train_sample_size,
+                                  replace=False))
+        self._log.info("Training on a sample of %d of %d vectors",
+                       len(idxs), len(data))
+        return data[idxs]
+
+    def _add_kvs_mappings(self, uuids, idx_ids):
+        """
+        Add UID-index mappings to the key-value stores.
+
+        :param uuids: Descriptor UIDs.
+        :type uuids: list[collections.Hashable]
+
+        :param idx_ids: FAISS index IDs of the descriptors, in the same order.
+        :type idx_ids: collections.Iterable[int]
+        """
+        self._uid2idx_kvs.add_many(dict(zip(uuids, idx_ids)))
+        self._idx2uid_kvs.add_many(dict(zip(idx_ids, uuids)))
+
+    def _build_index_chunked(self, descriptors):
+        """
+        Build a new index out-of-core, in chunks of the configured size.
+
+        Input descriptors and their vectors are first staged in chunks to a
+        temporary file while sampling training vectors. Only once the input
+        has been consumed is the descriptor set cleared, as the input may be
+        iterating over the descriptor set itself. Staged chunks are then
+        added to the descriptor set and the index.
+
+        :param descriptors: Iterable of descriptor elements to build index
+            over.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+        """
+        chunk_size = self.build_chunk_size
+        self._log.info("Building new FAISS index in chunks of %d",
+                       chunk_size)
+        rng = np.random.RandomState(self.random_seed)
+
+        with self._model_lock, tempfile.TemporaryFile() as staging:
+            # First pass: stage descriptors while sampling training vectors.
+            self._log.debug("Staging new descriptor elements")
+            sample_chunks = []
+            sample = None
+            n_seen = 0
+            n_chunks = 0
+            types = set()
+            for chunk in _iter_chunks(descriptors, chunk_size):
+                types.update(c.type() for c in chunk)
+                data = np.vstack(
+                    DescriptorElement.get_many_vectors(chunk)
+                ).astype(np.float32, copy=False)
+                pickle.dump((chunk, data), staging, pickle.HIGHEST_PROTOCOL)
+                n_chunks += 1
+                if self.train_sample_size is None:
+                    sample_chunks.append(data)
+                    n_seen += len(data)
+                    continue
+                if sample is None:
+                    sample = np.empty(
+                        (self.train_sample_size, data.shape[1]), np.float32
+                    )
+                n_seen = _reservoir_update(sample, n_seen, data, rng)
+            if n_seen == 0:
+                raise ValueError("No descriptors provided to build over.")
+            if sample is None:
+                sample = np.vstack(sample_chunks)
+                del sample_chunks
+            else:
+                sample = sample[:min(n_seen, len(sample))]
+            d = sample.shape[1]
+
+            faiss_index = self._index_factory_wrapper(d, self.factory_string)
+            self._log.info("Training FAISS index on %d of %d vectors",
+                           len(sample), n_seen)
+            # noinspection PyArgumentList
+            faiss_index.train(sample)
+            del sample
+
+            # Second pass: add staged chunks to the descriptor set and index,
+            # inserting the mappings of the previous chunk in the background.
+            self._log.debug("Clearing and adding new descriptor elements")
+            self._descriptor_set.clear()
+            self._uid2idx_kvs.clear()
+            self._idx2uid_kvs.clear()
+            staging.seek(0)
+            n = 0
+            pool = ThreadPool(1)
+            try:
+                pending = None
+                for _ in range(n_chunks):
+                    chunk, data = pickle.load(staging)
+                    self._descriptor_set.add_many_descriptors(chunk)
+                    idx_ids = np.arange(n, n + len(chunk))
+                    # noinspection PyArgumentList
+                    faiss_index.add_with_ids(data, idx_ids)
+                    n += len(chunk)
+                    if pending is not None:
+                        pending.get()
+                    pending = pool.apply_async(
+                        self._add_kvs_mappings,
+                        ([c.uuid() for c in chunk], idx_ids.astype(object))
+                    )
+                    self._log.debug("Added %d of %d vectors", n, n_seen)
+                if pending is not None:
+                    pending.get()
+            finally:
+                pool.close()
+                pool.join()
+
+            assert faiss_index.ntotal == n, \
+                "FAISS index size doesn't match data size"
+            assert len(self._descriptor_set) == n, \
+                "New descriptor set size doesn't match data size"
+            assert len(self._uid2idx_kvs) == n, \
+                "New uid2idx map size doesn't match data size."
+            assert len(self._idx2uid_kvs) == n, \
+                "New idx2uid map size doesn't match data size."
+
+            self._faiss_index = faiss_index
+            self._next_index = n
+            self._descriptor_type = _single_type(types)
+            self._log.info("FAISS index has been constructed with %d "
+                           "vectors", n)
+            self._save_faiss_model()
+
     def _update_index(self, descriptors):
         """
         Internal method to be implemented by sub-classes to additively update
@@ -574,6 +816,11 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
             assert len(self._idx2uid_kvs) == old_ntotal + n, \
                 "New idx2uid kvs size doesn't match old + new data size."
 
+            types = set(d.type() for d in desc_list)
+            if old_ntotal:
+                types.add(self._descriptor_type)
+            self._descriptor_type = _single_type(types)
+
             self._save_faiss_model()
 
     def _remove_from_index(self, uids):
@@ -625,7 +872,7 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
         new_uuids = [desc.uuid() for desc in descriptors]
         data = np.vstack(
             DescriptorElement.get_many_vectors(descriptors)
-        ).astype(np.float32)
+        ).astype(np.float32, copy=False)
         self._log.info("data shape, type: %s, %s",
                        data.shape, data.dtype)
         self._log.info("# uuids: %d", len(new_uuids))
@@ -687,29 +934,42 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
                 # Otherwise re-raise
                 raise
 
-    def _nn(self, d, n=1):
+    def exact_distances(self):
         """
-        Internal method to be implemented by sub-classes to return the nearest
-        `N` neighbors to the given descriptor element.
+        Whether distances computed by the configured index type are exact
+        euclidean distances, determined from the factory string.
 
-        When this internal method is called, we have already checked that there
-        is a vector in ``d`` and our index is not empty.
-
-        :param d: Descriptor element to compute the neighbors of.
-        :type d: smqtk.representation.DescriptorElement
+        Indexes that compress or transform vectors (e.g. with product or
+        scalar quantization, PCA or LSH) only approximate distances, so query
+        results are re-ranked by the exact distances to the stored
+        descriptors. Otherwise, FAISS distances are returned directly, unless
+        the index refines its results with exact distances itself (``RFlat``).
 
-        :param n: Number of nearest neighbors to find.
-        :type n: int
+        :rtype: bool
+        """
+        components = self.factory_string.split(',')
+        if components[-1] in ('RFlat', 'Refine(Flat)'):
+            return True
+        return not any(self._LOSSY_COMPONENT_RE.search(c)
+                       for c in components)
 
-        :return: Tuple of nearest N DescriptorElement instances, and a tuple of
-            the distance values to those neighbors.
-        :rtype: (tuple[smqtk.representation.DescriptorElement], tuple[float])
+    # Factory string components that make an index's distances approximate.
+    _LOSSY_COMPONENT_RE = re.compile(r'(^|_)(OPQ|PQ|SQ|PCA|LSH|ITQ)')
 
+    def _search(self, q, n):
         """
-        log = self._log
-        q = d.vector()[np.newaxis, :].astype(np.float32)
-        log.debug("Received query for %d nearest neighbors", n)
+        Search the FAISS index for the neighbors of each query vector.
+
+        :param q: (m, d) float32 matrix of query vectors.
+        :type q: np.ndarray
 
+        :param n: Number of nearest neighbors to find for each query.
+        :type n: int
+
+        :return: List, parallel to the query rows, of the neighbor descriptor
+            UIDs and their FAISS euclidean distances in increasing order.
+        :rtype: list[(list[collections.Hashable], np.ndarray)]
+        """
         with self._model_lock:
             # Attempt to set n-probe of an IVF index
             self._set_index_nprobe()
@@ -718,43 +978,117 @@ class FaissNearestNeighborsIndex (NearestNeighborsIndex):
             s_dists, s_ids = self._faiss_index.search(
                 q, k=min(n, self._faiss_index.ntotal)
             )
-            s_dists, s_ids = np.sqrt(s_dists[0, :]), s_ids[0, :]
-            s_ids = s_ids.astype(object)
             # s_id (the FAISS index indices) can equal -1 if fewer than the
             # requested number of nearest neighbors is returned. In this case,
             # eliminate the -1 entries
+            valid = s_ids >= 0
             self._log.debug("Getting descriptor UIDs from idx2uid mapping.")
-            uuids = list(self._idx2uid_kvs.get_many(
-                filter(lambda s_id_: s_id_ >= 0, s_ids)
+            u_ids = np.unique(s_ids[valid])
+            id2uid = dict(zip(
+                u_ids, self._idx2uid_kvs.get_many(u_ids.astype(object))
             ))
+
+        results = []
+        for row_valid, row_ids, row_dists in zip(valid, s_ids, s_dists):
+            uuids = [id2uid[i] for i in row_ids[row_valid]]
             if len(uuids) < n:
                 warnings.warn("Less than n={} neighbors were retrieved from "
                               "the FAISS index instance. Maybe increase "
                               "nprobe if this is an IVF index?"
                               .format(n), RuntimeWarning)
+            # FAISS L2 distances are squared.
+            dists = np.sqrt(np.maximum(row_dists[row_valid], 0))
+            results.append((uuids, dists))
+        return results
 
-            descriptors = tuple(
-                self._descriptor_set.get_many_descriptors(uuids)
-            )
+    def _nn(self, d, n=1):
+        """
+        Internal method to be implemented by sub-classes to return the nearest
+        `N` neighbors to the given descriptor element.
 
-        log.debug("Min and max FAISS distances: %g, %g",
-                  min(s_dists), max(s_dists))
+        When this internal method is called, we have already checked that there
+        is a vector in ``d`` and our index is not empty.
 
-        d_vectors = np.vstack(
-            DescriptorElement.get_many_vectors(descriptors)
-        )
-        d_dists = metrics.euclidean_distance(d_vectors, q)
+        :param d: Descriptor element to compute the neighbors of.
+        :type d: smqtk.representation.DescriptorElement
+
+        :param n: Number of nearest neighbors to find.
+        :type n: int
+
+        :return: Tuple of nearest N DescriptorElement instances, and a tuple of
+            the distance values to those neighbors.
+        :rtype: (tuple[smqtk.representation.DescriptorElement], tuple[float])
+
+        """
+        return next(iter(self._nn_many([d], n)))
 
-        log.debug("Min and max descriptor distances: %g, %g",
-                  min(d_dists), max(d_dists))
+    def _nn_many(self, descriptors, n=1):
+        """
+        Internal method to return the nearest `N` neighbors to each of the
+        given descriptor elements.
+
+        All query vectors are searched for in one FAISS search call. When the
+        index computes exact distances, the neighbor descriptors returned are
+        lazily retrieved from the descriptor set when their vector is first
+        needed and the FAISS distances are returned. Their type is that of
+        the indexed descriptors if all are known to share one, and otherwise
+        also retrieved when first needed. Otherwise, neighbor
+        descriptors of all queries are retrieved together and re-ranked by
+        their exact distances to each query.
+
+        :param descriptors: Descriptor elements to compute the neighbors of.
+        :type descriptors:
+            list[smqtk.representation.DescriptorElement]
+
+        :param n: Number of nearest neighbors to find for each descriptor.
+        :type n: int
 
-        order = d_dists.argsort()
-        uuids, d_dists = zip(*((uuids[oidx], d_dists[oidx]) for oidx in order))
+        :return: Iterable, parallel to the input descriptors, of tuples of
+            nearest N DescriptorElement instances and a tuple of the distance
+            values to those neighbors.
+        :rtype: collections.Iterable[
+            (tuple[smqtk.representation.DescriptorElement], tuple[float])]
 
-        log.debug("Returning query result of size %g", len(uuids))
+        """
+        log = self._log
+        q = np.vstack(DescriptorElement.get_many_vectors(descriptors))
+        log.debug("Received %d queries for %d nearest neighbors",
+                  len(q), n)
+        results = self._search(q.astype(np.float32, copy=False), n)
+
+        if self.exact_distances():
+            for uuids, dists in results:
+                yield (
+                    tuple(LazyDescriptorElement(self._descriptor_type, uid,
+                                                self._descriptor_set)
+                          for uid in uuids),
+                    tuple(dists.tolist())
+                )
+            return
 
-        return descriptors, tuple(d_dists)
+        log.debug("Re-ranking neighbors by descriptor distances")
+        # Retrieve the neighbor descriptors of all queries at once.
+        uniq_uuids = list(set(uid for uuids, _ in results for uid in uuids))
+        uid2descr = dict(zip(
+            uniq_uuids,
+            self._descriptor_set.get_many_descriptors(uniq_uuids)
+        ))
+        uid2vec = dict(zip(
+            uniq_uuids,
+            DescriptorElement.get_many_vectors(
+                [uid2descr[uid] for uid in uniq_uuids]
+            )
+        ))
+        for q_vec, (uuids, _) in zip(q, results):
+            if not uuids:
+                yield (), ()
+                continue
+            d_dists = metrics.euclidean_distance(
+                np.vstack([uid2vec[uid] for uid in uuids]), q_vec
+            )
+            order = d_dists.argsort()
+            yield (tuple(uid2descr[uuids[i]] for i in order),
+                   tuple(d_dists[order].tolist()))
 
 
 SMQTK_PLUGIN_CLASS = FaissNearestNeighborsIndex
-
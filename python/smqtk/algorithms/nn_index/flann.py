@@ -3,6 +3,7 @@ import logging
 import multiprocessing
 import os
 import tempfile
+import threading
 
 from six.moves import cPickle
 
@@ -10,7 +11,11 @@ import numpy
 
 from smqtk.algorithms.nn_index import NearestNeighborsIndex
 from smqtk.representation.data_element import from_uri
-from smqtk.representation.descriptor_element import elements_to_matrix
+from smqtk.representation.descriptor_element import (
+    DescriptorElement,
+    elements_to_matrix,
+)
+from smqtk.utils.delta_buffer import DeltaBuffer
 
 # Requires FLANN bindings
 try:
@@ -19,6 +24,25 @@ except ImportError:
     pyflann = None
 
 
+def _chi_square_distances(m, q):
+    s = m + q
+    with numpy.errstate(divide='ignore', invalid='ignore'):
+        d = (m - q) ** 2 / s
+    d[s == 0] = 0
+    return d.sum(axis=1)
+
+
+# Brute-force distance functions, for the distance methods supported by the
+# delta buffer, matching the distances reported by FLANN. FLANN's euclidean
+# distances are squared, and HIK similarities are inverted like in ``_nn``.
+_BUFFER_DISTANCE_FUNCS = {
+    'euclidean': lambda m, q: ((m - q) ** 2).sum(axis=1),
+    'manhattan': lambda m, q: numpy.abs(m - q).sum(axis=1),
+    'hik': lambda m, q: 1.0 - numpy.minimum(m, q).sum(axis=1),
+    'chi_square': _chi_square_distances,
+}
+
+
 class FlannNearestNeighborsIndex (NearestNeighborsIndex):
     """
     Nearest-neighbor computation using the FLANN library (pyflann module).
@@ -44,7 +68,8 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
                  descriptor_cache_uri=None,
                  # Parameters for building an index
                  autotune=False, target_precision=0.95, sample_fraction=0.1,
-                 distance_method='hik', random_seed=None):
+                 distance_method='hik', random_seed=None,
+                 delta_merge_threshold=0, delta_merge_background=False):
         """
         Initialize FLANN index properties. Does not contain a query-able index
         until one is built via the ``build_index`` method, or loaded from
@@ -109,6 +134,25 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         :param random_seed: Integer to use as the random number generator seed.
         :type random_seed: int
 
+        :param delta_merge_threshold: Number of pending changes at which to
+            merge them into the FLANN index by rebuilding it. Until merged,
+            added descriptors are kept in a side buffer that is searched by
+            brute force along with the FLANN index, and removed descriptors
+            are filtered out of FLANN index results. Pending changes are only
+            written to the configured model files when merged (see
+            ``merge_delta``). When 0, the FLANN index is rebuilt on every
+            update or removal. Only the "euclidean", "manhattan", "hik" and
+            "chi_square" distance methods are supported when non-zero.
+        :type delta_merge_threshold: int
+
+        :param delta_merge_background: Merge pending changes in a background
+            thread when the merge threshold is reached, continuing to serve
+            queries from the current FLANN index and side buffer meanwhile.
+        :type delta_merge_background: bool
+
+        :raises ValueError: Invalid delta merge threshold, or a non-zero
+            threshold with an unsupported distance method.
+
         """
         super(FlannNearestNeighborsIndex, self).__init__()
 
@@ -130,6 +174,18 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         self._build_sample_frac = float(sample_fraction)
         self._distance_method = str(distance_method)
 
+        self._delta_merge_threshold = int(delta_merge_threshold)
+        self._delta_merge_background = bool(delta_merge_background)
+        if self._delta_merge_threshold < 0:
+            raise ValueError("Delta merge threshold must be non-negative, "
+                             "given %d." % self._delta_merge_threshold)
+        if self._delta_merge_threshold and \
+                self._distance_method not in _BUFFER_DISTANCE_FUNCS:
+            raise ValueError("Distance method '%s' is not supported with a "
+                             "delta merge threshold. Supported methods: %s"
+                             % (self._distance_method,
+                                sorted(_BUFFER_DISTANCE_FUNCS)))
+
         # Lock for model component access.  Using a multiprocessing due to
         # possible cases where another thread/process attempts to restore a
         # model before its fully written.  A reordering of _build_index could
@@ -140,6 +196,23 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         # - flann.nn_index will spit out indices to list
         #: :type: list[smqtk.representation.DescriptorElement] | None
         self._descr_cache = None
+        # UUIDs of the descriptors in the above cache.
+        #: :type: set[collections.Hashable]
+        self._descr_cache_uids = set()
+
+        # Pending changes not yet merged into the FLANN index. The distance
+        # method may change when loading an existing index.
+        self._delta = DeltaBuffer(
+            lambda m, q: _BUFFER_DISTANCE_FUNCS[self._distance_method](m, q)
+        )
+        # Serializes merges of pending changes. Acquired before, never while
+        # holding, the model lock.
+        self._merge_lock = threading.Lock()
+        #: :type: None | threading.Thread
+        self._merge_thread = None
+        # Incremented whenever the FLANN index is replaced, so a merge can
+        # detect that the index was rebuilt while it was running.
+        self._model_generation = 0
 
         # The flann instance with a built index. None before index load/build.
         #: :type: pyflann.index.FLANN or None
@@ -174,6 +247,8 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
             "sample_fraction": self._build_sample_frac,
             "distance_method": self._distance_method,
             "random_seed": self._rand_seed,
+            "delta_merge_threshold": self._delta_merge_threshold,
+            "delta_merge_background": self._delta_merge_background,
         }
 
     def _has_model_data(self):
@@ -193,6 +268,7 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
             self._log.debug("Loading cached descriptors")
             self._descr_cache = \
                 cPickle.loads(self._descr_cache_elem.get_bytes())
+            self._descr_cache_uids = set(d.uuid() for d in self._descr_cache)
 
         # Params pickle include the build params + our local state params
         if self._index_param_elem and not self._index_param_elem.is_empty():
@@ -237,10 +313,10 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         :rtype: int
         """
         with self._model_lock:
+            n = len(self._delta) - len(self._delta.tombstones)
             if self._descr_cache is not None:
-                return len(self._descr_cache)
-            else:
-                return 0
+                n += len(self._descr_cache)
+            return n
 
     def _build_index(self, descriptors):
         """
@@ -270,55 +346,97 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
             self._log.info("Building new FLANN index")
 
             self._log.debug("Caching descriptor elements")
-            self._descr_cache = list(descriptors)
+            descr_cache = list(descriptors)
+            self._set_model(descr_cache, *self._build_flann(descr_cache))
+            # Any pending changes are superseded by the new index.
+            self._delta.clear()
+
+    def _build_flann(self, descr_cache):
+        """
+        Build a FLANN index over the given descriptors without modifying the
+        current model.
+
+        :param descr_cache: Descriptors to build the index over.
+        :type descr_cache: list[smqtk.representation.DescriptorElement]
+
+        :return: New FLANN instance and its index parameters determined
+            during building.
+        :rtype: (pyflann.index.FLANN, dict)
+
+        """
+        params = {
+            "target_precision": self._build_target_precision,
+            "sample_fraction": self._build_sample_frac,
+            "log_level": ("info"
+                          if self._log.getEffectiveLevel() <= logging.DEBUG
+                          else "warning")
+        }
+        if self._build_autotune:
+            params['algorithm'] = "autotuned"
+        if self._rand_seed is not None:
+            params['random_seed'] = self._rand_seed
+        pyflann.set_distance_type(self._distance_method)
+
+        self._log.debug("Accumulating descriptor vectors into matrix for "
+                        "FLANN")
+        pts_array = elements_to_matrix(descr_cache, report_interval=1.0)
+
+        self._log.debug('Building FLANN index')
+        flann = pyflann.FLANN()
+        build_params = flann.build_index(pts_array, **params)
+        del pts_array
+        return flann, build_params
+
+    def _set_model(self, descr_cache, flann, build_params):
+        """
+        Set the current model, caching it to the configured model elements.
+
+        :param descr_cache: Descriptors indexed by ``flann``.
+        :type descr_cache: list[smqtk.representation.DescriptorElement]
+
+        :param flann: FLANN instance with a built index, or None if there are
+            no descriptors to index.
+        :type flann: None | pyflann.index.FLANN
+
+        :param build_params: FLANN index parameters determined during
+            building, or None if there is no index.
+        :type build_params: None | dict
+
+        """
+        with self._model_lock:
+            self._descr_cache = descr_cache
+            self._descr_cache_uids = set(d.uuid() for d in descr_cache)
+            self._flann = flann
+            self._flann_build_params = build_params
+            self._model_generation += 1
+
             # Cache descriptors if we have an element
             if self._descr_cache_elem and self._descr_cache_elem.writable():
                 self._log.debug("Caching descriptors: %s",
                                 self._descr_cache_elem)
                 self._descr_cache_elem.set_bytes(
-                    cPickle.dumps(self._descr_cache, -1)
+                    cPickle.dumps(self._descr_cache, -1) if flann else b''
                 )
 
-            params = {
-                "target_precision": self._build_target_precision,
-                "sample_fraction": self._build_sample_frac,
-                "log_level": ("info"
-                              if self._log.getEffectiveLevel() <= logging.DEBUG
-                              else "warning")
-            }
-            if self._build_autotune:
-                params['algorithm'] = "autotuned"
-            if self._rand_seed is not None:
-                params['random_seed'] = self._rand_seed
-            pyflann.set_distance_type(self._distance_method)
-
-            self._log.debug("Accumulating descriptor vectors into matrix for "
-                            "FLANN")
-            pts_array = elements_to_matrix(self._descr_cache,
-                                           report_interval=1.0)
-
-            self._log.debug('Building FLANN index')
-            self._flann = pyflann.FLANN()
-            self._flann_build_params = self._flann.build_index(pts_array,
-                                                               **params)
-            del pts_array
-
             if self._index_elem and self._index_elem.writable():
                 self._log.debug("Caching index: %s", self._index_elem)
-                # FLANN wants to write to a file, so make a temp file, then
-                # read it in, putting bytes into element.
-                fd, fp = tempfile.mkstemp()
-                try:
-                    self._flann.save_index(fp)
-                    # Use the file descriptor to create the file object.
-                    # This avoids reopening the file and will automatically
-                    # close the file descriptor on exiting the with block.
-                    # fdopen() is required because in Python 2 open() does
-                    # not accept a file descriptor.
-                    with os.fdopen(fd, 'rb') as f:
-                        self._index_elem.set_bytes(f.read())
-                finally:
-                    os.remove(fp)
+                if flann is None:
+                    self._index_elem.set_bytes(b'')
+                else:
+                    # FLANN wants to write to a file, so make a temp file,
+                    # then read it in, putting bytes into element.
+                    fd, fp = tempfile.mkstemp()
+                    try:
+                        flann.save_index(fp)
+                        # Use the file descriptor to create the file object.
+                        # This avoids reopening the file and will
+                        # automatically close the file descriptor on exiting
+                        # the with block. fdopen() is required because in
+                        # Python 2 open() does not accept a file descriptor.
+                        with os.fdopen(fd, 'rb') as f:
+                            self._index_elem.set_bytes(f.read())
+                    finally:
+                        os.remove(fp)
             if self._index_param_elem and self._index_param_elem.writable():
                 self._log.debug("Caching index params: %s",
                                 self._index_param_elem)
@@ -333,6 +451,79 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
 
             self._pid = multiprocessing.current_process().pid
 
+    def _is_indexed(self, uid):
+        """
+        :return: If a descriptor with the given UUID is currently in the
+            index, either in the FLANN index or pending addition.
+        :rtype: bool
+        """
+        return uid in self._delta or (uid in self._descr_cache_uids and
+                                      uid not in self._delta.tombstones)
+
+    def merge_delta(self):
+        """
+        Merge pending changes into the FLANN index by rebuilding it, waiting
+        for any merge already in progress first.
+
+        This does nothing when there are no pending changes, which is always
+        the case when ``delta_merge_threshold`` is 0.
+        """
+        with self._merge_lock:
+            with self._model_lock:
+                self._restore_index()
+                if not self._delta.num_changes:
+                    return
+                snapshot = self._delta.snapshot()
+                generation = self._model_generation
+                added, _, tombstones = snapshot
+                descr_cache = [d for d in self._descr_cache or ()
+                               if d.uuid() not in tombstones]
+                descr_cache.extend(added)
+
+            self._log.info("Merging %d additions and %d removals into FLANN "
+                           "index", len(added), len(tombstones))
+            if descr_cache:
+                flann, build_params = self._build_flann(descr_cache)
+            else:
+                flann = build_params = None
+
+            with self._model_lock:
+                if generation != self._model_generation:
+                    self._log.info("FLANN index was rebuilt during merge, "
+                                   "discarding merge result.")
+                    return
+                self._set_model(descr_cache, flann, build_params)
+                self._delta.discard(snapshot)
+
+    def _merge_in_background(self):
+        try:
+            self.merge_delta()
+        except Exception:
+            self._log.exception("Failed to merge pending changes into FLANN "
+                                "index")
+
+    def _merge_delta_if_needed(self):
+        """
+        Merge pending changes if there are at least as many as the merge
+        threshold, in a background thread if configured to.
+
+        This must not be called while holding the model lock.
+        """
+        with self._model_lock:
+            if self._delta.num_changes < self._delta_merge_threshold:
+                return
+            if self._delta_merge_background:
+                if self._merge_thread is None or \
+                        not self._merge_thread.is_alive():
+                    self._merge_thread = threading.Thread(
+                        target=self._merge_in_background,
+                        name="FlannDeltaMerge",
+                    )
+                    self._merge_thread.daemon = True
+                    self._merge_thread.start()
+                return
+        self.merge_delta()
+
     def _update_index(self, descriptors):
         """
         Internal method to be implemented by sub-classes to additively update
@@ -342,11 +533,14 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         descriptors.
 
         The currently bundled FLANN implementation bindings (v1.8.4) does not
-        support support incremental updating of an existing index.  Thus this
-        update method fully rebuilds the index based on the previous cache of
-        descriptors and the newly specified ones.  Due to requiring a full
-        rebuild this update method may take a significant amount of time
-        depending on the size of the index being updated.
+        support support incremental updating of an existing index.  Thus, when
+        ``delta_merge_threshold`` is 0, this update method fully rebuilds the
+        index based on the previous cache of descriptors and the newly
+        specified ones.  Due to requiring a full rebuild this update method
+        may take a significant amount of time depending on the size of the
+        index being updated.  Otherwise, new descriptors are added to the side
+        buffer, replacing any indexed descriptors with the same UUIDs, until
+        merged.
 
         :param descriptors: Iterable of descriptor elements to add to this
             index.
@@ -356,17 +550,36 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         """
         with self._model_lock:
             self._restore_index()
-            # Build a new index that contains the union of the current
-            # descriptors and the new provided descriptors.
-            self._log.info("Rebuilding FLANN index to include new "
-                           "descriptors.")
-            self.build_index(itertools.chain(self._descr_cache, descriptors))
+            if not self._delta_merge_threshold or (self._flann is None and
+                                                   not len(self._delta)):
+                # Build a new index that contains the union of the current
+                # descriptors and the new provided descriptors.
+                self._log.info("Rebuilding FLANN index to include new "
+                               "descriptors.")
+                self.build_index(itertools.chain(self._descr_cache or (),
+                                                 descriptors))
+                return
+
+            descriptors = list(descriptors)
+            vectors = DescriptorElement.get_many_vectors(descriptors)
+            for d, v in zip(descriptors, vectors):
+                uid = d.uuid()
+                if uid in self._descr_cache_uids:
+                    # Replaced descriptors are filtered out of FLANN results.
+                    self._delta.tombstones.add(uid)
+                self._delta.add(uid, v, d)
+        self._merge_delta_if_needed()
 
     def _remove_from_index(self, uids):
         """
         Internal method to be implemented by sub-classes to partially remove
         descriptors from this index associated with the given UIDs.
 
+        When ``delta_merge_threshold`` is 0, the FLANN index is rebuilt
+        without the removed descriptors.  Otherwise, removed descriptors are
+        dropped from the side buffer or filtered out of FLANN results until
+        merged.
+
         :param uids: Iterable of UIDs of descriptors to remove from this index.
         :type uids: collections.Iterable[collections.Hashable]
 
@@ -378,17 +591,22 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
             self._restore_index()
             uidset = set(uids)
             # Make sure provided UIDs are part of our current index.
-            uid_diff = uidset - set(map(lambda d: d.uuid(), self._descr_cache))
+            uid_diff = set(u for u in uidset if not self._is_indexed(u))
             if uid_diff:
                 if len(uid_diff) == 1:
                     raise KeyError(list(uid_diff)[0])
                 else:
                     raise KeyError(uid_diff)
-            # Filter descriptors NOT matching UIDs of current descriptor
-            # cache.
-            self._descr_cache = \
-                [descr for descr in self._descr_cache if descr.uuid() in uidset]
-            self.build_index(self._descr_cache)
+            if not self._delta_merge_threshold:
+                # Filter descriptors NOT matching UIDs of current descriptor
+                # cache.
+                self.build_index([descr for descr in self._descr_cache
+                                  if descr.uuid() not in uidset])
+                return
+            for uid in uidset:
+                if not self._delta.remove(uid):
+                    self._delta.tombstones.add(uid)
+        self._merge_delta_if_needed()
 
     def _nn(self, d, n=1):
         """
@@ -398,6 +616,9 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         When this internal method is called, we have already checked that there
         is a vector in ``d`` and our index is not empty.
 
+        Neighbors pending addition are found by brute force and merged with
+        the FLANN index results.
+
         :param d: Descriptor element to compute the neighbors of.
         :type d: smqtk.representation.DescriptorElement
 
@@ -412,44 +633,74 @@ class FlannNearestNeighborsIndex (NearestNeighborsIndex):
         with self._model_lock:
             self._restore_index()
             vec = d.vector()
+            tombstones = self._delta.tombstones
+
+            neighbors = []
+            if self._flann is not None:
+                neighbors = self._flann_nn(vec, n + len(tombstones))
+                if tombstones:
+                    neighbors = [(descr, dist) for descr, dist in neighbors
+                                 if descr.uuid() not in tombstones]
+            if len(self._delta):
+                neighbors.extend(zip(*self._delta.nn(vec, n)))
+                # Stable sort keeps the FLANN order of equal distances.
+                neighbors.sort(key=lambda p: p[1])
+            neighbors = neighbors[:n]
+
+            return ([descr for descr, _ in neighbors],
+                    tuple(dist for _, dist in neighbors))
+
+    def _flann_nn(self, vec, n):
+        """
+        Query the FLANN index for the nearest neighbors of a vector.
 
-            # If the distance method is HIK, we need to treat it special since
-            # that method produces a similarity score, not a distance score.
-            #
-            # FLANN asserts that we query for <= index size, thus the use of
-            # min().
-            if self._distance_method == 'hik':
-                # This call is different than the else version in that k is the
-                # size of the full data set, so that we can reverse the
-                # distances.
-                #: :type: numpy.ndarray, numpy.ndarray
-                idxs, dists = self._flann.nn_index(
-                    vec, len(self._descr_cache),
-                    **self._flann_build_params
-                )
-            else:
-                #: :type: numpy.ndarray, numpy.ndarray
-                idxs, dists = self._flann.nn_index(
-                    vec, min(n, len(self._descr_cache)),
-                    **self._flann_build_params
-                )
+        :param vec: Query vector.
+        :type vec: numpy.ndarray
 
-            # When N>1, return value is a 2D array. Since this method limits
-            # query to a single descriptor, we reduce to 1D arrays.
-            if len(idxs.shape) > 1:
-                idxs = idxs[0]
-                dists = dists[0]
-
-            if self._distance_method == 'hik':
-                # Invert values to stay consistent with other distance value
-                # norms.
-                dists = [1.0 - d for d in dists]
-                idxs = tuple(reversed(idxs))[:n]
-                dists = tuple(reversed(dists))[:n]
-            else:
-                dists = tuple(dists)
+        :param n: Number of nearest neighbors to find. Fewer are returned if
+            the index is smaller.
+        :type n: int
+
+        :return: Pairs of neighbor descriptor and distance, in order of
+            increasing distance.
+        :rtype: list[(smqtk.representation.DescriptorElement, float)]
 
-            return [self._descr_cache[i] for i in idxs], dists
+        """
+        # If the distance method is HIK, we need to treat it special since
+        # that method produces a similarity score, not a distance score.
+        #
+        # FLANN asserts that we query for <= index size, thus the use of
+        # min().
+        if self._distance_method == 'hik':
+            # This call is different than the else version in that k is the
+            # size of the full data set, so that we can reverse the
+            # distances.
+            #: :type: numpy.ndarray, numpy.ndarray
+            idxs, dists = self._flann.nn_index(
+                vec, len(self._descr_cache),
+                **self._flann_build_params
+            )
+        else:
+            #: :type: numpy.ndarray, numpy.ndarray
+            idxs, dists = self._flann.nn_index(
+                vec, min(n, len(self._descr_cache)),
+                **self._flann_build_params
+            )
+
+        # When N>1, return value is a 2D array. Since this method limits
+        # query to a single descriptor, we reduce to 1D arrays.
+        if len(idxs.shape) > 1:
+            idxs = idxs[0]
+            dists = dists[0]
+
+        if self._distance_method == 'hik':
+            # Invert values to stay consistent with other distance value
+            # norms.
+            dists = [1.0 - d for d in dists]
+            idxs = tuple(reversed(idxs))[:n]
+            dists = tuple(reversed(dists))[:n]
+
+        return [(self._descr_cache[i], dist) for i, dist in zip(idxs, dists)]
 
 
 NN_INDEX_CLASS = FlannNearestNeighborsIndex
@@ -7,6 +7,7 @@ from sklearn.neighbors import BallTree, DistanceMetric
 
 from smqtk.algorithms.nn_index.hash_index import HashIndex
 from smqtk.representation import DataElement
+from smqtk.utils.delta_buffer import DeltaBuffer
 from smqtk.utils.configuration import (
     from_config_dict,
     make_default_config,
@@ -90,7 +91,8 @@ class SkLearnBallTreeHashIndex (HashIndex):
         return super(SkLearnBallTreeHashIndex, cls).from_config(config_dict,
                                                                 False)
 
-    def __init__(self, cache_element=None, leaf_size=40, random_seed=None):
+    def __init__(self, cache_element=None, leaf_size=40, random_seed=None,
+                 delta_merge_threshold=0, delta_merge_background=False):
         """
         Initialize Scikit-Learn BallTree index for hash codes.
 
@@ -103,17 +105,55 @@ class SkLearnBallTreeHashIndex (HashIndex):
         :param random_seed: Optional random number generator seed (numpy).
         :type random_seed: None | int
 
+        :param delta_merge_threshold: Number of pending changes at which to
+            merge them into the ball tree by rebuilding it. Until merged,
+            added hashes are kept in a side buffer that is searched by brute
+            force along with the ball tree, and removed hashes are filtered
+            out of ball tree results. Pending changes are only saved to the
+            cache element when merged (see ``merge_delta``). When 0, the ball
+            tree is rebuilt on every update or removal.
+        :type delta_merge_threshold: int
+
+        :param delta_merge_background: Merge pending changes in a background
+            thread when the merge threshold is reached, continuing to serve
+            queries from the current ball tree and side buffer meanwhile.
+        :type delta_merge_background: bool
+
+        :raises ValueError: Negative delta merge threshold.
+
         """
         super(SkLearnBallTreeHashIndex, self).__init__()
         self.cache_element = cache_element
         self.leaf_size = leaf_size
         self.random_seed = random_seed
+        self.delta_merge_threshold = int(delta_merge_threshold)
+        self.delta_merge_background = bool(delta_merge_background)
+        if self.delta_merge_threshold < 0:
+            raise ValueError("Delta merge threshold must be non-negative, "
+                             "given %d." % self.delta_merge_threshold)
 
         self._model_lock = threading.RLock()
 
         # the actual index
         #: :type: sklearn.neighbors.BallTree
         self.bt = None
+        # Hash tuples of the rows of the ball tree, created when first
+        # needed.
+        #: :type: None | set[tuple[bool]]
+        self._bt_hashes = None
+
+        # Pending changes not yet merged into the ball tree, keyed by hash
+        # tuple. Distances are normalized hamming distances, like those of
+        # the ball tree.
+        self._delta = DeltaBuffer(lambda m, q: (m != q).mean(axis=1))
+        # Serializes merges of pending changes. Acquired before, never while
+        # holding, the model lock.
+        self._merge_lock = threading.Lock()
+        #: :type: None | threading.Thread
+        self._merge_thread = None
+        # Incremented whenever the ball tree is replaced, so a merge can
+        # detect that the tree was rebuilt while it was running.
+        self._model_generation = 0
 
         self.load_model()
 
@@ -121,6 +161,8 @@ class SkLearnBallTreeHashIndex (HashIndex):
         c = merge_dict(self.get_default_config(), {
             'leaf_size': self.leaf_size,
             'random_seed': self.random_seed,
+            'delta_merge_threshold': self.delta_merge_threshold,
+            'delta_merge_background': self.delta_merge_background,
         })
         if self.cache_element:
             c['cache_element'] = merge_dict(c['cache_element'],
@@ -188,11 +230,46 @@ class SkLearnBallTreeHashIndex (HashIndex):
                 #: :type: sklearn.neighbors.BallTree
                 self.bt = BallTree.__new__(BallTree)
                 self.bt.__setstate__(s)
+                self._bt_hashes = None
                 self._log.debug("Loading mode: Done")
 
     def count(self):
         with self._model_lock:
-            return self.bt.data.shape[0] if self.bt else 0
+            n = len(self._delta) - len(self._delta.tombstones)
+            return n + (self.bt.data.shape[0] if self.bt else 0)
+
+    def _make_bt(self, vec_list):
+        """
+        Make a new BallTree over a list of boolean hash vectors without
+        modifying the current model.
+
+        :param vec_list: List of bool-valued numpy arrays.
+        :type vec_list: list[np.ndarray[bool]] | np.ndarray[np.ndarray[bool]]
+
+        :return: New ball tree, or None if there are no hash vectors.
+        :rtype: None | sklearn.neighbors.BallTree
+
+        """
+        if len(vec_list) > 0:
+            # If distance metric ever changes, need to update save/load model
+            # functions.
+            return BallTree(np.asarray(vec_list), self.leaf_size,
+                            metric='hamming')
+        return None
+
+    def _set_bt(self, bt):
+        """
+        Set the current ball tree and save the model.
+
+        :param bt: New ball tree, or None if there are no hashes to index.
+        :type bt: None | sklearn.neighbors.BallTree
+
+        """
+        with self._model_lock:
+            self.bt = bt
+            self._bt_hashes = None
+            self._model_generation += 1
+            self.save_model()
 
     def _build_bt_internal(self, vec_list):
         """
@@ -206,14 +283,81 @@ class SkLearnBallTreeHashIndex (HashIndex):
         :type vec_list: list[np.ndarray[bool]] | np.ndarray[np.ndarray[bool]]
 
         """
-        if len(vec_list) > 0:
-            # If distance metric ever changes, need to update save/load model
-            # functions.
-            self.bt = BallTree(np.asarray(vec_list), self.leaf_size,
-                               metric='hamming')
-        else:
-            self.bt = None
-        self.save_model()
+        self._set_bt(self._make_bt(vec_list))
+
+    def _get_bt_hashes(self):
+        """
+        :return: Hash tuples of the rows of the current ball tree.
+        :rtype: set[tuple[bool]]
+        """
+        if self._bt_hashes is None:
+            self._bt_hashes = set()
+            if self.bt is not None:
+                self._bt_hashes.update(
+                    tuple(r) for r in
+                    np.asarray(self.bt.data).astype(bool).tolist()
+                )
+        return self._bt_hashes
+
+    def merge_delta(self):
+        """
+        Merge pending changes into the ball tree by rebuilding it, waiting for
+        any merge already in progress first.
+
+        This does nothing when there are no pending changes, which is always
+        the case when ``delta_merge_threshold`` is 0.
+        """
+        with self._merge_lock:
+            with self._model_lock:
+                if not self._delta.num_changes:
+                    return
+                snapshot = self._delta.snapshot()
+                generation = self._model_generation
+                added, _, tombstones = snapshot
+                vec_list = [np.array(t) for t in self._get_bt_hashes()
+                            if t not in tombstones]
+                vec_list.extend(added)
+
+            self._log.debug("Merging %d additions and %d removals into ball "
+                            "tree", len(added), len(tombstones))
+            bt = self._make_bt(vec_list)
+
+            with self._model_lock:
+                if generation != self._model_generation:
+                    self._log.debug("Ball tree was rebuilt during merge, "
+                                    "discarding merge result.")
+                    return
+                self._set_bt(bt)
+                self._delta.discard(snapshot)
+
+    def _merge_in_background(self):
+        try:
+            self.merge_delta()
+        except Exception:
+            self._log.exception("Failed to merge pending changes into ball "
+                                "tree")
+
+    def _merge_delta_if_needed(self):
+        """
+        Merge pending changes if there are at least as many as the merge
+        threshold, in a background thread if configured to.
+
+        This must not be called while holding the model lock.
+        """
+        with self._model_lock:
+            if self._delta.num_changes < self.delta_merge_threshold:
+                return
+            if self.delta_merge_background:
+                if self._merge_thread is None or \
+                        not self._merge_thread.is_alive():
+                    self._merge_thread = threading.Thread(
+                        target=self._merge_in_background,
+                        name="BallTreeDeltaMerge",
+                    )
+                    self._merge_thread.daemon = True
+                    self._merge_thread.start()
+                return
+        self.merge_delta()
 
     def _build_index(self, hashes):
         """
@@ -239,6 +383,8 @@ class SkLearnBallTreeHashIndex (HashIndex):
             # Convert tuples back into numpy arrays for BallTree constructor.
             hash_vector_list = list(map(lambda t: np.array(t), hash_tuple_set))
             self._build_bt_internal(hash_vector_list)
+            # Any pending changes are superseded by the new index.
+            self._delta.clear()
 
     def _update_index(self, hashes):
         """
@@ -249,9 +395,10 @@ class SkLearnBallTreeHashIndex (HashIndex):
         hash vectors.
 
         *Note:* The scikit-learn ball-tree implementation does not support
-        incremental updating of its model, so we need to rebuild the model from
-        scratch using the currently indexed hashes and the new ones provided to
-        this method.
+        incremental updating of its model, so when ``delta_merge_threshold``
+        is 0 we need to rebuild the model from scratch using the currently
+        indexed hashes and the new ones provided to this method.  Otherwise,
+        hashes not already indexed are added to the side buffer until merged.
 
         :param hashes: Iterable of numpy boolean hash vectors to add to this
             index.
@@ -261,17 +408,33 @@ class SkLearnBallTreeHashIndex (HashIndex):
         with self._model_lock:
             # Can't use iterators with numpy operations.
             new_hashes = tuple(hashes)
-            if self.bt is None:
-                # 0-row array using bit-vector size of first new entry length.
-                # - Must have at least one new hash due to super-method check.
-                indexed_hash_vectors = np.ndarray((0, len(new_hashes[0])))
-            else:
-                indexed_hash_vectors = self.bt.data
-            # Build a new index as normal with the union of source data.
-            self._log.debug("Updating index by rebuilding with union.")
-            self._build_bt_internal(
-                np.concatenate([indexed_hash_vectors, new_hashes], 0)
-            )
+            if not self.delta_merge_threshold or (self.bt is None and
+                                                  not len(self._delta)):
+                if self.bt is None:
+                    # 0-row array using bit-vector size of first new entry
+                    # length.
+                    # - Must have at least one new hash due to super-method
+                    #   check.
+                    indexed_hash_vectors = np.ndarray((0, len(new_hashes[0])))
+                else:
+                    indexed_hash_vectors = self.bt.data
+                # Build a new index as normal with the union of source data.
+                self._log.debug("Updating index by rebuilding with union.")
+                self._build_bt_internal(
+                    np.concatenate([indexed_hash_vectors, new_hashes], 0)
+                )
+                return
+
+            bt_hashes = self._get_bt_hashes()
+            for h in new_hashes:
+                h = np.asarray(h, dtype=bool)
+                h_t = tuple(h.tolist())
+                if h_t in self._delta or (h_t in bt_hashes and
+                                          h_t not in self._delta.tombstones):
+                    # Already indexed.
+                    continue
+                self._delta.add(h_t, h, h)
+        self._merge_delta_if_needed()
 
     def _remove_from_index(self, hashes):
         """
@@ -279,9 +442,11 @@ class SkLearnBallTreeHashIndex (HashIndex):
         hashes from this index.
 
         *Note:* The scikit-learn ball-tree implementation does not support
-        incremental removal from its model, so we need to rebuild the model
-        from scratch using the currently indexed hashes minus the ones provided
-        to this method.
+        incremental removal from its model, so when ``delta_merge_threshold``
+        is 0 we need to rebuild the model from scratch using the currently
+        indexed hashes minus the ones provided to this method.  Otherwise,
+        removed hashes are dropped from the side buffer or filtered out of
+        ball tree results until merged.
 
         :param hashes: Iterable of numpy boolean hash vectors to remove from
             this index.
@@ -292,8 +457,21 @@ class SkLearnBallTreeHashIndex (HashIndex):
 
         """
         with self._model_lock:
+            if self.delta_merge_threshold:
+                bt_hashes = self._get_bt_hashes()
+                hash_tuples = set()
+                for h in hashes:
+                    h_t = tuple(np.asarray(h, dtype=bool).tolist())
+                    if h_t not in self._delta and (
+                            h_t not in bt_hashes or
+                            h_t in self._delta.tombstones):
+                        raise KeyError(h)
+                    hash_tuples.add(h_t)
+                for h_t in hash_tuples:
+                    if not self._delta.remove(h_t):
+                        self._delta.tombstones.add(h_t)
             # Convert to a set of hashable tuples for removal
-            if self.bt:
+            elif self.bt:
                 tuple_matrix = set(tuple(r) for r in
                                    np.asarray(self.bt.data).tolist())
                 hash_tuples = set()
@@ -307,10 +485,12 @@ class SkLearnBallTreeHashIndex (HashIndex):
                 self._build_bt_internal(
                     list(map(lambda t: np.array(t), new_data))
                 )
+                return
             else:
                 # No index built, so anything is a key error.
                 # We can also only be here if hashes was non-zero in size.
                 raise KeyError(np.asarray(next(iter(hashes))))
+        self._merge_delta_if_needed()
 
     def _nn(self, h, n=1):
         """
@@ -325,6 +505,9 @@ class SkLearnBallTreeHashIndex (HashIndex):
         When this internal method is called, we have already checked that our
         index is not empty.
 
+        Neighbors pending addition are found by brute force and merged with
+        the ball tree results.
+
         :param h: Hash code to compute the neighbors of. Should be the same bit
             length as indexed hash codes.
         :type h: np.ndarray[bool]
@@ -338,12 +521,29 @@ class SkLearnBallTreeHashIndex (HashIndex):
 
         """
         with self._model_lock:
-            # Reselect N based on how many hashes are currently indexes
-            n = min(n, self.count())
-            # Reshaping ``h`` into an array of arrays, with just one array
-            # (ball tree deprecation warns when giving it a single array).
-            dists, idxs = self.bt.query([h], n, return_distance=True)
-            # only indexing the first entry became we're only querying with one
-            # vector
-            neighbors = np.asarray(self.bt.data)[idxs[0]].astype(bool)
-            return neighbors, dists[0]
+            tombstones = self._delta.tombstones
+            if self.bt is not None:
+                # Reselect N based on how many hashes are currently indexes,
+                # including removed hashes that are filtered out below.
+                k = min(n + len(tombstones), self.bt.data.shape[0])
+                # Reshaping ``h`` into an array of arrays, with just one array
+                # (ball tree deprecation warns when giving it a single array).
+                dists, idxs = self.bt.query([h], k, return_distance=True)
+                # only indexing the first entry became we're only querying
+                # with one vector
+                neighbors = np.asarray(self.bt.data)[idxs[0]].astype(bool)
+                dists = dists[0]
+                if tombstones:
+                    keep = np.array([tuple(r) not in tombstones
+                                     for r in neighbors.tolist()], dtype=bool)
+                    neighbors, dists = neighbors[keep], dists[keep]
+            else:
+                neighbors = np.empty((0, len(h)), dtype=bool)
+                dists = np.empty(0)
+            if len(self._delta):
+                d_neighbors, d_dists = self._delta.nn(h, n)
+                neighbors = np.vstack([neighbors] + d_neighbors)
+                dists = np.concatenate([dists, d_dists])
+                order = np.argsort(dists, kind='mergesort')
+                neighbors, dists = neighbors[order], dists[order]
+            return neighbors[:n], dists[:n]
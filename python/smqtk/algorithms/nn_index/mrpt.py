@@ -3,6 +3,7 @@ from __future__ import absolute_import, division
 from __future__ import print_function, unicode_literals
 
 from itertools import chain, groupby
+import os
 from os import path as osp
 import threading
 
@@ -13,7 +14,10 @@ from six import next
 from smqtk.algorithms.nn_index import NearestNeighborsIndex
 from smqtk.exceptions import ReadOnlyError
 from smqtk.representation import DescriptorSet
-from smqtk.representation.descriptor_element import elements_to_matrix
+from smqtk.representation.descriptor_element import (
+    DescriptorElement,
+    elements_to_matrix,
+)
 from smqtk.utils.configuration import (
     from_config_dict,
     make_default_config,
@@ -21,11 +25,110 @@ from smqtk.utils.configuration import (
 )
 from smqtk.utils.dict import merge_dict
 from smqtk.utils.file import safe_create_dir
+from smqtk.utils.parallel import parallel_map
 
 
 CHUNK_SIZE = 5000
 
 
+def _build_tree(proj, depth):
+    """
+    Build a single RP tree over the projections of a dataset.
+
+    Every branch splits its points at the median of their projection for
+    the branch's level, putting the median in the upper half if the number of
+    points is odd.
+
+    :param proj: Projections of the dataset for this tree.
+    :type proj: np.ndarray (N, depth)
+
+    :param depth: Depth of the tree.
+    :type depth: int
+
+    :return: (2^depth-1) array of splits (a packed tree, where split ``i``'s
+        children are ``2i+1`` and ``2i+2``), the (N,) array of dataset row
+        indices ordered by leaf, and the (2^depth+1) array of offsets of each
+        leaf's rows in that array.
+    :rtype: (np.ndarray, np.ndarray, np.ndarray)
+    """
+    n = proj.shape[0]
+    rows = np.arange(n)
+    splits = np.zeros(((1 << depth) - 1,), np.float64)
+    bounds = [0, n]
+    for level in range(depth):
+        next_bounds = [0]
+        for node, (beg, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+            seg_size = end - beg
+            n_split = seg_size // 2
+            # Nodes without any points leave their split unused.
+            if seg_size:
+                seg = rows[beg:end]
+                level_proj = proj[seg, level]
+                if seg_size % 2 == 0:
+                    part = np.argpartition(level_proj,
+                                           (n_split - 1, n_split))
+                    split_val = (level_proj[part[n_split - 1]] +
+                                 level_proj[part[n_split]]) / 2.0
+                else:
+                    part = np.argpartition(level_proj, n_split)
+                    split_val = level_proj[part[n_split]]
+                splits[(1 << level) - 1 + node] = split_val
+                rows[beg:end] = seg[part]
+            next_bounds.extend([beg + n_split, end])
+        bounds = next_bounds
+    return splits, rows, np.asarray(bounds, np.int64)
+
+
+def _leaf_indices(proj, splits, depth):
+    """
+    Find the leaf of each tree that each query falls into.
+
+    :param proj: Projections of the queries for every tree.
+    :type proj: np.ndarray (M, T, depth)
+
+    :param splits: Packed splits of every tree.
+    :type splits: np.ndarray (T, 2^depth-1)
+
+    :param depth: Depth of the trees.
+    :type depth: int
+
+    :return: Leaf index of each query in each tree.
+    :rtype: np.ndarray (M, T)
+    """
+    t_idx = np.arange(splits.shape[0])
+    idx = np.zeros(proj.shape[:2], np.intp)
+    for level in range(depth):
+        go_right = proj[:, :, level] >= splits[t_idx, idx]
+        idx = 2 * idx + 1 + go_right
+    # Leaf nodes follow the 2^depth-1 split nodes.
+    return idx - ((1 << depth) - 1)
+
+
+def _build_trees(projs, depth, num_trees):
+    """
+    Build RP trees over the projections of a dataset in parallel threads.
+
+    :param projs: Projections of the dataset for all trees.
+    :type projs: np.ndarray (N, num_trees, depth)
+
+    :param depth: Depth of the trees.
+    :type depth: int
+
+    :param num_trees: Number of trees.
+    :type num_trees: int
+
+    :return: List of the splits, leaf-ordered rows and leaf offsets of each
+        tree, as returned by ``_build_tree``.
+    :rtype: list[(np.ndarray, np.ndarray, np.ndarray)]
+    """
+    return list(parallel_map(
+        lambda t: _build_tree(projs[:, t], depth),
+        range(num_trees),
+        ordered=True, use_multiprocessing=False,
+        name='mrpt_build_trees',
+    ))
+
+
 class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
     """
     Nearest Neighbors index that uses the MRPT algorithm of [Hyvönen et
@@ -43,6 +146,12 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
     tree. The neighbors are drawn from the set of points that are in the most
     leaves.
 
+    Each tree's leaves are stored as arrays of row offsets (a CSR layout) into
+    a matrix of the indexed vectors, which may be memory-mapped from file.
+    Queries are projected and traversed through all trees at once, and
+    candidates are re-ranked by exact distance over the gathered rows of the
+    vector matrix.
+
     The performance will depend on settings for the parameters:
 
     - If `depth` is too high, then the leaves will not have enough points
@@ -129,7 +238,8 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
                  # Parameters for building an index
                  num_trees=10, depth=1, random_seed=None,
                  pickle_protocol=pickle.HIGHEST_PROTOCOL,
-                 use_multiprocessing=False):
+                 use_multiprocessing=False, vectors_filepath=None,
+                 vote_threshold=1):
         """
         Initialize MRPT index properties. Does not contain a queryable index
         until one is built via the ``build_index`` method, or loaded from
@@ -173,9 +283,21 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
         :type pickle_protocol: int
 
         :param use_multiprocessing: Whether or not to use discrete processes
-            as the parallelization agent vs python threads.
+            as the parallelization agent vs python threads when reading
+            descriptor vectors.
         :type use_multiprocessing: bool
 
+        :param vectors_filepath: Optional file location to store the matrix
+            of indexed vectors at when built, which is memory-mapped when
+            loaded. If not configured, the vector matrix is kept in memory and,
+            when loading an existing index, gathered from the descriptor set.
+        :type vectors_filepath: None | str
+
+        :param vote_threshold: Minimum number of trees whose query leaf must
+            contain a descriptor for it to be a candidate neighbor. The
+            default of 1 considers the union of all query leaves.
+        :type vote_threshold: int
+
         """
         super(MRPTNearestNeighborsIndex, self).__init__()
 
@@ -192,6 +314,7 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
 
         self._index_filepath = normpath(index_filepath)
         self._index_param_filepath = normpath(parameters_filepath)
+        self._vectors_filepath = normpath(vectors_filepath)
         # Now they're either None or an absolute path
 
         # parameters for building an index
@@ -201,9 +324,23 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
         if num_trees < 1:
             raise ValueError("The number of trees must be positive.")
         self._num_trees = num_trees
-
-        # Set the list of trees to an empty list to have a sane value
-        self._trees = []
+        if vote_threshold < 1:
+            raise ValueError("The vote threshold must be positive.")
+        self._vote_threshold = vote_threshold
+
+        # Model components, set when built or loaded.
+        #: :type: None | np.ndarray
+        self._random_bases = None  # (T, d, depth)
+        #: :type: None | np.ndarray
+        self._splits = None  # (T, 2^depth-1)
+        #: :type: None | np.ndarray
+        self._leaf_rows = None  # (T, N) vector row indices ordered by leaf
+        #: :type: None | np.ndarray
+        self._leaf_offsets = None  # (T, 2^depth+1) leaf offsets in rows
+        #: :type: list[collections.Hashable]
+        self._uuids = []  # Descriptor UID of each vector row
+        #: :type: None | np.ndarray
+        self._vectors = None  # (N, d) indexed vectors
 
         #: :type: None | int
         self._rand_seed = None
@@ -226,6 +363,8 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
             "use_multiprocessing": self._use_multiprocessing,
             "depth": self._depth,
             "num_trees": self._num_trees,
+            "vectors_filepath": self._vectors_filepath,
+            "vote_threshold": self._vote_threshold,
         }
 
     def _has_model_files(self):
@@ -255,10 +394,10 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
             "Leaf size             (L = N/2^l)  ~ %g/2^%d = %g",
             n, self._depth, leaf_size)
         self._log.debug(
-            "UUIDs stored                (T*N)  = %g * %g = %g",
+            "Row indices stored          (T*N)  = %g * %g = %g",
             self._num_trees, n, self._num_trees*n)
         self._log.debug(
-            "Examined UUIDs              (T*L)  ~ %g * %g = %g",
+            "Examined rows               (T*L)  ~ %g * %g = %g",
             self._num_trees, leaf_size, self._num_trees*leaf_size)
         self._log.debug(
             "Examined/DB size  (T*L/N = T/2^l)  ~ %g/%g = %.3f",
@@ -270,16 +409,34 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
                 "all the leaves of the tree. Consider lowering the depth "
                 "parameter.", n, self._depth)
 
+        # Vectors are written to a temporary file, which replaces the
+        # configured file when complete, so any currently memory-mapped
+        # vectors remain valid until then.
+        vectors_tmp_fp = None
+        if self._vectors_filepath:
+            safe_create_dir(osp.dirname(self._vectors_filepath))
+            vectors_tmp_fp = self._vectors_filepath + '.tmp.npy'
+            vectors = np.lib.format.open_memmap(
+                vectors_tmp_fp, mode='w+', dtype=sample_v.dtype,
+                shape=(n, d)
+            )
+        else:
+            vectors = np.empty((n, d), sample_v.dtype)
+
         self._log.debug("Projecting onto random bases")
         # Build all the random bases and the projections at the same time
         # (_num_trees * _depth shouldn't really be that high -- if it is,
         # you're a monster)
         if self._rand_seed is not None:
             np.random.seed(self._rand_seed)
-        random_bases = np.random.randn(self._num_trees, d, self._depth)
-        projs = np.empty((n, self._num_trees, self._depth), dtype=np.float64)
+        # Projected in the vectors' type, if at least single precision, so
+        # chunks of vectors are not upcast.
+        proj_dtype = np.result_type(vectors.dtype, np.float32)
+        random_bases = np.random.randn(self._num_trees, d, self._depth) \
+            .astype(proj_dtype)
+        projs = np.empty((n, self._num_trees, self._depth), dtype=proj_dtype)
+        uuids = []
         # Load the data in chunks (because n * d IS high)
-        pts_array = np.empty((chunk_size, d), sample_v.dtype)
         # Enumerate the descriptors and div the index by the chunk size
         # (causes each loop to only deal with at most chunk_size descriptors at
         # a time).
@@ -287,109 +444,38 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
                             lambda pair: pair[0] // chunk_size):
             # Items are still paired so extract the descriptors
             chunk = list(desc for (i, desc) in g)
+            uuids.extend(desc.uuid() for desc in chunk)
             # Take care of dangling end piece
             k_beg = k * chunk_size
             k_end = min((k+1) * chunk_size, n)
-            k_len = k_end - k_beg
             # Run the descriptors through elements_to_matrix
             elements_to_matrix(
-                chunk, mat=pts_array, report_interval=1.0,
+                chunk, mat=vectors[k_beg:k_end], report_interval=1.0,
                 use_multiprocessing=self._use_multiprocessing)
             # Insert into projection matrix
-            projs[k_beg:k_end] = pts_array[:k_len].dot(random_bases)
-        del pts_array
+            projs[k_beg:k_end] = vectors[k_beg:k_end].dot(random_bases)
 
         self._log.debug("Constructing trees")
-        desc_ids = list(self._descriptor_set.keys())
-        # Start with no trees
-        self._trees = []
-        for t in range(self._num_trees):
-            # Array of splits is a packed tree
-            splits = np.empty(((1 << self._depth) - 1,), np.float64)
-
-            self._log.debug("Constructing tree #%d", t+1)
-
-            # Build the tree & store it
-            leaves = self._build_single_tree(projs[:, t], splits)
-            leaves = [[desc_ids[idx] for idx in leaf]
-                      for leaf in leaves]
-            self._trees.append({
-                'random_basis': (random_bases[t]),
-                'splits': splits,
-                'leaves': leaves
-            })
-
-    def _build_single_tree(self, proj, splits):
-        """
-        Build a single RP tree for fast kNN search
+        depth = self._depth
+        trees = _build_trees(projs, depth, self._num_trees)
+        del projs
 
-        :param proj: Projections of the dataset for this tree
-        :type proj: np.ndarray (N, levels)
-
-        :param splits: (2^depth-1) array of splits corresponding to leaves
-                       (tree, where immediate descendants follow parents;
-                       index i's children are 2i+1 and 2i+2
-        :type splits: np.ndarray
-
-        :return: Tree of splits and list of index arrays for each leaf
-        :rtype: list[np.ndarray]
-        """
-        def _build_recursive(indices, level=0, split_index=0):
-            """
-            Descend recursively into tree to build it, setting splits and
-            returning indices for leaves
-
-            :param indices: The current set of indices before partitioning
-            :param level: The level in the tree
-            :param split_index: The index of the split to set
-
-            :return: A list of arrays representing leaf membership
-            :rtype: list[np.ndarray]
-            """
-            # If we're at the bottom, no split, just return the set
-            if level == self._depth:
-                return [indices]
-
-            n = indices.size
-            # If we literally don't have enough to populate the leaf, make it
-            # empty
-            if n < 1:
-                return []
-
-            # Get the random projections for these indices at this level
-            # NB: Recall that the projection matrix has shape (levels, N)
-            level_proj = proj[indices, level]
-
-            # Split at the median if even, put median in upper half if not
-            n_split = n // 2
-            if n % 2 == 0:
-                part_indices = np.argpartition(
-                    level_proj, (n_split - 1, n_split))
-                split_val = level_proj[part_indices[n_split - 1]]
-                split_val += level_proj[part_indices[n_split]]
-                split_val /= 2.0
+        row_dtype = np.int32 if n < np.iinfo(np.int32).max else np.int64
+        with self._model_lock:
+            self._random_bases = random_bases
+            self._splits = np.stack([t[0] for t in trees])
+            self._leaf_rows = np.stack([t[1] for t in trees]) \
+                .astype(row_dtype)
+            self._leaf_offsets = np.stack([t[2] for t in trees])
+            self._uuids = uuids
+            if vectors_tmp_fp:
+                vectors.flush()
+                del vectors
+                os.rename(vectors_tmp_fp, self._vectors_filepath)
+                self._vectors = np.load(self._vectors_filepath,
+                                        mmap_mode='r')
             else:
-                part_indices = np.argpartition(level_proj, n_split)
-                split_val = level_proj[part_indices[n_split]]
-
-            splits[split_index] = split_val
-
-            # part_indices is relative to this block of values, recover
-            # main indices
-            left_indices = indices[part_indices[:n_split]]
-            right_indices = indices[part_indices[n_split:]]
-
-            # Descend into each split and get sub-splits
-            left_out = _build_recursive(left_indices, level=level + 1,
-                                        split_index=2 * split_index + 1)
-            right_out = _build_recursive(right_indices, level=level + 1,
-                                         split_index=2 * split_index + 2)
-
-            # Assemble index set
-            left_out.extend(right_out)
-            return left_out
-
-        return _build_recursive(np.arange(proj.shape[0]))
+                self._vectors = vectors
 
     def _save_mrpt_model(self):
         self._log.debug("Caching index and parameters: %s, %s",
@@ -397,9 +483,16 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
         if self._index_filepath:
             self._log.debug("Caching index: %s", self._index_filepath)
             safe_create_dir(osp.dirname(self._index_filepath))
+            index = {
+                "random_bases": self._random_bases,
+                "splits": self._splits,
+                "leaf_rows": self._leaf_rows,
+                "leaf_offsets": self._leaf_offsets,
+                "uuids": self._uuids,
+            }
             # noinspection PyTypeChecker
             with open(self._index_filepath, "wb") as f:
-                pickle.dump(self._trees, f, self._pickle_protocol)
+                pickle.dump(index, f, self._pickle_protocol)
         if self._index_param_filepath:
             self._log.debug("Caching index params: %s",
                             self._index_param_filepath)
@@ -410,16 +503,43 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
                 "depth": self._depth,
             }
             # noinspection PyTypeChecker
-            with open(self._index_param_filepath, "w") as f:
+            with open(self._index_param_filepath, "wb") as f:
                 pickle.dump(params, f, self._pickle_protocol)
 
+    def _set_legacy_trees(self, trees):
+        """
+        Set model components from trees stored in the previous format: a list
+        of dictionaries with each tree's random basis, splits and leaves as
+        lists of descriptor UIDs.
+
+        :param trees: Trees in the previous format.
+        :type trees: list[dict]
+        """
+        self._log.debug("Converting index from list of trees format")
+        n_leaves = 1 << self._depth
+        uuids = [uid for leaf in trees[0]['leaves'] for uid in leaf]
+        uid2row = dict((uid, i) for i, uid in enumerate(uuids))
+        leaf_rows = []
+        leaf_offsets = []
+        for tree in trees:
+            leaf_rows.append([uid2row[uid]
+                              for leaf in tree['leaves'] for uid in leaf])
+            sizes = [len(leaf) for leaf in tree['leaves']]
+            sizes += [0] * (n_leaves - len(sizes))
+            leaf_offsets.append(np.cumsum([0] + sizes))
+        self._random_bases = np.stack([t['random_basis'] for t in trees])
+        self._splits = np.stack([t['splits'] for t in trees])
+        self._leaf_rows = np.asarray(leaf_rows, np.int64)
+        self._leaf_offsets = np.asarray(leaf_offsets, np.int64)
+        self._uuids = uuids
+
     def _load_mrpt_model(self):
         self._log.debug("Loading index and parameters: %s, %s",
                         self._index_filepath, self._index_param_filepath)
         if self._index_param_filepath:
             self._log.debug("Loading index params: %s",
                             self._index_param_filepath)
-            with open(self._index_param_filepath) as f:
+            with open(self._index_param_filepath, "rb") as f:
                 params = pickle.load(f)
             self._read_only = params['read_only']
             self._num_trees = params['num_trees']
@@ -430,7 +550,29 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
             self._log.debug("Loading index: %s", self._index_filepath)
             # noinspection PyTypeChecker
             with open(self._index_filepath, "rb") as f:
-                self._trees = pickle.load(f)
+                index = pickle.load(f)
+            if isinstance(index, list):
+                self._set_legacy_trees(index)
+            else:
+                self._random_bases = index['random_bases']
+                self._splits = index['splits']
+                self._leaf_rows = index['leaf_rows']
+                self._leaf_offsets = index['leaf_offsets']
+                self._uuids = index['uuids']
+
+            if (self._vectors_filepath and
+                    osp.isfile(self._vectors_filepath)):
+                self._log.debug("Memory-mapping vectors: %s",
+                                self._vectors_filepath)
+                self._vectors = np.load(self._vectors_filepath,
+                                        mmap_mode='r')
+            else:
+                self._log.debug("Gathering vectors from descriptor set")
+                self._vectors = np.vstack(DescriptorElement.get_many_vectors(
+                    list(self._descriptor_set.get_many_descriptors(
+                        self._uuids
+                    ))
+                ))
 
     def count(self):
         """
@@ -518,6 +660,55 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
             self._descriptor_set.remove_many_descriptors(uids)
             self.build_index(self._descriptor_set)
 
+    def _query_rows(self, leaves, q, n):
+        """
+        Get the nearest vector rows to a query among the rows of its leaves.
+
+        :param leaves: (T,) leaf index of the query in each tree.
+        :type leaves: np.ndarray
+
+        :param q: Query vector.
+        :type q: np.ndarray
+
+        :param n: Number of nearest neighbors to find.
+        :type n: int
+
+        :return: Nearest vector rows and their squared euclidean distances to
+            the query, in order of increasing distance.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        t_idx = np.arange(leaves.size)
+        starts = self._leaf_offsets[t_idx, leaves]
+        sizes = self._leaf_offsets[t_idx, leaves + 1] - starts
+        # Gather the rows of every tree's leaf at once: position of each row
+        # within its tree's row array.
+        ends = np.cumsum(sizes)
+        pos = (np.arange(ends[-1] if ends.size else 0) +
+               np.repeat(starts - (ends - sizes), sizes))
+        rows = self._leaf_rows[np.repeat(t_idx, sizes), pos]
+
+        # Count the votes of each row: the number of leaves it is in.
+        rows, votes = np.unique(rows, return_counts=True)
+        rows = rows[votes >= self._vote_threshold]
+        hit_union = rows.size
+        self._log.debug("Hit union (h): %g", hit_union)
+
+        # Exact distances over the contiguous gathered sub-matrix of
+        # candidates.
+        cand = np.asarray(self._vectors[rows])
+        dists = ((cand - q) ** 2).sum(axis=1)
+
+        if n > dists.shape[0]:
+            self._log.warning(
+                "There were fewer descriptors (%d) in the set than "
+                "requested in the query (%d). Returning entire set.",
+                dists.shape[0], n)
+        if n < dists.shape[0]:
+            near = np.argpartition(dists, n - 1)[:n]
+            rows, dists = rows[near], dists[near]
+        order = dists.argsort()
+        return rows[order], dists[order]
+
     def _nn(self, d, n=1):
         """
         Internal method to be implemented by sub-classes to return the nearest
@@ -537,54 +728,35 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
         :rtype: (tuple[smqtk.representation.DescriptorElement], tuple[float])
 
         """
-        def _query_single(tree):
-            # Search a single tree for the leaf that matches the query
-            # NB: random_basis has shape (levels, N)
-            random_basis = tree['random_basis']
-            proj_query = d.vector().dot(random_basis)
-            splits = tree['splits']
-            idx = 0
-            for level in range(depth):
-                split_point = splits[idx]
-                # Look at the level'th coordinate of proj_query
-                if proj_query[level] < split_point:
-                    idx = 2 * idx + 1
-                else:
-                    idx = 2 * idx + 2
+        return next(iter(self._nn_many([d], n)))
 
-            # idx will be `2^depth - 1` greater than the position of the leaf
-            # in the list
-            idx -= ((1 << depth) - 1)
-            return tree['leaves'][idx]
-
-        def _exact_query(_uuids):
-            set_size = len(_uuids)
-            self._log.debug("Exact query requested with %d descriptors",
-                            set_size)
+    def _nn_many(self, descriptors, n=1):
+        """
+        Internal method to return the nearest `N` neighbors to each of the
+        given descriptor elements.
 
-            # Assemble the array to query from the descriptors that match
-            d_v = d.vector()
-            pts_array = np.empty((set_size, d_v.size), dtype=d_v.dtype)
-            descriptors = self._descriptor_set.get_many_descriptors(_uuids)
-            for i, desc in enumerate(descriptors):
-                pts_array[i, :] = desc.vector()
+        Queries are projected onto the random bases of every tree and
+        traversed through all trees at once. Neighbor descriptors of all
+        queries are retrieved from the descriptor set together.
 
-            dists = ((pts_array - d_v) ** 2).sum(axis=1)
+        :param descriptors: Descriptor elements to compute the neighbors of.
+        :type descriptors:
+            list[smqtk.representation.DescriptorElement]
 
-            if n > dists.shape[0]:
-                self._log.warning(
-                    "There were fewer descriptors (%d) in the set than "
-                    "requested in the query (%d). Returning entire set.",
-                    dists.shape[0], n)
-            if n >= dists.shape[0]:
-                return _uuids, dists
+        :param n: Number of nearest neighbors to find for each descriptor.
+        :type n: int
 
-            near_indices = np.argpartition(dists, n - 1)[:n]
-            return ([_uuids[idx] for idx in near_indices],
-                    dists[near_indices])
+        :return: Iterable, parallel to the input descriptors, of tuples of
+            nearest N DescriptorElement instances and a tuple of the distance
+            values to those neighbors.
+        :rtype: collections.Iterable[
+            (tuple[smqtk.representation.DescriptorElement], tuple[float])]
 
+        """
+        q = np.vstack(DescriptorElement.get_many_vectors(descriptors))
         with self._model_lock:
-            self._log.debug("Received query for %d nearest neighbors", n)
+            self._log.debug("Received %d queries for %d nearest neighbors",
+                            len(q), n)
 
             depth, ntrees, db_size = self._depth, self._num_trees, self.count()
             leaf_size = db_size//(1 << depth)
@@ -595,30 +767,26 @@ class MRPTNearestNeighborsIndex (NearestNeighborsIndex):
                     "descriptors requested by the query (%d). The query "
                     "result will be deficient.", leaf_size, ntrees, n)
 
-            # Take union of all tree hits
-            tree_hits = set()
-            for t in self._trees:
-                tree_hits.update(_query_single(t))
-
-            hit_union = len(tree_hits)
-            self._log.debug(
-                "Query (k): %g, Hit union (h): %g, DB (N): %g, "
-                "Leaf size (L = N/2^l): %g, Examined (T*L): %g",
-                n, hit_union, db_size, leaf_size, leaf_size * ntrees)
-            self._log.debug("k/L     = %.3f", n / leaf_size)
-            self._log.debug("h/N     = %.3f", hit_union / db_size)
-            self._log.debug("h/L     = %.3f", hit_union / leaf_size)
-            self._log.debug("h/(T*L) = %.3f", hit_union / (leaf_size * ntrees))
-
-            uuids, distances = _exact_query(list(tree_hits))
-            order = distances.argsort()
-            uuids, distances = zip(
-                *((uuids[oidx], distances[oidx]) for oidx in order))
-
-            self._log.debug("Returning query result of size %g", len(uuids))
-
-            return (tuple(self._descriptor_set.get_many_descriptors(uuids)),
-                    tuple(distances))
+            # (M, T, depth) projections of every query for every tree.
+            proj = q.astype(self._random_bases.dtype, copy=False) \
+                .dot(self._random_bases)
+            leaves = _leaf_indices(proj, self._splits, depth)
+            results = [self._query_rows(q_leaves, q_vec, n)
+                       for q_leaves, q_vec in zip(leaves, q)]
+            uuids = self._uuids
+
+        # Retrieve the neighbor descriptors of all queries at once.
+        r_uuids = [[uuids[r] for r in rows] for rows, _ in results]
+        descriptors = list(self._descriptor_set.get_many_descriptors(
+            [uid for q_uuids in r_uuids for uid in q_uuids]
+        ))
+        offset = 0
+        for q_uuids, (_, dists) in zip(r_uuids, results):
+            q_descriptors = descriptors[offset:offset + len(q_uuids)]
+            offset += len(q_uuids)
+            self._log.debug("Returning query result of size %g",
+                            len(q_uuids))
+            yield tuple(q_descriptors), tuple(dists.tolist())
 
 
 NN_INDEX_CLASS = MRPTNearestNeighborsIndex
@@ -0,0 +1,540 @@
+from __future__ import division
+
+from itertools import groupby
+from os import path as osp
+import threading
+
+import numpy as np
+from six.moves import cPickle as pickle, range, zip
+
+from smqtk.algorithms.nn_index import NearestNeighborsIndex
+from smqtk.algorithms.nn_index.brute_force import _merge_top_k
+from smqtk.exceptions import ReadOnlyError
+from smqtk.representation import DescriptorSet
+from smqtk.representation.descriptor_element import DescriptorElement
+from smqtk.utils.configuration import (
+    from_config_dict,
+    make_default_config,
+    to_config_dict
+)
+from smqtk.utils.dict import merge_dict
+from smqtk.utils.file import safe_create_dir
+from smqtk.utils.product_quantization import ProductQuantizer
+
+
+CHUNK_SIZE = 5000
+
+
+class PQNearestNeighborsIndex (NearestNeighborsIndex):
+    """
+    Approximate euclidean nearest-neighbors index over product-quantization
+    codes of the indexed vectors.
+
+    Each indexed vector is stored as ``num_subspaces`` bytes, the indices of
+    its nearest centroids in each subspace of a ``ProductQuantizer`` trained
+    on a sample of the indexed vectors. Queries are compared to every code by
+    asymmetric distance computation: distances from the query's sub-vectors
+    to all centroids are computed once into lookup tables, then summed by
+    code. No FAISS or other native library is required.
+
+    Optionally, ``rerank_factor`` times the requested number of neighbors are
+    found by approximate distance and re-ranked by their exact distances to
+    the query, computed from the vectors of the descriptor set. Without
+    re-ranking, returned distances are approximate.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        return True
+
+    @classmethod
+    def get_default_config(cls):
+        """
+        Generate and return a default configuration dictionary for this class.
+        This will be primarily used for generating what the configuration
+        dictionary would look like for this class without instantiating it.
+
+        By default, we observe what this class's constructor takes as
+        arguments, turning those argument names into configuration dictionary
+        keys. If any of those arguments have defaults, we will add those
+        values into the configuration dictionary appropriately. The dictionary
+        returned should only contain JSON compliant value types.
+
+        It is not be guaranteed that the configuration dictionary returned
+        from this method is valid for construction of an instance of this
+        class.
+
+        :return: Default configuration dictionary for the class.
+        :rtype: dict
+
+        """
+        default = super(PQNearestNeighborsIndex, cls).get_default_config()
+        default['descriptor_set'] = \
+            make_default_config(DescriptorSet.get_impls())
+        return default
+
+    @classmethod
+    def from_config(cls, config_dict, merge_default=True):
+        """
+        Instantiate a new instance of this class given the configuration
+        JSON-compliant dictionary encapsulating initialization arguments.
+
+        This method should not be called via super unless and instance of the
+        class is desired.
+
+        :param config_dict: JSON compliant dictionary encapsulating
+            a configuration.
+        :type config_dict: dict
+
+        :param merge_default: Merge the given configuration on top of the
+            default provided by ``get_default_config``.
+        :type merge_default: bool
+
+        :return: Constructed instance from the provided config.
+        :rtype: PQNearestNeighborsIndex
+
+        """
+        if merge_default:
+            cfg = cls.get_default_config()
+            merge_dict(cfg, config_dict)
+        else:
+            cfg = config_dict
+
+        cfg['descriptor_set'] = \
+            from_config_dict(cfg['descriptor_set'],
+                             DescriptorSet.get_impls())
+
+        return super(PQNearestNeighborsIndex, cls).from_config(cfg, False)
+
+    def __init__(self, descriptor_set, index_filepath=None,
+                 quantizer_filepath=None, num_subspaces=8, num_centroids=256,
+                 num_iterations=20, train_sample_size=65536, rerank_factor=0,
+                 block_size=65536, random_seed=None, read_only=False,
+                 pickle_protocol=pickle.HIGHEST_PROTOCOL):
+        """
+        Initialize the index. Does not contain a queryable index until one is
+        built via the ``build_index`` method, or loaded from an existing model
+        file.
+
+        :param descriptor_set: Index in which DescriptorElements will be
+            stored, from which neighbors are returned and vectors are
+            re-ranked by.
+        :type descriptor_set: smqtk.representation.DescriptorSet
+
+        :param index_filepath: Optional file location to load/store the UIDs
+            and codes of the indexed vectors, and the quantizer centroids,
+            when initialized and/or built.
+
+            If not configured, no model files are written to or loaded from
+            disk.
+        :type index_filepath: None | str
+
+        :param quantizer_filepath: Optional file location of a trained
+            quantizer to encode vectors with when building the index. If the
+            file does not exist, the quantizer trained when building is saved
+            to it, so that later builds reuse it.
+        :type quantizer_filepath: None | str
+
+        :param num_subspaces: Number of subspaces vectors are split into,
+            which must divide the descriptor dimension. This is the number of
+            bytes stored per indexed vector.
+        :type num_subspaces: int
+
+        :param num_centroids: Number of centroids of each subspace, up to
+            256.
+        :type num_centroids: int
+
+        :param num_iterations: Number of k-means iterations when training the
+            quantizer.
+        :type num_iterations: int
+
+        :param train_sample_size: Maximum number of indexed vectors, sampled
+            at random, to train the quantizer on. At least ``num_centroids``
+            vectors must be indexed.
+        :type train_sample_size: int
+
+        :param rerank_factor: If positive, this many times the requested
+            number of neighbors are re-ranked by exact distance.
+        :type rerank_factor: int
+
+        :param block_size: Number of codes to compare queries against at a
+            time.
+        :type block_size: int
+
+        :param random_seed: Optional random number generator seed for
+            deterministic sampling and training.
+        :type random_seed: None | int
+
+        :param read_only: If True, modifying the index raises a
+            ``ReadOnlyError``.
+        :type read_only: bool
+
+        :param pickle_protocol: The protocol version to be used by the pickle
+            module to serialize the index file.
+        :type pickle_protocol: int
+
+        :raises ValueError: Invalid quantizer parameters, re-rank factor or
+            block size.
+
+        """
+        super(PQNearestNeighborsIndex, self).__init__()
+
+        self._descriptor_set = descriptor_set
+
+        def normpath(p):
+            return (p and osp.abspath(osp.expanduser(p))) or p
+
+        self._index_filepath = normpath(index_filepath)
+        self._quantizer_filepath = normpath(quantizer_filepath)
+
+        # Validates the quantizer parameters.
+        ProductQuantizer(num_subspaces, num_centroids)
+        self._num_subspaces = num_subspaces
+        self._num_centroids = num_centroids
+        self._num_iterations = num_iterations
+        self._train_sample_size = train_sample_size
+        if rerank_factor < 0:
+            raise ValueError("The re-rank factor must not be negative.")
+        self._rerank_factor = rerank_factor
+        if block_size < 1:
+            raise ValueError("The block size must be positive.")
+        self._block_size = block_size
+        self._random_seed = random_seed
+        self._read_only = read_only
+        self._pickle_protocol = pickle_protocol
+
+        # Lock for model component access.
+        self._model_lock = threading.RLock()
+
+        # Model components, set when built or loaded.
+        #: :type: None | ProductQuantizer
+        self._pq = None
+        #: :type: list[collections.Hashable]
+        self._uuids = []  # Descriptor UID of each code row
+        #: :type: dict[collections.Hashable, int]
+        self._uid2row = {}
+        #: :type: None | np.ndarray
+        self._codes = None  # (N, num_subspaces) uint8 codes
+
+        if self._index_filepath and osp.isfile(self._index_filepath):
+            self._log.debug("Found existing model files. Loading.")
+            self._load_model()
+
+    def get_config(self):
+        return {
+            "descriptor_set": to_config_dict(self._descriptor_set),
+            "index_filepath": self._index_filepath,
+            "quantizer_filepath": self._quantizer_filepath,
+            "num_subspaces": self._num_subspaces,
+            "num_centroids": self._num_centroids,
+            "num_iterations": self._num_iterations,
+            "train_sample_size": self._train_sample_size,
+            "rerank_factor": self._rerank_factor,
+            "block_size": self._block_size,
+            "random_seed": self._random_seed,
+            "read_only": self._read_only,
+            "pickle_protocol": self._pickle_protocol,
+        }
+
+    def _load_model(self):
+        self._log.debug("Loading index: %s", self._index_filepath)
+        # noinspection PyTypeChecker
+        with open(self._index_filepath, "rb") as f:
+            index = pickle.load(f)
+        pq = None
+        if index['centroids'] is not None:
+            pq = ProductQuantizer(self._num_subspaces, self._num_centroids,
+                                  self._num_iterations, self._random_seed)
+            pq.centroids = index['centroids']
+        self._set_model(pq, index['uuids'], index['codes'])
+
+    def _save_model(self):
+        if self._index_filepath:
+            self._log.debug("Caching index: %s", self._index_filepath)
+            safe_create_dir(osp.dirname(self._index_filepath))
+            index = {
+                "centroids": self._pq.centroids if self._pq else None,
+                "uuids": self._uuids,
+                "codes": self._codes,
+            }
+            # noinspection PyTypeChecker
+            with open(self._index_filepath, "wb") as f:
+                pickle.dump(index, f, self._pickle_protocol)
+
+    def _set_model(self, pq, uuids, codes):
+        with self._model_lock:
+            self._pq = pq
+            self._uuids = uuids
+            self._uid2row = dict((uid, i) for i, uid in enumerate(uuids))
+            self._codes = codes
+
+    def count(self):
+        """
+        :return: Number of elements in this index.
+        :rtype: int
+        """
+        with self._model_lock:
+            return len(self._uuids)
+
+    def _check_writable(self):
+        if self._read_only:
+            raise ReadOnlyError("Cannot modify container attributes due to "
+                                "being in read-only mode.")
+
+    def _iter_chunks(self):
+        """
+        :return: Iterator of chunks of descriptors of the descriptor set.
+        :rtype: __generator[list[smqtk.representation.DescriptorElement]]
+        """
+        for _, g in groupby(enumerate(self._descriptor_set.iterdescriptors()),
+                            lambda pair: pair[0] // CHUNK_SIZE):
+            yield [desc for _, desc in g]
+
+    def _get_quantizer(self):
+        """
+        Load the configured quantizer file if it exists, or train a quantizer
+        on a random sample of the vectors of the descriptor set, saving it to
+        the configured file.
+
+        :rtype: ProductQuantizer
+        """
+        if self._quantizer_filepath and osp.isfile(self._quantizer_filepath):
+            self._log.debug("Loading quantizer: %s", self._quantizer_filepath)
+            return ProductQuantizer.load(self._quantizer_filepath)
+
+        n = self._descriptor_set.count()
+        rng = np.random.RandomState(self._random_seed)
+        sample = np.zeros(n, bool)
+        sample[rng.choice(n, min(n, self._train_sample_size),
+                          replace=False)] = True
+        train = []
+        offset = 0
+        for chunk in self._iter_chunks():
+            chunk_sample = sample[offset:offset + len(chunk)]
+            offset += len(chunk)
+            train.extend(DescriptorElement.get_many_vectors(
+                [d for d, s in zip(chunk, chunk_sample) if s]
+            ))
+        pq = ProductQuantizer(self._num_subspaces, self._num_centroids,
+                              self._num_iterations, self._random_seed)
+        self._log.info("Training product quantizer on %d vectors", len(train))
+        pq.train(np.vstack(train))
+        if self._quantizer_filepath:
+            self._log.debug("Saving quantizer: %s", self._quantizer_filepath)
+            safe_create_dir(osp.dirname(self._quantizer_filepath))
+            # noinspection PyTypeChecker
+            with open(self._quantizer_filepath, "wb") as f:
+                pq.save(f)
+        return pq
+
+    def _build_index(self, descriptors):
+        """
+        Internal method to be implemented by sub-classes to build the index
+        with the given descriptor data elements.
+
+        Subsequent calls to this method should rebuild the current index.  This
+        method shall not add to the existing index nor raise an exception to as
+        to protect the current index.
+
+        :param descriptors: Iterable of descriptor elements to build index
+            over.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        """
+        with self._model_lock:
+            self._check_writable()
+            self._log.info("Building new product-quantization index")
+            self._descriptor_set.clear()
+            self._descriptor_set.add_many_descriptors(descriptors)
+
+            pq = self._get_quantizer()
+            uuids = []
+            codes = np.empty((self._descriptor_set.count(), pq.num_subspaces),
+                             dtype=np.uint8)
+            for chunk in self._iter_chunks():
+                codes[len(uuids):len(uuids) + len(chunk)] = pq.encode(
+                    np.vstack(DescriptorElement.get_many_vectors(chunk))
+                )
+                uuids.extend(d.uuid() for d in chunk)
+
+            self._set_model(pq, uuids, codes)
+            self._save_model()
+
+    def _update_index(self, descriptors):
+        """
+        Internal method to be implemented by sub-classes to additively update
+        the current index with the one or more descriptor elements given.
+
+        If no index exists yet, a new one should be created using the given
+        descriptors.
+
+        New descriptors are encoded with the current quantizer and appended,
+        replacing the codes of any indexed descriptors with the same UIDs.
+
+        :param descriptors: Iterable of descriptor elements to add to this
+            index.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        """
+        with self._model_lock:
+            self._check_writable()
+            if self._pq is None:
+                self.build_index(descriptors)
+                return
+            # Later duplicates of a UID replace earlier ones.
+            new = dict((d.uuid(), d) for d in descriptors)
+            new_uuids = list(new)
+            new_codes = self._pq.encode(np.vstack(
+                DescriptorElement.get_many_vectors(
+                    [new[uid] for uid in new_uuids]
+                )
+            ))
+            self._descriptor_set.add_many_descriptors(new.values())
+
+            uuids = list(self._uuids)
+            codes = self._codes.copy()
+            appended = []
+            for uid, code in zip(new_uuids, new_codes):
+                row = self._uid2row.get(uid)
+                if row is None:
+                    uuids.append(uid)
+                    appended.append(code)
+                else:
+                    codes[row] = code
+            if appended:
+                codes = np.vstack([codes, appended])
+            self._log.debug("Appending %d and replacing %d codes",
+                            len(appended), len(new_uuids) - len(appended))
+            self._set_model(self._pq, uuids, codes)
+            self._save_model()
+
+    def _remove_from_index(self, uids):
+        """
+        Internal method to be implemented by sub-classes to partially remove
+        descriptors from this index associated with the given UIDs.
+
+        :param uids: Iterable of UIDs of descriptors to remove from this index.
+        :type uids: collections.Iterable[collections.Hashable]
+
+        :raises KeyError: One or more UIDs provided do not match any stored
+            descriptors.
+
+        """
+        with self._model_lock:
+            self._check_writable()
+            uids = set(uids)
+            for uid in uids:
+                if uid not in self._uid2row:
+                    raise KeyError(uid)
+            self._descriptor_set.remove_many_descriptors(uids)
+
+            keep = np.ones(len(self._uuids), bool)
+            keep[[self._uid2row[uid] for uid in uids]] = False
+            uuids = [uid for uid, k in zip(self._uuids, keep) if k]
+            self._set_model(self._pq, uuids, self._codes[keep])
+            self._save_model()
+
+    def _search(self, q, k, pq, codes):
+        """
+        Find the nearest codes to each query by approximate distance.
+
+        :param q: (M, d) query vectors.
+        :type q: np.ndarray
+
+        :param k: Number of nearest codes to find.
+        :type k: int
+
+        :param pq: Quantizer of the codes.
+        :type pq: ProductQuantizer
+
+        :param codes: (N, num_subspaces) indexed codes.
+        :type codes: np.ndarray
+
+        :return: (M, min(k, N)) nearest rows of each query and their
+            approximate squared distances, in order of increasing distance.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        tables = pq.distance_tables(q)
+        bs = self._block_size
+        rows = np.empty((len(q), 0), int)
+        dists = np.empty((len(q), 0), np.float32)
+        for beg in range(0, len(codes), bs):
+            block = codes[beg:beg + bs]
+            d = pq.adc(tables, block)
+            r = np.arange(beg, beg + len(block))[None, :].repeat(len(q), 0)
+            rows, dists = _merge_top_k(np.hstack([rows, r]),
+                                       np.hstack([dists, d]), k)
+        return rows, dists
+
+    def _nn(self, d, n=1):
+        """
+        Internal method to be implemented by sub-classes to return the nearest
+        `N` neighbors to the given descriptor element.
+
+        When this internal method is called, we have already checked that there
+        is a vector in ``d`` and our index is not empty.
+
+        :param d: Descriptor element to compute the neighbors of.
+        :type d: smqtk.representation.DescriptorElement
+
+        :param n: Number of nearest neighbors to find.
+        :type n: int
+
+        :return: Tuple of nearest N DescriptorElement instances, and a tuple of
+            the distance values to those neighbors.
+        :rtype: (tuple[smqtk.representation.DescriptorElement], tuple[float])
+
+        """
+        return next(iter(self._nn_many([d], n)))
+
+    def _nn_many(self, descriptors, n=1):
+        """
+        Internal method to return the nearest `N` neighbors to each of the
+        given descriptor elements.
+
+        All queries are compared to each block of codes together. Neighbor,
+        or re-ranked candidate, descriptors of all queries are retrieved from
+        the descriptor set together.
+
+        :param descriptors: Descriptor elements to compute the neighbors of.
+        :type descriptors:
+            list[smqtk.representation.DescriptorElement]
+
+        :param n: Number of nearest neighbors to find for each descriptor.
+        :type n: int
+
+        :return: Iterable, parallel to the input descriptors, of tuples of
+            nearest N DescriptorElement instances and a tuple of the distance
+            values to those neighbors.
+        :rtype: collections.Iterable[
+            (tuple[smqtk.representation.DescriptorElement], tuple[float])]
+
+        """
+        q = np.vstack(DescriptorElement.get_many_vectors(descriptors))
+        # Model components are replaced, not modified, by updates.
+        with self._model_lock:
+            pq, uuids, codes = self._pq, self._uuids, self._codes
+        k = n * max(self._rerank_factor, 1)
+        rows, dists = self._search(q, k, pq, codes)
+        k = rows.shape[1]
+        r_uuids = [uuids[r] for r in rows.ravel()]
+        candidates = list(self._descriptor_set.get_many_descriptors(r_uuids))
+
+        if self._rerank_factor:
+            vectors = np.vstack(DescriptorElement.get_many_vectors(candidates))
+            diff = vectors.reshape(len(q), k, -1) - q[:, None, :]
+            exact = np.einsum('qkd,qkd->qk', diff, diff)
+            idx, dists = _merge_top_k(np.arange(k)[None, :].repeat(len(q), 0),
+                                      exact, n)
+        else:
+            idx = np.arange(k)[None, :].repeat(len(q), 0)
+        dists = np.sqrt(np.maximum(dists.astype(np.float64), 0))
+
+        for i, (q_idx, q_dists) in enumerate(zip(idx, dists)):
+            yield (tuple(candidates[i * k + j] for j in q_idx),
+                   tuple(q_dists.tolist()))
+
+
+NN_INDEX_CLASS = PQNearestNeighborsIndex
@@ -1,10 +1,15 @@
 import abc
 import hashlib
+import itertools
 
 import six
+from six.moves import zip
 
 from smqtk.algorithms import SmqtkAlgorithm, ImageReader
+from smqtk.representation import AxisAlignedBoundingBox
 from smqtk.utils import ContentTypeValidator
+from smqtk.utils.image import tile_grid
+from smqtk.utils.parallel import parallel_map
 from smqtk.utils.configuration import (
     make_default_config,
     from_config_dict,
@@ -102,6 +107,134 @@ class ObjectDetector (SmqtkAlgorithm, ContentTypeValidator):
             de = de_factory.new_detection(det_uuid).set_detection(bbox, ce)
             yield de
 
+    def detect_objects_many(self, data_iter,
+                            de_factory=DFLT_DETECTION_FACTORY,
+                            ce_factory=DFLT_CLASSIFIER_FACTORY,
+                            batch_size=32):
+        """
+        Detect objects in each of the given data elements.
+
+        Data elements are processed in batches of up to ``batch_size``
+        elements, allowing implementations to detect objects over whole
+        batches at once (see ``_detect_objects_many``). Result detection and
+        classification elements for a batch are created in bulk through the
+        given factories.
+
+        Detection UUIDs are generated in the same way as by
+        ``detect_objects``.
+
+        :param data_iter: Iterable of source data elements from which to
+            detect objects within.
+        :type data_iter:
+            collections.Iterable[smqtk.representation.DataElement]
+        :param smqtk.representation.DetectionElementFactory de_factory:
+            Factory for generating DetectionElement instances. The default
+            factory yields MemoryClassificationElement instances.
+        :param smqtk.representation.ClassificationElementFactory ce_factory:
+            Factory for generating ClassificationElement instances for
+            detections. The default factory yields MemoryClassificationElement
+            instances.
+        :param int batch_size:
+            Maximum number of data elements to detect objects in at once.
+
+        :raises ValueError: A given data element's content was not of a valid
+            content type that this class reports as valid for object
+            detection, or ``batch_size`` was less than 1.
+
+        :return: Iterator over lists of result DetectionElement instances, one
+            list for each input data element in the order given.
+        :rtype:
+            collections.Iterator[list[smqtk.representation.DetectionElement]]
+
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1 (given %d)."
+                             % batch_size)
+        batch = []
+        for data_element in data_iter:
+            self.raise_valid_element(data_element)
+            batch.append(data_element)
+            if len(batch) >= batch_size:
+                for dets in self._detect_objects_batch(batch, de_factory,
+                                                       ce_factory):
+                    yield dets
+                batch = []
+        if batch:
+            for dets in self._detect_objects_batch(batch, de_factory,
+                                                   ce_factory):
+                yield dets
+
+    def _detect_objects_batch(self, data_batch, de_factory, ce_factory):
+        """
+        Detect objects over a batch of validated data elements and create
+        their result elements in bulk.
+
+        :param list[smqtk.representation.DataElement] data_batch:
+            Data elements to detect objects within.
+        :param smqtk.representation.DetectionElementFactory de_factory:
+            Factory for generating DetectionElement instances.
+        :param smqtk.representation.ClassificationElementFactory ce_factory:
+            Factory for generating ClassificationElement instances.
+
+        :raises IndexError: The implementation did not produce results for
+            each data element in the batch.
+
+        :return: Lists of result DetectionElement instances, parallel to the
+            given data elements.
+        :rtype: list[list[smqtk.representation.DetectionElement]]
+
+        """
+        results = [list(r) for r in self._detect_objects_many(data_batch)]
+        if len(results) != len(data_batch):
+            raise IndexError("Object detector produced results for %d data "
+                             "elements, expected %d."
+                             % (len(results), len(data_batch)))
+
+        # Flatten detections over the batch for bulk element creation.
+        detections = []
+        for data_element, r in zip(data_batch, results):
+            de_uuid = str(data_element.uuid())
+            detections.extend((de_uuid, bbox, c_map) for bbox, c_map in r)
+        d_elems = self._new_detection_elements(detections, de_factory,
+                                               ce_factory)
+
+        batch_dets = []
+        offset = 0
+        for r in results:
+            batch_dets.append(d_elems[offset:offset + len(r)])
+            offset += len(r)
+        return batch_dets
+
+    def _new_detection_elements(self, detections, de_factory, ce_factory):
+        """
+        Create result detection and classification elements in bulk.
+
+        :param detections: Sequence of detections as parent data element UUID
+            string, bounding box and classification map triples.
+        :type detections: collections.Sequence[
+            (str, smqtk.representation.AxisAlignedBoundingBox,
+             dict[collections.Hashable, float])]
+        :param smqtk.representation.DetectionElementFactory de_factory:
+            Factory for generating DetectionElement instances.
+        :param smqtk.representation.ClassificationElementFactory ce_factory:
+            Factory for generating ClassificationElement instances.
+
+        :return: DetectionElement instances parallel to the given detections.
+        :rtype: list[smqtk.representation.DetectionElement]
+
+        """
+        det_uuids = [self._gen_detection_uuid(de_uuid, bbox, c_map.keys())
+                     for de_uuid, bbox, c_map in detections]
+        type_str = 'object detection classification'
+        c_elems = ce_factory.new_classifications(type_str, det_uuids)
+        d_elems = de_factory.new_detections(det_uuids)
+
+        ret = []
+        for (_, bbox, c_map), ce, de in zip(detections, c_elems, d_elems):
+            ce.set_classification(c_map)
+            ret.append(de.set_detection(bbox, ce))
+        return ret
+
     @abc.abstractmethod
     def _detect_objects(self, data):
         """
@@ -123,6 +256,29 @@ class ObjectDetector (SmqtkAlgorithm, ContentTypeValidator):
 
         """
 
+    def _detect_objects_many(self, data_elements):
+        """
+        Internal method that defines the generation of paired bounding boxes
+        and classification maps for detected objects over a batch of data.
+
+        By default, this calls ``_detect_objects`` for each data element in
+        turn. Implementations that can detect objects over multiple data
+        elements at once should override this method.
+
+        :param list[smqtk.representation.DataElement] data_elements:
+            Source data elements from which to detect objects within.
+
+        :return: Iterable, parallel to the given data elements, of iterables
+            over paired ``AxisAlignedBoundingBox`` and classification map for
+            detected objects, as returned by ``_detect_objects``.
+        :rtype: collections.Iterable[
+            collections.Iterable[(smqtk.representation.AxisAlignedBoundingBox,
+                                  dict[collections.Hashable, float])]]
+
+        """
+        for data in data_elements:
+            yield self._detect_objects(data)
+
 
 @six.add_metaclass(abc.ABCMeta)
 class ImageMatrixObjectDetector (ObjectDetector):
@@ -286,6 +442,145 @@ class ImageMatrixObjectDetector (ObjectDetector):
             self._image_reader.load_as_matrix(data)
         )
 
+    def detect_objects_tiled(self, data_element, tile_width, tile_height,
+                             overlap=0, batch_size=32,
+                             de_factory=DFLT_DETECTION_FACTORY,
+                             ce_factory=DFLT_CLASSIFIER_FACTORY):
+        """
+        Detect objects in the given image by detecting over a grid of tiles
+        of the image.
+
+        Tile image matrices are read through the configured
+        :class:`smqtk.algorithms.ImageReader` as they are needed (see
+        :meth:`smqtk.algorithms.ImageReader.load_tiles`) and passed to
+        ``_detect_objects_matrices`` in batches of up to ``batch_size``
+        tiles, so memory use is bounded by the batch size instead of by the
+        size of the image when the reader supports windowed reads.
+
+        Detection bounding boxes are returned in the pixel coordinates of the
+        whole image, and detection UUIDs are generated from the given data
+        element's UUID as with ``detect_objects``.  Objects within the
+        overlap of adjacent tiles may be detected in each of those tiles.
+
+        :param smqtk.representation.DataElement data_element:
+            Source image data from which to detect objects within.
+        :param int tile_width:
+            Tile width in pixels.
+        :param int tile_height:
+            Tile height in pixels.
+        :param int overlap:
+            Number of pixels adjacent tiles overlap by.
+        :param int batch_size:
+            Maximum number of tiles to detect objects in at once.
+        :param smqtk.representation.DetectionElementFactory de_factory:
+            Factory for generating DetectionElement instances. The default
+            factory yields MemoryClassificationElement instances.
+        :param smqtk.representation.ClassificationElementFactory ce_factory:
+            Factory for generating ClassificationElement instances for
+            detections. The default factory yields MemoryClassificationElement
+            instances.
+
+        :raises ValueError: Given data element content was not of a valid
+            content type, the tile size or overlap was invalid (see
+            :func:`smqtk.utils.image.tile_grid`), or ``batch_size`` was less
+            than 1.
+
+        :return: Iterator over result DetectionElement instances.
+        :rtype: collections.Iterator[smqtk.representation.DetectionElement]
+
+        """
+        if batch_size < 1:
+            raise ValueError("Batch size must be at least 1 (given %d)."
+                             % batch_size)
+        self.raise_valid_element(data_element)
+        de_uuid = str(data_element.uuid())
+
+        width, height = self._image_reader.get_image_size(data_element)
+        tiles = tile_grid(width, height, tile_width, tile_height, overlap)
+        tile_mat_iter = zip(
+            tiles, self._image_reader.load_tiles(data_element, tiles)
+        )
+        while True:
+            batch = list(itertools.islice(tile_mat_iter, batch_size))
+            if not batch:
+                break
+            batch_tiles, mats = zip(*batch)
+            results = [list(r)
+                       for r in self._detect_objects_matrices(list(mats))]
+            if len(results) != len(batch):
+                raise IndexError("Object detector produced results for %d "
+                                 "tiles, expected %d."
+                                 % (len(results), len(batch)))
+            # Translate detections into whole image coordinates.
+            detections = []
+            for tile, r in zip(batch_tiles, results):
+                offset = tile.min_vertex
+                for bbox, c_map in r:
+                    detections.append((
+                        de_uuid,
+                        AxisAlignedBoundingBox(bbox.min_vertex + offset,
+                                               bbox.max_vertex + offset),
+                        c_map
+                    ))
+            for de in self._new_detection_elements(detections, de_factory,
+                                                   ce_factory):
+                yield de
+
+    def _detect_objects_many(self, data_elements):
+        """
+        Internal method that defines the generation of paired bounding boxes
+        and classification maps for detected objects over a batch of data.
+
+        This ``ImageMatrixObjectDetector`` implementation loads the image
+        matrices of the given data elements in parallel threads before
+        passing the batch of matrices along to the
+        :func:`_detect_objects_matrices` method.
+
+        :param list[smqtk.representation.DataElement] data_elements:
+            Source data elements from which to detect objects within.
+
+        :return: Iterable, parallel to the given data elements, of iterables
+            over paired ``AxisAlignedBoundingBox`` and classification map for
+            detected objects.
+        :rtype: collections.Iterable[
+            collections.Iterable[(smqtk.representation.AxisAlignedBoundingBox,
+                                  dict[collections.Hashable, float])]]
+
+        """
+        if len(data_elements) == 1:
+            mats = [self._image_reader.load_as_matrix(data_elements[0])]
+        else:
+            mats = list(parallel_map(self._image_reader.load_as_matrix,
+                                     data_elements,
+                                     use_multiprocessing=False,
+                                     ordered=True,
+                                     name="image-load"))
+        return self._detect_objects_matrices(mats)
+
+    def _detect_objects_matrices(self, mats):
+        """
+        Internal method that defines the generation of paired bounding boxes
+        and classification maps for detected objects over a batch of image
+        matrices.
+
+        By default, this calls ``_detect_objects_matrix`` for each matrix in
+        turn. Implementations that can detect objects over a batch of images
+        at once, e.g. by stacking them for a single network forward pass,
+        should override this method.
+
+        :param list[numpy.ndarray] mats:
+            Image pixel matrices to detect objects within.
+
+        :return: Iterable, parallel to the given matrices, of iterables over
+            paired ``AxisAlignedBoundingBox`` and classification map for
+            detected objects, as returned by ``_detect_objects_matrix``.
+        :rtype: collections.Iterable[
+            collections.Iterable[(smqtk.representation.AxisAlignedBoundingBox,
+                                  dict[collections.Hashable, float])]]
+        """
+        for mat in mats:
+            yield self._detect_objects_matrix(mat)
+
     @abc.abstractmethod
     def _detect_objects_matrix(self, mat):
         """
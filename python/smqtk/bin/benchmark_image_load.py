@@ -0,0 +1,114 @@
+# coding=utf-8
+"""
+Benchmark image decoding times of ``GdalImageReader`` load methods across
+data element types.
+
+Each given image is loaded as a ``DataFileElement`` and as a
+``DataMemoryElement`` holding the same bytes, and decoded into an image matrix
+with each available ``GdalImageReader`` load method. The average time per
+load is reported for each image, element type and load method.
+
+Results are printed, and optionally written to file, as JSON.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import logging
+import time
+
+import smqtk.utils.cli
+from smqtk.algorithms.image_io.gdal_io import GdalImageReader
+from smqtk.representation.data_element.file_element import DataFileElement
+from smqtk.representation.data_element.memory_element import \
+    DataMemoryElement
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-v", "--verbose",
+                        default=False, action="store_true",
+                        help="Output additional debug logging.")
+    parser.add_argument("-n", "--repeat",
+                        default=10, type=int,
+                        help="Number of times to repeat each load for average "
+                             "times.")
+    parser.add_argument("-m", "--load-method",
+                        default=[], action="append",
+                        choices=sorted(
+                            GdalImageReader.LOAD_METHOD_CONTEXTMANAGERS
+                        ),
+                        help="Load method to benchmark. May be given multiple "
+                             "times. By default, all load methods usable "
+                             "with the installed GDAL are benchmarked.")
+    parser.add_argument("-o", "--output",
+                        default=None, type=str,
+                        help="Optional path to write JSON results to.")
+    parser.add_argument("images", nargs="+", metavar="IMAGE",
+                        help="Paths to images to load.")
+    return parser
+
+
+def time_load(reader, data_element, repeat):
+    """
+    :return: Average time in seconds of loading the element's image matrix.
+    :rtype: float
+    """
+    s = time.time()
+    for _ in range(repeat):
+        reader.load_as_matrix(data_element)
+    return (time.time() - s) / repeat
+
+
+def main():
+    args = cli().parse_args()
+
+    llevel = logging.INFO
+    if args.verbose:
+        llevel = logging.DEBUG
+    smqtk.utils.cli.initialize_logging(logging.getLogger("smqtk"), llevel)
+    log = logging.getLogger("smqtk.benchmark_image_load")
+
+    if not GdalImageReader.is_usable():
+        raise RuntimeError("GdalImageReader is not usable in the current "
+                           "environment.")
+
+    readers = {}
+    for m in (args.load_method or
+              sorted(GdalImageReader.LOAD_METHOD_CONTEXTMANAGERS)):
+        try:
+            readers[m] = GdalImageReader(load_method=m)
+        except RuntimeError as ex:
+            log.warning("Skipping load method '%s': %s", m, ex)
+
+    results = {}
+    for fp in args.images:
+        file_elem = DataFileElement(fp, readonly=True)
+        elements = {
+            "file": file_elem,
+            "memory": DataMemoryElement(file_elem.get_bytes(),
+                                        file_elem.content_type(),
+                                        readonly=True),
+        }
+        results[fp] = {}
+        for e_name, e in sorted(elements.items()):
+            results[fp][e_name] = {}
+            for m, reader in sorted(readers.items()):
+                log.info("Benchmarking '%s' load of %s element for %s",
+                         m, e_name, fp)
+                # Load once to exclude first-time driver setup.
+                shape = reader.load_as_matrix(e).shape
+                results[fp][e_name][m] = {
+                    "shape": list(shape),
+                    "load_s": time_load(reader, e, args.repeat),
+                }
+
+    print(json.dumps(results, indent=4, sort_keys=True))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+        log.info("Wrote results to: %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+# coding=utf-8
+"""
+Benchmark building and querying ``NearestNeighborsIndex`` configurations over
+a synthetic descriptor set.
+
+Descriptor and query vectors are drawn from a mixture of gaussian clusters
+over non-negative values (or uniformly when the number of clusters is 0), as
+configured in the "data" section. When file paths are configured for them,
+vectors are loaded from existing ``.npy`` files, or saved there after being
+generated, so that later runs benchmark the same data.
+
+Each index configured in the "indexes" section, by name, is built over the
+descriptors and queried for the "k" nearest neighbors of each query, in a
+separate process with a fresh working directory in which relative model file
+paths of the index configuration are created. Reported for each index are:
+
+    - ``build_s``: Time to build the index.
+    - ``peak_rss_bytes``: Peak resident memory of the benchmark process.
+      This includes the benchmark data, which is the same for every index.
+    - ``disk_bytes``: Total size of the files in the working directory after
+      building.
+    - ``qps``, ``p50_latency_s`` and ``p99_latency_s``: Queries per second and
+      latency percentiles when querying one descriptor at a time with ``nn``.
+    - ``batch_qps``: Queries per second when querying all descriptors at once
+      with ``nn_many``.
+    - ``recall_at_k``: Average fraction of the exact nearest neighbors, by
+      the configured "metric" computed by brute force, found by the index.
+
+Results are printed, and optionally written to file, as JSON.
+"""
+from __future__ import division, print_function
+
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy
+
+from smqtk.algorithms import HashIndex, NearestNeighborsIndex
+from smqtk.algorithms.nn_index.lsh import LSHNearestNeighborIndex
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
+from smqtk.utils.cli import basic_cli_parser, utility_main_helper
+from smqtk.utils.configuration import (
+    cls_conf_to_config_dict,
+    from_config_dict,
+)
+
+
+# Metrics exact nearest neighbors may be computed by.
+METRICS = ('euclidean', 'cosine', 'hik')
+
+
+def get_cli_parser():
+    parser = basic_cli_parser(__doc__)
+    parser.add_argument("-i", "--index",
+                        default=[], action="append", metavar="NAME",
+                        help="Name of a configured index to benchmark. May "
+                             "be given multiple times. By default, all "
+                             "configured indexes are benchmarked.")
+    parser.add_argument("-o", "--output",
+                        default=None, type=str,
+                        help="Optional path to write JSON results to.")
+    return parser
+
+
+def get_default_config():
+    """
+    Default configuration with an entry for each available index type, and
+    one for ``LSHNearestNeighborIndex`` with each available ``HashIndex``
+    type.
+    """
+    indexes = {}
+    for cls in NearestNeighborsIndex.get_impls():
+        if cls is LSHNearestNeighborIndex:
+            for hi_cls in HashIndex.get_impls():
+                c = cls.get_default_config()
+                c['hash_index']['type'] = hi_cls.__name__
+                indexes['%s-%s' % (cls.__name__, hi_cls.__name__)] = \
+                    cls_conf_to_config_dict(cls, c)
+        else:
+            indexes[cls.__name__] = \
+                cls_conf_to_config_dict(cls, cls.get_default_config())
+    return {
+        "data": {
+            "num_descriptors": 10000,
+            "num_queries": 100,
+            "dimension": 128,
+            "num_clusters": 100,
+            "cluster_std": 0.1,
+            "random_seed": 0,
+            "descriptors_filepath": None,
+            "queries_filepath": None,
+        },
+        "k": 10,
+        "metric": "euclidean",
+        "keep_work_dirs": False,
+        "indexes": indexes,
+    }
+
+
+def generate_vectors(num, dimension, num_clusters, cluster_std, rng):
+    """
+    Generate non-negative vectors from a mixture of gaussian clusters with
+    centers uniformly distributed in the unit hypercube, or uniformly in the
+    unit hypercube if ``num_clusters`` is 0.
+
+    :rtype: numpy.ndarray
+    """
+    if num_clusters < 1:
+        return rng.rand(num, dimension)
+    centers = rng.rand(num_clusters, dimension)
+    v = centers[rng.randint(num_clusters, size=num)]
+    v += rng.normal(scale=cluster_std, size=v.shape)
+    return numpy.clip(v, 0, None)
+
+
+def load_or_generate(filepath, generate, log):
+    """
+    Load vectors from a ``.npy`` file if it exists, otherwise generate them,
+    saving them to the file if a path is given.
+
+    :rtype: numpy.ndarray
+    """
+    if filepath and os.path.isfile(filepath):
+        log.info("Loading vectors: %s", filepath)
+        return numpy.load(filepath)
+    v = generate()
+    if filepath:
+        log.info("Saving generated vectors: %s", filepath)
+        numpy.save(filepath, v)
+    return v
+
+
+def pairwise_distances(q, m, metric):
+    """
+    :return: Distances between each row of ``q`` and each row of ``m``,
+        monotonic with the given metric.
+    :rtype: numpy.ndarray
+    """
+    if metric == 'euclidean':
+        # Squared, which orders the same.
+        d = ((q ** 2).sum(1)[:, None] + (m ** 2).sum(1)[None, :] -
+             2 * q.dot(m.T))
+        return numpy.maximum(d, 0)
+    elif metric == 'cosine':
+        qn = q / numpy.linalg.norm(q, axis=1)[:, None]
+        mn = m / numpy.linalg.norm(m, axis=1)[:, None]
+        return 1. - qn.dot(mn.T)
+    elif metric == 'hik':
+        return 1. - numpy.array([numpy.minimum(m, v).sum(1) for v in q])
+    raise ValueError("Invalid metric '%s'. Options: %s" % (metric, METRICS))
+
+
+def exact_neighbors(vectors, queries, k, metric, block_size=4096):
+    """
+    Find the exact ``k`` nearest neighbors of each query by brute force over
+    blocks of vectors.
+
+    :return: Matrix of the row indices of each query's nearest neighbors.
+    :rtype: numpy.ndarray
+    """
+    k = min(k, len(vectors))
+    best_d = numpy.empty((len(queries), 0))
+    best_i = numpy.empty((len(queries), 0), dtype=int)
+    for s in range(0, len(vectors), block_size):
+        block = vectors[s:s + block_size]
+        d = numpy.hstack([best_d, pairwise_distances(queries, block, metric)])
+        i = numpy.hstack([best_i, numpy.arange(s, s + len(block))
+                          [None, :].repeat(len(queries), 0)])
+        top = numpy.argpartition(d, k - 1, axis=1)[:, :k] \
+            if d.shape[1] > k else numpy.argsort(d, axis=1)
+        rows = numpy.arange(len(queries))[:, None]
+        best_d, best_i = d[rows, top], i[rows, top]
+    return best_i
+
+
+def peak_rss_bytes():
+    """
+    :return: Peak resident set size of this process in bytes.
+    :rtype: int
+    """
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere.
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+def dir_size_bytes(path):
+    """
+    :return: Total size in bytes of the files under a directory.
+    :rtype: int
+    """
+    return sum(os.path.getsize(os.path.join(dp, f))
+               for dp, _, files in os.walk(path) for f in files)
+
+
+def benchmark_index(nn_config, descriptors, queries, truth, k, work_dir):
+    """
+    Build and query an index in the given working directory.
+
+    :return: Benchmark results.
+    :rtype: dict
+    """
+    os.chdir(work_dir)
+    #: :type: smqtk.algorithms.NearestNeighborsIndex
+    index = from_config_dict(nn_config, NearestNeighborsIndex.get_impls())
+
+    s = time.time()
+    index.build_index(descriptors)
+    build_s = time.time() - s
+
+    latencies = []
+    recalls = []
+    for q, t in zip(queries, truth):
+        s = time.time()
+        neighbors, _ = index.nn(q, k)
+        latencies.append(time.time() - s)
+        recalls.append(len(set(d.uuid() for d in neighbors) &
+                           set(t.tolist())) / len(t))
+
+    s = time.time()
+    index.nn_many(queries, k)
+    batch_s = time.time() - s
+
+    return {
+        "build_s": build_s,
+        "peak_rss_bytes": peak_rss_bytes(),
+        "disk_bytes": dir_size_bytes(work_dir),
+        "qps": len(queries) / sum(latencies),
+        "p50_latency_s": float(numpy.percentile(latencies, 50)),
+        "p99_latency_s": float(numpy.percentile(latencies, 99)),
+        "batch_qps": len(queries) / batch_s,
+        "recall_at_k": float(numpy.mean(recalls)),
+    }
+
+
+def _benchmark_in_child(conn, *args):
+    try:
+        conn.send(benchmark_index(*args))
+    except Exception as ex:
+        logging.getLogger(__name__).exception("Benchmark failed")
+        conn.send({"error": "%s: %s" % (type(ex).__name__, ex)})
+    finally:
+        conn.close()
+
+
+def run_isolated(*args):
+    """
+    Run ``benchmark_index`` in a child process, so that peak memory use and
+    any native library state are not shared between indexes.
+
+    :return: Benchmark results, or the error that occurred.
+    :rtype: dict
+    """
+    parent_conn, child_conn = multiprocessing.Pipe(duplex=False)
+    p = multiprocessing.Process(target=_benchmark_in_child,
+                                args=(child_conn,) + args)
+    p.start()
+    child_conn.close()
+    try:
+        result = parent_conn.recv()
+    except EOFError:
+        result = {"error": "Benchmark process exited with code %s"
+                           % p.exitcode}
+    p.join()
+    return result
+
+
+def main():
+    args = get_cli_parser().parse_args()
+    config = utility_main_helper(get_default_config, args)
+    log = logging.getLogger(__name__)
+
+    c_data = config['data']
+    k = int(config['k'])
+    metric = config['metric']
+    if metric not in METRICS:
+        raise ValueError("Invalid metric '%s'. Options: %s"
+                         % (metric, METRICS))
+    rng = numpy.random.RandomState(c_data['random_seed'])
+
+    def generate(num):
+        return generate_vectors(num, c_data['dimension'],
+                                c_data['num_clusters'],
+                                c_data['cluster_std'], rng)
+
+    vectors = load_or_generate(c_data['descriptors_filepath'],
+                               lambda: generate(c_data['num_descriptors']),
+                               log)
+    query_vectors = load_or_generate(c_data['queries_filepath'],
+                                     lambda: generate(c_data['num_queries']),
+                                     log)
+
+    log.info("Computing exact %s nearest neighbors of %d queries over %d "
+             "descriptors", metric, len(query_vectors), len(vectors))
+    truth = exact_neighbors(vectors, query_vectors, k, metric)
+
+    descriptors = []
+    for i, v in enumerate(vectors):
+        d = DescriptorMemoryElement('benchmark', i)
+        d.set_vector(v)
+        descriptors.append(d)
+    queries = []
+    for i, v in enumerate(query_vectors):
+        d = DescriptorMemoryElement('benchmark-query', i)
+        d.set_vector(v)
+        queries.append(d)
+
+    names = args.index or sorted(config['indexes'])
+    for name in names:
+        if name not in config['indexes']:
+            raise ValueError("No index configured with name '%s'. "
+                             "Configured: %s"
+                             % (name, sorted(config['indexes'])))
+
+    results = {
+        "data": {
+            "num_descriptors": len(vectors),
+            "num_queries": len(query_vectors),
+            "dimension": vectors.shape[1],
+        },
+        "k": k,
+        "metric": metric,
+        "indexes": {},
+    }
+    for name in names:
+        work_dir = tempfile.mkdtemp(prefix='smqtk_benchmark_nn_')
+        log.info("Benchmarking '%s' in: %s", name, work_dir)
+        try:
+            results['indexes'][name] = run_isolated(
+                config['indexes'][name], descriptors, queries, truth, k,
+                work_dir
+            )
+        finally:
+            if not config['keep_work_dirs']:
+                shutil.rmtree(work_dir, ignore_errors=True)
+        log.info("'%s': %s", name, results['indexes'][name])
+
+    print(json.dumps(results, indent=4, sort_keys=True))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+        log.info("Wrote results to: %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+# coding=utf-8
+"""
+Benchmark plugin discovery times for SMQTK plugin interfaces.
+
+For each interface, this reports the time taken by the first, uncached
+discovery of implementations in this process, by subsequent cached discovery
+and by re-discovery after clearing the cache (with modules already imported).
+
+Optionally, the time to get a single plugin type by name from a fresh
+interpreter is also reported, both with full discovery and with lazy
+discovery, to measure the cold start cost of configuring that one type.
+Interface and type pairs are given as "<interface>:<type>", e.g.
+"DescriptorSet:MemoryDescriptorSet".
+
+Results are printed, and optionally written to file, as JSON.
+"""
+from __future__ import print_function
+
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import smqtk.algorithms
+import smqtk.representation
+import smqtk.utils.cli
+from smqtk.utils.plugin import LAZY_ENV_VAR, clear_plugin_cache
+
+
+# Interface types benchmarked, by name.
+INTERFACES = {
+    t.__name__: t for t in [
+        smqtk.representation.DataElement,
+        smqtk.representation.DataSet,
+        smqtk.representation.DescriptorElement,
+        smqtk.representation.DescriptorSet,
+        smqtk.representation.KeyValueStore,
+        smqtk.algorithms.Classifier,
+        smqtk.algorithms.DescriptorGenerator,
+        smqtk.algorithms.HashIndex,
+        smqtk.algorithms.LshFunctor,
+        smqtk.algorithms.NearestNeighborsIndex,
+        smqtk.algorithms.RelevancyIndex,
+    ]
+}
+
+# Script run in a fresh interpreter to time getting one plugin type by name.
+# Formatted with the interface module, interface name and type name.
+LOOKUP_SCRIPT = """
+import time
+s = time.time()
+from {module} import {interface} as i
+from smqtk.utils.configuration import cls_conf_from_config_dict
+cls, _ = cls_conf_from_config_dict({{'type': '{type}', '{type}': {{}}}},
+                                   i.get_impls(warn=False))
+print(time.time() - s)
+"""
+
+
+def cli():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-v", "--verbose",
+                        default=False, action="store_true",
+                        help="Output additional debug logging.")
+    parser.add_argument("-n", "--repeat",
+                        default=10, type=int,
+                        help="Number of times to repeat cached and uncached "
+                             "discovery for average times.")
+    parser.add_argument("-l", "--lookup",
+                        default=[], action="append", metavar="I:T",
+                        help="Interface and type name pair to time cold "
+                             "start lookup of in a fresh interpreter, with "
+                             "and without lazy discovery. May be given "
+                             "multiple times.")
+    parser.add_argument("-o", "--output",
+                        default=None, type=str,
+                        help="Optional path to write JSON results to.")
+    return parser
+
+
+def time_call(f, repeat=1):
+    """
+    :return: Average time in seconds of calling the given function.
+    :rtype: float
+    """
+    s = time.time()
+    for _ in range(repeat):
+        f()
+    return (time.time() - s) / repeat
+
+
+def time_fresh_lookup(interface_t, type_name, lazy):
+    """
+    Time getting a plugin type by name in a fresh interpreter, including
+    importing the interface.
+
+    :return: Time in seconds.
+    :rtype: float
+    """
+    env = dict(os.environ)
+    env[LAZY_ENV_VAR] = "1" if lazy else ""
+    script = LOOKUP_SCRIPT.format(module=interface_t.__module__,
+                                  interface=interface_t.__name__,
+                                  type=type_name)
+    out = subprocess.check_output([sys.executable, "-c", script], env=env)
+    return float(out.decode().strip().splitlines()[-1])
+
+
+def main():
+    args = cli().parse_args()
+
+    llevel = logging.INFO
+    if args.verbose:
+        llevel = logging.DEBUG
+    smqtk.utils.cli.initialize_logging(logging.getLogger("smqtk"), llevel)
+    log = logging.getLogger("smqtk.benchmark_plugin_discovery")
+
+    results = {"discovery": {}, "lookup": {}}
+    for name, interface_t in sorted(INTERFACES.items()):
+        log.info("Benchmarking %s discovery", name)
+        clear_plugin_cache(interface_t)
+        first = time_call(lambda: interface_t.get_impls(warn=False))
+        cached = time_call(lambda: interface_t.get_impls(warn=False),
+                           args.repeat)
+
+        def rediscover():
+            clear_plugin_cache(interface_t)
+            interface_t.get_impls(warn=False)
+
+        uncached = time_call(rediscover, args.repeat)
+        results["discovery"][name] = {
+            "num_impls": len(interface_t.get_impls(warn=False)),
+            "first_s": first,
+            "cached_s": cached,
+            "uncached_s": uncached,
+        }
+
+    for pair in args.lookup:
+        i_name, _, type_name = pair.partition(':')
+        if i_name not in INTERFACES or not type_name:
+            raise ValueError("Invalid interface and type pair '%s'. "
+                             "Interface options: %s"
+                             % (pair, sorted(INTERFACES)))
+        log.info("Benchmarking fresh lookup of %s", pair)
+        results["lookup"][pair] = {
+            "eager_s": time_fresh_lookup(INTERFACES[i_name], type_name,
+                                         lazy=False),
+            "lazy_s": time_fresh_lookup(INTERFACES[i_name], type_name,
+                                        lazy=True),
+        }
+
+    print(json.dumps(results, indent=4, sort_keys=True))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4, sort_keys=True)
+        log.info("Wrote results to: %s", args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,11 @@ Tool Configuration Parameters
         data-set. If this is 0 or None, we will collect all elements before
         adding then to the configured data-set.
 
+    prefetch
+        Concurrently download the content of each batch of files to the local
+        Girder spool directory before adding them to the configured data-set,
+        so that later processing reads content from local disk.
+
 TODO: Add support for searching collections
 
 """
@@ -31,9 +36,7 @@ TODO: Add support for searching collections
 import collections
 import logging
 
-import requests
-
-from smqtk.representation import DataSet
+from smqtk.representation import DataElement, DataSet
 from smqtk.representation.data_element.girder import GirderDataElement
 from smqtk.utils import cli
 from smqtk.utils.configuration import (
@@ -41,6 +44,7 @@ from smqtk.utils.configuration import (
     make_default_config,
 )
 from smqtk.utils.girder import GirderTokenManager
+from smqtk.utils.http_cache import get_session
 from smqtk.utils.url import url_join
 
 
@@ -80,6 +84,7 @@ def default_config():
             'api_key': None,
             'api_query_batch': 1000,
             'dataset_insert_batch_size': None,
+            'prefetch': False,
         },
         'plugins': {
             'data_set': make_default_config(DataSet.get_impls()),
@@ -123,12 +128,12 @@ def get_folder_subfolders(api_root, folder_id, tm, batch_size):
     :rtype: __generator[str]
     """
     def q(offset, limit):
-        r = requests.get(url_join(api_root, 'folder'),
-                         params={'parentType': 'folder',
-                                 'parentId': folder_id,
-                                 'offset': offset,
-                                 'limit': limit},
-                         headers=tm.get_requests_header())
+        r = get_session().get(url_join(api_root, 'folder'),
+                              params={'parentType': 'folder',
+                                      'parentId': folder_id,
+                                      'offset': offset,
+                                      'limit': limit},
+                              headers=tm.get_requests_header())
         r.raise_for_status()
         for f_model in r.json():
             yield f_model['_id']
@@ -147,11 +152,11 @@ def get_folder_items(api_root, folder_id, tm, batch_size):
     :rtype: __generator[str]
     """
     def q(offset, limit):
-        r = requests.get(url_join(api_root, 'item'),
-                         params={'folderId': folder_id,
-                                 'offset': offset,
-                                 'limit': limit},
-                         headers=tm.get_requests_header())
+        r = get_session().get(url_join(api_root, 'item'),
+                              params={'folderId': folder_id,
+                                      'offset': offset,
+                                      'limit': limit},
+                              headers=tm.get_requests_header())
         r.raise_for_status()
         for i_model in r.json():
             yield i_model['_id']
@@ -170,10 +175,10 @@ def get_item_files(api_root, item_id, tm, batch_size):
     :rtype: __generator[str]
     """
     def q(offset, limit):
-        r = requests.get(url_join(api_root, 'item', item_id, 'files'),
-                         params={'offset': offset,
-                                 'limit': limit},
-                         headers=tm.get_requests_header())
+        r = get_session().get(url_join(api_root, 'item', item_id, 'files'),
+                              params={'offset': offset,
+                                      'limit': limit},
+                              headers=tm.get_requests_header())
         r.raise_for_status()
         for file_model in r.json():
             yield file_model['_id'], file_model['mimeType']
@@ -285,6 +290,7 @@ def main():
     api_key = config['tool']['api_key']
     api_query_batch = config['tool']['api_query_batch']
     insert_batch_size = config['tool']['dataset_insert_batch_size']
+    prefetch = config['tool'].get('prefetch', False)
 
     # Collect N folder/item/file references on CL and any files referenced.
     #: :type: list[str]
@@ -308,19 +314,25 @@ def main():
     data_set = from_config_dict(config['plugins']['data_set'],
                                 DataSet.get_impls())
 
+    def add_batch():
+        if prefetch:
+            log.debug("Prefetching content of %d files", len(batch))
+            DataElement.prefetch(batch)
+        data_set.add_data(*batch)
+        batch.clear()
+
     batch = collections.deque()
     pr = cli.ProgressReporter(log.info, 1.0).start()
     for e in find_girder_files(api_root, ids_folder, ids_item, ids_file,
                                api_key, api_query_batch):
         batch.append(e)
         if insert_batch_size and len(batch) >= insert_batch_size:
-            data_set.add_data(*batch)
-            batch.clear()
+            add_batch()
         pr.increment_report()
     pr.report()
 
     if batch:
-        data_set.add_data(*batch)
+        add_batch()
 
     log.info('Done')
 
@@ -10,14 +10,20 @@ import logging
 import itertools
 
 import numpy
+import PIL.Image
 import six
 from six.moves import zip
 
+from smqtk.representation import DataElement
+from smqtk.representation.data_element.matrix import MatrixDataElement
+from smqtk.representation.data_element.memory_element import \
+    DataMemoryElement
 from smqtk.utils import (
     cli,
     bits,
     parallel,
 )
+from smqtk.utils.image import tile_grid
 
 
 def compute_many_descriptors(data_elements, descr_generator, descr_factory,
@@ -53,9 +59,10 @@ def compute_many_descriptors(data_elements, descr_generator, descr_factory,
         at a time. This is useful when it is desired for this function to yield
         results before all descriptors have been computed, yet still take
         advantage of any batch asynchronous computation optimizations a
-        particular DescriptorGenerator implementation may have. If this is 0 or
-        None (false-evaluating), this function blocks until all descriptors
-        have been generated.
+        particular DescriptorGenerator implementation may have. The content of
+        each batch's data elements is pre-loaded via ``DataElement.prefetch``.
+        If this is 0 or None (false-evaluating), this function blocks until
+        all descriptors have been generated.
     :type batch_size: None | int | long
 
     :param overwrite: If descriptors from a particular generator already exist
@@ -103,6 +110,9 @@ def compute_many_descriptors(data_elements, descr_generator, descr_factory,
         log.debug("Computing in batches of size %d", batch_size)
 
         def iterate_batch_results():
+            # Pre-load batch content where data element types can do so in
+            # bulk, like fetching many rows from a database at once.
+            DataElement.prefetch(de_deque)
             descr_list_ = list(descr_generator.generate_elements(
                 de_deque, descr_factory, overwrite
             ))
@@ -215,6 +225,92 @@ def compute_transformed_descriptors(data_elements, descr_generator,
         yield de, itertools.islice((d[1] for d in descriptors), count)
 
 
+def compute_tiled_descriptors(data_element, image_reader, descr_generator,
+                              tile_width, tile_height, overlap=0,
+                              batch_size=32):
+    """
+    Compute descriptors for a grid of tiles over an image, yielding
+    (AxisAlignedBoundingBox, numpy.ndarray) tuple pairs of each tile's pixel
+    region within the whole image and its descriptor vector, in row-major tile
+    order.
+
+    Tile image matrices are read through the given image reader as they are
+    needed (see :meth:`smqtk.algorithms.ImageReader.load_tiles`) and
+    described in batches of up to ``batch_size`` tiles, so memory use is
+    bounded by the batch size instead of by the size of the image when the
+    reader supports windowed reads.
+
+    Tiles are given to the descriptor generator as ``MatrixDataElement``
+    instances if it reports them as valid, and otherwise as PNG encoded
+    ``DataMemoryElement`` instances.
+
+    :param data_element: Image to describe tiles of.
+    :type data_element: smqtk.representation.DataElement
+
+    :param image_reader: Image reader to read tile matrices with.
+    :type image_reader: smqtk.algorithms.ImageReader
+
+    :param descr_generator: DescriptorGenerator implementation instance
+        to use to generate descriptor vectors.
+    :type descr_generator: smqtk.algorithms.DescriptorGenerator
+
+    :param tile_width: Tile width in pixels.
+    :type tile_width: int
+
+    :param tile_height: Tile height in pixels.
+    :type tile_height: int
+
+    :param overlap: Number of pixels adjacent tiles overlap by.
+    :type overlap: int
+
+    :param batch_size: Maximum number of tiles to describe at once.
+    :type batch_size: int
+
+    :raises ValueError: The tile size or overlap was invalid (see
+        :func:`smqtk.utils.image.tile_grid`), or ``batch_size`` was less
+        than 1.
+
+    :return: Generator of tile bounding box and descriptor vector pairs.
+    :rtype: collections.Iterable[
+        (smqtk.representation.AxisAlignedBoundingBox, numpy.ndarray)]
+    """
+    if batch_size < 1:
+        raise ValueError("Batch size must be at least 1 (given %d)."
+                         % batch_size)
+    width, height = image_reader.get_image_size(data_element)
+    tiles = tile_grid(width, height, tile_width, tile_height, overlap)
+    tile_mat_iter = zip(tiles, image_reader.load_tiles(data_element, tiles))
+
+    # Whether tiles may be given to the generator as matrix elements.
+    as_matrix = None
+    while True:
+        batch = list(itertools.islice(tile_mat_iter, batch_size))
+        if not batch:
+            break
+        batch_tiles, mats = zip(*batch)
+        if as_matrix is None:
+            as_matrix = descr_generator.is_valid_element(
+                MatrixDataElement(mats[0], readonly=True)
+            )
+        if as_matrix:
+            tile_elems = [MatrixDataElement(m, readonly=True) for m in mats]
+        else:
+            tile_elems = [_png_data_element(m) for m in mats]
+        vecs = list(descr_generator.generate_arrays(tile_elems))
+        for tile, v in zip(batch_tiles, vecs):
+            yield tile, v
+
+
+def _png_data_element(mat):
+    """
+    :return: In-memory PNG encoding of the given image matrix.
+    :rtype: DataMemoryElement
+    """
+    buf = six.BytesIO()
+    PIL.Image.fromarray(mat).save(buf, format='PNG')
+    return DataMemoryElement(buf.getvalue(), 'image/png', readonly=True)
+
+
 def compute_hash_codes(uuids, descr_set, functor, report_interval=1.0,
                        use_mp=False, ordered=False):
     """
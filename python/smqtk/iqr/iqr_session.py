@@ -5,9 +5,11 @@ import threading
 import uuid
 import zipfile
 
+import numpy
 import six
 
 from smqtk.algorithms.relevancy_index import RelevancyIndex
+from smqtk.representation import DescriptorElement
 from smqtk.representation.descriptor_set.memory import MemoryDescriptorSet
 from smqtk.utils import SmqtkObject
 from smqtk.utils.configuration import from_config_dict
@@ -506,9 +508,18 @@ class IqrSession (SmqtkObject):
 
     # I/O Constants. These should not be changed.
     STATE_ZIP_COMPRESSION = zipfile.ZIP_DEFLATED
+    # Legacy (version 1) state member: JSON of per-descriptor vector lists.
     STATE_ZIP_FILENAME = "iqr_state.json"
-
-    def get_state_bytes(self):
+    # Binary (version 2) state members: a JSON manifest of descriptor UIDs,
+    # types and adjudication membership, plus a single NPY vector matrix whose
+    # rows are aligned to the manifest's descriptor list.
+    STATE_VERSION = 2
+    STATE_MANIFEST_FILENAME = "iqr_state_manifest.json"
+    STATE_MATRIX_FILENAME = "iqr_state_vectors.npy"
+    # Adjudication groups stored in a state package.
+    STATE_GROUPS = ('pos', 'neg', 'external_pos', 'external_neg')
+
+    def get_state_bytes(self, compress=True):
         """
         Get a byte representation of the current descriptor and adjudication
         state of this session.
@@ -516,40 +527,140 @@ class IqrSession (SmqtkObject):
         This does not encode current results or the relevancy index's state, but
         these can be reproduced with this state.
 
+        The returned bytes are a ZIP archive containing a JSON manifest and a
+        single binary NPY matrix of all unique descriptor vectors (see
+        ``STATE_MANIFEST_FILENAME`` and ``STATE_MATRIX_FILENAME``). The
+        manifest records the format version, the ``[uuid, type]`` pair of each
+        matrix row and the row indices belonging to each adjudication group.
+
+        :param compress: If the archive members should be deflated. Vector
+            data usually compresses poorly, so disabling this trades state size
+            for faster encoding and decoding.
+        :type compress: bool
+
+        :raises ValueError: A descriptor in this session has no vector or
+            descriptor vectors are not all of the same dimensionality.
+
         :return: State representation bytes
         :rtype: bytes
 
         """
-        def d_set_to_list(d_set):
-            # Convert set of descriptors to list of tuples:
-            #   [..., (uuid, type, vector), ...]
-            return [(d.uuid(), d.type(), d.vector().tolist()) for d in d_set]
-
         with self:
-            # Convert session descriptors into basic values.
-            pos_d = d_set_to_list(self.positive_descriptors)
-            neg_d = d_set_to_list(self.negative_descriptors)
-            ext_pos_d = d_set_to_list(self.external_positive_descriptors)
-            ext_neg_d = d_set_to_list(self.external_negative_descriptors)
+            group_sets = dict(zip(self.STATE_GROUPS, (
+                self.positive_descriptors,
+                self.negative_descriptors,
+                self.external_positive_descriptors,
+                self.external_negative_descriptors,
+            )))
+            # Unique descriptors across groups, in first-seen order, so a
+            # descriptor shared between groups is only stored once.
+            #: :type: list[smqtk.representation.DescriptorElement]
+            descriptors = []
+            uid_to_row = {}
+            groups = {}
+            for g in self.STATE_GROUPS:
+                rows = []
+                for d in group_sets[g]:
+                    uid = d.uuid()
+                    if uid not in uid_to_row:
+                        uid_to_row[uid] = len(descriptors)
+                        descriptors.append(d)
+                    rows.append(uid_to_row[uid])
+                groups[g] = rows
+            vectors = DescriptorElement.get_many_vectors(descriptors)
+
+        if descriptors:
+            if any(v is None for v in vectors):
+                raise ValueError("One or more session descriptors have no "
+                                 "vector to save.")
+            if len(set(numpy.shape(v) for v in vectors)) > 1:
+                raise ValueError("Session descriptor vectors are not all of "
+                                 "the same dimensionality.")
+            matrix = numpy.vstack(vectors)
+        else:
+            matrix = numpy.empty((0, 0))
+
+        manifest = {
+            'version': self.STATE_VERSION,
+            'descriptors': [[d.uuid(), d.type()] for d in descriptors],
+            'groups': groups,
+        }
+        matrix_buffer = io.BytesIO()
+        numpy.save(matrix_buffer, matrix, allow_pickle=False)
 
         z_buffer = io.BytesIO()
-        z = zipfile.ZipFile(z_buffer, 'w', self.STATE_ZIP_COMPRESSION)
-        z.writestr(self.STATE_ZIP_FILENAME, json.dumps({
-            'pos': pos_d,
-            'neg': neg_d,
-            'external_pos': ext_pos_d,
-            'external_neg': ext_neg_d,
-        }))
+        compression = (self.STATE_ZIP_COMPRESSION if compress
+                       else zipfile.ZIP_STORED)
+        z = zipfile.ZipFile(z_buffer, 'w', compression)
+        z.writestr(self.STATE_MANIFEST_FILENAME, json.dumps(manifest))
+        z.writestr(self.STATE_MATRIX_FILENAME, matrix_buffer.getvalue())
         z.close()
         return z_buffer.getvalue()
 
+    @classmethod
+    def _parse_state_zip(cls, z):
+        """
+        Extract adjudication group contents from an opened state archive.
+
+        Both the current binary format and the legacy JSON format are
+        supported.
+
+        :param z: Opened state ZIP archive.
+        :type z: zipfile.ZipFile
+
+        :raises ValueError: The archive is not a recognized state format.
+
+        :return: Mapping of group name to the list of ``(uuid, type_str,
+            row)`` tuples in that group, and the matrix of vectors that rows
+            index into.
+        :rtype: (dict[str, list[(collections.Hashable, str, int)]],
+                 numpy.ndarray)
+
+        """
+        names = z.namelist()
+        if cls.STATE_MANIFEST_FILENAME in names:
+            manifest = json.loads(z.read(cls.STATE_MANIFEST_FILENAME).decode())
+            version = manifest.get('version', None)
+            if version != cls.STATE_VERSION:
+                raise ValueError("Unsupported IQR state version: %s"
+                                 % version)
+            if cls.STATE_MATRIX_FILENAME not in names:
+                raise ValueError("Invalid bytes given, did not contain "
+                                 "expected vector matrix file name.")
+            matrix = numpy.load(io.BytesIO(z.read(cls.STATE_MATRIX_FILENAME)),
+                                allow_pickle=False)
+            descriptors = manifest['descriptors']
+            if len(descriptors) != matrix.shape[0]:
+                raise ValueError("IQR state manifest describes %d descriptors "
+                                 "but %d vectors were stored."
+                                 % (len(descriptors), matrix.shape[0]))
+            groups = {}
+            for g in cls.STATE_GROUPS:
+                groups[g] = [(descriptors[r][0], descriptors[r][1], r)
+                             for r in manifest['groups'].get(g, ())]
+            return groups, matrix
+        elif cls.STATE_ZIP_FILENAME in names:
+            # Legacy format: vectors inline as JSON lists per group.
+            state = json.loads(z.read(cls.STATE_ZIP_FILENAME).decode())
+            vectors = []
+            groups = {}
+            for g in cls.STATE_GROUPS:
+                groups[g] = []
+                for uid, type_str, vector_list in state[g]:
+                    groups[g].append((uid, type_str, len(vectors)))
+                    vectors.append(vector_list)
+            return groups, vectors
+        raise ValueError("Invalid bytes given, did not contain expected "
+                         "zipped file name.")
+
     def set_state_bytes(self, b, descriptor_factory):
         """
         Set this session's state to the given byte representation, resetting
         this session in the process.
 
         Bytes given must have been retrieved via a previous call to
-        ``get_state_bytes`` otherwise this method will fail.
+        ``get_state_bytes`` otherwise this method will fail. State bytes in the
+        legacy zipped-JSON format are also accepted.
 
         Since this state may be completely different from the current state,
         this session is reset before applying the new state. Thus, any current
@@ -563,40 +674,52 @@ class IqrSession (SmqtkObject):
         :type descriptor_factory: smqtk.representation.DescriptorElementFactory
 
         :raises ValueError: The input bytes could not be loaded due to
-            incompatibility.
+            incompatibility, or a descriptor to load already exists in the
+            factory's backend with a different vector.
 
         """
-        z_buffer = io.BytesIO(b)
-        z = zipfile.ZipFile(z_buffer, 'r', self.STATE_ZIP_COMPRESSION)
-        if self.STATE_ZIP_FILENAME not in z.namelist():
-            raise ValueError("Invalid bytes given, did not contain expected "
-                             "zipped file name.")
-
-        # Extract expected json file object
-        state = json.loads(z.read(self.STATE_ZIP_FILENAME).decode())
-        del z, z_buffer
+        try:
+            z = zipfile.ZipFile(io.BytesIO(b), 'r')
+        except zipfile.BadZipfile as ex:
+            raise ValueError("Invalid bytes given, not a ZIP archive: %s"
+                             % str(ex))
+        with z:
+            groups, vectors = self._parse_state_zip(z)
 
         with self:
             self.reset()
 
-            def load_descriptor(_uid, _type_str, vec_list):
-                _e = descriptor_factory.new_descriptor(_type_str, _uid)
-                if _e.has_vector():
-                    assert _e.vector().tolist() == vec_list, \
-                        "Found existing vector for UUID '%s' but vectors did " \
-                        "not match."
+            # Create one element per unique stored row, checking against any
+            # vectors that already exist for them in a single batch.
+            row_elems = {}
+            for g in self.STATE_GROUPS:
+                for uid, type_str, row in groups[g]:
+                    if row not in row_elems:
+                        row_elems[row] = \
+                            descriptor_factory.new_descriptor(type_str, uid)
+            rows = list(row_elems)
+            elems = [row_elems[r] for r in rows]
+            existing = DescriptorElement.get_many_vectors(elems)
+            set_elems = []
+            set_vecs = []
+            for r, e, e_vec in zip(rows, elems, existing):
+                vec = numpy.asarray(vectors[r])
+                if e_vec is not None:
+                    if not numpy.array_equal(e_vec, vec):
+                        raise ValueError("Found existing vector for UUID '%s' "
+                                         "but vectors did not match."
+                                         % e.uuid())
                 else:
-                    _e.set_vector(vec_list)
-                return _e
-
-            # Read in raw descriptor data from the state, convert to descriptor
-            # element, then store in our descriptor sets.
-            for source, target in [(state['external_pos'],
-                                    self.external_positive_descriptors),
-                                   (state['external_neg'],
-                                    self.external_negative_descriptors),
-                                   (state['pos'], self.positive_descriptors),
-                                   (state['neg'], self.negative_descriptors)]:
-                for uid, type_str, vector_list in source:
-                    e = load_descriptor(uid, type_str, vector_list)
-                    target.add(e)
+                    set_elems.append(e)
+                    set_vecs.append(vec)
+            DescriptorElement.set_many_vectors(set_elems, set_vecs)
+
+            # Store elements in our descriptor sets.
+            for g, target in [('external_pos',
+                               self.external_positive_descriptors),
+                              ('external_neg',
+                               self.external_negative_descriptors),
+                              ('pos', self.positive_descriptors),
+                              ('neg', self.negative_descriptors)]:
+                for _, _, row in groups[g]:
+                    target.add(row_elems[row])
@@ -109,6 +109,32 @@ class ClassificationElementFactory (SmqtkRepresentation):
         """
         return self.type.from_config(self.type_config, type, uuid)
 
+    # noinspection PyShadowingBuiltins
+    def new_classifications(self, type, uuids):
+        """
+        Create new ClassificationElement instances of the configured
+        implementation for each of the given UUIDs.
+
+        The implementation's default configuration is merged with this
+        factory's configuration once for all new elements instead of once per
+        element.
+
+        :param type: Type of classifier. This is usually the name of the
+            classifier that generated these results.
+        :type type: str
+
+        :param uuids: UUIDs to associate with the classifications.
+        :type uuids: collections.Iterable[collections.Hashable]
+
+        :return: New ClassificationElement instances, parallel to the given
+            UUIDs.
+        :rtype: list[smqtk.representation.ClassificationElement]
+
+        """
+        conf = merge_dict(self.type.get_default_config(), self.type_config)
+        return [self.type.from_config(conf, type, uuid, merge_default=False)
+                for uuid in uuids]
+
     # noinspection PyShadowingBuiltins
     def __call__(self, type, uuid):
         """
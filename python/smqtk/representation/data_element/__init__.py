@@ -1,5 +1,5 @@
 import abc
-from collections import deque
+from collections import defaultdict, deque
 import hashlib
 import io
 import logging
@@ -55,6 +55,44 @@ class DataElement (SmqtkRepresentation, Pluggable):
         """
         raise NoUriResolutionError()
 
+    @classmethod
+    def prefetch(cls, elements):
+        """
+        Pre-load the content of many data elements ahead of use, where their
+        implementations support doing so more efficiently in bulk than one
+        element at a time.
+
+        :note: Subclasses should override internal method ``_prefetch`` rather
+            than this external wrapper function.
+
+        :param elements: Iterable of data elements to pre-load content for.
+        :type elements:
+            collections.Iterable[smqtk.representation.DataElement]
+
+        """
+        batch_dictionary = defaultdict(list)
+        for e in elements:
+            # Each DataElement subclass knows best how to optimally fetch
+            # content of its own type.
+            batch_dictionary[e.__class__].append(e)
+        for _cls, element_batch in batch_dictionary.items():
+            # noinspection PyProtectedMember
+            _cls._prefetch(element_batch)
+
+    @classmethod
+    def _prefetch(cls, elements):
+        """
+        Internal method to pre-load the content of many data elements of this
+        type.
+
+        This default implementation does nothing, leaving content to be loaded
+        when accessed.
+
+        :param elements: Data elements of this type to pre-load content for.
+        :type elements: list[smqtk.representation.DataElement]
+
+        """
+
     def __init__(self):
         super(DataElement, self).__init__()
         self._temp_filepath_stack = []
@@ -1,8 +1,23 @@
+import atexit
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import os.path as osp
+import shutil
+import tempfile
+import threading
+
+import requests
 import six
 from six.moves.urllib_parse import urlparse
 
 from smqtk.exceptions import InvalidUriError, ReadOnlyError
 from smqtk.representation import DataElement
+from smqtk.representation.data_element import MIMETYPES
+from smqtk.utils.file import safe_create_dir
+from smqtk.utils.girder import get_api_client
+from smqtk.utils.parallel import parallel_map
 
 try:
     import girder_client
@@ -15,12 +30,58 @@ __all__ = [
 ]
 
 
+# Private spool directory of this process, created on first use when no
+# ``SPOOL_DIR`` is set.
+#: :type: None | str
+_SPOOL_ROOT = None
+# Paths of content spooled by this process to their size in bytes, in order
+# of least to most recent use.
+#: :type: OrderedDict[str, int]
+_SPOOLED = OrderedDict()
+_SPOOL_LOCK = threading.RLock()
+
+
+@atexit.register
+def _remove_spool_root():
+    if _SPOOL_ROOT is not None:
+        shutil.rmtree(_SPOOL_ROOT, ignore_errors=True)
+
+
 class GirderDataElement (DataElement):
     """
     Element whose data is stored via a Girder backend.  Accesses via Girder
     REST API given user credentials.
+
+    File models and content are read through a client shared by elements of
+    the same server and credentials (see ``smqtk.utils.girder``), reusing
+    connections and caching file models for a short period. Content is
+    streamed in chunks to a spool directory on local disk and read from there
+    while the file model reports the same file version. Spooled content of
+    previous file versions is removed when a new version is spooled, least
+    recently used content is removed once more than ``SPOOL_MAX_BYTES`` is
+    spooled by this process, and ``clear_spool`` removes all spooled content.
+
+    Temporary files from ``write_temp`` are copied from the spooled file, and
+    checksums are computed from it, in chunks, so neither reads the whole
+    content into memory.
     """
 
+    # Size in bytes of chunks in which spooled content is read for checksums.
+    READ_CHUNK_SIZE = 1024 * 1024
+
+    # Directory where downloaded file content is spooled, which must only be
+    # accessible by the current user. When None, a private directory in the
+    # system temporary directory is created for this process, and removed on
+    # exit.
+    SPOOL_DIR = None
+
+    # Maximum total size in bytes of content spooled by this process, past
+    # which least recently used content is removed.
+    SPOOL_MAX_BYTES = 1024 ** 3
+
+    # Number of threads used to prefetch the content of many elements.
+    PREFETCH_THREADS = 8
+
     @classmethod
     def is_usable(cls):
         """
@@ -29,6 +90,90 @@ class GirderDataElement (DataElement):
         """
         return girder_client is not None
 
+    @classmethod
+    def _get_spool_root(cls):
+        """
+        Get the root directory where file content is spooled, creating it if
+        it does not exist.
+
+        :raises RuntimeError: The configured ``SPOOL_DIR`` is accessible by
+            other users.
+
+        :return: Root directory where file content is spooled.
+        :rtype: str
+        """
+        global _SPOOL_ROOT
+        with _SPOOL_LOCK:
+            if not cls.SPOOL_DIR:
+                if _SPOOL_ROOT is None or not osp.isdir(_SPOOL_ROOT):
+                    _SPOOL_ROOT = tempfile.mkdtemp(
+                        prefix='smqtk_girder_spool_'
+                    )
+                return _SPOOL_ROOT
+            root = cls.SPOOL_DIR
+            if not osp.isdir(root):
+                os.makedirs(root, 0o700)
+            # Content is served from files found in the spool, so others must
+            # not be able to place files there.
+            st = os.stat(root)
+            if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or
+                                          st.st_mode & 0o077):
+                raise RuntimeError("Girder spool directory '%s' must be "
+                                   "owned by and only accessible by the "
+                                   "current user." % root)
+            return root
+
+    @classmethod
+    def clear_spool(cls):
+        """
+        Remove all content spooled by Girder elements, of all servers.
+        """
+        with _SPOOL_LOCK:
+            shutil.rmtree(cls._get_spool_root(), ignore_errors=True)
+            _SPOOLED.clear()
+
+    @classmethod
+    def _spool_used(cls, path, nbytes=None):
+        """
+        Record spooled content as most recently used, removing least recently
+        used content of this process past ``SPOOL_MAX_BYTES``.
+
+        :param path: Path of the spooled content.
+        :type path: str
+
+        :param nbytes: Size of newly spooled content, or None if already
+            spooled.
+        :type nbytes: None | int
+        """
+        with _SPOOL_LOCK:
+            if nbytes is None:
+                nbytes = _SPOOLED.pop(path, None)
+                if nbytes is None:
+                    # Spooled by another process sharing the directory.
+                    nbytes = osp.getsize(path)
+            _SPOOLED[path] = nbytes
+            total = sum(six.itervalues(_SPOOLED))
+            # The content just used is never removed.
+            while total > cls.SPOOL_MAX_BYTES and len(_SPOOLED) > 1:
+                old_path, old_nbytes = _SPOOLED.popitem(last=False)
+                total -= old_nbytes
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _spool_discard(paths):
+        """
+        Stop tracking spooled content that has been removed.
+
+        :param paths: Paths of removed spooled content.
+        :type paths: collections.Iterable[str]
+        """
+        with _SPOOL_LOCK:
+            for path in paths:
+                _SPOOLED.pop(path, None)
+
     # TODO: from_uri
     #       - maybe optionally allow API key in place of user/pass spec
     #           (i.e. girder://<api_key>@<url...>
@@ -122,17 +267,20 @@ class GirderDataElement (DataElement):
         # compat with DataFileElement (compute_many_descriptors needs this)
         self._filepath = self.file_id
 
-        self.gc = girder_client.GirderClient(apiUrl=api_root)
-
-        if token is not None:
-            self.gc.token = token
-        elif api_key is not None:
-            self.gc.authenticate(apiKey=api_key)
+        # girder_client instance used for write access, created when first
+        # needed.
+        self._gc = None
 
         # Cache so we don't have to query server multiple times for multiple
         # calls.
         self._content_type = None
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # Clients are re-created when first needed after unpickling.
+        state['_gc'] = None
+        return state
+
     def __repr__(self):
         return super(GirderDataElement, self).__repr__() + \
             "{file_id: %s, api_root: %s, api_key: %s, token: %s}" % (
@@ -148,6 +296,103 @@ class GirderDataElement (DataElement):
             'token': self.token
         }
 
+    @property
+    def _client(self):
+        """
+        :return: Client for reading, shared with other elements of the same
+            server and credentials.
+        :rtype: smqtk.utils.girder.GirderApiClient
+        """
+        return get_api_client(self.api_root, self.api_key, self.token)
+
+    @property
+    def gc(self):
+        """
+        :return: Girder client used for write access.
+        :rtype: girder_client.GirderClient
+        """
+        if self._gc is None:
+            gc = girder_client.GirderClient(apiUrl=self.api_root)
+            if self.token is not None:
+                gc.token = self.token
+            elif self.api_key is not None:
+                gc.authenticate(apiKey=self.api_key)
+            self._gc = gc
+        return self._gc
+
+    def _get_spool_dir(self):
+        """
+        :return: Directory where this file's content is spooled.
+        :rtype: str
+        """
+        server = hashlib.md5(self.api_root.encode('utf-8')).hexdigest()
+        return osp.join(self._get_spool_root(), server, self.file_id)
+
+    def _spool_file(self):
+        """
+        Get the path to this file's spooled content for its current version,
+        downloading it first if not already spooled.
+
+        :raises requests.HTTPError: The file model or content could not be
+            retrieved.
+
+        :return: Path to the spooled content.
+        :rtype: str
+        """
+        model = self._client.get_file_model(self.file_id)
+        if self._content_type is None:
+            self._content_type = model.get('mimeType')
+        # File versions are distinguished by these model properties.
+        version = hashlib.md5(json.dumps(
+            [model.get(k) for k in ('size', 'sha512', 'created', 'updated')]
+        ).encode('utf-8')).hexdigest()
+        spool_dir = self._get_spool_dir()
+        path = osp.join(spool_dir, version)
+        if osp.isfile(path):
+            self._spool_used(path)
+        else:
+            self._log.debug("Downloading content for file ID %s",
+                            self.file_id)
+            safe_create_dir(spool_dir)
+            # Download to a temporary file renamed into place when complete,
+            # so concurrent readers never see partial content.
+            fd, tmp_path = tempfile.mkstemp(dir=spool_dir, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    self._client.download_file(self.file_id, f)
+                os.rename(tmp_path, path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+            # Remove content of previous versions, leaving in-progress
+            # downloads.
+            stale = [osp.join(spool_dir, fn) for fn in os.listdir(spool_dir)
+                     if fn != version and not fn.endswith('.tmp')]
+            for stale_path in stale:
+                try:
+                    os.remove(stale_path)
+                except OSError:
+                    pass
+            self._spool_discard(stale)
+            self._spool_used(path, osp.getsize(path))
+        return path
+
+    @classmethod
+    def _prefetch(cls, elements):
+        """
+        Concurrently download the content of many Girder elements to the
+        spool directory.
+
+        :param elements: Girder data elements to pre-load content for.
+        :type elements: list[GirderDataElement]
+
+        """
+        # noinspection PyProtectedMember
+        for _ in parallel_map(lambda e: e._spool_file(), elements,
+                              cores=cls.PREFETCH_THREADS,
+                              use_multiprocessing=False):
+            pass
+
     def content_type(self):
         if self._content_type is None:
             self._log.debug("Getting content type for file ID %s"
@@ -170,8 +415,8 @@ class GirderDataElement (DataElement):
 
         """
         try:
-            return self.gc.getFile(self.file_id)
-        except girder_client.HttpError:
+            return self._client.get_file_model(self.file_id)
+        except requests.HTTPError:
             return None
 
     def is_empty(self):
@@ -196,11 +441,53 @@ class GirderDataElement (DataElement):
         :return: Get the byte stream for this data element.
         :rtype: bytes
         """
-        # Download file bytes from girder
-        content = six.BytesIO()
         self._log.debug("Getting bytes for file ID %s", self.file_id)
-        self.gc.downloadFile(self.file_id, content)
-        return bytes(content.getvalue())
+        with open(self._spool_file(), 'rb') as f:
+            return f.read()
+
+    def _spool_hexdigest(self, h):
+        """
+        Update a hash object with the spooled content in chunks.
+
+        :param h: Hash object, e.g. from ``hashlib.sha1()``.
+
+        :return: Hex digest of the content.
+        :rtype: str
+        """
+        with open(self._spool_file(), 'rb') as f:
+            for chunk in iter(lambda: f.read(self.READ_CHUNK_SIZE), b''):
+                h.update(chunk)
+        return h.hexdigest()
+
+    def md5(self):
+        return self._spool_hexdigest(hashlib.md5())
+
+    def sha1(self):
+        return self._spool_hexdigest(hashlib.sha1())
+
+    def sha512(self):
+        return self._spool_hexdigest(hashlib.sha512())
+
+    def _write_new_temp(self, d):
+        """
+        Copy the spooled content to a new temp file in chunks, so that it
+        remains until cleaned even if removed from the spool.
+
+        :param d: directory to write temp file in or None to use system
+            default.
+        :returns: path to file written
+
+        """
+        spool_path = self._spool_file()
+        if d:
+            safe_create_dir(d)
+        ext = MIMETYPES.guess_extension(self.content_type() or '')
+        if ext in {'.jpe', '.jfif'}:
+            ext = '.jpg'
+        fd, fp = tempfile.mkstemp(suffix=ext or '', dir=d)
+        with os.fdopen(fd, 'wb') as f, open(spool_path, 'rb') as spool_f:
+            shutil.copyfileobj(spool_f, f, self.READ_CHUNK_SIZE)
+        return fp
 
     def writable(self):
         """
@@ -249,3 +536,11 @@ class GirderDataElement (DataElement):
                                     'file %s' % self.file_id)
             else:
                 raise e
+        finally:
+            # Content has changed, or may have, so drop cached versions.
+            self._client.invalidate_file_model(self.file_id)
+            spool_dir = self._get_spool_dir()
+            with _SPOOL_LOCK:
+                shutil.rmtree(spool_dir, ignore_errors=True)
+                self._spool_discard([p for p in _SPOOLED
+                                     if osp.dirname(p) == spool_dir])
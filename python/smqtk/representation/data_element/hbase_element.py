@@ -1,3 +1,11 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import hashlib
+import struct
+import threading
+
+import six
+
 from smqtk.exceptions import ReadOnlyError
 from smqtk.representation import DataElement
 
@@ -13,6 +21,32 @@ except ImportError:
     tika_detector = None
 
 
+# Connection pools shared between elements, keyed by HBase server address,
+# table name and timeout.
+#: :type: dict[(str, str, int), happybase.ConnectionPool]
+_CONNECTION_POOLS = {}
+_CONNECTION_POOLS_LOCK = threading.Lock()
+
+
+def _as_bytes(s):
+    """
+    :return: Given string as bytes, encoding text as UTF-8.
+    :rtype: bytes
+    """
+    return s if isinstance(s, six.binary_type) else s.encode('utf-8')
+
+
+def _row_value(row, column):
+    """
+    :return: Value of a column in a row returned by happybase, whose column
+        names may be either text or bytes.
+    :rtype: bytes
+    """
+    if column in row:
+        return row[column]
+    return row[_as_bytes(column)]
+
+
 class HBaseDataElement (DataElement):
     """
     Wrapper for binary data contained on an HBase server somewhere. Uses Tika
@@ -23,6 +57,12 @@ class HBaseDataElement (DataElement):
     def is_usable(cls):
         return None not in {happybase, tika_detector}
 
+    # Maximum number of connections in each shared connection pool.
+    CONNECTION_POOL_SIZE = 8
+
+    # Number of rows to request at a time when fetching many elements.
+    ROWS_BATCH_SIZE = 256
+
     def __init__(self, element_key, binary_column, hbase_address,
                  hbase_table, timeout=10000):
         """
@@ -53,6 +93,11 @@ class HBaseDataElement (DataElement):
         self.timeout = int(timeout)
 
         self._binary_ct_cache = None
+        # Bytes pre-loaded via ``prefetch``, until returned by ``get_bytes``.
+        #: :type: None | bytes
+        self._bytes_cache = None
+        #: :type: None | str
+        self._sha1_cache = None
 
     def __repr__(self):
         return super(HBaseDataElement, self).__repr__() + \
@@ -73,28 +118,158 @@ class HBaseDataElement (DataElement):
 
     def content_type(self):
         if self._binary_ct_cache is None:
-            self._binary_ct_cache = tika_detector.from_buffer(self.get_bytes())
+            self._binary_ct_cache = \
+                tika_detector.from_buffer(self._peek_bytes())
         return self._binary_ct_cache
 
-    def _new_hbase_table_connection(self):
-        return happybase.Connection(self.hbase_address, timeout=self.timeout)\
-            .table(self.hbase_table)
+    def _peek_bytes(self):
+        """
+        :return: Prefetched bytes, leaving them for ``get_bytes``, or fetched
+            bytes if none are prefetched.
+        :rtype: bytes
+        """
+        b = self._bytes_cache
+        if b is None:
+            b = self.get_bytes()
+        return b
+
+    def md5(self):
+        return hashlib.md5(self._peek_bytes()).hexdigest()
+
+    def sha1(self):
+        # Memoized, as this is the UUID of this read-only element, so that
+        # getting the UUID does not use up prefetched bytes or fetch the row
+        # again each time.
+        if self._sha1_cache is None:
+            self._sha1_cache = hashlib.sha1(self._peek_bytes()).hexdigest()
+        return self._sha1_cache
+
+    def sha512(self):
+        return hashlib.sha512(self._peek_bytes()).hexdigest()
+
+    def _get_connection_pool(self):
+        """
+        :return: Connection pool shared by elements of the same HBase server,
+            table and timeout, creating it if it does not exist yet.
+        :rtype: happybase.ConnectionPool
+        """
+        key = (self.hbase_address, self.hbase_table, self.timeout)
+        with _CONNECTION_POOLS_LOCK:
+            if key not in _CONNECTION_POOLS:
+                _CONNECTION_POOLS[key] = happybase.ConnectionPool(
+                    self.CONNECTION_POOL_SIZE, host=self.hbase_address,
+                    timeout=self.timeout
+                )
+            return _CONNECTION_POOLS[key]
+
+    @contextmanager
+    def _hbase_table(self):
+        """
+        Context yielding our table using a connection from the shared pool.
+        The connection is returned to the pool when the context exits.
+
+        :rtype: happybase.Table
+        """
+        with self._get_connection_pool().connection() as conn:
+            yield conn.table(self.hbase_table)
+
+    @classmethod
+    def get_many_bytes(cls, elements):
+        """
+        Get the bytes of many HBase data elements, fetching rows in batches
+        from each server and table.
+
+        :raises KeyError: A row or its binary column does not exist for one or
+            more elements.
+
+        :param elements: Iterable of HBase data elements to get bytes for.
+        :type elements: collections.Iterable[HBaseDataElement]
+
+        :return: List of bytes, parallel to the input elements.
+        :rtype: list[bytes]
+
+        """
+        elements = list(elements)
+        results = [None] * len(elements)
+        # Group element indices by the table and column rows are fetched from.
+        #: :type: dict[(str, str, int, str), list[int]]
+        groups = defaultdict(list)
+        for i, e in enumerate(elements):
+            groups[(e.hbase_address, e.hbase_table, e.timeout,
+                    e.binary_column)].append(i)
+
+        for idxs in six.itervalues(groups):
+            first = elements[idxs[0]]
+            column = first.binary_column
+            with first._hbase_table() as table:
+                for s in range(0, len(idxs), cls.ROWS_BATCH_SIZE):
+                    batch = idxs[s:s+cls.ROWS_BATCH_SIZE]
+                    keys = [elements[i].element_key for i in batch]
+                    # Rows that do not exist are omitted from the result.
+                    rows = dict((_as_bytes(k), r) for k, r in
+                                table.rows(keys, columns=[column]))
+                    for i, k in zip(batch, keys):
+                        results[i] = _row_value(rows[_as_bytes(k)], column)
+        return results
+
+    @classmethod
+    def _prefetch(cls, elements):
+        """
+        Fetch and cache the bytes of many HBase data elements in batches.
+
+        Cached bytes are retained by each element until returned by the next
+        ``get_bytes`` call, after which they are released. Checksums, and so
+        UUIDs, and content types computed before then are computed from the
+        cached bytes without releasing them.
+
+        :param elements: HBase data elements to pre-load bytes for.
+        :type elements: list[HBaseDataElement]
+
+        """
+        to_fetch = [e for e in elements if e._bytes_cache is None]
+        if not to_fetch:
+            return
+        for e, b in zip(to_fetch, cls.get_many_bytes(to_fetch)):
+            e._bytes_cache = b
 
     def is_empty(self):
         """
         Check if this element contains no bytes.
 
+        Only the length of the binary column value is requested from the
+        server, not the value itself.
+
+        :raises KeyError: The row or its binary column does not exist.
+
         :return: If this element contains 0 bytes.
         :rtype: bool
 
         """
-        # naive impl for now
-        return len(self.get_bytes()) == 0
+        if self._bytes_cache is not None:
+            return len(self._bytes_cache) == 0
+        with self._hbase_table() as table:
+            # KeyOnlyFilter with ``lenAsVal`` replaces cell values with their
+            # length as a 4-byte big-endian integer. Scanning up to the key
+            # followed by a null byte only includes our row.
+            row_start = _as_bytes(self.element_key)
+            for _, r in table.scan(row_start=row_start,
+                                   row_stop=row_start + b'\0',
+                                   columns=[self.binary_column],
+                                   filter="KeyOnlyFilter(true)",
+                                   limit=1):
+                return struct.unpack('>i', _row_value(
+                    r, self.binary_column))[0] == 0
+        raise KeyError(self.element_key)
 
     def get_bytes(self):
-        table = self._new_hbase_table_connection()
-        r = table.row(self.element_key, columns=[self.binary_column])
-        return r[self.binary_column]
+        b = self._bytes_cache
+        if b is not None:
+            # Prefetched bytes are only retained until used.
+            self._bytes_cache = None
+            return b
+        with self._hbase_table() as table:
+            r = table.row(self.element_key, columns=[self.binary_column])
+        return _row_value(r, self.binary_column)
 
     def writable(self):
         """
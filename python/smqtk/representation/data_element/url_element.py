@@ -1,9 +1,10 @@
 import mimetypes
 import re
-import requests
 
 from smqtk.exceptions import InvalidUriError, ReadOnlyError
 from smqtk.representation import DataElement
+from smqtk.utils.http_cache import LruByteCache, get_session
+from smqtk.utils.parallel import parallel_map
 
 
 MIMETYPES = mimetypes.MimeTypes()
@@ -12,11 +13,24 @@ MIMETYPES = mimetypes.MimeTypes()
 class DataUrlElement (DataElement):
     """
     Representation of data loadable via a web URL address.
+
+    Requests are made through a session shared within the process so that
+    connections are reused. URL metadata is requested via HEAD on
+    construction, and content is retained in ``CONTENT_CACHE`` keyed by URL
+    and the ``ETag`` and ``Last-Modified`` headers reported at that time, so
+    an element reflects the content available when it was constructed.
+    Content served without either header is not cached, nor prefetched.
     """
 
     # Enforce presence of demarcating schema
     URI_RE = re.compile('^https?://.+$')
 
+    # Content cache shared by URL elements.
+    CONTENT_CACHE = LruByteCache(256 * 1024 * 1024)
+
+    # Number of threads used to prefetch the content of many elements.
+    PREFETCH_THREADS = 8
+
     @classmethod
     def is_usable(cls):
         # URLs are not necessarily on the public internet. Local networking
@@ -41,7 +55,7 @@ class DataUrlElement (DataElement):
         :raises requests.exceptions.ConnectionError: Failed to connect with the
             given hostname.
         :raises requests.exceptions.HTTPError: URL address provided does not
-            resolve into a valid GET request.
+            resolve into a valid HEAD (or GET) request.
 
         :param url_address: Web address of element
         :type url_address: str
@@ -55,8 +69,10 @@ class DataUrlElement (DataElement):
         if not (self._url[:7] == "http://" or self._url[:8] == "https://"):
             self._url = "http://" + self._url
 
-        # Check that the URL is valid, i.e. actually points to something
-        requests.get(self._url).raise_for_status()
+        # Check that the URL is valid, i.e. actually points to something, and
+        # record its metadata.
+        #: :type: requests.structures.CaseInsensitiveDict
+        self._headers = self._request_headers()
 
     def __repr__(self):
         return super(DataUrlElement, self).__repr__() + "{url: %s}" % self._url
@@ -66,13 +82,72 @@ class DataUrlElement (DataElement):
             "url_address": self._url
         }
 
+    def _request_headers(self):
+        """
+        Request the response headers for our URL without downloading its
+        content.
+
+        :raises requests.exceptions.HTTPError: Error during request.
+
+        :return: Response headers.
+        :rtype: requests.structures.CaseInsensitiveDict
+
+        """
+        session = get_session()
+        r = session.head(self._url, allow_redirects=True)
+        if r.status_code in (405, 501):
+            # Server does not support HEAD requests. Only the headers of a
+            # streamed GET request are read before closing it.
+            r = session.get(self._url, stream=True)
+            r.close()
+        r.raise_for_status()
+        return r.headers
+
+    def _cache_key(self, headers):
+        """
+        :return: Content cache key for our URL given its response headers, or
+            None if content cannot be validated by either the ETag or
+            Last-Modified header.
+        :rtype: None | (str, str | None, str | None)
+        """
+        etag = headers.get('etag')
+        last_modified = headers.get('last-modified')
+        if etag is None and last_modified is None:
+            return None
+        return self._url, etag, last_modified
+
+    @classmethod
+    def _prefetch(cls, elements):
+        """
+        Concurrently download the content of many URL elements into
+        ``CONTENT_CACHE``.
+
+        Elements whose content is already cached, or cannot be cached for
+        lack of validating headers, are skipped. Prefetched content is subject
+        to the cache's size limit, so prefetching more content than fits
+        evicts the earliest fetched.
+
+        :param elements: URL data elements to pre-load content for.
+        :type elements: list[DataUrlElement]
+
+        """
+        to_fetch = {}
+        for e in elements:
+            key = e._cache_key(e._headers)
+            if key is not None and key not in cls.CONTENT_CACHE:
+                to_fetch.setdefault(key, e)
+        for _ in parallel_map(lambda e: e.get_bytes(), to_fetch.values(),
+                              cores=cls.PREFETCH_THREADS,
+                              use_multiprocessing=False):
+            pass
+
     def content_type(self):
         """
         :return: Standard type/subtype string for this data element, or None if
             the content type is unknown.
         :rtype: str or None
         """
-        return requests.get(self._url).headers['content-type']
+        return self._headers.get('content-type')
 
     def is_empty(self):
         """
@@ -82,6 +157,9 @@ class DataUrlElement (DataElement):
         :rtype: bool
 
         """
+        content_length = self._headers.get('content-length')
+        if content_length is not None:
+            return int(content_length) == 0
         return len(self.get_bytes()) == 0
 
     def get_bytes(self):
@@ -93,9 +171,18 @@ class DataUrlElement (DataElement):
             via GET.
 
         """
+        key = self._cache_key(self._headers)
+        if key is not None:
+            b = self.CONTENT_CACHE.get(key)
+            if b is not None:
+                return b
         # Fetch content from URL, return bytes
-        r = requests.get(self._url)
+        r = get_session().get(self._url)
         r.raise_for_status()
+        key = self._cache_key(r.headers)
+        if key is not None:
+            self.CONTENT_CACHE.put(key, r.content)
+            self._headers = r.headers
         return r.content
 
     def writable(self):
@@ -1,5 +1,6 @@
 import abc
 import numpy
+import warnings
 
 from collections import defaultdict
 
@@ -11,18 +12,63 @@ from smqtk.utils.parallel import parallel_map
 from ._io import elements_to_matrix
 
 
-def _uuid_and_vector_from_descriptor(descriptor):
+def _index_and_vector_from_descriptor(index, descriptor):
     """
-    Given a descriptor, return a tuple containing the UUID and associated
-    vector for that descriptor
+    Given a descriptor and its position in a sequence of descriptors, return a
+    tuple containing the position and associated vector for that descriptor
 
+    :param index: Position of the descriptor.
+    :type index: int
     :param descriptor: The descriptor to process.
     :type descriptor: smqtk.representation.descriptor_element.DescriptorElement
-    :return: Tuple containing the UUID and associated vector for the given
-        descriptor
-    :rtype: tuple[collections.Hashable, numpy.ndarray]
+    :return: Tuple containing the position and associated vector for the
+        given descriptor
+    :rtype: tuple[int, numpy.ndarray]
     """
-    return (descriptor.uuid(), descriptor.vector())
+    return (index, descriptor.vector())
+
+
+def _defining_class(cls, name):
+    """
+    Get the class in the method resolution order of the given class that
+    defines the named attribute.
+
+    :param cls: Class to look up the attribute on.
+    :type cls: type
+    :param name: Name of the attribute.
+    :type name: str
+    :return: Class defining the attribute, or None if no class does.
+    :rtype: type | None
+    """
+    for c in cls.__mro__:
+        if name in vars(c):
+            return c
+    return None
+
+
+def _storage_dtype(dtype):
+    """
+    Check a configured vector storage data type.
+
+    :param dtype: Name of a floating point numpy data type, e.g. "float32" or
+        "float16", or None.
+    :type dtype: None | str
+
+    :raises ValueError: The data type is not a floating point type.
+
+    :return: Numpy data type, or None if ``dtype`` is None.
+    :rtype: None | numpy.dtype
+    """
+    if dtype is None:
+        return None
+    try:
+        dt = numpy.dtype(dtype)
+    except TypeError:
+        dt = None
+    if dt is None or dt.kind != 'f':
+        raise ValueError("Vector storage type must be a floating point type, "
+                         "given '%s'." % dtype)
+    return dt
 
 
 class DescriptorElement (SmqtkRepresentation, Pluggable):
@@ -161,7 +207,7 @@ class DescriptorElement (SmqtkRepresentation, Pluggable):
         return self._type_label
 
     @classmethod
-    def _get_many_vectors(cls, descriptors):
+    def _get_many_indexed_vectors(cls, descriptors):
         """
         Internal method to be overridden by subclasses to return many vectors
         associated with given descriptors.
@@ -172,8 +218,38 @@ class DescriptorElement (SmqtkRepresentation, Pluggable):
             `get_many_vectors` handles re-ordering as necessary and insertion
             of None for missing values.
 
-        :param descriptors: Iterable of descriptors to query for.
-        :type descriptors: collections.Iterable[
+        :param descriptors: Sequence of descriptors to query for.
+        :type descriptors: collections.Sequence[
+            smqtk.representation.descriptor_element.DescriptorElement]
+
+        :return: Iterator of tuples containing the position of a descriptor in
+            ``descriptors`` and the vector associated with that descriptor or
+            None if the descriptor has no associated vector. Vectors are
+            identified by position rather than UUID, as the same UUID may
+            refer to elements of different descriptor types or storage.
+        :rtype: collections.Iterable[
+            tuple[int, Union[numpy.ndarray, None]]]
+        """
+        for index_vector_pair in parallel_map(
+                _index_and_vector_from_descriptor,
+                range(len(descriptors)), descriptors,
+                name='retrieve_vectors'):
+            yield index_vector_pair
+
+    @classmethod
+    def _get_many_vectors(cls, descriptors):
+        """
+        Deprecated internal method returning many vectors associated with
+        given descriptors, keyed by descriptor UUID.
+
+        :note: Subclasses should override `_get_many_indexed_vectors` instead.
+            Subclasses that still override this method continue to be used by
+            `get_many_vectors`, with a DeprecationWarning, though descriptors
+            of a batch that share a UUID then share the vector returned for
+            that UUID.
+
+        :param descriptors: Sequence of descriptors to query for.
+        :type descriptors: collections.Sequence[
             smqtk.representation.descriptor_element.DescriptorElement]
 
         :return: Iterator of tuples containing the descriptor uuid and the
@@ -182,10 +258,23 @@ class DescriptorElement (SmqtkRepresentation, Pluggable):
         :rtype: collections.Iterable[
             tuple[collections.Hashable, Union[numpy.ndarray, None]]]
         """
-        for uuid_vector_pair in parallel_map(
-                _uuid_and_vector_from_descriptor, descriptors,
-                name='retrieve_vectors'):
-            yield uuid_vector_pair
+        descriptors = list(descriptors)
+        # noinspection PyProtectedMember
+        for i, vector in cls._get_many_indexed_vectors(descriptors):
+            yield descriptors[i].uuid(), vector
+
+    @classmethod
+    def _uses_uuid_keyed_vectors(cls):
+        """
+        :return: If this class overrides the deprecated UUID-keyed
+            `_get_many_vectors` hook more specifically than the position-keyed
+            `_get_many_indexed_vectors` hook.
+        :rtype: bool
+        """
+        legacy = _defining_class(cls, '_get_many_vectors')
+        indexed = _defining_class(cls, '_get_many_indexed_vectors')
+        return (legacy is not DescriptorElement and legacy is not indexed and
+                issubclass(legacy, indexed))
 
     @classmethod
     def get_many_vectors(cls, descriptors):
@@ -193,10 +282,10 @@ class DescriptorElement (SmqtkRepresentation, Pluggable):
         Get an iterator over vectors associated with given descriptors.
 
         :note: Most subclasses should override internal method
-            `_get_many_vectors` rather than this external wrapper function. If
-            a subclass does override this classmethod, it is responsible for
-            appropriately handling any valid DescriptorElement, regardless of
-            subclass.
+            `_get_many_indexed_vectors` rather than this external wrapper
+            function. If a subclass does override this classmethod, it is
+            responsible for appropriately handling any valid
+            DescriptorElement, regardless of subclass.
 
         :param descriptors: Iterable of descriptors to query for.
         :type descriptors: collections.Iterable[
@@ -208,7 +297,7 @@ class DescriptorElement (SmqtkRepresentation, Pluggable):
         :rtype: list[numpy.ndarray | None]
         """
         batch_dictionary = defaultdict(list)
-        uuid_indices = {}
+        batch_indices = defaultdict(list)
         index = -1
         for index, descriptor_ in enumerate(descriptors):
             # Divide descriptors up into batches based on their type, since
@@ -217,21 +306,96 @@ class DescriptorElement (SmqtkRepresentation, Pluggable):
             batch_dictionary[type(descriptor_)].append(descriptor_)
             # Keep track of the order of descriptors to ensure that we return
             # vectors in the requested order after batching them out.
-            uuid_indices[descriptor_.uuid()] = index
+            batch_indices[type(descriptor_)].append(index)
 
-        # Default to None, since _get_many_vectors implementations can ignore
-        # any descriptors that cannot be retrieved
+        # Default to None, since _get_many_indexed_vectors implementations can
+        # ignore any descriptors that cannot be retrieved
         ordered_vectors = [None] * (index + 1)
 
         # Retrieve all the vectors for a given type of descriptor in a single
         # batch
         for _cls, descriptor_batch in batch_dictionary.items():
+            indices = batch_indices[_cls]
             # noinspection PyProtectedMember
-            for uuid, vector in _cls._get_many_vectors(descriptor_batch):
-                ordered_vectors[uuid_indices[uuid]] = vector
+            if _cls._uses_uuid_keyed_vectors():
+                warnings.warn(
+                    "%s overrides the deprecated UUID-keyed "
+                    "_get_many_vectors, override _get_many_indexed_vectors "
+                    "instead." % _cls.__name__,
+                    DeprecationWarning
+                )
+                uuid_positions = defaultdict(list)
+                for i, descriptor_ in enumerate(descriptor_batch):
+                    uuid_positions[descriptor_.uuid()].append(i)
+                # noinspection PyProtectedMember
+                for uuid, vector in _cls._get_many_vectors(descriptor_batch):
+                    for i in uuid_positions[uuid]:
+                        ordered_vectors[indices[i]] = vector
+            else:
+                # noinspection PyProtectedMember
+                for i, vector in \
+                        _cls._get_many_indexed_vectors(descriptor_batch):
+                    ordered_vectors[indices[i]] = vector
 
         return ordered_vectors
 
+    @classmethod
+    def _set_many_vectors(cls, descriptors, vectors):
+        """
+        Internal method to be overridden by subclasses to set the vectors of
+        many descriptors of the subclass's type at once.
+
+        By default, ``set_vector`` is called for each descriptor.
+
+        :param descriptors: Sequence of descriptors to set the vectors of.
+        :type descriptors: collections.Sequence[
+            smqtk.representation.descriptor_element.DescriptorElement]
+
+        :param vectors: Sequence of vectors to set, parallel to
+            ``descriptors``.
+        :type vectors: collections.Sequence[numpy.ndarray]
+        """
+        for d, v in zip(descriptors, vectors):
+            d.set_vector(v)
+
+    @classmethod
+    def set_many_vectors(cls, descriptors, vectors):
+        """
+        Set the vectors of many descriptors at once.
+
+        Descriptors are batched by their type, as each DescriptorElement
+        subclass knows best how to optimally store vectors of its own type.
+
+        :note: Most subclasses should override internal method
+            `_set_many_vectors` rather than this external wrapper function.
+
+        :param descriptors: Iterable of descriptors to set the vectors of.
+        :type descriptors: collections.Iterable[
+            smqtk.representation.descriptor_element.DescriptorElement]
+
+        :param vectors: Iterable of vectors to set, parallel to
+            ``descriptors``.
+        :type vectors: collections.Iterable[numpy.ndarray]
+
+        :raises ValueError: A different number of vectors than descriptors was
+            given.
+        """
+        descriptors = list(descriptors)
+        vectors = list(vectors)
+        if len(descriptors) != len(vectors):
+            raise ValueError("Given %d descriptors but %d vectors."
+                             % (len(descriptors), len(vectors)))
+        batch_dictionary = defaultdict(lambda: ([], []))
+        for descriptor_, vector in zip(descriptors, vectors):
+            batch_descriptors, batch_vectors = \
+                batch_dictionary[type(descriptor_)]
+            batch_descriptors.append(descriptor_)
+            batch_vectors.append(vector)
+        for _cls, (batch_descriptors, batch_vectors) in \
+                batch_dictionary.items():
+            # noinspection PyProtectedMember
+            _cls._set_many_vectors(batch_descriptors, batch_vectors)
+
     ###
     # Abstract methods
     #
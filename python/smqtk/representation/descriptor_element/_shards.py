@@ -0,0 +1,375 @@
+"""
+Storage of many descriptor vectors packed into large, append-only shard files.
+"""
+import atexit
+import json
+import os
+import os.path as osp
+import socket
+import threading
+import time
+import uuid as uuid_module
+from collections import OrderedDict, defaultdict
+
+import numpy
+import six
+
+from smqtk.utils import SmqtkObject
+from smqtk.utils.file import safe_create_dir
+
+
+SHARD_EXT = '.shard'
+INDEX_EXT = '.idx'
+
+# Byte alignment of vectors in shard files.
+ALIGNMENT = 16
+
+# Minimum seconds between re-reads of index files on lookup misses.
+REFRESH_INTERVAL = 1.0
+
+
+def check_uuid(uuid):
+    """
+    Check that a UUID may be stored, being a string or integer, which index
+    records keep the type of.
+
+    :param uuid: Descriptor UUID.
+    :type uuid: collections.Hashable
+
+    :raises TypeError: The UUID is not a string or integer.
+
+    :return: The given UUID.
+    :rtype: str | int
+    """
+    if isinstance(uuid, bool) or \
+            not isinstance(uuid, six.string_types + six.integer_types):
+        raise TypeError("Sharded vector stores only support string or "
+                        "integer UUIDs, got %s." % type(uuid).__name__)
+    return uuid
+
+
+class ShardedVectorStore (SmqtkObject):
+    """
+    Vectors keyed by descriptor type and UUID, packed into append-only shard
+    files in a directory. UUIDs must be strings or integers, whose type is
+    kept, so that e.g. ``1`` and ``'1'`` are different keys.
+
+    Each writing process appends vectors to its own shard file, starting a new
+    shard when the current one exceeds the maximum shard size. Once a vector
+    is written, a JSON record of its key, location and stamp is appended to
+    an index file alongside the shard. Of the records of a key, the one with
+    the greatest stamp is used, regardless of the order index files are read
+    in.
+
+    Stamps are logical clock values rather than wall-clock times, so writers
+    on different hosts need not have synchronized clocks. Before writing, a
+    store reads all new records, and stamps its records after the greatest
+    stamp it has read or written. A record therefore wins over every record
+    written before its write began. Records of the same key written
+    concurrently by different processes, neither seeing the other's, may
+    have the same stamp, and are ordered by shard name, so that all readers
+    agree on which is used.
+
+    The index files of all shards are read when the store is created. When a
+    key is not found, records appended since are read, so that vectors written
+    by other processes become visible without listing more than the one
+    directory. Such refreshes on lookup misses happen at most once per
+    refresh interval, so that looking up many new keys does not list the
+    directory for each one. ``refresh`` may be called to read new records
+    immediately.
+
+    Vectors are read as read-only views of memory-maps of shard files, without
+    copying.
+
+    Stores are shared per directory within a process via ``get_store``.
+    """
+
+    def __init__(self, root_dir, refresh_interval=REFRESH_INTERVAL):
+        """
+        :param root_dir: Directory of shard and index files, created when
+            first written to.
+        :type root_dir: str
+
+        :param refresh_interval: Minimum seconds between re-reads of index
+            files when a looked up key is not found.
+        :type refresh_interval: float
+        """
+        super(ShardedVectorStore, self).__init__()
+        self.root_dir = root_dir
+        self.refresh_interval = refresh_interval
+        self._lock = threading.RLock()
+        # (type, UUID) to (shard name, byte offset, dtype, size, stamp).
+        #: :type: dict[(str, str | int), (str, int, str, int, int)]
+        self._index = {}
+        # Index file name to the number of its bytes read.
+        #: :type: dict[str, int]
+        self._index_pos = {}
+        # Shard name to a uint8 memory-map of its file.
+        #: :type: dict[str, numpy.memmap]
+        self._maps = {}
+        # Process ID, shard name, data file and index file of the shard this
+        # process is appending to.
+        self._writer = None
+        # Open files of shards this process has filled.
+        self._full_files = []
+        # Time of the last refresh.
+        self._refresh_time = 0.
+        # Greatest stamp of the records read or written by this store.
+        self._clock = 0
+        self.refresh()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._index)
+
+    def refresh(self):
+        """
+        Read records appended to index files since last read, including those
+        of shards created since.
+        """
+        with self._lock:
+            self._refresh_time = time.time()
+            if not osp.isdir(self.root_dir):
+                return
+            for fn in os.listdir(self.root_dir):
+                if fn.endswith(INDEX_EXT):
+                    self._read_index(fn)
+
+    def _read_index(self, fn):
+        pos = self._index_pos.get(fn, 0)
+        with open(osp.join(self.root_dir, fn), 'rb') as f:
+            f.seek(pos)
+            b = f.read()
+        # A trailing partial record is still being written.
+        end = b.rfind(b'\n') + 1
+        shard = fn[:-len(INDEX_EXT)]
+        for line in b[:end].splitlines():
+            type_str, uid, offset, dtype, size, stamp = \
+                json.loads(line.decode('utf-8'))
+            key = (type_str, uid)
+            cur = self._index.get(key)
+            # Stamps increase within a file, and ties between files are
+            # broken by shard name.
+            if cur is None or (cur[4], cur[0]) <= (stamp, shard):
+                self._index[key] = (shard, offset, dtype, size, stamp)
+            self._clock = max(self._clock, stamp)
+        self._index_pos[fn] = pos + end
+
+    def location(self, type_str, uuid):
+        """
+        :param type_str: Descriptor type.
+        :type type_str: str
+
+        :param uuid: Descriptor UUID.
+        :type uuid: collections.Hashable
+
+        :raises TypeError: The UUID is not a string or integer.
+
+        :return: Shard name, byte offset, data type, size and stamp of the
+            stored vector, or None if no vector is stored.
+        :rtype: None | (str, int, str, int, int)
+        """
+        key = (type_str, check_uuid(uuid))
+        with self._lock:
+            loc = self._index.get(key)
+            if loc is None and \
+                    time.time() - self._refresh_time >= self.refresh_interval:
+                self.refresh()
+                loc = self._index.get(key)
+            return loc
+
+    def _shard_map(self, shard, end):
+        """
+        Get a memory-map of a shard file covering at least ``end`` bytes,
+        re-mapping the file if it has grown since mapped.
+        """
+        m = self._maps.get(shard)
+        if m is None or len(m) < end:
+            m = self._maps[shard] = numpy.memmap(
+                osp.join(self.root_dir, shard + SHARD_EXT), numpy.uint8, 'r'
+            )
+        return m
+
+    def _read(self, loc):
+        shard, offset, dtype, size, _ = loc
+        dtype = numpy.dtype(dtype)
+        end = offset + size * dtype.itemsize
+        with self._lock:
+            m = self._shard_map(shard, end)
+        return m[offset:end].view(dtype)
+
+    def read(self, type_str, uuid):
+        """
+        :param type_str: Descriptor type.
+        :type type_str: str
+
+        :param uuid: Descriptor UUID.
+        :type uuid: collections.Hashable
+
+        :return: Read-only view of the stored vector, or None if no vector is
+            stored.
+        :rtype: None | numpy.ndarray
+        """
+        loc = self.location(type_str, uuid)
+        if loc is None:
+            return None
+        return self._read(loc)
+
+    def read_many(self, keys):
+        """
+        Read many vectors, grouped by shard and in order of their offsets in
+        each shard.
+
+        :param keys: Sequence of descriptor type and UUID pairs.
+        :type keys: collections.Sequence[(str, collections.Hashable)]
+
+        :return: Iterator of the positions in ``keys`` of stored vectors and
+            read-only views of the vectors.
+        :rtype: __generator[(int, numpy.ndarray)]
+        """
+        by_shard = defaultdict(list)
+        for i, (type_str, uuid) in enumerate(keys):
+            loc = self.location(type_str, uuid)
+            if loc is not None:
+                by_shard[loc[0]].append((loc[1], i, loc))
+        for shard in sorted(by_shard):
+            for _, i, loc in sorted(by_shard[shard]):
+                yield i, self._read(loc)
+
+    def _get_writer(self, shard_size):
+        w = self._writer
+        # A forked process starts its own shard.
+        if w is not None and w[0] == os.getpid() and \
+                w[2].tell() < shard_size:
+            return w
+        if w is not None and w[0] == os.getpid():
+            # Closed once pending records are written.
+            self._full_files.extend(w[2:])
+        safe_create_dir(self.root_dir)
+        shard = '%s-%d-%s' % (socket.gethostname(), os.getpid(),
+                              uuid_module.uuid4().hex)
+        data_f = open(osp.join(self.root_dir, shard + SHARD_EXT), 'ab')
+        index_f = open(osp.join(self.root_dir, shard + INDEX_EXT), 'ab')
+        self._index_pos[shard + INDEX_EXT] = 0
+        self._writer = (os.getpid(), shard, data_f, index_f)
+        return self._writer
+
+    def write(self, type_str, uuid, vector, shard_size):
+        """
+        Append a vector to this process's shard, replacing any vector stored
+        for the same key.
+
+        :param type_str: Descriptor type.
+        :type type_str: str
+
+        :param uuid: Descriptor UUID.
+        :type uuid: collections.Hashable
+
+        :param vector: Vector to store.
+        :type vector: numpy.ndarray
+
+        :param shard_size: Size in bytes past which a new shard is started.
+        :type shard_size: int
+
+        :raises TypeError: The UUID is not a string or integer.
+        """
+        self.write_many([(type_str, uuid, vector)], shard_size)
+
+    def write_many(self, items, shard_size):
+        """
+        Append many vectors to this process's shards, replacing any vectors
+        stored for the same keys.
+
+        Vectors are flushed to shard files before the index records of the
+        vectors are written and flushed, so that records read by other
+        processes only refer to stored vectors.
+
+        :param items: Iterable of descriptor type, UUID and vector triples.
+        :type items: collections.Iterable[
+            (str, collections.Hashable, numpy.ndarray)]
+
+        :param shard_size: Size in bytes past which a new shard is started.
+        :type shard_size: int
+
+        :raises TypeError: A UUID is not a string or integer.
+        """
+        items = [(type_str, check_uuid(uuid), vector)
+                 for type_str, uuid, vector in items]
+        with self._lock:
+            # Stamp records after all those written so far.
+            self.refresh()
+            # Shard name to its data file, index file and pending records, in
+            # order of writing.
+            pending = OrderedDict()
+            for type_str, uuid, vector in items:
+                vector = numpy.ascontiguousarray(vector).ravel()
+                _, shard, data_f, index_f = self._get_writer(shard_size)
+                if shard not in pending:
+                    pending[shard] = (data_f, index_f, [])
+                pos = data_f.tell()
+                pad = -pos % ALIGNMENT
+                if pad:
+                    data_f.write(b'\0' * pad)
+                data_f.write(vector.tobytes())
+                self._clock += 1
+                stamp = self._clock
+                pending[shard][2].append((
+                    (type_str, uuid),
+                    (shard, pos + pad, vector.dtype.str, vector.size, stamp),
+                ))
+            for shard, (data_f, index_f, records) in pending.items():
+                data_f.flush()
+                index_f.write(b''.join(
+                    json.dumps([key[0], key[1]] + list(loc[1:]))
+                    .encode('utf-8') + b'\n'
+                    for key, loc in records
+                ))
+                index_f.flush()
+                self._index_pos[shard + INDEX_EXT] = index_f.tell()
+                self._index.update(records)
+            for f in self._full_files:
+                f.close()
+            del self._full_files[:]
+
+    def close(self):
+        """
+        Close the shard and index files this process has written to. Writing
+        again starts a new shard.
+        """
+        with self._lock:
+            w = self._writer
+            if w is not None and w[0] == os.getpid():
+                self._full_files.extend(w[2:])
+            self._writer = None
+            for f in self._full_files:
+                f.close()
+            del self._full_files[:]
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+@atexit.register
+def _close_stores():
+    with _STORES_LOCK:
+        for store in _STORES.values():
+            store.close()
+
+
+def get_store(root_dir):
+    """
+    Get the vector store of a directory shared within this process, creating
+    it on first use.
+
+    :param root_dir: Directory of shard and index files.
+    :type root_dir: str
+
+    :rtype: ShardedVectorStore
+    """
+    root_dir = osp.abspath(osp.expanduser(root_dir))
+    with _STORES_LOCK:
+        store = _STORES.get(root_dir)
+        if store is None:
+            store = _STORES[root_dir] = ShardedVectorStore(root_dir)
+        return store
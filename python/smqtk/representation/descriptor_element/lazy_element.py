@@ -0,0 +1,174 @@
+import collections
+
+from six.moves import zip
+
+from smqtk.representation import DescriptorElement, DescriptorSet
+from smqtk.utils.configuration import (
+    from_config_dict,
+    make_default_config,
+    to_config_dict,
+)
+from smqtk.utils.dict import merge_dict
+
+
+class LazyDescriptorElement (DescriptorElement):
+    """
+    Descriptor element that stands in for an element of a descriptor set,
+    retrieving that element from the set only when its vector, or its type if
+    not given, is first needed.
+
+    Vectors of many lazy elements are retrieved from their descriptor sets
+    in bulk via ``DescriptorElement.get_many_vectors``.
+
+    The element must remain in the descriptor set until it is retrieved,
+    otherwise a KeyError is raised when it is used.
+
+    When pickled, the element is retrieved and serialized in place of the
+    descriptor set, whose configuration is kept for ``get_config``.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        """
+        This implementation has no direct dependencies of its own.
+        :rtype: bool
+        """
+        return True
+
+    @classmethod
+    def get_default_config(cls):
+        """
+        Generate and return a default configuration dictionary for this class.
+        This will be primarily used for generating what the configuration
+        dictionary would look like for this class without instantiating it.
+
+        :return: Default configuration dictionary for the class.
+        :rtype: dict
+        """
+        c = super(LazyDescriptorElement, cls).get_default_config()
+        c['descriptor_set'] = make_default_config(DescriptorSet.get_impls())
+        return c
+
+    @classmethod
+    def from_config(cls, config_dict, type_str, uuid, merge_default=True):
+        """
+        Instantiate a new instance of this class given the desired type, uuid,
+        and JSON-compliant configuration dictionary.
+
+        :param type_str: Type of descriptor, or None to take it from the
+            descriptor set element.
+        :type type_str: None | str
+
+        :param uuid: UID of the element in the descriptor set.
+        :type uuid: collections.Hashable
+
+        :param config_dict: JSON compliant dictionary encapsulating
+            a configuration.
+        :type config_dict: dict
+
+        :param merge_default: Merge the given configuration on top of the
+            default provided by ``get_default_config``.
+        :type merge_default: bool
+
+        :return: Constructed instance from the provided config.
+        :rtype: LazyDescriptorElement
+        """
+        if merge_default:
+            config_dict = merge_dict(cls.get_default_config(), config_dict)
+        else:
+            config_dict = merge_dict({}, config_dict)
+        config_dict['descriptor_set'] = from_config_dict(
+            config_dict['descriptor_set'], DescriptorSet.get_impls()
+        )
+        return super(LazyDescriptorElement, cls).from_config(
+            config_dict, type_str, uuid, merge_default=False
+        )
+
+    def __init__(self, type_str, uuid, descriptor_set):
+        """
+        :param type_str: Type of descriptor, or None to take it from the
+            descriptor set element.
+        :type type_str: None | str
+
+        :param uuid: UID of the element in the descriptor set.
+        :type uuid: collections.Hashable
+
+        :param descriptor_set: Descriptor set containing the element.
+        :type descriptor_set: smqtk.representation.DescriptorSet
+        """
+        super(LazyDescriptorElement, self).__init__(type_str, uuid)
+        self._descriptor_set = descriptor_set
+        #: :type: None | dict
+        self._descriptor_set_config = None
+        #: :type: None | smqtk.representation.DescriptorElement
+        self._element = None
+
+    def __getstate__(self):
+        state = super(LazyDescriptorElement, self).__getstate__()
+        # Retrieve the element to not serialize the descriptor set.
+        state.update({
+            "_element": self.element(),
+            "_descriptor_set_config": self.get_config()['descriptor_set'],
+        })
+        return state
+
+    def __setstate__(self, state):
+        super(LazyDescriptorElement, self).__setstate__(state)
+        self._element = state['_element']
+        self._descriptor_set_config = state['_descriptor_set_config']
+        self._descriptor_set = None
+
+    def get_config(self):
+        if self._descriptor_set is None:
+            return {"descriptor_set": self._descriptor_set_config}
+        return {"descriptor_set": to_config_dict(self._descriptor_set)}
+
+    def element(self):
+        """
+        :return: The descriptor set element this element stands in for,
+            retrieving it if it has not been yet.
+        :rtype: smqtk.representation.DescriptorElement
+        """
+        if self._element is None:
+            self._element = self._descriptor_set.get_descriptor(self._uuid)
+        return self._element
+
+    def is_retrieved(self):
+        """
+        :return: If the descriptor set element has been retrieved yet.
+        :rtype: bool
+        """
+        return self._element is not None
+
+    def type(self):
+        if self._type_label is None:
+            return self.element().type()
+        return self._type_label
+
+    def has_vector(self):
+        return self.element().has_vector()
+
+    def vector(self):
+        return self.element().vector()
+
+    def set_vector(self, new_vec):
+        self.element().set_vector(new_vec)
+        return self
+
+    @classmethod
+    def _get_many_indexed_vectors(cls, descriptors):
+        descriptors = list(descriptors)
+        # Retrieve elements not yet retrieved in bulk, per descriptor set.
+        to_retrieve = collections.defaultdict(list)
+        for d in descriptors:
+            if d._element is None:
+                to_retrieve[id(d._descriptor_set)].append(d)
+        for lazy_list in to_retrieve.values():
+            d_set = lazy_list[0]._descriptor_set
+            for d, e in zip(lazy_list, d_set.get_many_descriptors(
+                    [d.uuid() for d in lazy_list])):
+                d._element = e
+        vectors = DescriptorElement.get_many_vectors(
+            [d._element for d in descriptors]
+        )
+        return enumerate(vectors)
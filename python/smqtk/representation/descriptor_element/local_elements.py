@@ -1,9 +1,16 @@
+from collections import defaultdict
+
 import numpy
 import os.path as osp
 
 from six import BytesIO
 
 from smqtk.representation import DescriptorElement
+from smqtk.representation.descriptor_element import _storage_dtype
+from smqtk.representation.descriptor_element._shards import (
+    check_uuid,
+    get_store,
+)
 from smqtk.utils.file import safe_create_dir
 from smqtk.utils.string import partition_string
 
@@ -22,8 +29,28 @@ class DescriptorMemoryElement (DescriptorElement):
     def is_usable(cls):
         return True
 
-    def __init__(self, type_str, uuid):
+    def __init__(self, type_str, uuid, dtype=None):
+        """
+        Initialize a new in-memory descriptor element.
+
+        :param type_str: Type of descriptor. This is usually the name of the
+            content descriptor that generated this vector.
+        :type type_str: str
+
+        :param uuid: Unique ID reference of the descriptor.
+        :type uuid: collections.Hashable
+
+        :param dtype: Optional name of the floating point numpy data type to
+            store vectors as, e.g. "float32" or "float16". Vectors set are
+            converted to this type. If None, vectors are stored as given.
+        :type dtype: None | str
+
+        :raises ValueError: ``dtype`` is not a floating point type.
+
+        """
         super(DescriptorMemoryElement, self).__init__(type_str, uuid)
+        self._dtype = dtype
+        self.__dtype = _storage_dtype(dtype)
         self.__v = None
 
     def __getstate__(self):
@@ -33,6 +60,7 @@ class DescriptorMemoryElement (DescriptorElement):
         # noinspection PyTypeChecker
         numpy.save(b, self.vector())
         state['v'] = b.getvalue()
+        state['dtype'] = self._dtype
         return state
 
     def __setstate__(self, state):
@@ -41,9 +69,13 @@ class DescriptorMemoryElement (DescriptorElement):
             self._type_label = state[0]
             self._uuid = state[1]
             b = BytesIO(state[2])
+            self._dtype = None
         else:  # dictionary
             super(DescriptorMemoryElement, self).__setstate__(state)
             b = BytesIO(state['v'])
+            # States from before storage types were configurable have none.
+            self._dtype = state.get('dtype')
+        self.__dtype = _storage_dtype(self._dtype)
         self.__v = numpy.load(b)
 
     def get_config(self):
@@ -51,7 +83,9 @@ class DescriptorMemoryElement (DescriptorElement):
         :return: JSON type compliant configuration dictionary.
         :rtype: dict
         """
-        return {}
+        return {
+            "dtype": self._dtype,
+        }
 
     def has_vector(self):
         """
@@ -90,7 +124,7 @@ class DescriptorMemoryElement (DescriptorElement):
         Implementation Note
         -------------------
         This implementation copies input arrays before storage to mimic
-        immutability.
+        immutability, converting them to the configured storage type, if any.
 
         :param new_vec: New vector to contain.
         :type new_vec: numpy.core.multiarray.ndarray | tuple | list | None
@@ -101,7 +135,7 @@ class DescriptorMemoryElement (DescriptorElement):
         """
         # Copy a non-None value given, otherwise stay None
         if new_vec is not None:
-            self.__v = numpy.copy(new_vec)
+            self.__v = numpy.array(new_vec, dtype=self.__dtype)
         else:
             self.__v = None
         return self
@@ -125,7 +159,8 @@ class DescriptorFileElement (DescriptorElement):
     def is_usable(cls):
         return True
 
-    def __init__(self, type_str, uuid, save_dir, subdir_split=None):
+    def __init__(self, type_str, uuid, save_dir, subdir_split=None,
+                 dtype=None):
         """
         Initialize a file-base descriptor element.
 
@@ -152,10 +187,19 @@ class DescriptorFileElement (DescriptorElement):
             uuid.UUID instance as the uuid element).
         :type subdir_split: None | int
 
+        :param dtype: Optional name of the floating point numpy data type to
+            save vectors as, e.g. "float32" or "float16". Vectors set are
+            converted to this type. If None, vectors are saved as given.
+        :type dtype: None | str
+
+        :raises ValueError: ``dtype`` is not a floating point type.
+
         """
         super(DescriptorFileElement, self).__init__(type_str, uuid)
         self._save_dir = osp.abspath(osp.expanduser(save_dir))
         self._subdir_split = subdir_split
+        self._dtype = dtype
+        self._np_dtype = _storage_dtype(dtype)
 
         # Generate filepath from parameters
         if self._subdir_split and int(self._subdir_split) > 1:
@@ -178,6 +222,7 @@ class DescriptorFileElement (DescriptorElement):
             '_save_dir': self._save_dir,
             '_subdir_split': self._subdir_split,
             '_vec_filepath': self._vec_filepath,
+            '_dtype': self._dtype,
         })
         return state
 
@@ -186,11 +231,14 @@ class DescriptorFileElement (DescriptorElement):
         self._save_dir = state['_save_dir']
         self._subdir_split = state['_subdir_split']
         self._vec_filepath = state['_vec_filepath']
+        self._dtype = state.get('_dtype')
+        self._np_dtype = _storage_dtype(self._dtype)
 
     def get_config(self):
         return {
             "save_dir": self._save_dir,
-            'subdir_split': self._subdir_split
+            'subdir_split': self._subdir_split,
+            'dtype': self._dtype,
         }
 
     def has_vector(self):
@@ -221,6 +269,8 @@ class DescriptorFileElement (DescriptorElement):
         If this container already stores a descriptor vector, this will
         overwrite it.
 
+        The vector is converted to the configured storage type, if any.
+
         :param new_vec: New vector to contain.
         :type new_vec: numpy.core.multiarray.ndarray
 
@@ -229,11 +279,189 @@ class DescriptorFileElement (DescriptorElement):
 
         """
         safe_create_dir(osp.dirname(self._vec_filepath))
+        self._save_vector(new_vec)
+        return self
+
+    def _save_vector(self, new_vec):
+        """
+        Save a vector to our file, whose directory must exist.
+        """
+        if self._np_dtype is not None:
+            new_vec = numpy.asarray(new_vec, self._np_dtype)
         numpy.save(self._vec_filepath, new_vec)
+
+    @classmethod
+    def _set_many_vectors(cls, descriptors, vectors):
+        # Create each directory once rather than for every vector.
+        by_dir = defaultdict(list)
+        for d, v in zip(descriptors, vectors):
+            by_dir[osp.dirname(d._vec_filepath)].append((d, v))
+        for save_dir, pairs in by_dir.items():
+            safe_create_dir(save_dir)
+            for d, v in pairs:
+                d._save_vector(v)
+
+
+class DescriptorShardedFileElement (DescriptorElement):
+    """
+    File-based storage of descriptor vectors packed into large, append-only
+    shard files shared by all elements configured with the same directory.
+
+    Unlike ``DescriptorFileElement``, which saves a file per vector, vectors
+    are appended to the shard file of the writing process alongside an index
+    file of vector locations, so storing many vectors creates few files.
+    Vectors are read as read-only, memory-mapped views of shard files without
+    copying, and ``get_many_vectors`` reads the vectors of each shard in file
+    order.
+
+    Setting the vector of an element again appends the new vector, leaving
+    the space of the previous one unused. Vectors set by other processes are
+    found once the directory's index files are re-read, which is done on a
+    lookup miss at most once a second, and before writing.
+
+    UUIDs must be strings or integers.
+
+    """
+
+    @classmethod
+    def is_usable(cls):
+        return True
+
+    def __init__(self, type_str, uuid, root_dir, shard_size=1073741824,
+                 dtype=None):
+        """
+        Initialize a sharded file descriptor element.
+
+        :param type_str: Type of descriptor. This is usually the name of the
+            content descriptor that generated this vector.
+        :type type_str: str
+
+        :param uuid: uuid for this descriptor
+        :type uuid: str | int
+
+        :param root_dir: Directory of shard and index files. If this path is
+            relative, we interpret as relative to the current working
+            directory.
+        :type root_dir: str | unicode
+
+        :param shard_size: Size in bytes past which a writing process starts a
+            new shard file.
+        :type shard_size: int
+
+        :param dtype: Optional name of the floating point numpy data type to
+            save vectors as, e.g. "float32" or "float16". Vectors set are
+            converted to this type. If None, vectors are saved as given.
+        :type dtype: None | str
+
+        :raises TypeError: ``uuid`` is not a string or integer.
+
+        :raises ValueError: ``dtype`` is not a floating point type.
+
+        """
+        super(DescriptorShardedFileElement, self).__init__(
+            type_str, check_uuid(uuid)
+        )
+        self._root_dir = osp.abspath(osp.expanduser(root_dir))
+        self._shard_size = int(shard_size)
+        self._dtype = dtype
+        self._np_dtype = _storage_dtype(dtype)
+
+    def __getstate__(self):
+        state = super(DescriptorShardedFileElement, self).__getstate__()
+        state.update({
+            '_root_dir': self._root_dir,
+            '_shard_size': self._shard_size,
+            '_dtype': self._dtype,
+        })
+        return state
+
+    def __setstate__(self, state):
+        super(DescriptorShardedFileElement, self).__setstate__(state)
+        self._root_dir = state['_root_dir']
+        self._shard_size = state['_shard_size']
+        self._dtype = state['_dtype']
+        self._np_dtype = _storage_dtype(self._dtype)
+
+    def get_config(self):
+        return {
+            'root_dir': self._root_dir,
+            'shard_size': self._shard_size,
+            'dtype': self._dtype,
+        }
+
+    def _store(self):
+        """
+        :return: Vector store of our directory shared within this process.
+        :rtype: smqtk.representation.descriptor_element._shards
+            .ShardedVectorStore
+        """
+        return get_store(self._root_dir)
+
+    @classmethod
+    def _get_many_indexed_vectors(cls, descriptors):
+        by_dir = defaultdict(list)
+        for i, d in enumerate(descriptors):
+            by_dir[d._root_dir].append((i, d))
+        for root_dir, dir_descriptors in by_dir.items():
+            keys = [(d.type(), d.uuid()) for _, d in dir_descriptors]
+            for i, v in get_store(root_dir).read_many(keys):
+                yield dir_descriptors[i][0], v
+
+    @classmethod
+    def _set_many_vectors(cls, descriptors, vectors):
+        # Append the vectors of each directory's store together.
+        by_store = defaultdict(list)
+        for d, v in zip(descriptors, vectors):
+            by_store[(d._root_dir, d._shard_size)].append(
+                (d.type(), d.uuid(), numpy.asarray(v, d._np_dtype))
+            )
+        for (root_dir, shard_size), items in by_store.items():
+            get_store(root_dir).write_many(items, shard_size)
+
+    def has_vector(self):
+        """
+        :return: Whether or not this container current has a descriptor vector
+            stored.
+        :rtype: bool
+        """
+        return self._store().location(self.type(), self.uuid()) is not None
+
+    def vector(self):
+        """
+        Implementation Note
+        -------------------
+        A read-only view of the memory-mapped shard file is returned.
+
+        :return: Get the stored descriptor vector as a numpy array. This returns
+            None of there is no vector stored in this container.
+        :rtype: numpy.core.multiarray.ndarray or None
+        """
+        return self._store().read(self.type(), self.uuid())
+
+    def set_vector(self, new_vec):
+        """
+        Set the contained vector.
+
+        If this container already stores a descriptor vector, this will
+        overwrite it.
+
+        The vector is converted to the configured storage type, if any.
+
+        :param new_vec: New vector to contain.
+        :type new_vec: numpy.core.multiarray.ndarray
+
+        :returns: Self.
+        :rtype: DescriptorShardedFileElement
+
+        """
+        new_vec = numpy.asarray(new_vec, self._np_dtype)
+        self._store().write(self.type(), self.uuid(), new_vec,
+                            self._shard_size)
         return self
 
 
 DESCRIPTOR_ELEMENT_CLASS = [
     DescriptorMemoryElement,
     DescriptorFileElement,
+    DescriptorShardedFileElement,
 ]
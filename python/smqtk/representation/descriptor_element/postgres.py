@@ -1,14 +1,16 @@
 import multiprocessing
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 import numpy
 
 from smqtk.representation import DescriptorElement
+from smqtk.representation.descriptor_element import _storage_dtype
 from smqtk.utils.postgres import norm_psql_cmd_string, PsqlConnectionHelper
 
 # Try to import required modules
 try:
     import psycopg2
+    import psycopg2.extras
 except ImportError:
     psycopg2 = None
 
@@ -27,8 +29,13 @@ class PostgresDescriptorElement (DescriptorElement):
     Efficient connection pooling may be achieved via external utilities like
     PGBounder.
 
+    Vectors are stored as the raw bytes of arrays of the configured storage
+    type, so elements reading vectors must be configured with the type they
+    were stored with.
+
     """
 
+    # Default vector storage type.
     ARRAY_DTYPE = numpy.float64
 
     UPSERT_TABLE_TMPL = norm_psql_cmd_string("""
@@ -69,6 +76,32 @@ class PostgresDescriptorElement (DescriptorElement):
             WHERE NOT EXISTS (SELECT * FROM upsert);
     """)
 
+    # Multi-row form of ``UPSERT_TMPL`` for use with
+    # ``psycopg2.extras.execute_values``.
+    UPSERT_MANY_TMPL = norm_psql_cmd_string("""
+        WITH new_values ({type_col:s}, {uuid_col:s}, {binary_col:s}) AS (
+          VALUES %s
+        ), upsert AS (
+          UPDATE {table_name:s} AS t
+            SET {binary_col:s} = nv.{binary_col:s}
+            FROM new_values AS nv
+            WHERE t.{type_col:s} = nv.{type_col:s}
+              AND t.{uuid_col:s} = nv.{uuid_col:s}
+            RETURNING t.{type_col:s}, t.{uuid_col:s}
+          )
+        INSERT INTO {table_name:s} ({type_col:s}, {uuid_col:s}, {binary_col:s})
+          SELECT {type_col:s}, {uuid_col:s}, {binary_col:s}
+            FROM new_values AS nv
+            WHERE NOT EXISTS (
+              SELECT * FROM upsert AS u
+                WHERE u.{type_col:s} = nv.{type_col:s}
+                  AND u.{uuid_col:s} = nv.{uuid_col:s}
+            );
+    """)
+
+    # Number of rows upserted per statement when setting many vectors.
+    UPSERT_MANY_PAGE_SIZE = 1000
+
     @classmethod
     def is_usable(cls):
         if psycopg2 is None:
@@ -80,7 +113,7 @@ class PostgresDescriptorElement (DescriptorElement):
                  table_name='descriptors',
                  uuid_col='uid', type_col='type_str', binary_col='vector',
                  db_name='postgres', db_host=None, db_port=None, db_user=None,
-                 db_pass=None, create_table=True):
+                 db_pass=None, create_table=True, dtype='float64'):
         """
         Initialize new PostgresDescriptorElement attached to some database
         credentials.
@@ -148,8 +181,16 @@ class PostgresDescriptorElement (DescriptorElement):
             does not currently exist, an exception will be raised.
         :type create_table: bool
 
+        :param dtype: Name of the floating point numpy data type vectors are
+            stored as, e.g. "float32" or "float16". Vectors set are converted
+            to this type. If None, ``ARRAY_DTYPE`` is used.
+        :type dtype: None | str
+
+        :raises ValueError: ``dtype`` is not a floating point type.
+
         """
         super(PostgresDescriptorElement, self).__init__(type_str, uuid)
+        self._set_dtype(dtype)
 
         self.table_name = table_name
         self.uuid_col = uuid_col
@@ -188,6 +229,7 @@ class PostgresDescriptorElement (DescriptorElement):
             "db_port": self.db_port,
             "db_user": self.db_user,
             "db_pass": self.db_pass,
+            "dtype": self.dtype,
         })
         return state
 
@@ -205,8 +247,20 @@ class PostgresDescriptorElement (DescriptorElement):
         self.db_port = state['db_port']
         self.db_user = state['db_user']
         self.db_pass = state['db_pass']
+        # States from before storage types were configurable were float64.
+        self._set_dtype(state.get('dtype', 'float64'))
         self._psql_helper = None
 
+    def _set_dtype(self, dtype):
+        """
+        Set the configured vector storage type, defaulting to
+        ``ARRAY_DTYPE``.
+        """
+        self.dtype = dtype
+        self._array_dtype = numpy.dtype(
+            self.ARRAY_DTYPE if dtype is None else _storage_dtype(dtype)
+        )
+
     @classmethod
     def _create_psql_helper(
             cls, db_name, db_host, db_port, db_user, db_pass, table_name,
@@ -309,6 +363,7 @@ class PostgresDescriptorElement (DescriptorElement):
             "db_port": self.db_port,
             "db_user": self.db_user,
             "db_pass": self.db_pass,
+            "dtype": self.dtype,
         }
 
     def has_vector(self):
@@ -386,7 +441,7 @@ class PostgresDescriptorElement (DescriptorElement):
             return None
         else:
             b = r[0][0]
-            v = numpy.frombuffer(b, self.ARRAY_DTYPE)
+            v = numpy.frombuffer(b, self._array_dtype)
             return v
 
     @classmethod
@@ -408,11 +463,12 @@ class PostgresDescriptorElement (DescriptorElement):
             descriptor.type_col,
             descriptor.uuid_col,
             descriptor.binary_col,
-            descriptor.type()
+            descriptor.type(),
+            descriptor._array_dtype,
         )
 
     @classmethod
-    def _get_many_vectors(cls, descriptors):
+    def _get_many_indexed_vectors(cls, descriptors):
         """
         Internal method to be overridden by subclasses to return many vectors
         associated with given descriptors.
@@ -423,29 +479,31 @@ class PostgresDescriptorElement (DescriptorElement):
             `get_many_vectors` handles re-ordering as necessary and insertion
             of None for missing values.
 
-        :param descriptors: Iterable of descriptors to query for.
-        :type descriptors: collections.Iterable[
+        :param descriptors: Sequence of descriptors to query for.
+        :type descriptors: collections.Sequence[
             smqtk.representation.descriptor_element.DescriptorElement]
 
-        :return: Iterator of tuples containing the descriptor uuid and the
-            vector associated with the given descriptors or None if the
-            descriptor has no associated vector
+        :return: Iterator of tuples containing the position of a descriptor in
+            ``descriptors`` and the vector associated with that descriptor or
+            None if the descriptor has no associated vector
         :rtype: collections.Iterable[
-            tuple[collections.Hashable, Union[numpy.ndarray, None]]]
+            tuple[int, Union[numpy.ndarray, None]]]
         """
-        batch_dictionary = defaultdict(list)
+        # Query options to the positions of the descriptors of each UUID, as
+        # stored.
+        batch_dictionary = defaultdict(lambda: defaultdict(list))
         # For each given descriptor...
-        for descriptor_ in descriptors:
+        for i, descriptor_ in enumerate(descriptors):
             # Extract options for constructing SQL query used to
             # retrieve descriptor vectors
             batch_dictionary[
                 cls._sql_vector_query_options(descriptor_)
-            ].append(descriptor_.uuid())
+            ][str(descriptor_.uuid())].append(i)
 
         # For each unique set of SQL query options...
-        for query_options, uuids in batch_dictionary.items():
+        for query_options, uuid_indices in batch_dictionary.items():
             psql_helper = cls._create_psql_helper(
-                *query_options[:-1], create_table=False)
+                *query_options[:9], create_table=False)
 
             sql_query = cls.SELECT_MANY_TMPL.format(
                 table_name=query_options[5],
@@ -456,7 +514,7 @@ class PostgresDescriptorElement (DescriptorElement):
 
             sql_values = {
                 "type_val": query_options[9],
-                "uuids_tuple": tuple(uuids)
+                "uuids_tuple": tuple(uuid_indices)
             }
 
             def query_callback(cursor):
@@ -467,9 +525,81 @@ class PostgresDescriptorElement (DescriptorElement):
                 query_callback, yield_result_rows=True
             )
 
-            # Construct numpy array from buffer and return uuid, vector pairs
+            # Construct numpy array from buffer and return position, vector
+            # pairs
             for uuid, vector_buffer in sql_return:
-                yield (uuid, numpy.frombuffer(vector_buffer, cls.ARRAY_DTYPE))
+                vector = numpy.frombuffer(vector_buffer, query_options[10])
+                for i in uuid_indices[uuid]:
+                    yield (i, vector)
+
+    def _as_stored_array(self, new_vec):
+        """
+        Convert a vector to an array of our storage type.
+
+        :raises ValueError: ``new_vec`` could not be converted.
+
+        :type new_vec: numpy.ndarray
+        :rtype: numpy.ndarray
+        """
+        if not isinstance(new_vec, numpy.ndarray):
+            new_vec = numpy.copy(new_vec)
+
+        if new_vec.dtype != self._array_dtype:
+            try:
+                new_vec = new_vec.astype(self._array_dtype)
+            except TypeError:
+                raise ValueError("Could not convert input to a vector of type "
+                                 "%s." % self._array_dtype)
+        return new_vec
+
+    @classmethod
+    def _set_many_vectors(cls, descriptors, vectors):
+        """
+        Upsert the vectors of descriptors stored in the same table in a single
+        transaction of multi-row statements.
+
+        :raises ValueError: A vector could not be converted to its
+            descriptor's storage type.
+
+        :param descriptors: Sequence of descriptors to set the vectors of.
+        :type descriptors: collections.Sequence[PostgresDescriptorElement]
+
+        :param vectors: Sequence of vectors to set, parallel to
+            ``descriptors``.
+        :type vectors: collections.Sequence[numpy.ndarray]
+        """
+        # Connection and table options to rows keyed by type and UUID. A row
+        # may only be upserted once per statement, so the last vector given
+        # for a descriptor is used.
+        batch_dictionary = defaultdict(OrderedDict)
+        for descriptor_, vector in zip(descriptors, vectors):
+            type_str = descriptor_.type()
+            uuid = str(descriptor_.uuid())
+            vector = descriptor_._as_stored_array(vector)
+            query_options = \
+                cls._sql_vector_query_options(descriptor_)[:9] + \
+                (descriptor_.create_table,)
+            batch_dictionary[query_options][(type_str, uuid)] = \
+                (type_str, uuid, psycopg2.Binary(vector))
+
+        for query_options, rows in batch_dictionary.items():
+            psql_helper = cls._create_psql_helper(
+                *query_options[:9], create_table=query_options[9])
+            sql_query = cls.UPSERT_MANY_TMPL.format(
+                table_name=query_options[5],
+                type_col=query_options[6],
+                uuid_col=query_options[7],
+                binary_col=query_options[8],
+            )
+            sql_values = list(rows.values())
+
+            def query_callback(cursor):
+                psycopg2.extras.execute_values(
+                    cursor, sql_query, sql_values,
+                    page_size=cls.UPSERT_MANY_PAGE_SIZE
+                )
+
+            list(psql_helper.single_execute(query_callback))
 
     def set_vector(self, new_vec):
         """
@@ -495,15 +625,7 @@ class PostgresDescriptorElement (DescriptorElement):
         :rtype: PostgresDescriptorElement
 
         """
-        if not isinstance(new_vec, numpy.ndarray):
-            new_vec = numpy.copy(new_vec)
-
-        if new_vec.dtype != self.ARRAY_DTYPE:
-            try:
-                new_vec = new_vec.astype(self.ARRAY_DTYPE)
-            except TypeError:
-                raise ValueError("Could not convert input to a vector of type "
-                                 "%s." % self.ARRAY_DTYPE)
+        new_vec = self._as_stored_array(new_vec)
 
         q_upsert = self.UPSERT_TMPL.strip().format(**{
             "table_name": self.table_name,
@@ -1,4 +1,5 @@
 import time
+from collections import OrderedDict
 
 import numpy
 
@@ -174,6 +175,43 @@ class SolrDescriptorElement (DescriptorElement):
     def has_vector(self):
         return bool(self._get_existing_doc())
 
+    def _vector_doc(self, new_vec):
+        """
+        :return: Document storing the given vector for our type/uuid.
+        :rtype: dict[str, any]
+        """
+        doc = self._base_doc()
+        doc[self.vector_field] = new_vec.tolist()
+        doc[self.timestamp_field] = time.time()
+        return doc
+
+    @classmethod
+    def _set_many_vectors(cls, descriptors, vectors):
+        """
+        Add the documents of descriptors stored in the same Solr index in a
+        single request, committing once if configured to commit on set.
+
+        :param descriptors: Sequence of descriptors to set the vectors of.
+        :type descriptors: collections.Sequence[SolrDescriptorElement]
+
+        :param vectors: Sequence of vectors to set, parallel to
+            ``descriptors``.
+        :type vectors: collections.Sequence[numpy.ndarray]
+        """
+        # Index and field options to the first descriptor with those options
+        # and the documents to add. Documents are keyed by ID so that only the
+        # last vector given for a descriptor is added.
+        batch_dictionary = {}
+        for d, v in zip(descriptors, vectors):
+            key = (d.solr_conn_addr, d.type_field, d.uuid_field,
+                   d.vector_field, d.timestamp_field, d.solr_commit_on_set)
+            if key not in batch_dictionary:
+                batch_dictionary[key] = (d, OrderedDict())
+            doc = d._vector_doc(v)
+            batch_dictionary[key][1][doc['id']] = doc
+        for d, docs in batch_dictionary.values():
+            d.solr.add_many(list(docs.values()), commit=d.solr_commit_on_set)
+
     def set_vector(self, new_vec):
         """
         Set the contained vector.
@@ -188,10 +226,8 @@ class SolrDescriptorElement (DescriptorElement):
         :rtype: SolrDescriptorElement
 
         """
-        doc = self._base_doc()
-        doc[self.vector_field] = new_vec.tolist()
-        doc[self.timestamp_field] = time.time()
-        self.solr.add(doc, commit=self.solr_commit_on_set)
+        self.solr.add(self._vector_doc(new_vec),
+                      commit=self.solr_commit_on_set)
         return self
 
     def vector(self):
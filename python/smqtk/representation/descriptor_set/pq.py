@@ -0,0 +1,503 @@
+from os import path as osp
+
+import numpy
+from six.moves import cPickle as pickle, range, zip
+
+from smqtk.representation import DataElement, DescriptorSet
+from smqtk.representation.descriptor_element import DescriptorElement
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
+from smqtk.utils import SimpleTimer
+from smqtk.utils.configuration import (
+    from_config_dict,
+    make_default_config,
+    to_config_dict
+)
+from smqtk.utils.dict import merge_dict
+from smqtk.utils.file import safe_create_dir
+from smqtk.utils.product_quantization import ProductQuantizer
+
+
+class PQDescriptorSet (DescriptorSet):
+    """
+    In-memory descriptor index storing product-quantization codes of
+    descriptor vectors, with file caching.
+
+    Instead of descriptor elements, the index holds one row of
+    ``num_subspaces`` bytes per descriptor in a single uint8 matrix, along
+    with each descriptor's UUID and type string. Descriptors retrieved from
+    the index are ``DescriptorMemoryElement`` instances with vectors
+    approximated from their codes, so this index is lossy.
+
+    The product quantizer must be trained, via ``train`` on a representative
+    sample of descriptors, or loaded from a configured quantizer file before
+    descriptors are added.
+
+    If the path to a file cache is provided, it is loaded at construction if
+    it exists. As elements are added to or removed from the index, the codes
+    and quantizer are periodically dumped to the cache, and ``cache_table``
+    dumps any changes not cached yet.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        """
+        Check whether this class is available for use.
+
+        :return: Boolean determination of whether this implementation is usable.
+        :rtype: bool
+
+        """
+        # Only numpy required.
+        return True
+
+    @classmethod
+    def get_default_config(cls):
+        """
+        Generate and return a default configuration dictionary for this class.
+        This will be primarily used for generating what the configuration
+        dictionary would look like for this class without instantiating it.
+
+        :return: Default configuration dictionary for the class.
+        :rtype: dict
+
+        """
+        c = super(PQDescriptorSet, cls).get_default_config()
+        c['cache_element'] = make_default_config(DataElement.get_impls())
+        return c
+
+    @classmethod
+    def from_config(cls, config_dict, merge_default=True):
+        """
+        Instantiate a new instance of this class given the configuration
+        JSON-compliant dictionary encapsulating initialization arguments.
+
+        :param config_dict: JSON compliant dictionary encapsulating
+            a configuration.
+        :type config_dict: dict
+
+        :param merge_default: Merge the given configuration on top of the
+            default provided by ``get_default_config``.
+        :type merge_default: bool
+
+        :return: Constructed instance from the provided config.
+        :rtype: PQDescriptorSet
+
+        """
+        if merge_default:
+            config_dict = merge_dict(cls.get_default_config(), config_dict)
+
+        # Optionally construct cache element from sub-config.
+        if config_dict['cache_element'] \
+                and config_dict['cache_element']['type']:
+            e = from_config_dict(config_dict['cache_element'],
+                                 DataElement.get_impls())
+            config_dict['cache_element'] = e
+        else:
+            config_dict['cache_element'] = None
+
+        return super(PQDescriptorSet, cls).from_config(config_dict, False)
+
+    def __init__(self, cache_element=None, quantizer_filepath=None,
+                 num_subspaces=8, num_centroids=256, num_iterations=20,
+                 train_sample_size=65536, random_seed=None,
+                 cache_fraction=0.1, pickle_protocol=-1):
+        """
+        Initialize a new product-quantized descriptor index, or reload one
+        from a cache.
+
+        :param cache_element: Optional data element cache, loading an existing
+            index if the element has bytes. If the given element is writable,
+            new descriptors added to this index are cached to the element.
+        :type cache_element: None | smqtk.representation.DataElement
+
+        :param quantizer_filepath: Optional file location of a trained
+            quantizer to encode vectors with, loaded at construction if it
+            exists and the cache does not hold a quantizer. A quantizer
+            trained via ``train`` is saved to it.
+        :type quantizer_filepath: None | str
+
+        :param num_subspaces: Number of subspaces descriptor vectors are split
+            into, which must divide the descriptor dimension. This is the
+            number of bytes stored per descriptor.
+        :type num_subspaces: int
+
+        :param num_centroids: Number of centroids of each subspace, up to
+            256.
+        :type num_centroids: int
+
+        :param num_iterations: Number of k-means iterations when training the
+            quantizer.
+        :type num_iterations: int
+
+        :param train_sample_size: Maximum number of descriptors given to
+            ``train``, sampled at random, to train the quantizer on.
+        :type train_sample_size: int
+
+        :param random_seed: Optional random number generator seed for
+            deterministic sampling and training of the quantizer.
+        :type random_seed: None | int
+
+        :param cache_fraction: The index is dumped to the cache element once
+            the descriptors added or removed since it was last dumped number
+            at least this fraction of the descriptors in the index, so that
+            caching takes amortized constant time per descriptor. Changes
+            since the last dump are lost unless ``cache_table`` is called. If
+            0, the index is dumped after every change.
+        :type cache_fraction: float
+
+        :param pickle_protocol: Pickling protocol to use when serializing the
+            index to the optionally provided, writable cache element.
+        :type pickle_protocol: int
+
+        :raises ValueError: Invalid number of subspaces or centroids, a
+            negative cache fraction, or a quantizer file with other numbers
+            of subspaces or centroids.
+
+        """
+        super(PQDescriptorSet, self).__init__()
+
+        self.cache_element = cache_element
+        self.quantizer_filepath = \
+            (quantizer_filepath and
+             osp.abspath(osp.expanduser(quantizer_filepath))) or \
+            quantizer_filepath
+        self.num_subspaces = num_subspaces
+        self.num_centroids = num_centroids
+        self.num_iterations = num_iterations
+        self.train_sample_size = train_sample_size
+        self.random_seed = random_seed
+        if cache_fraction < 0:
+            raise ValueError("The cache fraction must not be negative.")
+        self.cache_fraction = cache_fraction
+        self.pickle_protocol = pickle_protocol
+
+        self._pq = ProductQuantizer(num_subspaces, num_centroids,
+                                    num_iterations, random_seed)
+        # Codes of each descriptor in the first ``len(self._uuids)`` rows.
+        # Rows are over-allocated so that adding is amortized constant time.
+        self._codes = numpy.empty((0, num_subspaces), dtype=numpy.uint8)
+        # Descriptor UUID and type string of each row.
+        #: :type: list[collections.Hashable]
+        self._uuids = []
+        #: :type: list[str]
+        self._types = []
+        #: :type: dict[collections.Hashable, int]
+        self._uid2row = {}
+        # Number of descriptors added or removed since the last cache dump.
+        self._num_uncached = 0
+
+        if cache_element and not cache_element.is_empty():
+            self._log.debug("Loading cached descriptor index from %s "
+                            "element.", cache_element.__class__.__name__)
+            state = pickle.loads(cache_element.get_bytes())
+            self._pq.centroids = state['centroids']
+            self._codes = state['codes']
+            self._uuids = state['uuids']
+            self._types = state['types']
+            self._uid2row = dict((uid, i) for i, uid in enumerate(self._uuids))
+        if not self._pq.is_trained and self.quantizer_filepath and \
+                osp.isfile(self.quantizer_filepath):
+            self._log.debug("Loading quantizer: %s", self.quantizer_filepath)
+            centroids = \
+                ProductQuantizer.load(self.quantizer_filepath).centroids
+            if centroids.shape[:2] != (num_subspaces, num_centroids):
+                raise ValueError("Quantizer file %s has %d subspaces of %d "
+                                 "centroids, not %d of %d."
+                                 % ((self.quantizer_filepath,) +
+                                    centroids.shape[:2] +
+                                    (num_subspaces, num_centroids)))
+            self._pq.centroids = centroids
+
+    def get_config(self):
+        c = merge_dict(self.get_default_config(), {
+            "quantizer_filepath": self.quantizer_filepath,
+            "num_subspaces": self.num_subspaces,
+            "num_centroids": self.num_centroids,
+            "num_iterations": self.num_iterations,
+            "train_sample_size": self.train_sample_size,
+            "random_seed": self.random_seed,
+            "cache_fraction": self.cache_fraction,
+            "pickle_protocol": self.pickle_protocol,
+        })
+        if self.cache_element:
+            merge_dict(c['cache_element'],
+                       to_config_dict(self.cache_element))
+        return c
+
+    def cache_table(self):
+        """
+        Dump the index to the cache element, if one is configured and
+        writable.
+        """
+        if self.cache_element and self.cache_element.writable():
+            with SimpleTimer("Caching descriptor codes", self._log.debug):
+                state = {
+                    "centroids": self._pq.centroids,
+                    "codes": self._codes[:len(self._uuids)],
+                    "uuids": self._uuids,
+                    "types": self._types,
+                }
+                self.cache_element.set_bytes(pickle.dumps(
+                    state, self.pickle_protocol
+                ))
+        self._num_uncached = 0
+
+    def _changed(self, num_changed):
+        """
+        Record descriptors added or removed, dumping the index to the cache
+        once enough changes are not cached yet.
+
+        :param num_changed: Number of descriptors added or removed.
+        :type num_changed: int
+        """
+        self._num_uncached += num_changed
+        if self._num_uncached >= self.cache_fraction * len(self._uuids):
+            self.cache_table()
+
+    @property
+    def quantizer(self):
+        """
+        :return: Product quantizer of this index.
+        :rtype: ProductQuantizer
+        """
+        return self._pq
+
+    def train(self, descriptors):
+        """
+        Train the product quantizer on a random sample of at most
+        ``train_sample_size`` of the given descriptors, saving it to the
+        configured quantizer file.
+
+        :param descriptors: Iterable of descriptors to train on.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        :raises ValueError: This index is not empty, as its codes would not
+            be valid for the new quantizer, or fewer than ``num_centroids``
+            descriptors are given.
+
+        """
+        if self._uuids:
+            raise ValueError("Cannot train the quantizer of a non-empty "
+                             "index.")
+        descriptors = list(descriptors)
+        rng = numpy.random.RandomState(self.random_seed)
+        sample = sorted(rng.choice(
+            len(descriptors), min(len(descriptors), self.train_sample_size),
+            replace=False
+        ))
+        vectors = numpy.vstack(DescriptorElement.get_many_vectors(
+            [descriptors[i] for i in sample]
+        ))
+        with SimpleTimer("Training product quantizer on %d vectors"
+                         % len(vectors), self._log.debug):
+            self._pq.train(vectors)
+        if self.quantizer_filepath:
+            self._log.debug("Saving quantizer: %s", self.quantizer_filepath)
+            safe_create_dir(osp.dirname(self.quantizer_filepath))
+            # noinspection PyTypeChecker
+            with open(self.quantizer_filepath, "wb") as f:
+                self._pq.save(f)
+        self.cache_table()
+
+    def count(self):
+        return len(self._uuids)
+
+    def clear(self):
+        """
+        Clear this descriptor index's entries. The trained quantizer is kept.
+        """
+        self._codes = numpy.empty((0, self.num_subspaces), dtype=numpy.uint8)
+        self._uuids = []
+        self._types = []
+        self._uid2row = {}
+        self.cache_table()
+
+    def has_descriptor(self, uuid):
+        """
+        Check if a DescriptorElement with the given UUID exists in this index.
+
+        :param uuid: UUID to query for
+        :type uuid: collections.Hashable
+
+        :return: True if a DescriptorElement with the given UUID exists in this
+            index, or False if not.
+        :rtype: bool
+
+        """
+        return uuid in self._uid2row
+
+    def add_descriptor(self, descriptor):
+        """
+        Add a descriptor to this index.
+
+        Adding the same descriptor multiple times should not add multiple
+        copies of the descriptor in the index.
+
+        :param descriptor: Descriptor to index.
+        :type descriptor: smqtk.representation.DescriptorElement
+
+        :raises RuntimeError: The quantizer has not been trained.
+
+        """
+        self.add_many_descriptors([descriptor])
+
+    def add_many_descriptors(self, descriptors):
+        """
+        Add multiple descriptors at one time.
+
+        :param descriptors: Iterable of descriptor instances to add to this
+            index.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        :raises RuntimeError: The quantizer has not been trained.
+
+        """
+        descriptors = list(descriptors)
+        if not descriptors:
+            return
+        if not self._pq.is_trained:
+            raise RuntimeError("The product quantizer must be trained, via "
+                               "train or a quantizer file, before "
+                               "descriptors are added.")
+        vectors = numpy.vstack(DescriptorElement.get_many_vectors(descriptors))
+        codes = self._pq.encode(vectors)
+
+        n = len(self._uuids)
+        new_rows = sum(1 for d in set(d.uuid() for d in descriptors)
+                       if d not in self._uid2row)
+        if n + new_rows > len(self._codes):
+            grown = numpy.empty((max(n + new_rows, 2 * len(self._codes)),
+                                 self.num_subspaces), dtype=numpy.uint8)
+            grown[:n] = self._codes[:n]
+            self._codes = grown
+        for d, code in zip(descriptors, codes):
+            uid = d.uuid()
+            row = self._uid2row.get(uid)
+            if row is None:
+                row = self._uid2row[uid] = len(self._uuids)
+                self._uuids.append(uid)
+                self._types.append(d.type())
+            else:
+                self._types[row] = d.type()
+            self._codes[row] = code
+        self._changed(len(descriptors))
+
+    def _make_descriptors(self, rows):
+        """
+        :param rows: Rows of the descriptors to make.
+        :type rows: list[int]
+
+        :return: Descriptor elements of the given rows, with vectors decoded
+            from their codes.
+        :rtype: list[DescriptorMemoryElement]
+        """
+        if not rows:
+            return []
+        vectors = self._pq.decode(self._codes[rows])
+        descriptors = []
+        for r, v in zip(rows, vectors):
+            d = DescriptorMemoryElement(self._types[r], self._uuids[r])
+            d.set_vector(v)
+            descriptors.append(d)
+        return descriptors
+
+    def get_descriptor(self, uuid):
+        """
+        Get the descriptor in this index that is associated with the given UUID.
+
+        :param uuid: UUID of the DescriptorElement to get.
+        :type uuid: collections.Hashable
+
+        :raises KeyError: The given UUID doesn't associate to a
+            DescriptorElement in this index.
+
+        :return: DescriptorElement associated with the queried UUID, with its
+            vector approximated from its code.
+        :rtype: smqtk.representation.DescriptorElement
+
+        """
+        return self._make_descriptors([self._uid2row[uuid]])[0]
+
+    def get_many_descriptors(self, uuids):
+        """
+        Get an iterator over descriptors associated to given descriptor UUIDs.
+
+        The codes of all requested descriptors are decoded together.
+
+        :param uuids: Iterable of descriptor UUIDs to query for.
+        :type uuids: collections.Iterable[collections.Hashable]
+
+        :raises KeyError: A given UUID doesn't associate with a
+            DescriptorElement in this index.
+
+        :return: Iterator of descriptors associated to given uuid values.
+        :rtype: __generator[smqtk.representation.DescriptorElement]
+
+        """
+        rows = [self._uid2row[uid] for uid in uuids]
+        for d in self._make_descriptors(rows):
+            yield d
+
+    def remove_descriptor(self, uuid):
+        """
+        Remove a descriptor from this index by the given UUID.
+
+        :param uuid: UUID of the DescriptorElement to remove.
+        :type uuid: collections.Hashable
+
+        :raises KeyError: The given UUID doesn't associate to a
+            DescriptorElement in this index.
+
+        """
+        self.remove_many_descriptors([uuid])
+
+    def remove_many_descriptors(self, uuids):
+        """
+        Remove descriptors associated to given descriptor UUIDs from this
+        index.
+
+        The last rows of the index are moved into the rows removed.
+
+        :param uuids: Iterable of descriptor UUIDs to remove.
+        :type uuids: collections.Iterable[collections.Hashable]
+
+        :raises KeyError: A given UUID doesn't associate with a
+            DescriptorElement in this index.
+
+        """
+        uuids = set(uuids)
+        for uid in uuids:
+            if uid not in self._uid2row:
+                raise KeyError(uid)
+        for uid in uuids:
+            row = self._uid2row.pop(uid)
+            last = len(self._uuids) - 1
+            if row != last:
+                last_uid = self._uuids[last]
+                self._uuids[row] = last_uid
+                self._types[row] = self._types[last]
+                self._codes[row] = self._codes[last]
+                self._uid2row[last_uid] = row
+            del self._uuids[last], self._types[last]
+        self._changed(len(uuids))
+
+    def iterkeys(self):
+        return iter(list(self._uuids))
+
+    def iterdescriptors(self):
+        for _, d in self.iteritems():
+            yield d
+
+    def iteritems(self):
+        # Decoded in chunks of rows to bound memory use.
+        chunk_size = 1000
+        for beg in range(0, len(self._uuids), chunk_size):
+            rows = list(range(beg, min(beg + chunk_size, len(self._uuids))))
+            for d in self._make_descriptors(rows):
+                yield d.uuid(), d
+
+
+SMQTK_PLUGIN_CLASS = PQDescriptorSet
@@ -1,9 +1,14 @@
-import collections
+import base64
+import threading
 import time
 
-from six.moves import cPickle, range
+import numpy
+from six.moves import cPickle
 
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
 from smqtk.representation.descriptor_set import DescriptorSet
+from smqtk.utils.parallel import parallel_map
 
 # Try to import required module
 try:
@@ -27,8 +32,26 @@ class SolrDescriptorSet (DescriptorSet):
     Descriptor UUIDs should maintain their uniqueness when converted to a
     string, otherwise this backend will not work well when querying.
 
+    Descriptors are stored either as pickled ``DescriptorElement`` instances
+    (the ``pickle`` vector encoding) or as the base64 encoded bytes of their
+    vector's little-endian float64 array along with their type string (the
+    ``raw`` vector encoding). Documents of either encoding are readable
+    regardless of the configured encoding. Descriptors read from ``raw``
+    documents are returned as ``DescriptorMemoryElement`` instances with
+    string UUIDs.
+
+    Batches of descriptors are selected with ``{!terms}`` filter queries and
+    results are paged through with ``cursorMark`` deep paging, so the ``id``
+    field must be the Solr schema's unique key field.
+
     """
 
+    VECTOR_ENCODING_PICKLE = 'pickle'
+    VECTOR_ENCODING_RAW = 'raw'
+
+    # Data type of vectors stored with the ``raw`` vector encoding.
+    RAW_VECTOR_DTYPE = numpy.dtype('<f8')
+
     @classmethod
     def is_usable(cls):
         return solr is not None
@@ -37,7 +60,8 @@ class SolrDescriptorSet (DescriptorSet):
                  set_uuid_field, d_uid_field, descriptor_field,
                  timestamp_field, solr_params=None,
                  commit_on_add=True, max_boolean_clauses=1024,
-                 pickle_protocol=-1):
+                 pickle_protocol=-1, rows=1000, fetch_threads=4,
+                 vector_encoding=VECTOR_ENCODING_PICKLE, type_field=None):
         """
         Construct a descriptor set pointing to a Solr instance.
 
@@ -73,17 +97,33 @@ class SolrDescriptorSet (DescriptorSet):
             descriptor are added.
         :type commit_on_add: bool
 
-        :param max_boolean_clauses: Solr instance's configured
-            maxBooleanClauses configuration property (found in solrconfig.xml
-            file). This is needed so we can correctly chunk up batch queries
-            without breaking the server. This may also be less than the Solr
-            instance's set value.
+        :param max_boolean_clauses: Maximum number of descriptor UUIDs given
+            to a single ``{!terms}`` query when getting or removing batches
+            of descriptors. This bounds the size of each request. This was
+            previously bound by the Solr instance's configured
+            maxBooleanClauses configuration property, which terms queries are
+            not subject to.
         :type max_boolean_clauses: int
 
         :param pickle_protocol: Pickling protocol to use. We will use -1 by
             default (latest version, probably binary).
         :type pickle_protocol: int
 
+        :param rows: Number of documents to request per page of results.
+        :type rows: int
+
+        :param fetch_threads: Number of threads used to get batches of
+            descriptors from Solr concurrently.
+        :type fetch_threads: int
+
+        :param vector_encoding: How descriptors are stored in the
+            ``descriptor_field``, either ``pickle`` or ``raw``.
+        :type vector_encoding: str
+
+        :param type_field: Solr set field to store descriptor type strings
+            in. This is required for the ``raw`` vector encoding.
+        :type type_field: None | str
+
         """
         super(SolrDescriptorSet, self).__init__()
 
@@ -93,6 +133,7 @@ class SolrDescriptorSet (DescriptorSet):
         self.d_uid_field = d_uid_field
         self.descriptor_field = descriptor_field
         self.timestamp_field = timestamp_field
+        self.type_field = type_field
 
         self.commit_on_add = commit_on_add
         self.max_boolean_clauses = int(max_boolean_clauses)
@@ -100,18 +141,55 @@ class SolrDescriptorSet (DescriptorSet):
 
         self.pickle_protocol = pickle_protocol
 
+        self.rows = int(rows)
+        if self.rows < 1:
+            raise ValueError("Rows per page must be positive (given %d)."
+                             % self.rows)
+        self.fetch_threads = int(fetch_threads)
+
+        if vector_encoding not in (self.VECTOR_ENCODING_PICKLE,
+                                   self.VECTOR_ENCODING_RAW):
+            raise ValueError("Invalid vector encoding '%s'. Must be one of: "
+                             "%s" % (vector_encoding,
+                                     [self.VECTOR_ENCODING_PICKLE,
+                                      self.VECTOR_ENCODING_RAW]))
+        if vector_encoding == self.VECTOR_ENCODING_RAW and not type_field:
+            raise ValueError("A type field must be given for the '%s' vector "
+                             "encoding." % vector_encoding)
+        self.vector_encoding = vector_encoding
+
         self.solr_params = solr_params
-        self.solr = solr.Solr(solr_conn_addr, **solr_params)
+        self.solr = solr.Solr(solr_conn_addr, **(solr_params or {}))
+        self._thread_local = threading.local()
 
     def __getstate__(self):
         return self.get_config()
 
     def __setstate__(self, state):
+        # Support states from before paging and encoding were configurable.
+        state.setdefault('rows', 1000)
+        state.setdefault('fetch_threads', 4)
+        state.setdefault('vector_encoding', self.VECTOR_ENCODING_PICKLE)
+        state.setdefault('type_field', None)
         state['solr'] = solr.Solr(state["solr_conn_addr"],
-                                  **state['solr_params'])
+                                  **(state['solr_params'] or {}))
         del state['solr_conn_addr']
+        state['_thread_local'] = threading.local()
         self.__dict__.update(state)
 
+    def _thread_solr(self):
+        """
+        Get a Solr connection for the current thread. ``solr.Solr`` instances
+        use a single connection that is not safe to share between threads.
+
+        :rtype: solr.Solr
+        """
+        conn = getattr(self._thread_local, 'solr', None)
+        if conn is None:
+            conn = self._thread_local.solr = \
+                solr.Solr(self.solr.url, **(self.solr_params or {}))
+        return conn
+
     def _doc_for_code_descr(self, d):
         """
         Generate standard identifying document base for the given
@@ -119,11 +197,125 @@ class SolrDescriptorSet (DescriptorSet):
         """
         uuid = d.uuid()
         return {
-            'id': '-'.join([self.set_uuid, uuid]),
+            'id': '-'.join([self.set_uuid, str(uuid)]),
             self.set_uuid_field: self.set_uuid,
             self.d_uid_field: uuid,
         }
 
+    def _docs_for_descriptors(self, descriptors):
+        """
+        Generate complete documents, encoded as configured, for the given
+        descriptor elements.
+
+        :param descriptors: Descriptor elements to make documents for.
+        :type descriptors:
+            collections.Iterable[smqtk.representation.DescriptorElement]
+
+        :rtype: list[dict[str, object]]
+        """
+        descriptors = list(descriptors)
+        docs = [self._doc_for_code_descr(d) for d in descriptors]
+        if self.vector_encoding == self.VECTOR_ENCODING_RAW:
+            # Get vectors in bulk rather than one descriptor at a time.
+            vectors = descriptors[0].get_many_vectors(descriptors) \
+                if descriptors else []
+            for d, doc, v in zip(descriptors, docs, vectors):
+                doc[self.type_field] = d.type()
+                doc[self.descriptor_field] = base64.b64encode(
+                    numpy.asarray(v, self.RAW_VECTOR_DTYPE).tobytes()
+                ).decode('ascii')
+        else:
+            for d, doc in zip(descriptors, docs):
+                doc[self.descriptor_field] = \
+                    cPickle.dumps(d, self.pickle_protocol)
+        t = time.time()
+        for doc in docs:
+            doc[self.timestamp_field] = t
+        return docs
+
+    def _descriptor_from_doc(self, doc):
+        """
+        Get the descriptor element stored in the given document.
+
+        Documents with a descriptor type stored are decoded as ``raw``
+        encoded, otherwise as pickled.
+
+        :param doc: Solr document.
+        :type doc: dict[str, object]
+
+        :rtype: smqtk.representation.DescriptorElement
+        """
+        if self.type_field and doc.get(self.type_field) is not None:
+            d = DescriptorMemoryElement(doc[self.type_field],
+                                        doc[self.d_uid_field])
+            d.set_vector(numpy.frombuffer(
+                base64.b64decode(doc[self.descriptor_field]),
+                self.RAW_VECTOR_DTYPE
+            ))
+            return d
+        return cPickle.loads(doc[self.descriptor_field])
+
+    def _set_query(self, *fields):
+        """
+        :param fields: Fields that matching documents must have a value for.
+        :type fields: str
+
+        :return: Query selecting documents of this set that have a value for
+            all the given fields.
+        :rtype: str
+        """
+        return ' AND '.join(['%s:%s' % (self.set_uuid_field, self.set_uuid)] +
+                            ['%s:*' % f for f in fields])
+
+    def _terms_query(self, uuids):
+        """
+        :param uuids: Descriptor UUIDs to match.
+        :type uuids: collections.Iterable[collections.Hashable]
+
+        :return: Terms query matching documents with the given descriptor
+            UUIDs.
+        :rtype: str
+        """
+        return '{!terms f=%s}%s' % (self.d_uid_field,
+                                    ','.join(str(u) for u in uuids))
+
+    def _select_all(self, q, fields, fq=None, conn=None):
+        """
+        Iterate over all documents matching a query, paging through results
+        with ``cursorMark`` deep paging.
+
+        :param q: Query string.
+        :type q: str
+
+        :param fields: Fields to return for each document.
+        :type fields: list[str]
+
+        :param fq: Optional filter query.
+        :type fq: None | str
+
+        :param conn: Solr connection to use instead of ``self.solr``.
+        :type conn: None | solr.Solr
+
+        :return: Iterator of result documents.
+        :rtype: collections.Iterator[dict[str, object]]
+        """
+        conn = conn or self.solr
+        params = {'rows': self.rows}
+        if fq is not None:
+            params['fq'] = fq
+        cursor = '*'
+        while True:
+            r = conn.select(q, fields=fields, score=False, sort='id',
+                            sort_order='asc', cursorMark=cursor, **params)
+            for doc in r.results:
+                yield doc
+            # The cursor does not change once all results have been paged
+            # through.
+            next_cursor = getattr(r, 'nextCursorMark', cursor)
+            if not r.results or next_cursor == cursor:
+                break
+            cursor = next_cursor
+
     def get_config(self):
         return {
             "solr_conn_addr": self.solr.url,
@@ -136,6 +328,10 @@ class SolrDescriptorSet (DescriptorSet):
             "commit_on_add": self.commit_on_add,
             "max_boolean_clauses": self.max_boolean_clauses,
             "pickle_protocol": self.pickle_protocol,
+            "rows": self.rows,
+            "fetch_threads": self.fetch_threads,
+            "vector_encoding": self.vector_encoding,
+            "type_field": self.type_field,
         }
 
     def count(self):
@@ -143,10 +339,8 @@ class SolrDescriptorSet (DescriptorSet):
         :return: Number of descriptor elements stored in this set.
         :rtype: int
         """
-        return int(self.solr.
-                   select("%s:%s AND %s:*"
-                          % (self.set_uuid_field, self.set_uuid,
-                             self.descriptor_field))
+        return int(self.solr.select(self._set_query(self.descriptor_field),
+                                    rows=0)
                    .numFound)
 
     def clear(self):
@@ -169,12 +363,10 @@ class SolrDescriptorSet (DescriptorSet):
         :rtype: bool
 
         """
-        # Try to select the descriptor
-        # TODO: Probably a better way of doing this that's more efficient.
         return bool(
-            self.solr.select("%s:%s AND %s:%s"
-                             % (self.set_uuid_field, self.set_uuid,
-                                self.d_uid_field, uuid)).numFound
+            self.solr.select(self._set_query(),
+                             fq=self._terms_query([uuid]),
+                             rows=0).numFound
         )
 
     def add_descriptor(self, descriptor):
@@ -189,10 +381,7 @@ class SolrDescriptorSet (DescriptorSet):
         :type descriptor: smqtk.representation.DescriptorElement
 
         """
-        doc = self._doc_for_code_descr(descriptor)
-        doc[self.descriptor_field] = cPickle.dumps(descriptor,
-                                                   self.pickle_protocol)
-        doc[self.timestamp_field] = time.time()
+        doc = self._docs_for_descriptors([descriptor])[0]
         self.solr.add(doc, commit=self.commit_on_add)
 
     def add_many_descriptors(self, descriptors):
@@ -209,13 +398,7 @@ class SolrDescriptorSet (DescriptorSet):
             collections.Iterable[smqtk.representation.DescriptorElement]
 
         """
-        documents = []
-        for d in descriptors:
-            doc = self._doc_for_code_descr(d)
-            doc[self.descriptor_field] = cPickle.dumps(d, self.pickle_protocol)
-            doc[self.timestamp_field] = time.time()
-            documents.append(doc)
-        self.solr.add_many(documents)
+        self.solr.add_many(self._docs_for_descriptors(descriptors))
         if self.commit_on_add:
             self.solr.commit()
 
@@ -235,10 +418,29 @@ class SolrDescriptorSet (DescriptorSet):
         """
         return tuple(self.get_many_descriptors(uuid))[0]
 
+    def _iter_uuid_batches(self, uuids):
+        """
+        :return: Iterator of lists of at most ``max_boolean_clauses`` UUIDs.
+        :rtype: collections.Iterator[list[collections.Hashable]]
+        """
+        batch = []
+        for uid in uuids:
+            batch.append(uid)
+            if len(batch) == self.max_boolean_clauses:
+                yield batch
+                batch = []
+        # tail batch
+        if batch:
+            yield batch
+
     def get_many_descriptors(self, *uuids):
         """
         Get an iterator over descriptors associated to given descriptor UUIDs.
 
+        Batches of UUIDs are selected with terms filter queries, using
+        multiple threads, each with its own Solr connection, to get batches
+        concurrently.
+
         :param uuids: Iterable of descriptor UUIDs to query for.
         :type uuids: collections.Hashable
 
@@ -249,41 +451,37 @@ class SolrDescriptorSet (DescriptorSet):
         :rtype: collections.Iterable[smqtk.representation.DescriptorElement]
 
         """
-        # Chunk up query based on max clauses available to us
+        q = self._set_query()
+        fields = [f for f in (self.d_uid_field, self.descriptor_field,
+                              self.type_field) if f]
 
-        def batch_query(_batch):
+        def fetch_batch(_batch):
             """
             :param _batch: Batch of UIDs to select.
             :type _batch: list[collections.Hashable]
-            """
-            query = ' OR '.join([self.d_uid_field + (':%s' % _uid)
-                                 for _uid in _batch])
-            r = self.solr.select("%s:%s AND (%s)"
-                                 % (self.set_uuid_field, self.set_uuid,
-                                    query))
-            # result batches come in chunks of 10
-            for doc in r.results:
-                yield cPickle.loads(doc[self.descriptor_field])
-            for j in range(r.numFound // 10):
-                r = r.next_batch()
-                for doc in r.results:
-                    yield cPickle.loads(doc[self.descriptor_field])
-
-        batch = []
-        for uid in uuids:
-            batch.append(uid)
 
-            # Will end up using max_clauses-1 OR statements, and one AND
-            if len(batch) == self.max_boolean_clauses:
-                for d in batch_query(batch):
-                    yield d
-                batch = []
-
-        # tail batch
-        if batch:
-            assert len(batch) < self.max_boolean_clauses
-            for d in batch_query(batch):
-                yield d
+            :return: Batch UIDs and the documents of those found, keyed by
+                string UID.
+            :rtype: (list[collections.Hashable], dict[str, dict])
+            """
+            docs = dict(
+                (str(doc[self.d_uid_field]), doc)
+                for doc in self._select_all(q, fields,
+                                            fq=self._terms_query(_batch),
+                                            conn=self._thread_solr())
+            )
+            return _batch, docs
+
+        for batch, batch_docs in parallel_map(
+                fetch_batch, self._iter_uuid_batches(uuids),
+                cores=self.fetch_threads, use_multiprocessing=False,
+                ordered=True, name='solr_get_descriptors'):
+            for uid in batch:
+                try:
+                    doc = batch_docs[str(uid)]
+                except KeyError:
+                    raise KeyError(uid)
+                yield self._descriptor_from_doc(doc)
 
     def remove_descriptor(self, uuid):
         """
@@ -309,72 +507,46 @@ class SolrDescriptorSet (DescriptorSet):
             DescriptorElement in this set.
 
         """
-        # Chunk up operation based on max clauses available to us
-
-        def batch_op(_batch):
-            """
-            :param _batch: UIDs to remove from set.
-            :type _batch: collections.Iterable[collections.Hashable]
-            """
-            uuid_query = ' OR '.join([self.d_uid_field + (':%s' % str(_uid))
-                                      for _uid in _batch])
-            self.solr.delete("%s:%s AND (%s)"
-                             % (self.set_uuid_field, self.set_uuid,
-                                uuid_query))
-
-        batch = collections.deque()
-        for uid in uuids:
-            batch.append(uid)
-
-            # Will end up using max_clauses-1 OR statements, and one AND
-            if len(batch) == self.max_boolean_clauses:
-                batch_op(batch)
-            batch.clear()
-
-        # tail batch
-        if batch:
-            batch_op(batch)
+        batches = list(self._iter_uuid_batches(uuids))
+        # Check that all descriptors exist before removing any.
+        for batch in batches:
+            found = set(
+                str(doc[self.d_uid_field])
+                for doc in self._select_all(self._set_query(),
+                                            [self.d_uid_field],
+                                            fq=self._terms_query(batch))
+            )
+            for uid in batch:
+                if str(uid) not in found:
+                    raise KeyError(uid)
+        for batch in batches:
+            self.solr.delete_query('%s AND _query_:"%s"'
+                                   % (self._set_query(),
+                                      self._terms_query(batch)))
 
     def iterkeys(self):
         """
         Return an iterator over set descriptor keys, which are their UUIDs.
         """
-        r = self.solr.select('%s:%s %s:*'
-                             % (self.set_uuid_field, self.set_uuid,
-                                self.d_uid_field))
-        for doc in r.results:
+        for doc in self._select_all(self._set_query(self.d_uid_field),
+                                    [self.d_uid_field]):
             yield doc[self.d_uid_field]
-        for _ in range(r.numFound // 10):
-            r = r.next_batch()
-            for doc in r.results:
-                yield doc[self.d_uid_field]
 
     def iterdescriptors(self):
         """
         Return an iterator over set descriptor element instances.
         """
-        r = self.solr.select('%s:%s %s:*'
-                             % (self.set_uuid_field, self.set_uuid,
-                                self.descriptor_field))
-        for doc in r.results:
-            yield cPickle.loads(doc[self.descriptor_field])
-        for _ in range(r.numFound // 10):
-            r = r.next_batch()
-            for doc in r.results:
-                yield cPickle.loads(doc[self.descriptor_field])
+        for _, d in self.iteritems():
+            yield d
 
     def iteritems(self):
         """
         Return an iterator over set descriptor key and instance pairs.
         """
-        r = self.solr.select('%s:%s %s:* %s:*'
-                             % (self.set_uuid_field, self.set_uuid,
-                                self.d_uid_field, self.descriptor_field))
-        for doc in r.results:
-            d = cPickle.loads(doc[self.descriptor_field])
+        fields = [f for f in (self.d_uid_field, self.descriptor_field,
+                              self.type_field) if f]
+        for doc in self._select_all(self._set_query(self.d_uid_field,
+                                                    self.descriptor_field),
+                                    fields):
+            d = self._descriptor_from_doc(doc)
             yield d.uuid(), d
-        for _ in range(r.numFound // 10):
-            r = r.next_batch()
-            for doc in r.results:
-                d = cPickle.loads(doc[self.descriptor_field])
-                yield d.uuid(), d
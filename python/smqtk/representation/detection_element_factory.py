@@ -66,4 +66,29 @@ class DetectionElementFactory (SmqtkRepresentation):
         # noinspection PyUnresolvedReferences
         return self._elem_type.from_config(self._elem_config, uuid)
 
+    def new_detections(self, uuids):
+        """
+        Create new DetectionElement instances of the configured implementation
+        for each of the given UUIDs.
+
+        The implementation's default configuration is merged with this
+        factory's configuration once for all new elements instead of once per
+        element.
+
+        :param collections.Iterable[collections.Hashable] uuids:
+            UUIDs to assign the new elements.
+
+        :return: New DetectionElement instances, parallel to the given UUIDs.
+        :rtype: list[DetectionElement]
+
+        """
+        conf = merge_dict(self._elem_type.get_default_config(),
+                          self._elem_config)
+        # Element ``from_config`` sets the ``uuid`` key in the given
+        # dictionary, so each element is given its own shallow copy.
+        # noinspection PyUnresolvedReferences
+        return [self._elem_type.from_config(dict(conf), uuid,
+                                            merge_default=False)
+                for uuid in uuids]
+
     __call__ = new_detection
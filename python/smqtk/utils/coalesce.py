@@ -0,0 +1,201 @@
+"""
+Utilities for coalescing concurrent, single-item requests into batches.
+"""
+import sys
+import threading
+import time
+
+import six
+from six.moves import queue, zip
+
+from smqtk.utils import SmqtkObject
+
+
+class _PendingItem (object):
+    """
+    A submitted item waiting on its result from a batch.
+    """
+
+    __slots__ = ('item', 'result', 'exc_info', 'done')
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.exc_info = None
+        self.done = threading.Event()
+
+
+class RequestCoalescer (SmqtkObject):
+    """
+    Queue items submitted concurrently from many threads and process them in
+    batches with a single call to a batch function, handing each result back
+    to the thread that submitted the associated item.
+
+    A batch is dispatched once ``max_batch_size`` items are waiting, or once
+    ``max_wait`` seconds have passed since the first item of the batch was
+    received, whichever comes first. Items already waiting when ``max_wait``
+    expires are still included, up to the maximum batch size.
+
+    If the batch function raises an exception for a batch of more than one
+    item, each item of that batch is re-processed on its own so that one bad
+    item does not fail the other requests it was batched with. The exception
+    raised for an individual item is re-raised in the submitting thread.
+
+    Example
+    -------
+    >>> c = RequestCoalescer(lambda items: [i * 2 for i in items])
+    >>> c.submit(21)
+    42
+    >>> c.stop()
+
+    """
+
+    # Queue value signaling the worker thread to exit.
+    _STOP = object()
+
+    def __init__(self, batch_func, max_batch_size=32, max_wait=0.005,
+                 name=None):
+        """
+        Initialize and start the batching worker thread.
+
+        :param batch_func: Function taking a list of submitted items and
+            returning an iterable of results parallel to the input list.
+        :type batch_func: (list) -> collections.Iterable
+
+        :param max_batch_size: Maximum number of items to process in one call
+            to ``batch_func``.
+        :type max_batch_size: int
+
+        :param max_wait: Maximum time in seconds to wait for a batch to fill
+            after its first item has been received.
+        :type max_wait: float
+
+        :param name: Optional name for the worker thread.
+        :type name: None | str
+
+        :raises ValueError: Invalid batch size or wait time.
+
+        """
+        if int(max_batch_size) < 1:
+            raise ValueError("Maximum batch size must be at least 1 (given "
+                             "%s)." % max_batch_size)
+        if float(max_wait) < 0:
+            raise ValueError("Maximum wait time must be non-negative (given "
+                             "%s)." % max_wait)
+        self._batch_func = batch_func
+        self.max_batch_size = int(max_batch_size)
+        self.max_wait = float(max_wait)
+
+        self._queue = queue.Queue()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name=name or self.__class__.__name__
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def submit(self, item):
+        """
+        Submit an item for batched processing, blocking until its result is
+        available.
+
+        :param item: Item to process.
+
+        :raises RuntimeError: This coalescer has been stopped.
+
+        :return: Result for the given item as produced by the batch function.
+            If processing of the item raised an exception, that exception is
+            raised here.
+
+        """
+        if self._stopped.is_set():
+            raise RuntimeError("Cannot submit to a stopped coalescer.")
+        pending = _PendingItem(item)
+        self._queue.put(pending)
+        pending.done.wait()
+        if pending.exc_info is not None:
+            six.reraise(*pending.exc_info)
+        return pending.result
+
+    def stop(self):
+        """
+        Stop the worker thread after processing items already submitted.
+        """
+        if not self._stopped.is_set():
+            self._stopped.set()
+            self._queue.put(self._STOP)
+            self._thread.join()
+            # Fail any items that raced in behind the stop signal.
+            while True:
+                try:
+                    p = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                ex = RuntimeError("Coalescer stopped before the item was "
+                                  "processed.")
+                p.exc_info = (RuntimeError, ex, None)
+                p.done.set()
+
+    def _collect_batch(self):
+        """
+        Block for the next batch of pending items.
+
+        :return: List of pending items, which is empty if the worker should
+            exit, and whether a stop signal was received while collecting.
+        :rtype: (list[_PendingItem], bool)
+        """
+        first = self._queue.get()
+        if first is self._STOP:
+            return [], True
+        batch = [first]
+        deadline = time.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.time()
+            try:
+                if remaining > 0:
+                    p = self._queue.get(timeout=remaining)
+                else:
+                    p = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if p is self._STOP:
+                return batch, True
+            batch.append(p)
+        return batch, False
+
+    def _process_batch(self, batch):
+        """
+        Run the batch function over the given pending items and set their
+        results, falling back to per-item processing on failure.
+
+        :param batch: Pending items to process.
+        :type batch: list[_PendingItem]
+        """
+        try:
+            results = list(self._batch_func([p.item for p in batch]))
+            if len(results) != len(batch):
+                raise IndexError("Batch function produced %d results for %d "
+                                 "items." % (len(results), len(batch)))
+        except Exception:
+            if len(batch) == 1:
+                batch[0].exc_info = sys.exc_info()
+                batch[0].done.set()
+            else:
+                self._log.warning("Failed to process batch of %d items, "
+                                  "processing items individually.",
+                                  len(batch), exc_info=True)
+                for p in batch:
+                    self._process_batch([p])
+            return
+        self._log.debug("Processed batch of %d items", len(batch))
+        for p, r in zip(batch, results):
+            p.result = r
+            p.done.set()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect_batch()
+            if batch:
+                self._process_batch(batch)
@@ -39,6 +39,7 @@ import types
 import six
 
 from smqtk.utils.dict import merge_dict
+from smqtk.utils.plugin import LazyPluginSet
 
 
 @six.add_metaclass(abc.ABCMeta)
@@ -316,7 +317,9 @@ def cls_conf_from_config_dict(config, type_iter):
         Configuration dictionary to draw from.
 
     :param collections.Iterable[type] type_iter:
-        An iterable of class types to select from.
+        An iterable of class types to select from. If this is a
+        ``smqtk.utils.plugin.LazyPluginSet``, only the configured type is
+        looked up, unless it cannot be found.
 
     :raises ValueError:
         This may be raised if:
@@ -335,9 +338,15 @@ def cls_conf_from_config_dict(config, type_iter):
         raise ValueError("Configuration dictionary given does not have an "
                          "implementation type specification.")
     conf_type_name = config['type']
-    type_map = dict(map(lambda t: (t.__name__, t), type_iter))
-
     conf_type_options = set(config.keys()) - {'type'}
+
+    if isinstance(type_iter, LazyPluginSet) \
+            and conf_type_name in conf_type_options:
+        cls = type_iter.get_by_name(conf_type_name)
+        if cls is not None:
+            return cls, config[conf_type_name]
+
+    type_map = dict(map(lambda t: (t.__name__, t), type_iter))
     # Type provided may either by None, not have a matching block in the
     # config, not have a matching implementation type, or match both.
     if conf_type_name is None:
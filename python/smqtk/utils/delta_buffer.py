@@ -0,0 +1,186 @@
+"""
+Side buffer of pending changes to a nearest-neighbor structure that is
+expensive to update in place.
+"""
+import numpy
+
+
+class DeltaBuffer (object):
+    """
+    Buffer of changes to a "main" nearest-neighbor structure until they are
+    merged into it by rebuilding that structure.
+
+    Added items are kept in a small matrix that is searched by brute force
+    alongside the main structure. Removed items of the main structure are
+    recorded as tombstones, to be filtered out of its results. Items are
+    identified by unique, hashable keys.
+
+    A merge that runs while further changes arrive takes a ``snapshot`` of the
+    buffer, builds the new main structure from it, and then ``discard``s the
+    merged changes, keeping any changes made in the meantime.
+
+    This class is not thread-safe; callers synchronize access.
+    """
+
+    def __init__(self, distance_func):
+        """
+        :param distance_func: Function computing the distances of each row of
+            a matrix of buffered vectors to a query vector, returning a 1D
+            array of distances.
+        :type distance_func:
+            (numpy.ndarray, numpy.ndarray) -> numpy.ndarray
+        """
+        self._distance_func = distance_func
+        self._keys = []
+        self._vectors = []
+        self._values = []
+        # Key to its position in the above lists.
+        #: :type: dict[collections.Hashable, int]
+        self._key_idx = {}
+        # Key to the version of its last addition, distinguishing items
+        # re-added after a snapshot was taken.
+        #: :type: dict[collections.Hashable, int]
+        self._key_version = {}
+        self._next_version = 0
+        # Stacked buffered vectors, created when first searched.
+        #: :type: None | numpy.ndarray
+        self._matrix = None
+        #: :type: set[collections.Hashable]
+        self.tombstones = set()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._key_idx
+
+    @property
+    def num_changes(self):
+        """
+        :return: Number of buffered additions and tombstones.
+        :rtype: int
+        """
+        return len(self._keys) + len(self.tombstones)
+
+    def add(self, key, vector, value=None):
+        """
+        Add an item to the buffer, replacing any buffered item with the same
+        key.
+
+        :param key: Unique key of the item.
+        :type key: collections.Hashable
+
+        :param vector: Vector of the item to search over.
+        :type vector: numpy.ndarray
+
+        :param value: Value to return for the item from ``nn``. This is the
+            key if None.
+        """
+        if value is None:
+            value = key
+        i = self._key_idx.get(key)
+        if i is None:
+            self._key_idx[key] = len(self._keys)
+            self._keys.append(key)
+            self._vectors.append(vector)
+            self._values.append(value)
+        else:
+            self._vectors[i] = vector
+            self._values[i] = value
+        self._key_version[key] = self._next_version
+        self._next_version += 1
+        self._matrix = None
+
+    def remove(self, key):
+        """
+        Remove a buffered item.
+
+        :param key: Key of the item.
+        :type key: collections.Hashable
+
+        :return: If the item was buffered.
+        :rtype: bool
+        """
+        i = self._key_idx.pop(key, None)
+        if i is None:
+            return False
+        del self._keys[i], self._vectors[i], self._values[i]
+        del self._key_version[key]
+        for k in self._keys[i:]:
+            self._key_idx[k] -= 1
+        self._matrix = None
+        return True
+
+    def values(self):
+        """
+        :return: Values of buffered items in the order added.
+        :rtype: list
+        """
+        return list(self._values)
+
+    def nn(self, q, n):
+        """
+        Find the nearest buffered items to a query vector by brute force.
+
+        :param q: Query vector.
+        :type q: numpy.ndarray
+
+        :param n: Maximum number of items to return.
+        :type n: int
+
+        :return: Values of up to ``n`` nearest items and their distances, in
+            order of increasing distance.
+        :rtype: (list, numpy.ndarray)
+        """
+        if not self._keys or n < 1:
+            return [], numpy.empty(0)
+        if self._matrix is None:
+            self._matrix = numpy.vstack(self._vectors)
+        dists = numpy.asarray(self._distance_func(self._matrix, q),
+                              dtype=float)
+        if n < len(dists):
+            idxs = numpy.argpartition(dists, n - 1)[:n]
+        else:
+            idxs = numpy.arange(len(dists))
+        idxs = idxs[numpy.argsort(dists[idxs], kind='mergesort')]
+        return [self._values[i] for i in idxs], dists[idxs]
+
+    def snapshot(self):
+        """
+        :return: Opaque snapshot of the current changes: buffered values,
+            their keys and versions, and the tombstones.
+        :rtype: (list, list, set)
+        """
+        return (list(self._values),
+                [(k, self._key_version[k]) for k in self._keys],
+                set(self.tombstones))
+
+    def discard(self, snapshot):
+        """
+        Discard the changes of a ``snapshot`` after they have been merged into
+        the main structure, keeping changes made since it was taken.
+
+        Buffered items of the snapshot that have since been removed or
+        replaced are tombstoned, as their merged versions are now in the main
+        structure.
+
+        :param snapshot: Snapshot from ``snapshot``.
+        :type snapshot: (list, list, set)
+        """
+        _, key_versions, tombstones = snapshot
+        self.tombstones.difference_update(tombstones)
+        for k, version in key_versions:
+            if self._key_version.get(k) == version:
+                self.remove(k)
+            else:
+                self.tombstones.add(k)
+
+    def clear(self):
+        """
+        Remove all buffered items and tombstones.
+        """
+        del self._keys[:], self._vectors[:], self._values[:]
+        self._key_idx.clear()
+        self._key_version.clear()
+        self._matrix = None
+        self.tombstones.clear()
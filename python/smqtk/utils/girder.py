@@ -2,11 +2,13 @@
 Utilities for interacting with Girder
 """
 
+from collections import OrderedDict
 import datetime
-
-import requests
+import threading
+import time
 
 from smqtk.utils import SmqtkObject
+from smqtk.utils.http_cache import get_session
 from smqtk.utils.url import url_join
 
 
@@ -33,6 +35,7 @@ class GirderTokenManager (SmqtkObject):
         self._api_key = api_key
         self._token = None
         self._expiration = None
+        self._lock = threading.RLock()
 
     @property
     def api_root(self):
@@ -90,8 +93,9 @@ class GirderTokenManager (SmqtkObject):
 
         """
         self._log.debug("Requesting new authorization token.")
+        session = get_session()
         if self._api_key:
-            r = requests.post(
+            r = session.post(
                 url_join(self._api_root, 'api_key/token'),
                 data={'key': self._api_key}
             )
@@ -99,7 +103,7 @@ class GirderTokenManager (SmqtkObject):
             token = r.json()['authToken']['token']
             expires = r.json()['authToken']['expires']
         else:
-            r = requests.get(
+            r = session.get(
                 url_join(self._api_root, 'token/session')
             )
             r.raise_for_status()
@@ -117,10 +121,11 @@ class GirderTokenManager (SmqtkObject):
         :raises AssertionError: Expiration timestamp did not have a UTC timezone
             specifier attacked to the end.
         """
-        if (self._token is None
-                or self.token_expiration <= datetime.datetime.now()):
-            self._log.debug("No or expired token")
-            self._token, self.token_expiration = self._request_token()
+        with self._lock:
+            if (self._token is None
+                    or self._expiration <= datetime.datetime.now()):
+                self._log.debug("No or expired token")
+                self._token, self._expiration = self._request_token()
 
     def get_token(self):
         self._check_token_expiration()
@@ -134,3 +139,180 @@ class GirderTokenManager (SmqtkObject):
         """
         self._check_token_expiration()
         return {'Girder-Token': self._token}
+
+
+class GirderApiClient (SmqtkObject):
+    """
+    Minimal Girder REST API client for reading files.
+
+    Requests are made through the process-wide shared ``requests.Session`` so
+    that connections to the server are reused. When given an API key,
+    authentication tokens are managed by a ``GirderTokenManager``. File models
+    are cached for a time-to-live period, up to ``FILE_MODEL_CACHE_SIZE`` of
+    the most recently used ones.
+
+    Use ``get_api_client`` to get a client shared by all users of the same
+    server and credentials.
+    """
+
+    # Size in bytes of chunks in which file content is streamed.
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+    # Maximum number of file models cached.
+    FILE_MODEL_CACHE_SIZE = 4096
+
+    def __init__(self, api_root='http://localhost:8080/api/v1', api_key=None,
+                 token=None, file_model_ttl=60.):
+        """
+        :param api_root: Girder API root URL
+        :type api_root: str
+
+        :param api_key: Optional API key to request tokens with.
+        :type api_key: None | str
+
+        :param token: Optional fixed authentication token to use. This takes
+            precedence over ``api_key``.
+        :type token: None | str
+
+        :param file_model_ttl: Seconds for which file models are cached.
+        :type file_model_ttl: float
+
+        """
+        self._api_root = api_root
+        self._token = token
+        self._token_manager = None
+        if token is None and api_key is not None:
+            self._token_manager = GirderTokenManager(api_root, api_key)
+        self._file_model_ttl = float(file_model_ttl)
+        # Mapping of file ID to the expiration time and file model, in order
+        # of least to most recent use.
+        #: :type: OrderedDict[str, (float, dict)]
+        self._file_models = OrderedDict()
+        self._file_models_lock = threading.Lock()
+
+    @property
+    def api_root(self):
+        return self._api_root
+
+    def get_requests_header(self):
+        """
+        :return: The token authorization header if we have credentials.
+            Otherwise returns an empty dictionary.
+        :rtype: dict
+        """
+        if self._token is not None:
+            return {'Girder-Token': self._token}
+        elif self._token_manager is not None:
+            return self._token_manager.get_requests_header()
+        return {}
+
+    def request(self, method, path, **kwargs):
+        """
+        Make an authenticated request to an API path.
+
+        :raises requests.HTTPError: Request was not successful.
+
+        :param method: HTTP method.
+        :type method: str
+
+        :param path: Path relative to the API root.
+        :type path: str
+
+        :param kwargs: Additional keyword arguments to
+            ``requests.Session.request``.
+
+        :return: Successful response.
+        :rtype: requests.Response
+
+        """
+        r = get_session().request(method, url_join(self._api_root, path),
+                                  headers=self.get_requests_header(),
+                                  **kwargs)
+        r.raise_for_status()
+        return r
+
+    def get_file_model(self, file_id):
+        """
+        Get a file model, using the cached model if it has not expired.
+
+        :raises requests.HTTPError: The file model could not be retrieved.
+
+        :param file_id: ID of the file in Girder.
+        :type file_id: str
+
+        :return: File model.
+        :rtype: dict
+
+        """
+        now = time.time()
+        with self._file_models_lock:
+            expires, model = self._file_models.pop(file_id, (0, None))
+            if expires > now:
+                self._file_models[file_id] = (expires, model)
+                return model
+        model = self.request('GET', 'file/%s' % file_id).json()
+        with self._file_models_lock:
+            self._file_models.pop(file_id, None)
+            self._file_models[file_id] = (now + self._file_model_ttl, model)
+            while len(self._file_models) > self.FILE_MODEL_CACHE_SIZE:
+                self._file_models.popitem(last=False)
+        return model
+
+    def invalidate_file_model(self, file_id):
+        """
+        Remove a file's model from the cache, if cached.
+
+        :param file_id: ID of the file in Girder.
+        :type file_id: str
+        """
+        with self._file_models_lock:
+            self._file_models.pop(file_id, None)
+
+    def download_file(self, file_id, fileobj):
+        """
+        Stream a file's content in chunks into a file-like object.
+
+        :raises requests.HTTPError: The file could not be downloaded.
+
+        :param file_id: ID of the file in Girder.
+        :type file_id: str
+
+        :param fileobj: Writable file-like object.
+        :type fileobj: io.IOBase
+
+        """
+        r = self.request('GET', 'file/%s/download' % file_id, stream=True)
+        try:
+            for chunk in r.iter_content(self.DOWNLOAD_CHUNK_SIZE):
+                fileobj.write(chunk)
+        finally:
+            r.close()
+
+
+_API_CLIENTS = {}
+_API_CLIENTS_LOCK = threading.Lock()
+
+
+def get_api_client(api_root, api_key=None, token=None):
+    """
+    Get the Girder API client shared within this process for a server and
+    credentials, creating it on first use.
+
+    :param api_root: Girder API root URL
+    :type api_root: str
+
+    :param api_key: Optional API key to request tokens with.
+    :type api_key: None | str
+
+    :param token: Optional fixed authentication token to use.
+    :type token: None | str
+
+    :return: Shared client instance.
+    :rtype: GirderApiClient
+
+    """
+    key = (api_root, api_key, token)
+    with _API_CLIENTS_LOCK:
+        if key not in _API_CLIENTS:
+            _API_CLIENTS[key] = GirderApiClient(api_root, api_key, token)
+        return _API_CLIENTS[key]
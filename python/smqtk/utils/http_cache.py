@@ -0,0 +1,129 @@
+"""
+Utilities for reusing HTTP connections and caching fetched content.
+"""
+import collections
+import threading
+
+import requests
+import requests.adapters
+
+
+# Maximum number of connections kept alive per host by the shared session.
+SESSION_POOL_MAXSIZE = 32
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session():
+    """
+    Get the ``requests.Session`` shared within this process, creating it on
+    first use.
+
+    Sharing a session reuses kept-alive connections to the same hosts across
+    requests instead of setting up a new connection for each request.
+
+    :return: Shared session instance.
+    :rtype: requests.Session
+    """
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            s = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=SESSION_POOL_MAXSIZE,
+                pool_maxsize=SESSION_POOL_MAXSIZE,
+            )
+            s.mount('http://', adapter)
+            s.mount('https://', adapter)
+            _SESSION = s
+        return _SESSION
+
+
+class LruByteCache (object):
+    """
+    Thread-safe, in-memory cache of bytes values that evicts the least
+    recently used entries when the total size of cached values exceeds a
+    maximum number of bytes.
+    """
+
+    def __init__(self, max_bytes):
+        """
+        :param max_bytes: Maximum total size in bytes of cached values. Values
+            larger than this are not cached.
+        :type max_bytes: int
+        """
+        self._max_bytes = int(max_bytes)
+        self._nbytes = 0
+        #: :type: collections.OrderedDict[collections.Hashable, bytes]
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._cache
+
+    @property
+    def max_bytes(self):
+        return self._max_bytes
+
+    @property
+    def nbytes(self):
+        """
+        :return: Total size in bytes of currently cached values.
+        :rtype: int
+        """
+        return self._nbytes
+
+    def get(self, key, default=None):
+        """
+        Get the value cached for a key, marking it as most recently used.
+
+        :param key: Key of the value.
+        :type key: collections.Hashable
+
+        :param default: Value to return if the key is not cached.
+
+        :return: Cached value, or ``default``.
+        :rtype: bytes
+        """
+        with self._lock:
+            if key not in self._cache:
+                return default
+            # Re-insert to move to the most recently used end.
+            value = self._cache.pop(key)
+            self._cache[key] = value
+            return value
+
+    def put(self, key, value):
+        """
+        Cache a value for a key, evicting least recently used values as needed
+        to stay within the maximum size.
+
+        :param key: Key of the value.
+        :type key: collections.Hashable
+
+        :param value: Bytes to cache.
+        :type value: bytes
+        """
+        with self._lock:
+            if key in self._cache:
+                self._nbytes -= len(self._cache.pop(key))
+            if len(value) > self._max_bytes:
+                return
+            self._cache[key] = value
+            self._nbytes += len(value)
+            while self._nbytes > self._max_bytes:
+                _, v = self._cache.popitem(last=False)
+                self._nbytes -= len(v)
+
+    def clear(self):
+        """
+        Remove all cached values.
+        """
+        with self._lock:
+            self._cache.clear()
+            self._nbytes = 0
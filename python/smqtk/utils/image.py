@@ -6,6 +6,7 @@ import PIL.ImageEnhance
 
 from six.moves import range
 
+from smqtk.representation import AxisAlignedBoundingBox
 from smqtk.representation.data_element.file_element import DataElement
 
 
@@ -192,6 +193,74 @@ def image_crop_tiles(image, tile_width, tile_height, stride=None):
         y += stride_y
 
 
+def _tile_starts(length, tile_length, overlap):
+    """
+    Get the start positions of tiles along one image axis.
+
+    :return: Tile start positions and the tile length, which is clamped to the
+        axis length.
+    :rtype: (list[int], int)
+    """
+    if tile_length >= length:
+        # A single tile spans the whole axis.
+        return [0], length
+    starts = list(range(0, length - tile_length + 1, tile_length - overlap))
+    if starts[-1] + tile_length < length:
+        # Shift the last tile inward so it ends on the image edge.
+        starts.append(length - tile_length)
+    return starts, tile_length
+
+
+def tile_grid(width, height, tile_width, tile_height, overlap=0):
+    """
+    Get the pixel regions of a grid of tiles covering an image of the given
+    size.
+
+    Adjacent tiles overlap by ``overlap`` pixels along each axis. The last
+    tiles along the right and bottom edges are shifted inward, overlapping
+    their neighbors further, so that every tile has the requested size and
+    lies within the image. Along an axis where the image is smaller than a
+    tile, tiles span the whole image.
+
+    :param width: Image width in pixels.
+    :type width: int
+
+    :param height: Image height in pixels.
+    :type height: int
+
+    :param tile_width: Tile width in pixels.
+    :type tile_width: int
+
+    :param tile_height: Tile height in pixels.
+    :type tile_height: int
+
+    :param overlap: Number of pixels adjacent tiles overlap by. This must be
+        less than the tile width and height.
+    :type overlap: int
+
+    :raises ValueError: The image or tile size was not positive, or the
+        overlap was negative or not less than the tile size.
+
+    :return: Integer aligned tile bounding boxes in row-major order.
+    :rtype: list[smqtk.representation.AxisAlignedBoundingBox]
+
+    """
+    if width < 1 or height < 1:
+        raise ValueError("Image size must be positive (given {}x{})."
+                         .format(width, height))
+    if tile_width < 1 or tile_height < 1:
+        raise ValueError("Tile size must be positive (given {}x{})."
+                         .format(tile_width, tile_height))
+    if not 0 <= overlap < min(tile_width, tile_height):
+        raise ValueError("Tile overlap must be non-negative and less than the "
+                         "tile size (given overlap {} for tile size {}x{})."
+                         .format(overlap, tile_width, tile_height))
+    xs, tw = _tile_starts(int(width), int(tile_width), int(overlap))
+    ys, th = _tile_starts(int(height), int(tile_height), int(overlap))
+    return [AxisAlignedBoundingBox([x, y], [x + tw, y + th])
+            for y in ys for x in xs]
+
+
 def image_brightness_intervals(image, n):
     """
     Generate a number of images with different brightness levels using linear
@@ -31,9 +31,22 @@ Plugins may be accessed by one of the following ways:
          }
          ...
 
+Discovered plugins are cached process-wide per interface, so repeated calls
+to ``Pluggable.get_impls`` do not re-import and re-scan modules. The cache may
+be explicitly invalidated with ``clear_plugin_cache`` or by requesting a
+module reload.
+
+When the environment variable ``SMQTK_PLUGIN_LAZY`` is set to a true value
+(e.g. "1"), ``Pluggable.get_impls`` instead returns a ``LazyPluginSet`` when
+plugins of an interface have not yet been discovered. Configuration helpers
+such as ``smqtk.utils.configuration.from_config_dict`` then only import the
+plugin module whose source defines the requested type name, instead of every
+module that may contain plugins.
+
 """
 
 import abc
+import ast
 import collections
 import importlib
 import inspect
@@ -42,6 +55,7 @@ import logging
 import os
 import pkgutil
 import re
+import threading
 import types
 import warnings
 
@@ -61,21 +75,34 @@ OS_ENV_PATH_SEP = os.pathsep
 
 EXTENSION_NAMESPACE = "smqtk_plugins"
 
+# Environment variable enabling lazy plugin discovery when set to a true value.
+LAZY_ENV_VAR = "SMQTK_PLUGIN_LAZY"
 
-def _get_local_plugin_modules(log, interface_type, warn=True):
+# Process-wide cache of discovered plugin types, keyed by interface type,
+# environment variable, helper variable and environment variable value.
+#: :type: dict[tuple, frozenset[type]]
+_PLUGIN_CACHE = {}
+# Cache of sibling and environment variable plugin module paths paired with
+# the top-level names defined in their source, keyed like ``_PLUGIN_CACHE``.
+#: :type: dict[tuple, list[(str, frozenset[str])]]
+_MODULE_NAME_INDEX = {}
+_PLUGIN_CACHE_LOCK = threading.RLock()
+
+
+def _get_local_plugin_module_paths(log, interface_type):
     """
-    Get the python modules within the SMQTK tree that are located parallel
-    to the module defining the given interface type.
+    Get the python module paths, and their source file paths, within the
+    SMQTK tree that are located parallel to the module defining the given
+    interface type.
 
     :param logging.Logger log:
         Logger instance to use for logging.
     :param type interface_type:
         Interface type we want to find modules around.
-    :param bool warn:
-        If we should warn about module import failures.
 
-    :return: Iterator of python modules parallel to the given interface.
-    :rtype: collections.Iterator[types.ModuleType]
+    :return: Iterator of python module paths parallel to the given interface,
+        paired with the path to the module's source, if it could be found.
+    :rtype: collections.Iterator[(str, None | str)]
 
     """
     # Get the parent module and the filesystem path to that module.
@@ -103,31 +130,74 @@ def _get_local_plugin_modules(log, interface_type, warn=True):
             in pkgutil.iter_modules([t_module_dir]):
         sib_module_path = '.'.join([t_module_package, module_name])
         log.debug("Found sibling module '{}'.".format(sib_module_path))
-        try:
-            yield importlib.import_module(sib_module_path)
-        except Exception as ex:
-            if warn:
-                warnings.warn("Failed to import module '{}' due to exception: "
-                              "({}) {}"
-                              .format(sib_module_path, ex.__class__.__name__,
-                                      str(ex)))
+        if ispackage:
+            source_fp = os.path.join(t_module_dir, module_name, '__init__.py')
+        else:
+            source_fp = os.path.join(t_module_dir, module_name + '.py')
+        if not os.path.isfile(source_fp):
+            source_fp = None
+        yield sib_module_path, source_fp
 
 
-def _get_envvar_plugin_module(log, env_var, warn=True):
+def _get_local_plugin_modules(log, interface_type, warn=True):
     """
-    Get the python modules specified by the given environment variable.
+    Get the python modules within the SMQTK tree that are located parallel
+    to the module defining the given interface type.
 
     :param logging.Logger log:
         Logger instance to use for logging.
-    :param str env_var:
-        Environment variable key to use to look for python module paths to
-        load.
+    :param type interface_type:
+        Interface type we want to find modules around.
     :param bool warn:
         If we should warn about module import failures.
 
     :return: Iterator of python modules parallel to the given interface.
     :rtype: collections.Iterator[types.ModuleType]
 
+    """
+    for sib_module_path, _ in _get_local_plugin_module_paths(log,
+                                                             interface_type):
+        module = _import_plugin_module(sib_module_path, warn)
+        if module is not None:
+            yield module
+
+
+def _import_plugin_module(module_path, warn=True):
+    """
+    Import the python module of the given path, returning None if the import
+    failed.
+
+    :param str module_path: Python module path to import.
+    :param bool warn: If we should warn about module import failures.
+
+    :return: Imported module, or None if it failed to import.
+    :rtype: None | types.ModuleType
+
+    """
+    try:
+        return importlib.import_module(module_path)
+    except Exception as ex:
+        if warn:
+            warnings.warn("Failed to import module '{}' due to exception: "
+                          "({}) {}"
+                          .format(module_path, ex.__class__.__name__,
+                                  str(ex)))
+        return None
+
+
+def _get_envvar_plugin_module_paths(log, env_var):
+    """
+    Get the python module paths specified by the given environment variable.
+
+    :param logging.Logger log:
+        Logger instance to use for logging.
+    :param str env_var:
+        Environment variable key to use to look for python module paths to
+        load.
+
+    :return: Iterator of python module paths.
+    :rtype: collections.Iterator[str]
+
     """
     if env_var in os.environ:
         for p in os.environ[env_var].split(OS_ENV_PATH_SEP):
@@ -135,19 +205,33 @@ def _get_envvar_plugin_module(log, env_var, warn=True):
             if p:
                 log.debug("In env variable '{}' found module path '{}'."
                           .format(env_var, p))
-                try:
-                    yield importlib.import_module(p)
-                except Exception as ex:
-                    if warn:
-                        warnings.warn(
-                            "Failed to import module '{}' due to exception: "
-                            "({}) {}"
-                            .format(p, ex.__class__.__name__, str(ex))
-                        )
+                yield p
     else:
         log.debug("No variable '{}' in environment.".format(env_var))
 
 
+def _get_envvar_plugin_module(log, env_var, warn=True):
+    """
+    Get the python modules specified by the given environment variable.
+
+    :param logging.Logger log:
+        Logger instance to use for logging.
+    :param str env_var:
+        Environment variable key to use to look for python module paths to
+        load.
+    :param bool warn:
+        If we should warn about module import failures.
+
+    :return: Iterator of python modules parallel to the given interface.
+    :rtype: collections.Iterator[types.ModuleType]
+
+    """
+    for p in _get_envvar_plugin_module_paths(log, env_var):
+        module = _import_plugin_module(p, warn)
+        if module is not None:
+            yield module
+
+
 def _get_extension_plugin_modules(log, warn=True):
     """
     Get the modules registered by installed python modules that
@@ -181,6 +265,98 @@ def _get_extension_plugin_modules(log, warn=True):
             yield ext.plugin
 
 
+def _get_module_plugin_classes(log, module, interface_type, helper_var):
+    """
+    Get the valid plugin classes implementing the given interface type from
+    a python module.
+
+    See ``get_plugins`` for how classes are found within a module and what
+    makes a class valid.
+
+    :param logging.Logger log:
+        Logger instance to use for logging.
+    :param types.ModuleType module:
+        Module to get plugin classes from.
+    :param type interface_type:
+        Interface class type of which we want to discover implementations of.
+    :param str helper_var:
+        Name of the expected module helper attribute.
+
+    :return: List of valid plugin class types found in the module.
+    :rtype: list[type[Pluggable]]
+
+    """
+    module_path = module.__name__
+    log.debug("Examining module: {}".format(module_path))
+    valid_classes = []
+    # Find valid classes in the discovered module by:
+    classes = []
+    if hasattr(module, helper_var):
+        # Looking for magic variable for import guidance
+        classes = getattr(module, helper_var)
+        if classes is None:
+            log.debug("[%s] Helper is None-valued, skipping module",
+                      module_path)
+            classes = []
+        elif (isinstance(classes, collections.Iterable) and
+              not isinstance(classes, six.string_types)):
+            classes = list(classes)
+            log.debug("[%s] Loaded list of %d class types via helper",
+                      module_path, len(classes))
+        # Thus, non-iterable value.
+        elif isinstance(classes, type) \
+                and issubclass(classes, interface_type):
+            log.debug("[%s] Loaded class type: %s",
+                      module_path, classes.__name__)
+            classes = [classes]
+        else:
+            raise RuntimeError("[%s] Helper variable set to an invalid "
+                               "value: %s" % (module_path, classes))
+    else:
+        # Scan module valid attributes for classes that descend from the
+        # given base-class.
+        log.debug("[%s] No helper, scanning module attributes",
+                  module_path)
+        for attr_name in dir(module):
+            if VALUE_ATTRIBUTE_RE.match(attr_name):
+                classes.append(getattr(module, attr_name))
+
+    # Check the validity of the discovered class types in this module.
+    for cls in classes:
+        # check that all class types in iterable are:
+        # - Class types,
+        # - Subclasses of the given base-type and plugin interface
+        # - Not missing any abstract implementations.
+        #
+        # noinspection PyUnresolvedReferences
+        if not isinstance(cls, type):
+            # No logging, over verbose, undetermined type.
+            pass
+        elif cls is interface_type:
+            log.debug("[%s.%s] [skip] Literally the base class.",
+                      module_path, cls.__name__)
+        elif not issubclass(cls, interface_type):
+            log.debug("[%s.%s] [skip] Does not descend from base class.",
+                      module_path, cls.__name__)
+        elif bool(cls.__abstractmethods__):
+            # Making this a warning as I think this indicates a broken
+            # implementation in the ecosystem.
+            # noinspection PyUnresolvedReferences
+            log.warn('[%s.%s] [skip] Does not implement one or more '
+                     'abstract methods: %s',
+                     module_path, cls.__name__,
+                     list(cls.__abstractmethods__))
+        elif not cls.is_usable():
+            log.debug("[%s.%s] [skip] Class does not report as usable.",
+                      module_path, cls.__name__)
+        else:
+            log.debug('[%s.%s] [KEEP] Retaining subclass.',
+                      module_path, cls.__name__)
+            valid_classes.append(cls)
+
+    return valid_classes
+
+
 def get_plugins(interface_type, env_var, helper_var,
                 warn=True, reload_modules=False):
     """
@@ -257,82 +433,250 @@ def get_plugins(interface_type, env_var, helper_var,
               .format(interface_type.__name__))
     class_set = set()
     for _module in modules_iter:
-        module_path = _module.__name__
-        log.debug("Examining module: {}".format(module_path))
         if reload_modules:
+            module_path = _module.__name__
             # Invoke reload in case the module changed between imports.
             # six should find the right thing.
             # noinspection PyCompatibility
             _module = reload_module(_module)
             if _module is None:
                 raise RuntimeError("[{}] Failed to reload".format(module_path))
+        class_set.update(
+            _get_module_plugin_classes(log, _module, interface_type,
+                                       helper_var)
+        )
 
-        # Find valid classes in the discovered module by:
-        classes = []
-        if hasattr(_module, helper_var):
-            # Looking for magic variable for import guidance
-            classes = getattr(_module, helper_var)
-            if classes is None:
-                log.debug("[%s] Helper is None-valued, skipping module",
-                          module_path)
-                classes = []
-            elif (isinstance(classes, collections.Iterable) and
-                  not isinstance(classes, six.string_types)):
-                classes = list(classes)
-                log.debug("[%s] Loaded list of %d class types via helper",
-                          module_path, len(classes))
-            # Thus, non-iterable value.
-            elif isinstance(classes, type) \
-                    and issubclass(classes, interface_type):
-                log.debug("[%s] Loaded class type: %s",
-                          module_path, classes.__name__)
-                classes = [classes]
-            else:
-                raise RuntimeError("[%s] Helper variable set to an invalid "
-                                   "value: %s" % (module_path, classes))
-        else:
-            # Scan module valid attributes for classes that descend from the
-            # given base-class.
-            log.debug("[%s] No helper, scanning module attributes",
-                      module_path)
-            for attr_name in dir(_module):
-                if VALUE_ATTRIBUTE_RE.match(attr_name):
-                    classes.append(getattr(_module, attr_name))
-
-        # Check the validity of the discovered class types in this module.
-        for cls in classes:
-            # check that all class types in iterable are:
-            # - Class types,
-            # - Subclasses of the given base-type and plugin interface
-            # - Not missing any abstract implementations.
-            #
-            # noinspection PyUnresolvedReferences
-            if not isinstance(cls, type):
-                # No logging, over verbose, undetermined type.
-                pass
-            elif cls is interface_type:
-                log.debug("[%s.%s] [skip] Literally the base class.",
-                          module_path, cls.__name__)
-            elif not issubclass(cls, interface_type):
-                log.debug("[%s.%s] [skip] Does not descend from base class.",
-                          module_path, cls.__name__)
-            elif bool(cls.__abstractmethods__):
-                # Making this a warning as I think this indicates a broken
-                # implementation in the ecosystem.
-                # noinspection PyUnresolvedReferences
-                log.warn('[%s.%s] [skip] Does not implement one or more '
-                         'abstract methods: %s',
-                         module_path, cls.__name__,
-                         list(cls.__abstractmethods__))
-            elif not cls.is_usable():
-                log.debug("[%s.%s] [skip] Class does not report as usable.",
-                          module_path, cls.__name__)
+    return class_set
+
+
+def _plugin_cache_key(interface_type, env_var, helper_var):
+    """
+    Key into the process-wide plugin caches. This includes the current value
+    of the environment variable so that changes to it are respected.
+
+    :rtype: tuple
+    """
+    return interface_type, env_var, helper_var, os.environ.get(env_var, None)
+
+
+def get_cached_plugins(interface_type, env_var, helper_var,
+                       warn=True, reload_modules=False):
+    """
+    Cached version of ``get_plugins``.
+
+    Discovery for an interface type happens once per process and the result
+    is cached, unless ``reload_modules`` is True, in which case discovery is
+    performed again and the cache is updated with the new result. See
+    ``clear_plugin_cache`` to explicitly invalidate the cache.
+
+    See ``get_plugins`` for parameter descriptions.
+
+    :return: Set of discovered class types descending from type
+        ``interface_type`` and ``smqtk.utils.plugin.Pluggable``.
+    :rtype: set[type[Pluggable]]
+
+    """
+    key = _plugin_cache_key(interface_type, env_var, helper_var)
+    with _PLUGIN_CACHE_LOCK:
+        if reload_modules or key not in _PLUGIN_CACHE:
+            _PLUGIN_CACHE[key] = frozenset(
+                get_plugins(interface_type, env_var, helper_var,
+                            warn=warn, reload_modules=reload_modules)
+            )
+        # Copy so callers may not modify the cached set.
+        return set(_PLUGIN_CACHE[key])
+
+
+def clear_plugin_cache(interface_type=None):
+    """
+    Invalidate cached plugin discovery results.
+
+    :param None|type interface_type:
+        Only invalidate results for this interface type. If None, all cached
+        results are invalidated.
+
+    """
+    with _PLUGIN_CACHE_LOCK:
+        for cache in (_PLUGIN_CACHE, _MODULE_NAME_INDEX):
+            if interface_type is None:
+                cache.clear()
             else:
-                log.debug('[%s.%s] [KEEP] Retaining subclass.',
-                          module_path, cls.__name__)
-                class_set.add(cls)
+                for key in [k for k in cache if k[0] is interface_type]:
+                    del cache[key]
 
-    return class_set
+
+def _get_source_defined_names(source_fp, helper_var):
+    """
+    Get the names of classes defined at the top level of a python module's
+    source file, as well as names referenced by the plugin helper variable,
+    without importing the module.
+
+    :param str source_fp: Path to the python source file.
+    :param str helper_var: Name of the expected module helper attribute.
+
+    :return: Set of names that may be plugin classes of the module.
+    :rtype: frozenset[str]
+
+    """
+    with open(source_fp, 'rb') as f:
+        tree = ast.parse(f.read(), source_fp)
+    names = set()
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            names.add(node.name)
+        elif isinstance(node, ast.Assign) \
+                and any(isinstance(t, ast.Name) and t.id == helper_var
+                        for t in node.targets):
+            names.update(n.id for n in ast.walk(node.value)
+                         if isinstance(n, ast.Name))
+    return frozenset(names)
+
+
+def _get_module_name_index(log, interface_type, env_var, helper_var):
+    """
+    Get the sibling and environment variable specified plugin module paths
+    for the given interface paired with the names their source defines.
+
+    Modules whose source cannot be found or parsed are paired with None,
+    meaning that they must be imported to know what they define.
+
+    :return: List of module paths paired with the set of names that module
+        defines, or None.
+    :rtype: list[(str, None | frozenset[str])]
+
+    """
+    key = _plugin_cache_key(interface_type, env_var, helper_var)
+    with _PLUGIN_CACHE_LOCK:
+        if key not in _MODULE_NAME_INDEX:
+            env_module_paths = []
+            for p in _get_envvar_plugin_module_paths(log, env_var):
+                try:
+                    loader = pkgutil.find_loader(p)
+                    source_fp = loader and loader.get_filename(p)
+                except Exception:
+                    source_fp = None
+                env_module_paths.append((p, source_fp))
+            index = []
+            for module_path, source_fp in itertools.chain(
+                    _get_local_plugin_module_paths(log, interface_type),
+                    env_module_paths):
+                names = None
+                if source_fp and source_fp.endswith('.py'):
+                    try:
+                        names = _get_source_defined_names(source_fp,
+                                                          helper_var)
+                    except (IOError, SyntaxError, ValueError):
+                        log.debug("Failed to parse source of module '%s'",
+                                  module_path)
+                index.append((module_path, names))
+            _MODULE_NAME_INDEX[key] = index
+        return _MODULE_NAME_INDEX[key]
+
+
+def get_plugin_by_name(interface_type, env_var, helper_var, name, warn=True):
+    """
+    Get the plugin class of the given name implementing the given interface.
+
+    If plugins for the interface have already been discovered and cached, the
+    class is taken from the cache. Otherwise, only the sibling or environment
+    variable specified modules whose source defines the given name are
+    imported. If the class is not found that way, e.g. if it is provided by
+    an extension, we fall back to full, cached discovery.
+
+    See ``get_plugins`` for parameter descriptions.
+
+    :param str name: Class name of the plugin to get.
+
+    :return: Plugin class type of the given name, or None if no valid plugin
+        by that name could be found.
+    :rtype: None | type[Pluggable]
+
+    """
+    key = _plugin_cache_key(interface_type, env_var, helper_var)
+    with _PLUGIN_CACHE_LOCK:
+        cached = _PLUGIN_CACHE.get(key, None)
+    if cached is None:
+        log = logging.getLogger('.'.join([
+            __name__, 'get_plugin_by_name[{}]'.format(interface_type.__name__)
+        ]))
+        for module_path, names in _get_module_name_index(
+                log, interface_type, env_var, helper_var):
+            if names is not None and name not in names:
+                continue
+            module = _import_plugin_module(module_path, warn)
+            if module is None:
+                continue
+            for cls in _get_module_plugin_classes(log, module, interface_type,
+                                                  helper_var):
+                if cls.__name__ == name:
+                    log.debug("Found plugin '%s' in module '%s'", name,
+                              module_path)
+                    return cls
+        cached = get_cached_plugins(interface_type, env_var, helper_var,
+                                    warn=warn)
+    for cls in cached:
+        if cls.__name__ == name:
+            return cls
+    return None
+
+
+def lazy_discovery_enabled():
+    """
+    :return: If lazy plugin discovery is enabled via the ``LAZY_ENV_VAR``
+        environment variable.
+    :rtype: bool
+    """
+    return os.environ.get(LAZY_ENV_VAR, '').lower() in \
+        ('1', 'true', 'yes', 'on')
+
+
+class LazyPluginSet (object):
+    """
+    Set-like collection of the plugin types implementing an interface that
+    defers discovery until needed.
+
+    Getting a single plugin type by name via ``get_by_name`` only imports the
+    module that defines it (see ``get_plugin_by_name``). Iterating, sizing or
+    membership testing performs full, cached discovery.
+    """
+
+    __slots__ = ('interface_type', 'env_var', 'helper_var', 'warn')
+
+    def __init__(self, interface_type, env_var, helper_var, warn=True):
+        self.interface_type = interface_type
+        self.env_var = env_var
+        self.helper_var = helper_var
+        self.warn = warn
+
+    def _resolve(self):
+        return get_cached_plugins(self.interface_type, self.env_var,
+                                  self.helper_var, warn=self.warn)
+
+    def get_by_name(self, name):
+        """
+        Get the plugin type of the given class name.
+
+        :param str name: Class name of the plugin to get.
+
+        :return: Plugin class type, or None if there is no plugin by that
+            name.
+        :rtype: None | type[Pluggable]
+        """
+        return get_plugin_by_name(self.interface_type, self.env_var,
+                                  self.helper_var, name, warn=self.warn)
+
+    def __iter__(self):
+        return iter(self._resolve())
+
+    def __len__(self):
+        return len(self._resolve())
+
+    def __contains__(self, item):
+        return item in self._resolve()
+
+    def __repr__(self):
+        return "{}[{}]".format(self.__class__.__name__,
+                               self.interface_type.__name__)
 
 
 class NotUsableError (Exception):
@@ -365,6 +709,14 @@ class Pluggable (object):
         may be overridden to change what environment and helper variable are
         looked for, respectively.
 
+        Results are cached process-wide per interface (see
+        ``get_cached_plugins``). Requesting a module reload re-discovers and
+        re-caches implementations.
+
+        If lazy discovery is enabled (see ``LAZY_ENV_VAR``) and
+        implementations have not yet been discovered, a ``LazyPluginSet`` is
+        returned instead.
+
         :param bool warn:
         If we should warn about module import failures.
 
@@ -374,13 +726,19 @@ class Pluggable (object):
         :return: Set of discovered class types descending from type
             ``interface_type`` and ``smqtk.utils.plugin.Pluggable`` whose keys
             are the string names of the class types.
-        :rtype: set[type[Pluggable]]
+        :rtype: set[type[Pluggable]] | LazyPluginSet
 
         """
-        # TODO: If reload is False, cache result or use cache
-        # TODO: If True, re-cache new result.
-        return get_plugins(cls, cls.PLUGIN_ENV_VAR, cls.PLUGIN_HELPER_VAR,
-                           warn=warn, reload_modules=reload_modules)
+        if not reload_modules and lazy_discovery_enabled():
+            key = _plugin_cache_key(cls, cls.PLUGIN_ENV_VAR,
+                                    cls.PLUGIN_HELPER_VAR)
+            with _PLUGIN_CACHE_LOCK:
+                if key not in _PLUGIN_CACHE:
+                    return LazyPluginSet(cls, cls.PLUGIN_ENV_VAR,
+                                         cls.PLUGIN_HELPER_VAR, warn=warn)
+        return get_cached_plugins(cls, cls.PLUGIN_ENV_VAR,
+                                  cls.PLUGIN_HELPER_VAR,
+                                  warn=warn, reload_modules=reload_modules)
 
     @classmethod
     @abc.abstractmethod
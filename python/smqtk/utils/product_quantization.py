@@ -0,0 +1,287 @@
+"""
+Product quantization of vectors into compact codes, with asymmetric distance
+computation between full-precision query vectors and encoded vectors.
+"""
+from __future__ import division
+
+import numpy
+from six.moves import range
+
+
+# Number of vectors encoded, or compared to centroids, at a time, bounding the
+# size of intermediate distance matrices.
+CHUNK_SIZE = 8192
+
+
+def _nearest_centroids(x, centroids):
+    """
+    :param x: (N, d) vectors.
+    :type x: numpy.ndarray
+
+    :param centroids: (K, d) centroids.
+    :type centroids: numpy.ndarray
+
+    :return: (N,) index of the nearest centroid to each vector.
+    :rtype: numpy.ndarray
+    """
+    c_sq_norms = numpy.einsum('ij,ij->i', centroids, centroids)
+    idx = numpy.empty(len(x), dtype=numpy.intp)
+    for beg in range(0, len(x), CHUNK_SIZE):
+        chunk = x[beg:beg + CHUNK_SIZE]
+        # Squared distances, less the constant squared norm of each vector.
+        d = chunk.dot(centroids.T)
+        d *= -2
+        d += c_sq_norms[None, :]
+        idx[beg:beg + CHUNK_SIZE] = d.argmin(axis=1)
+    return idx
+
+
+def kmeans(x, k, num_iterations, rng):
+    """
+    Cluster vectors with Lloyd's algorithm, starting from randomly selected
+    vectors. Clusters that become empty are re-seeded with random vectors.
+
+    :param x: (N, d) vectors to cluster, where N >= k.
+    :type x: numpy.ndarray
+
+    :param k: Number of clusters.
+    :type k: int
+
+    :param num_iterations: Number of assignment and update iterations.
+    :type num_iterations: int
+
+    :param rng: Random state.
+    :type rng: numpy.random.RandomState
+
+    :return: (k, d) cluster centroids.
+    :rtype: numpy.ndarray
+    """
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(num_iterations):
+        assign = _nearest_centroids(x, centroids)
+        counts = numpy.bincount(assign, minlength=k)
+        nonempty = counts > 0
+        # Sum the vectors of each cluster over contiguous runs of vectors
+        # sorted by cluster.
+        order = numpy.argsort(assign, kind='mergesort')
+        starts = (numpy.cumsum(counts) - counts)[nonempty]
+        sums = numpy.add.reduceat(x[order], starts, axis=0)
+        centroids[nonempty] = sums / counts[nonempty, None]
+        n_empty = k - nonempty.sum()
+        if n_empty:
+            centroids[~nonempty] = x[rng.choice(len(x), n_empty,
+                                                replace=False)]
+    return centroids
+
+
+class ProductQuantizer (object):
+    """
+    Product quantizer encoding vectors as one byte per subspace.
+
+    Vectors are split into ``num_subspaces`` contiguous sub-vectors of equal
+    dimension, each of which is quantized to the nearest of ``num_centroids``
+    centroids learned for that subspace by k-means, recording the centroid's
+    index. A D-dimensional float64 vector of ``8 * D`` bytes is thus encoded
+    in ``num_subspaces`` bytes.
+
+    The squared euclidean distance between a query vector and an encoded
+    vector is approximated by asymmetric distance computation (ADC): the sum,
+    over subspaces, of the squared distance between the query's sub-vector
+    and the encoded centroid. Distances from a query's sub-vectors to every
+    centroid are computed once, into lookup tables, so comparing the query
+    to each encoded vector takes ``num_subspaces`` table lookups.
+    """
+
+    def __init__(self, num_subspaces, num_centroids=256, num_iterations=20,
+                 random_seed=None):
+        """
+        :param num_subspaces: Number of subspaces vectors are split into,
+            which must divide the vector dimension. This is the number of
+            bytes of each code.
+        :type num_subspaces: int
+
+        :param num_centroids: Number of centroids of each subspace, up to
+            256.
+        :type num_centroids: int
+
+        :param num_iterations: Number of k-means iterations when training.
+        :type num_iterations: int
+
+        :param random_seed: Optional random number generator seed for
+            deterministic training.
+        :type random_seed: None | int
+
+        :raises ValueError: Invalid number of subspaces or centroids.
+        """
+        if num_subspaces < 1:
+            raise ValueError("The number of subspaces must be positive.")
+        if not 1 <= num_centroids <= 256:
+            raise ValueError("The number of centroids must be in [1, 256].")
+        self.num_subspaces = num_subspaces
+        self.num_centroids = num_centroids
+        self.num_iterations = num_iterations
+        self.random_seed = random_seed
+        # (num_subspaces, num_centroids, sub-vector dimension) centroids, set
+        # when trained.
+        #: :type: None | numpy.ndarray
+        self.centroids = None
+
+    @property
+    def is_trained(self):
+        """
+        :return: If centroids have been trained or loaded.
+        :rtype: bool
+        """
+        return self.centroids is not None
+
+    @property
+    def dimension(self):
+        """
+        :return: Dimension of the vectors quantized, or None if not trained.
+        :rtype: None | int
+        """
+        if self.centroids is None:
+            return None
+        return self.num_subspaces * self.centroids.shape[2]
+
+    def _check_vectors(self, x):
+        x = numpy.atleast_2d(numpy.asarray(x, dtype=numpy.float32))
+        if x.ndim != 2 or x.shape[1] != self.dimension:
+            raise ValueError("Expected vectors of dimension %d, got shape %s"
+                             % (self.dimension, x.shape))
+        return x
+
+    def _check_trained(self):
+        if self.centroids is None:
+            raise RuntimeError("Product quantizer has not been trained.")
+
+    def train(self, x):
+        """
+        Learn the centroids of each subspace from training vectors, replacing
+        any current centroids.
+
+        :param x: (N, D) training vectors, where N is at least the number of
+            centroids and D is divisible by the number of subspaces.
+        :type x: numpy.ndarray
+
+        :raises ValueError: Too few training vectors, or a dimension not
+            divisible by the number of subspaces.
+        """
+        x = numpy.atleast_2d(numpy.asarray(x, dtype=numpy.float32))
+        if x.shape[1] % self.num_subspaces:
+            raise ValueError("Vector dimension %d is not divisible by the "
+                             "number of subspaces (%d)."
+                             % (x.shape[1], self.num_subspaces))
+        if len(x) < self.num_centroids:
+            raise ValueError("At least %d training vectors are required, got "
+                             "%d." % (self.num_centroids, len(x)))
+        ds = x.shape[1] // self.num_subspaces
+        rng = numpy.random.RandomState(self.random_seed)
+        centroids = numpy.empty((self.num_subspaces, self.num_centroids, ds),
+                                dtype=numpy.float32)
+        for m in range(self.num_subspaces):
+            centroids[m] = kmeans(
+                numpy.ascontiguousarray(x[:, m * ds:(m + 1) * ds]),
+                self.num_centroids, self.num_iterations, rng
+            )
+        self.centroids = centroids
+
+    def encode(self, x):
+        """
+        :param x: (N, D) vectors to encode.
+        :type x: numpy.ndarray
+
+        :return: (N, num_subspaces) uint8 codes of the vectors.
+        :rtype: numpy.ndarray
+        """
+        self._check_trained()
+        x = self._check_vectors(x)
+        ds = self.centroids.shape[2]
+        codes = numpy.empty((len(x), self.num_subspaces), dtype=numpy.uint8)
+        for m in range(self.num_subspaces):
+            codes[:, m] = _nearest_centroids(x[:, m * ds:(m + 1) * ds],
+                                             self.centroids[m])
+        return codes
+
+    def decode(self, codes):
+        """
+        :param codes: (N, num_subspaces) codes to decode.
+        :type codes: numpy.ndarray
+
+        :return: (N, D) approximate vectors of the codes.
+        :rtype: numpy.ndarray
+        """
+        self._check_trained()
+        codes = numpy.atleast_2d(codes)
+        return numpy.hstack([self.centroids[m][codes[:, m]]
+                             for m in range(self.num_subspaces)])
+
+    def distance_tables(self, q):
+        """
+        :param q: (Q, D) query vectors.
+        :type q: numpy.ndarray
+
+        :return: (Q, num_subspaces, num_centroids) squared distances between
+            the sub-vectors of each query and each centroid of their
+            subspace.
+        :rtype: numpy.ndarray
+        """
+        self._check_trained()
+        q = self._check_vectors(q)
+        ds = self.centroids.shape[2]
+        q = q.reshape(len(q), self.num_subspaces, ds)
+        # ||q||^2 - 2qc + ||c||^2 per subspace.
+        tables = numpy.einsum('qmd,mkd->qmk', q, self.centroids)
+        tables *= -2
+        tables += numpy.einsum('qmd,qmd->qm', q, q)[:, :, None]
+        tables += numpy.einsum('mkd,mkd->mk', self.centroids,
+                               self.centroids)[None, :, :]
+        return numpy.maximum(tables, 0, out=tables)
+
+    def adc(self, tables, codes):
+        """
+        Compute the asymmetric squared distances between queries and encoded
+        vectors.
+
+        :param tables: (Q, num_subspaces, num_centroids) distance tables of
+            the queries from ``distance_tables``.
+        :type tables: numpy.ndarray
+
+        :param codes: (N, num_subspaces) codes of the encoded vectors.
+        :type codes: numpy.ndarray
+
+        :return: (Q, N) approximate squared euclidean distances.
+        :rtype: numpy.ndarray
+        """
+        d = numpy.zeros((len(tables), len(codes)), dtype=numpy.float32)
+        for m in range(self.num_subspaces):
+            d += tables[:, m, :][:, codes[:, m]]
+        return d
+
+    def save(self, f):
+        """
+        Save the quantizer's centroids and number of training iterations.
+
+        :param f: File path or writable binary file object.
+        :type f: str | file
+        """
+        self._check_trained()
+        numpy.savez(f, centroids=self.centroids,
+                    num_iterations=self.num_iterations)
+
+    @classmethod
+    def load(cls, f):
+        """
+        Load a quantizer saved by ``save``.
+
+        :param f: File path or readable binary file object.
+        :type f: str | file
+
+        :rtype: ProductQuantizer
+        """
+        with numpy.load(f) as npz:
+            centroids = npz['centroids']
+            pq = cls(centroids.shape[0], centroids.shape[1],
+                     int(npz['num_iterations']))
+        pq.centroids = centroids
+        return pq
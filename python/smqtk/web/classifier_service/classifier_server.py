@@ -24,6 +24,7 @@ from smqtk.representation import (
 )
 from smqtk.representation.data_element.memory_element import DataMemoryElement
 from smqtk.utils import probability
+from smqtk.utils.coalesce import RequestCoalescer
 from smqtk.utils.configuration import (
     from_config_dict,
     make_default_config,
@@ -77,6 +78,12 @@ class SmqtkClassifierService (smqtk.web.SmqtkWebApp):
       IQR-state-based classifier models will bash each other causing
       erroneously labeled duplicate results.
 
+    * When ``request_coalescing`` is enabled, concurrent ``/classify``
+      requests are queued for up to ``max_wait`` seconds and described and
+      classified together in batches of up to ``max_batch_size`` items. This
+      trades a little latency per request for batched use of the descriptor
+      generator and classifiers under concurrent load.
+
     """
 
     CONFIG_ENABLE_CLASSIFIER_REMOVAL = "enable_classifier_removal"
@@ -86,6 +93,7 @@ class SmqtkClassifierService (smqtk.web.SmqtkWebApp):
     CONFIG_DESCRIPTOR_FACTORY = "descriptor_factory"
     CONFIG_IMMUTABLE_LABELS = "immutable_labels"
     CONFIG_IQR_CLASSIFIER = "iqr_state_classifier_config"
+    CONFIG_REQUEST_COALESCING = "request_coalescing"
 
     DEFAULT_IQR_STATE_CLASSIFIER_KEY = '__default__'
 
@@ -117,6 +125,12 @@ class SmqtkClassifierService (smqtk.web.SmqtkWebApp):
             SupervisedClassifier.get_impls()
         )
         c[cls.CONFIG_IMMUTABLE_LABELS] = []
+        # Opt-in batching of concurrent classification requests.
+        c[cls.CONFIG_REQUEST_COALESCING] = {
+            "enabled": False,
+            "max_batch_size": 32,
+            "max_wait": 0.005,
+        }
 
         return c
 
@@ -161,6 +175,18 @@ class SmqtkClassifierService (smqtk.web.SmqtkWebApp):
         self.iqr_state_classifier_config = \
             json_config[self.CONFIG_IQR_CLASSIFIER]
 
+        # Optional coalescing of concurrent classify requests into batches.
+        #: :type: None | smqtk.utils.coalesce.RequestCoalescer
+        self.classify_coalescer = None
+        coalesce_config = json_config[self.CONFIG_REQUEST_COALESCING]
+        if coalesce_config['enabled']:
+            self.classify_coalescer = RequestCoalescer(
+                self._describe_and_classify,
+                max_batch_size=coalesce_config['max_batch_size'],
+                max_wait=coalesce_config['max_wait'],
+                name="classify-coalescer",
+            )
+
         self.add_routes()
 
     def add_routes(self):
@@ -421,15 +447,12 @@ class SmqtkClassifierService (smqtk.web.SmqtkWebApp):
         self._log.debug("Length of byte data: %d" % len(data_bytes))
 
         data_elem = DataMemoryElement(data_bytes, content_type, readonly=True)
-        descr_elem = self.descriptor_gen.generate_one_element(
-            data_elem, descr_factory=self.descriptor_factory
-        )
-        self._log.debug("Descriptor shape: %s", descr_elem.vector().shape)
 
         try:
-            clfr_map = self.classifier_collection.classify(
-                descr_elem, labels=labels,
-                factory=self.classification_factory)
+            if self.classify_coalescer is not None:
+                clfr_map = self.classify_coalescer.submit((data_elem, labels))
+            else:
+                clfr_map = self._describe_and_classify([(data_elem, labels)])[0]
         except MissingLabelError as ex:
             return make_response_json(
                 "The following labels are not registered with any"
@@ -455,6 +478,50 @@ class SmqtkClassifierService (smqtk.web.SmqtkWebApp):
         return make_response_json('Finished classification.',
                                   result=c_json)
 
+    def _describe_and_classify(self, requests):
+        """
+        Describe and classify a batch of data elements.
+
+        Descriptors for all data elements are generated in one call to the
+        descriptor generator. Requests are then grouped by the classifier
+        labels they asked for and each group is classified in one batch.
+
+        :param requests: Sequence of pairs of a data element to describe and
+            classify and the labels of the classifiers to apply to it, or None
+            to apply all classifiers.
+        :type requests: collections.Sequence[
+            (smqtk.representation.DataElement, None | list[str])]
+
+        :raises smqtk.exceptions.MissingLabelError: Some or all of the
+            requested labels are missing.
+
+        :return: List, parallel to the input requests, of result dictionaries
+            of classifier labels to classification elements.
+        :rtype: list[dict[str, smqtk.representation.ClassificationElement]]
+
+        """
+        descr_elems = list(self.descriptor_gen.generate_elements(
+            (data_elem for data_elem, _ in requests),
+            descr_factory=self.descriptor_factory
+        ))
+        self._log.debug("Described %d elements", len(descr_elems))
+
+        # Group request indices by the set of labels requested.
+        label_groups = {}
+        for i, (_, labels) in enumerate(requests):
+            key = None if labels is None else tuple(sorted(set(labels)))
+            label_groups.setdefault(key, []).append(i)
+
+        results = [None] * len(requests)
+        for labels, indices in six.iteritems(label_groups):
+            group_results = self.classifier_collection.classify_elements(
+                [descr_elems[i] for i in indices], labels=labels,
+                factory=self.classification_factory
+            )
+            for i, r in zip(indices, group_results):
+                results[i] = r
+        return results
+
     # GET /classifier
     def get_classifier(self):
         """
@@ -11,6 +11,7 @@ from smqtk.representation.data_element.file_element import DataFileElement
 from smqtk.representation.data_element.memory_element import DataMemoryElement
 from smqtk.representation.data_element.url_element import DataUrlElement
 from smqtk.utils import SimpleTimer
+from smqtk.utils.coalesce import RequestCoalescer
 from smqtk.utils.configuration import (
     from_config_dict,
     make_default_config,
@@ -48,6 +49,10 @@ class DescriptorServiceServer (SmqtkWebApp):
 
     Additional Configuration
 
+    ``request_coalescing`` optionally enables batching of concurrent requests:
+    when ``enabled``, requests for the same descriptor generator label are
+    queued for up to ``max_wait`` seconds and described together in batches
+    of up to ``max_batch_size`` elements.
 
     .. note:: We will look for an environment variable
               `DescriptorService_CONFIG` for a string file path to an additional
@@ -75,7 +80,12 @@ class DescriptorServiceServer (SmqtkWebApp):
             "descriptor_factory": DescriptorElementFactory.get_default_config(),
             "descriptor_generators": {
                 "example": make_default_config(DescriptorGenerator.get_impls())
-            }
+            },
+            "request_coalescing": {
+                "enabled": False,
+                "max_batch_size": 32,
+                "max_wait": 0.005,
+            },
         })
         return c
 
@@ -104,6 +114,12 @@ class DescriptorServiceServer (SmqtkWebApp):
         self.descriptor_cache = {}
         self.descriptor_cache_lock = multiprocessing.RLock()
 
+        # Optional per-label coalescing of concurrent descriptor requests.
+        # Coalescers are created alongside cached generator instances.
+        self.coalesce_config = self.json_config['request_coalescing']
+        #: :type: dict[str, smqtk.utils.coalesce.RequestCoalescer]
+        self.coalescer_cache = {}
+
         @self.route("/")
         def list_ingest_labels():
             return flask.jsonify({
@@ -343,12 +359,42 @@ class DescriptorServiceServer (SmqtkWebApp):
 
         """
         with SimpleTimer("Computing descriptor...", self._log.debug):
-            cd = self.get_descriptor_inst(cd_label)
-            descriptor = cd.generate_one_element(
-                de, descr_factory=self.descr_elem_factory
-            )
+            if self.coalesce_config['enabled']:
+                descriptor = self.get_coalescer(cd_label).submit(de)
+            else:
+                cd = self.get_descriptor_inst(cd_label)
+                descriptor = cd.generate_one_element(
+                    de, descr_factory=self.descr_elem_factory
+                )
 
         return descriptor
 
+    def get_coalescer(self, label):
+        """
+        Get the cached request coalescer batching descriptor generation for a
+        configuration label.
+
+        :type label: str
+        :rtype: smqtk.utils.coalesce.RequestCoalescer
+        """
+        with self.descriptor_cache_lock:
+            if label not in self.coalescer_cache:
+                cd = self.get_descriptor_inst(label)
+
+                def describe_batch(data_elements):
+                    return cd.generate_elements(
+                        data_elements, descr_factory=self.descr_elem_factory
+                    )
+
+                self._log.debug("Creating request coalescer for '%s'", label)
+                self.coalescer_cache[label] = RequestCoalescer(
+                    describe_batch,
+                    max_batch_size=self.coalesce_config['max_batch_size'],
+                    max_wait=self.coalesce_config['max_wait'],
+                    name="descriptor-coalescer[%s]" % label,
+                )
+
+            return self.coalescer_cache[label]
+
 
 APPLICATION_CLASS = DescriptorServiceServer
@@ -1,9 +1,11 @@
 import base64
 import binascii
 import collections
+import copy
 import itertools
 import json
 import multiprocessing
+import threading
 import time
 import traceback
 import uuid
@@ -22,6 +24,7 @@ from smqtk.iqr import (
     iqr_session,
 )
 from smqtk.representation import (
+    DescriptorElement,
     ClassificationElementFactory,
     DescriptorElementFactory,
     DescriptorSet,
@@ -103,8 +106,18 @@ class IqrService (SmqtkWebApp):
     global set and once for the nearest neighbors index. These will probably
     be the set to the same set. In more detail, the global descriptor set
     is used when the "refine" endpoint is given descriptor UUIDs
+
+    ``session_control.classification`` controls the ``/classify`` endpoint:
+    descriptors are classified in batches of ``batch_size`` vectors, and when
+    ``background_retrain`` is enabled, sessions with a classifier already
+    trained retrain in the background upon adjudication changes while the
+    previous classifier continues to serve requests.
     """
 
+    # Classification labels of session classifiers.
+    CLASSIFIER_POS_LABEL = "positive"
+    CLASSIFIER_NEG_LABEL = "negative"
+
     @classmethod
     def is_usable(cls):
         return True
@@ -123,6 +136,10 @@ class IqrService (SmqtkWebApp):
 
                 "session_control": {
                     "positive_seed_neighbors": 500,
+                    "classification": {
+                        "batch_size": 1000,
+                        "background_retrain": False,
+                    },
                     "session_expiration": {
                         "enabled": False,
                         "check_interval_seconds": 30,
@@ -195,6 +212,10 @@ class IqrService (SmqtkWebApp):
 
         # Initialize from config
         self.positive_seed_neighbors = sc_config['positive_seed_neighbors']
+        self.classify_batch_size = \
+            int(sc_config['classification']['batch_size'])
+        self.background_retrain = \
+            bool(sc_config['classification']['background_retrain'])
         self.classifier_config = \
             json_config['iqr_service']['plugins']['classifier_config']
         self.classification_factory = \
@@ -232,19 +253,36 @@ class IqrService (SmqtkWebApp):
         # modifications locked under the parent session's global lock.
         #: :type: dict[collections.Hashable, SupervisedClassifier | None]
         self.session_classifiers = {}
+        # Version number of the current classifier for a session, incremented
+        # every time a new classifier is trained for that session.
+        #: :type: dict[collections.Hashable, int]
+        self.session_classifier_version = {}
         # Cache of IQR session classification results on descriptors with the
-        # recorded UIDs.
-        # This session cache contents are purged when a classifier retrains for
-        # a session.
+        # recorded UIDs, paired with the version of the classifier that
+        # produced them.
+        # Cached results are kept when a classifier retrains for a session and
+        # are recomputed when next requested.
         # Only "positive" class confidence values are retained due to the
         # binary nature of IQR-based classifiers.
-        #: :type: dict[collections.Hashable, dict[collections.Hashable, float]]
+        #: :type: dict[collections.Hashable,
+        #:             dict[collections.Hashable, (int, float)]]
         self.session_classification_results = {}
         # Control for knowing when a new classifier should be trained for a
         # session (True == train new classifier). Modification for specific
         # sessions under parent session's lock.
         #: :type: dict[collections.Hashable, bool]
         self.session_classifier_dirty = {}
+        # Thread training a new classifier for a session in the background, if
+        # any.
+        #: :type: dict[collections.Hashable, threading.Thread | None]
+        self.session_classifier_training = {}
+        # Positive and negative examples the current classifier for a session
+        # was trained with. This allows classifiers supporting incremental
+        # training to be updated with only new examples.
+        #: :type: dict[collections.Hashable,
+        #:             None | (frozenset[DescriptorElement],
+        #:                     frozenset[DescriptorElement])]
+        self.session_classifier_examples = {}
 
         def session_expire_callback(session):
             """
@@ -252,9 +290,7 @@ class IqrService (SmqtkWebApp):
             """
             with session:
                 self._log.debug("Removing session %s classifier", session.uuid)
-                del self.session_classifiers[session.uuid]
-                del self.session_classification_results[session.uuid]
-                del self.session_classifier_dirty[session.uuid]
+                self._remove_session_classifier(session.uuid)
 
         self.controller = iqr_controller.IqrController(
             sc_config['session_expiration']['enabled'],
@@ -807,9 +843,7 @@ class IqrService (SmqtkWebApp):
         with self.controller:
             with iqrs:  # because classifier maps locked by session
                 self.controller.add_session(iqrs, self.session_timeout)
-                self.session_classifiers[sid] = None
-                self.session_classification_results[sid] = {}
-                self.session_classifier_dirty[sid] = True
+                self._reset_session_classifier(sid)
 
         return make_response_json("Created new session with ID '%s'" % sid,
                                   sid=sid), 201  # CREATED
@@ -839,9 +873,7 @@ class IqrService (SmqtkWebApp):
 
         try:
             iqrs.reset()
-            self.session_classifiers[sid] = None
-            self.session_classification_results[sid] = {}
-            self.session_classifier_dirty[sid] = True
+            self._reset_session_classifier(sid)
 
         finally:
             iqrs.lock.release()
@@ -874,9 +906,7 @@ class IqrService (SmqtkWebApp):
                                           sid=sid), 404
             with self.controller.get_session(sid) as iqrs:
                 iqrs.reset()
-                del self.session_classifiers[sid]
-                del self.session_classification_results[sid]
-                del self.session_classifier_dirty[sid]
+                self._remove_session_classifier(sid)
             self.controller.remove_session(sid)
         return make_response_json("Cleaned session resources for '%s'" % sid,
                                   sid=sid), 200
@@ -1595,6 +1625,162 @@ class IqrService (SmqtkWebApp):
             total=total, results=r
         ), 200
 
+    def _reset_session_classifier(self, sid):
+        """
+        Set the classifier state of the given session to its initial state:
+        no classifier, no cached results and marked dirty.
+
+        Any background training for the session is abandoned. The classifier
+        version counter is not reset so that versions are never reused for a
+        session.
+
+        This method assumes its being executed within an IQR session lock.
+
+        :param collections.Hashable sid: UUID of the IQR session.
+        """
+        self.session_classifiers[sid] = None
+        self.session_classifier_version.setdefault(sid, 0)
+        self.session_classification_results[sid] = {}
+        self.session_classifier_dirty[sid] = True
+        self.session_classifier_training[sid] = None
+        self.session_classifier_examples[sid] = None
+
+    def _remove_session_classifier(self, sid):
+        """
+        Remove all classifier state of the given session.
+
+        This method assumes its being executed within an IQR session lock.
+
+        :param collections.Hashable sid: UUID of the IQR session.
+        """
+        del self.session_classifiers[sid]
+        del self.session_classifier_version[sid]
+        del self.session_classification_results[sid]
+        del self.session_classifier_dirty[sid]
+        del self.session_classifier_training[sid]
+        del self.session_classifier_examples[sid]
+
+    def _train_session_classifier(self, all_pos, all_neg, classifier=None,
+                                  trained_examples=None):
+        """
+        Train a binary pos/neg classifier for the given examples.
+
+        If an existing classifier is given that supports incremental training,
+        and the examples it was trained with are a subset of the given
+        examples, it is updated in place with just the new examples.
+        Otherwise, a new classifier is trained based on the input classifier
+        configuration.
+
+        :param set[smqtk.representation.DescriptorElement] all_pos:
+            Positive example descriptors.
+        :param set[smqtk.representation.DescriptorElement] all_neg:
+            Negative example descriptors.
+        :param None|smqtk.algorithms.SupervisedClassifier classifier:
+            Optional existing classifier to incrementally update.
+        :param trained_examples: Positive and negative examples the given
+            existing classifier was trained with.
+        :type trained_examples: None | (frozenset, frozenset)
+
+        :return: Trained classifier.
+        :rtype: smqtk.algorithms.SupervisedClassifier
+        """
+        if classifier is not None and trained_examples is not None \
+                and classifier.supports_partial_train():
+            trained_pos, trained_neg = trained_examples
+            # Examples cannot be unlearned, so removed or re-labeled examples
+            # require training a new classifier.
+            if trained_pos <= all_pos and trained_neg <= all_neg:
+                new_examples = {}
+                if all_pos - trained_pos:
+                    new_examples[self.CLASSIFIER_POS_LABEL] = \
+                        all_pos - trained_pos
+                if all_neg - trained_neg:
+                    new_examples[self.CLASSIFIER_NEG_LABEL] = \
+                        all_neg - trained_neg
+                self._log.debug("Incrementally training classifier with %d "
+                                "new examples",
+                                sum(len(e) for e in new_examples.values()))
+                classifier.partial_train(new_examples)
+                return classifier
+
+        #: :type: SupervisedClassifier
+        classifier = from_config_dict(
+            self.classifier_config,
+            SupervisedClassifier.get_impls()
+        )
+        classifier.train(
+            {self.CLASSIFIER_POS_LABEL: all_pos,
+             self.CLASSIFIER_NEG_LABEL: all_neg}
+        )
+        return classifier
+
+    def _set_session_classifier(self, sid, classifier, examples):
+        """
+        Set a newly trained classifier as the current classifier of the given
+        session, incrementing the session's classifier version.
+
+        This method assumes its being executed within an IQR session lock.
+
+        :param collections.Hashable sid: UUID of the IQR session.
+        :param smqtk.algorithms.SupervisedClassifier classifier:
+            Newly trained classifier.
+        :param examples: Positive and negative examples the classifier was
+            trained with.
+        :type examples: (frozenset, frozenset)
+        """
+        self.session_classifiers[sid] = classifier
+        self.session_classifier_examples[sid] = examples
+        self.session_classifier_version[sid] += 1
+        self._log.debug("[%s] New session classifier version %d", sid,
+                        self.session_classifier_version[sid])
+
+    def _background_train_session_classifier(self, iqrs, examples,
+                                             prev_classifier,
+                                             prev_examples):
+        """
+        Train a new classifier for the given session and set it as the
+        session's current classifier, unless the session was reset or removed
+        while training.
+
+        A copy of the previous classifier is incrementally updated if
+        possible, as the previous classifier continues to serve requests
+        while training.
+
+        This is the target of session background training threads.
+
+        :param smqtk.iqr.IqrSession iqrs: IQR session to train for.
+        :param examples: Positive and negative example descriptors to train
+            with.
+        :type examples: (frozenset, frozenset)
+        :param smqtk.algorithms.SupervisedClassifier prev_classifier:
+            Previous classifier of the session.
+        :param prev_examples: Positive and negative examples the previous
+            classifier was trained with.
+        :type prev_examples: (frozenset, frozenset)
+        """
+        sid = iqrs.uuid
+        classifier = None
+        try:
+            classifier = self._train_session_classifier(
+                examples[0], examples[1],
+                copy.deepcopy(prev_classifier), prev_examples
+            )
+        except Exception:
+            self._log.error("[%s] Background classifier training failed.",
+                            sid, exc_info=True)
+        with iqrs:
+            if self.session_classifier_training.get(sid, None) \
+                    is not threading.current_thread():
+                self._log.debug("[%s] Session changed during background "
+                                "training, discarding classifier.", sid)
+                return
+            self.session_classifier_training[sid] = None
+            if classifier is None:
+                # Try again upon the next request.
+                self.session_classifier_dirty[sid] = True
+            else:
+                self._set_session_classifier(sid, classifier, examples)
+
     def _ensure_session_classifier(self, iqrs):
         """
         Return the binary pos/neg classifier for this session.
@@ -1603,17 +1789,29 @@ class IqrService (SmqtkWebApp):
         dirty, retrain the classifier based on the input classifier
         configuration.
 
+        When background retraining is enabled and the session already has a
+        classifier, a dirty session starts training a new classifier in a
+        background thread and the existing classifier is returned until
+        training completes.
+
+        Classifiers that support incremental training are updated with only
+        the examples added since they were last trained, when no examples
+        were removed or re-labeled. If training fails, the session's current
+        classifier is discarded.
+
         This method assumes its being executed within an IQR session lock.
 
         :param smqtk.iqr.IqrSession iqrs:
             UUID of the IQR session to use.
 
         :return:
-            Binary classifier for the given IQR session, the positive
-            classification label and the negative classification label.
-        :rtype: (smqtk.algorithms.SupervisedClassifier, str, str)
+            Binary classifier for the given IQR session and its version.
+        :rtype: (smqtk.algorithms.SupervisedClassifier, int)
         """
         sid = iqrs.uuid
+        classifier = self.session_classifiers.get(sid, None)
+        if classifier is not None and not self.session_classifier_dirty[sid]:
+            return classifier, self.session_classifier_version[sid]
 
         all_pos = (iqrs.external_positive_descriptors |
                    iqrs.positive_descriptors)
@@ -1626,30 +1824,81 @@ class IqrService (SmqtkWebApp):
             raise RuntimeError("No negative labels in current IQR session. "
                                "Required for a supervised classifier.")
 
-        classifier = self.session_classifiers.get(sid, None)
+        examples = (frozenset(all_pos), frozenset(all_neg))
+        prev_examples = self.session_classifier_examples[sid]
+        if classifier is not None and examples == prev_examples:
+            # Adjudications are back to those the current classifier was
+            # trained with.
+            self.session_classifier_training[sid] = None
+            self.session_classifier_dirty[sid] = False
+        elif classifier is not None and self.background_retrain:
+            if self.session_classifier_training[sid] is None:
+                self._log.debug("[%s] Training new classifier for current "
+                                "adjudication state in the background...",
+                                sid)
+                t = threading.Thread(
+                    target=self._background_train_session_classifier,
+                    args=(iqrs, examples, classifier, prev_examples),
+                    name="IqrService-train[%s]" % sid,
+                )
+                t.daemon = True
+                self.session_classifier_training[sid] = t
+                # Adjudications made from here on dirty the session again.
+                self.session_classifier_dirty[sid] = False
+                t.start()
+        else:
+            self._log.debug("[%s] Training new classifier for current "
+                            "adjudication state...", sid)
+            try:
+                classifier = self._train_session_classifier(
+                    examples[0], examples[1], classifier, prev_examples
+                )
+            except Exception:
+                # The current classifier may have been left partially updated
+                # by failed incremental training, so it is discarded.
+                self._log.debug("[%s] Classifier training failed, discarding "
+                                "current classifier.", sid)
+                self._reset_session_classifier(sid)
+                raise
+            # Abandon any background training started before.
+            self.session_classifier_training[sid] = None
+            self._set_session_classifier(sid, classifier, examples)
+            self.session_classifier_dirty[sid] = False
 
-        pos_label = "positive"
-        neg_label = "negative"
+        return classifier, self.session_classifier_version[sid]
 
-        if self.session_classifier_dirty[sid] or classifier is None:
-            self._log.debug("Training new classifier for current "
-                            "adjudication state...")
+    def _classify_uuids(self, classifier, uuids):
+        """
+        Classify the descriptors of the given UUIDs, retrieved from the
+        configured descriptor set, in batches of vectors.
 
-            #: :type: SupervisedClassifier
-            classifier = from_config_dict(
-                self.classifier_config,
-                SupervisedClassifier.get_impls()
-            )
-            classifier.train(
-                {pos_label: all_pos,
-                 neg_label: all_neg}
-            )
+        :param smqtk.algorithms.Classifier classifier: Classifier to use.
+        :param collections.Sequence[collections.Hashable] uuids:
+            UUIDs of descriptors to classify.
 
-            self.session_classifiers[sid] = classifier
-            self.session_classification_results[sid] = {}
-            self.session_classifier_dirty[sid] = False
+        :raises KeyError: A UUID does not associate to a descriptor in the
+            configured descriptor set.
+        :raises ValueError: A descriptor does not have a vector set.
 
-        return classifier, pos_label, neg_label
+        :return: Iterator of UUID and positive class confidence pairs.
+        :rtype: collections.Iterator[(collections.Hashable, float)]
+        """
+        uuid_iter = iter(uuids)
+        batch = list(itertools.islice(uuid_iter, self.classify_batch_size))
+        while batch:
+            # get_many_descriptors can raise KeyError
+            descriptors = list(self.descriptor_set
+                               .get_many_descriptors(batch))
+            vectors = DescriptorElement.get_many_vectors(descriptors)
+            for d, v in zip(descriptors, vectors):
+                if v is None:
+                    raise ValueError("Descriptor UUID '%s' has no vector set."
+                                     % d.uuid())
+            c_iter = classifier.classify_arrays(vectors)
+            for d, c in zip(descriptors, c_iter):
+                yield d.uuid(), c[self.CLASSIFIER_POS_LABEL]
+            batch = list(itertools.islice(uuid_iter,
+                                          self.classify_batch_size))
 
     # GET /classify
     def classify(self):
@@ -1700,8 +1949,7 @@ class IqrService (SmqtkWebApp):
 
         try:
             try:
-                classifier, pos_label, neg_label = \
-                    self._ensure_session_classifier(iqrs)
+                classifier, version = self._ensure_session_classifier(iqrs)
             except RuntimeError as ex:
                 # Classification training may have failed.
                 return make_response_json(
@@ -1709,29 +1957,31 @@ class IqrService (SmqtkWebApp):
                 ), 400
 
             # Reduce descriptors actively classified to those not represented
-            # in the results cache.
+            # in the results cache by the current classifier version.
             c_cache = self.session_classification_results[sid]
-            uuid_for_clsify = set(uuids) - set(c_cache)
+            uuid_for_clsify = [
+                uid for uid in collections.OrderedDict.fromkeys(uuids)
+                if c_cache.get(uid, (None,))[0] != version
+            ]
             if uuid_for_clsify:
-                # Get descriptor elements for classification
-                # get_many_descriptors can raise KeyError
-                descriptors = list(self.descriptor_set
-                                   .get_many_descriptors(uuid_for_clsify))
-                classifications = classifier.classify_elements(
-                    descriptors, self.classification_factory,
-                    # TODO: overwrite? ensure memory only elements?
-                )
-
-                # Update cache
-                for c in classifications:
-                    c_cache[c.uuid] = c[pos_label]
+                try:
+                    for uid, proba in self._classify_uuids(classifier,
+                                                           uuid_for_clsify):
+                        c_cache[uid] = (version, proba)
+                except ValueError as ex:
+                    return make_response_json(str(ex), sid=sid), 400
             elif uuids:
                 self._log.info("No classifications necessary, using cache.")
 
             # Format output to be parallel lists of UUIDs input and
             # positive class classification scores.
             o_uuids = uuids
-            o_proba = [c_cache[uid] for uid in uuids]
+            o_proba = [c_cache[uid][1] for uid in uuids]
+            o_versions = [c_cache[uid][0] for uid in uuids]
+            # Scores are stale if adjudications have changed since the
+            # classifier used was trained.
+            stale = (self.session_classifier_dirty[sid] or
+                     self.session_classifier_training[sid] is not None)
 
         except KeyError as ex:
             err_uuid = str(ex)
@@ -1752,6 +2002,9 @@ class IqrService (SmqtkWebApp):
             sid=sid,
             uuids=o_uuids,
             proba=o_proba,
+            model_version=version,
+            proba_model_version=o_versions,
+            stale=stale,
         ), 200
 
     # TODO: Save/Export classifier model/state/configuration?
@@ -1872,6 +2125,8 @@ class IqrService (SmqtkWebApp):
 
         try:
             iqrs.set_state_bytes(state_bytes, self.descriptor_factory)
+            self._log.debug("[%s] session Classifier dirty", sid)
+            self.session_classifier_dirty[sid] = True
         finally:
             iqrs.lock.release()
 
@@ -1,3 +1,5 @@
+import itertools
+import json
 import mimetypes
 import os
 
@@ -46,6 +48,12 @@ class NearestNeighborServiceServer (SmqtkWebApp):
         "message": <string>,
         "reference_uri": <uri>
     }
+
+    Bulk variants of the compute and neighbor endpoints, ``/bulk/compute`` and
+    ``/bulk/nn``, accept many URIs and/or UUIDs in one POST request. Items are
+    described and queried in batches of ``bulk_batch_size`` and results are
+    streamed back as newline-delimited JSON, one line per input item in input
+    order.
     """
 
     @classmethod
@@ -72,6 +80,7 @@ class NearestNeighborServiceServer (SmqtkWebApp):
             "descriptor_set":
                 make_default_config(DescriptorSet.get_impls()),
             "update_descriptor_set": False,
+            "bulk_batch_size": 128,
         })
         return c
 
@@ -86,6 +95,7 @@ class NearestNeighborServiceServer (SmqtkWebApp):
         super(NearestNeighborServiceServer, self).__init__(json_config)
 
         self.update_index = json_config['update_descriptor_set']
+        self.bulk_batch_size = int(json_config['bulk_batch_size'])
 
         # Descriptor factory setup
         self._log.info("Initializing DescriptorElementFactory")
@@ -258,10 +268,185 @@ class NearestNeighborServiceServer (SmqtkWebApp):
             }
             return flask.jsonify(d)
 
+        @self.route("/bulk/compute", methods=["POST"])
+        def bulk_compute():
+            """
+            Compute descriptors for many URI or UUID specified items using the
+            configured descriptor generator.
+
+            See ``bulk_nn`` for the request body format, except that ``n`` is
+            not used.
+
+            Newline-delimited JSON return format, one line per input item::
+                {
+                    "success": <bool>
+
+                    "message": <str>
+
+                    "descriptor": <None|list[float]>
+
+                    "reference_uri": <str>
+                }
+
+            """
+            uris = self._bulk_request_uris()
+            if uris is None:
+                return flask.jsonify(
+                    success=False,
+                    message="Expected a JSON body with a list of \"uris\" "
+                            "and/or \"uuids\".",
+                ), 400
+
+            def iter_lines():
+                for uri_batch, d_batch in self._iter_bulk_descriptors(uris):
+                    for uri, (descriptor, message) in zip(uri_batch, d_batch):
+                        vec = None
+                        if descriptor is not None:
+                            vec = list(map(float, descriptor.vector()))
+                        yield json.dumps({
+                            "success": vec is not None,
+                            "message": message,
+                            "descriptor": vec,
+                            "reference_uri": uri,
+                        }) + "\n"
+
+            return flask.Response(flask.stream_with_context(iter_lines()),
+                                  mimetype="application/x-ndjson")
+
+        @self.route("/bulk/nn", methods=["POST"])
+        def bulk_nn():
+            """
+            Compute the nearest neighbors of many URI or UUID specified items.
+
+            Items are resolved and described in batches, and each batch of
+            descriptors is queried against the neighbor index at once.
+
+            Expected JSON request body::
+                {
+                    // Data URIs as accepted by the ``/nn/<uri>`` endpoint.
+                    "uris": <list[str]>,
+
+                    // Optional UUIDs of descriptors already in the configured
+                    // descriptor set, equivalent to "uuid://<uuid>" URIs.
+                    "uuids": <list[str]>,
+
+                    // Optional number of neighbors to query for (default 10).
+                    "n": <int>,
+
+                    // Optional content type for any "base64://" URIs.
+                    "content_type": <str>
+                }
+
+            Newline-delimited JSON return format, one line per input item::
+                {
+                    "success": <bool>
+
+                    "message": <str>
+
+                    "neighbors": <list[str]>
+
+                    "distances": <list[float]>
+
+                    "reference_uri": <str>
+                }
+
+            """
+            uris = self._bulk_request_uris()
+            if uris is None:
+                return flask.jsonify(
+                    success=False,
+                    message="Expected a JSON body with a list of \"uris\" "
+                            "and/or \"uuids\".",
+                ), 400
+            try:
+                n = int(flask.request.get_json().get('n', 10))
+            except (TypeError, ValueError):
+                return flask.jsonify(success=False,
+                                     message="Invalid value for \"n\"."), 400
+
+            def iter_lines():
+                for uri_batch, d_batch in self._iter_bulk_descriptors(uris):
+                    results = [(None, None, m) for _, m in d_batch]
+                    q_idx = [i for i, (d, _) in enumerate(d_batch)
+                             if d is not None]
+                    if q_idx:
+                        try:
+                            nn_results = self.nn_index.nn_many(
+                                [d_batch[i][0] for i in q_idx], n
+                            )
+                            for i, (neighbors, dists) in zip(q_idx,
+                                                             nn_results):
+                                results[i] = (neighbors, dists,
+                                              d_batch[i][1])
+                        except ValueError as ex:
+                            for i in q_idx:
+                                results[i] = (None, None,
+                                              "Descriptor or index related "
+                                              "issue: %s" % str(ex))
+                    for uri, (neighbors, dists, message) in zip(uri_batch,
+                                                                results):
+                        yield json.dumps({
+                            "success": neighbors is not None,
+                            "message": message,
+                            "neighbors": [nbr.uuid()
+                                          for nbr in neighbors or ()],
+                            "distances": [float(dist)
+                                          for dist in dists or ()],
+                            "reference_uri": uri,
+                        }) + "\n"
+
+            return flask.Response(flask.stream_with_context(iter_lines()),
+                                  mimetype="application/x-ndjson")
+
     def get_config(self):
         return self.json_config
 
-    def resolve_data_element(self, uri):
+    # noinspection PyMethodMayBeStatic
+    def _bulk_request_uris(self):
+        """
+        Get the list of item URIs from the current bulk request's JSON body.
+
+        UUIDs given under the "uuids" key are converted to "uuid://" URIs.
+
+        :return: List of URIs, or None if the body was not of the expected
+            format.
+        :rtype: None | list[str]
+        """
+        body = flask.request.get_json(silent=True)
+        if not isinstance(body, dict):
+            return None
+        uris = body.get('uris', [])
+        uuids = body.get('uuids', [])
+        if not isinstance(uris, list) or not isinstance(uuids, list) \
+                or not (uris or uuids):
+            return None
+        return [str(u) for u in uris] + ['uuid://%s' % u for u in uuids]
+
+    def _iter_bulk_descriptors(self, uris):
+        """
+        Yield batches of URIs paired with their computed descriptors, batched
+        according to the configured bulk batch size.
+
+        :param uris: URIs of items to describe.
+        :type uris: list[str]
+
+        :return: Iterator of pairs of a URI batch and a parallel list of
+            ``(descriptor, message)`` pairs, where ``descriptor`` is None if
+            it could not be resolved or computed.
+        :rtype: collections.Iterator[
+            (list[str],
+             list[(None | smqtk.representation.DescriptorElement, str)])]
+        """
+        content_type = flask.request.get_json().get('content_type', None)
+        uri_iter = iter(uris)
+        uri_batch = list(itertools.islice(uri_iter, self.bulk_batch_size))
+        while uri_batch:
+            yield uri_batch, self.generate_descriptors_for_uris(
+                uri_batch, content_type=content_type
+            )
+            uri_batch = list(itertools.islice(uri_iter, self.bulk_batch_size))
+
+    def resolve_data_element(self, uri, content_type=None):
         """
         Given the URI to some data, resolve it down to a DataElement instance.
 
@@ -273,6 +458,9 @@ class NearestNeighborServiceServer (SmqtkWebApp):
 
         :param uri: URI to data
         :type uri: str
+        :param content_type: Content type of "base64://" URI data. If None, we
+            look for the ``content_type`` argument of the current request.
+        :type content_type: None | str
         :return: DataElement instance wrapping given URI to data.
         :rtype: smqtk.representation.DataElement
 
@@ -290,7 +478,8 @@ class NearestNeighborServiceServer (SmqtkWebApp):
 
         elif uri[:9] == "base64://":
             self._log.debug("Given base64 string")
-            content_type = flask.request.args.get('content_type', None)
+            if content_type is None:
+                content_type = flask.request.args.get('content_type', None)
             self._log.debug("Content type: %s", content_type)
             if not content_type:
                 raise ValueError("No content-type with given base64 data")
@@ -335,5 +524,100 @@ class NearestNeighborServiceServer (SmqtkWebApp):
                 raise RuntimeError("No descriptor content")
         return descriptor
 
+    def generate_descriptors_for_uris(self, uris, content_type=None):
+        """
+        Resolve many URIs and compute their descriptors in batch.
+
+        Descriptors for "uuid://" URIs are fetched from the descriptor set
+        together, and descriptors for all other URIs are generated with one
+        call to the descriptor generator. If batch generation fails, elements
+        are re-described individually so that failures are reported for only
+        the elements that caused them.
+
+        :param uris: URIs to data or existing descriptors.
+        :type uris: list[str]
+        :param content_type: Content type of "base64://" URI data.
+        :type content_type: None | str
+
+        :return: List, parallel to the input URIs, of ``(descriptor, message)``
+            pairs. ``descriptor`` is None if it could not be resolved or
+            computed, in which case ``message`` describes the issue.
+        :rtype: list[(None | smqtk.representation.DescriptorElement, str)]
+        """
+        results = [(None, None)] * len(uris)
+
+        # Existing descriptors by UUID
+        uuid_idx = [i for i, u in enumerate(uris) if u[:7] == 'uuid://']
+        if uuid_idx:
+            if self.descr_index is None:
+                for i in uuid_idx:
+                    results[i] = (None, "Input data issue: No descriptor set "
+                                        "configured to look up UUIDs in.")
+            else:
+                uuids = [uris[i][7:] for i in uuid_idx]
+                try:
+                    found = list(self.descr_index.get_many_descriptors(uuids))
+                except KeyError:
+                    # Find the missing UUIDs individually.
+                    found = []
+                    for uid in uuids:
+                        try:
+                            found.append(self.descr_index.get_descriptor(uid))
+                        except KeyError:
+                            found.append(None)
+                for i, d in zip(uuid_idx, found):
+                    if d is None:
+                        results[i] = (None, "Input data issue: No descriptor "
+                                            "for UUID '%s'" % uris[i][7:])
+                    else:
+                        results[i] = (d, "descriptor retrieved")
+
+        # Data to describe
+        data_idx = []
+        data_elems = []
+        for i, u in enumerate(uris):
+            if u[:7] != 'uuid://':
+                try:
+                    data_elems.append(
+                        self.resolve_data_element(u, content_type)
+                    )
+                    data_idx.append(i)
+                except ValueError as ex:
+                    results[i] = (None, "Input data issue: %s" % str(ex))
+        if data_elems:
+            try:
+                descriptors = list(
+                    self.descriptor_generator_inst.generate_elements(
+                        data_elems, descr_factory=self.descr_elem_factory
+                    )
+                )
+                for i, d in zip(data_idx, descriptors):
+                    results[i] = (d, "descriptor computed")
+            except (ValueError, RuntimeError):
+                self._log.warning("Batch description of %d elements failed, "
+                                  "describing individually.", len(data_elems),
+                                  exc_info=True)
+                for i, de in zip(data_idx, data_elems):
+                    try:
+                        d = self.descriptor_generator_inst\
+                            .generate_one_element(
+                                de, descr_factory=self.descr_elem_factory
+                            )
+                        results[i] = (d, "descriptor computed")
+                    except ValueError as ex:
+                        results[i] = (None, "Input data issue: %s" % str(ex))
+                    except RuntimeError as ex:
+                        results[i] = (None, "Descriptor generation failure: "
+                                            "%s" % str(ex))
+            if self.update_index:
+                new_descriptors = [results[i][0] for i in data_idx
+                                   if results[i][0] is not None]
+                if new_descriptors:
+                    self._log.info("Updating index with %d new descriptors",
+                                   len(new_descriptors))
+                    self.descr_index.add_many_descriptors(new_descriptors)
+
+        return results
+
 
 SMQTK_PLUGIN_CLASS = NearestNeighborServiceServer
@@ -63,6 +63,10 @@ class IqrSearch (SmqtkObject, flask.Flask, Configurable):
 
     # TODO: User access white/black-list? See ``search_app/__init__.py``:L135
 
+    # Member of a downloaded state package holding our UI's working data. The
+    # other members are the IQR service's own state package contents.
+    STATE_WORKING_DATA_FILENAME = "iqr_working_data.json"
+
     @classmethod
     def get_default_config(cls):
         d = super(IqrSearch, cls).get_default_config()
@@ -228,19 +232,6 @@ class IqrSearch (SmqtkObject, flask.Flask, Configurable):
             r_get.raise_for_status()
             state_b64 = r_get.json()['state_b64']
             state_bytes = base64.b64decode(state_b64)
-
-            # Load state dictionary from base-64 ZIP payload from service
-            # - GET content is base64, so decode first and then read as a
-            #   ZipFile buffer.
-            # - `r_get.content` is `byte` type so it can be passed directly to
-            #   base64 decode.
-            state_dict = json.load(
-                zipfile.ZipFile(
-                    BytesIO(state_bytes),
-                    'r',
-                    IqrSession.STATE_ZIP_COMPRESSION
-                ).open(IqrSession.STATE_ZIP_FILENAME)
-            )
             r_get.close()
 
             # Wrap service state with our UI state: uploaded data elements.
@@ -251,17 +242,18 @@ class IqrSearch (SmqtkObject, flask.Flask, Configurable):
             for uid, workingElem in six.iteritems(sid_data_elems):
                 working_data[uid] = {
                     'content_type': workingElem.content_type(),
-                    'bytes_base64':
-                        base64.b64encode(workingElem.get_bytes()),
+                    'bytes_base64': base64.b64encode(
+                        workingElem.get_bytes()).decode('utf8'),
                 }
 
-            state_dict["working_data"] = working_data
-            state_json = json.dumps(state_dict)
-
-            z_wrapper_buffer = BytesIO()
-            z_wrapper = zipfile.ZipFile(z_wrapper_buffer, 'w',
+            # The service state package is a ZIP archive, so our UI state is
+            # appended to it as an additional member. The service's own
+            # members are passed through as-is.
+            z_wrapper_buffer = BytesIO(state_bytes)
+            z_wrapper = zipfile.ZipFile(z_wrapper_buffer, 'a',
                                         IqrSession.STATE_ZIP_COMPRESSION)
-            z_wrapper.writestr(IqrSession.STATE_ZIP_FILENAME, state_json)
+            z_wrapper.writestr(self.STATE_WORKING_DATA_FILENAME,
+                               json.dumps(working_data))
             z_wrapper.close()
 
             z_wrapper_buffer.seek(0)
@@ -297,14 +289,31 @@ class IqrSearch (SmqtkObject, flask.Flask, Configurable):
             upload_filepath = self.mod_upload.get_path_for_id(fid)
             self.mod_upload.clear_completed(fid)
 
-            # Load ZIP package back in, then remove the uploaded file.
+            # Load ZIP package back in, separating our UI state from the
+            # service state, then remove the uploaded file.
+            service_zip_buffer = BytesIO()
             try:
-                z = zipfile.ZipFile(
-                    upload_filepath,
-                    compression=IqrSession.STATE_ZIP_COMPRESSION
-                )
-                with z.open(IqrSession.STATE_ZIP_FILENAME) as f:
-                    state_dict = json.load(f)
+                z = zipfile.ZipFile(upload_filepath)
+                service_zip = zipfile.ZipFile(service_zip_buffer, 'w',
+                                              IqrSession.STATE_ZIP_COMPRESSION)
+                names = z.namelist()
+                if self.STATE_WORKING_DATA_FILENAME in names:
+                    working_data = json.loads(
+                        z.read(self.STATE_WORKING_DATA_FILENAME).decode()
+                    )
+                    for name in names:
+                        if name != self.STATE_WORKING_DATA_FILENAME:
+                            service_zip.writestr(name, z.read(name))
+                else:
+                    # Legacy package where UI state was merged into the
+                    # service's JSON state.
+                    state_dict = json.loads(
+                        z.read(IqrSession.STATE_ZIP_FILENAME).decode()
+                    )
+                    working_data = state_dict.pop('working_data')
+                    service_zip.writestr(IqrSession.STATE_ZIP_FILENAME,
+                                         json.dumps(state_dict))
+                service_zip.close()
                 z.close()
             finally:
                 os.remove(upload_filepath)
@@ -314,11 +323,8 @@ class IqrSearch (SmqtkObject, flask.Flask, Configurable):
             #
             # Reset this server's resources for an SID
             self.reset_session_local(sid)
-            # - Dictionary of data UUID (SHA1) to {'content_type': <str>,
-            #   'bytes_base64': <str>} dictionary.
-            #: :type: dict[str, dict]
-            working_data = state_dict['working_data']
-            del state_dict['working_data']
+            # - ``working_data`` is a dictionary of data UUID (SHA1) to
+            #   {'content_type': <str>, 'bytes_base64': <str>} dictionary.
             # - Write out base64-decoded files to session-specific work
             #   directory.
             # - Update self._iqr_example_data with DataFileElement instances
@@ -338,14 +344,8 @@ class IqrSearch (SmqtkObject, flask.Flask, Configurable):
                 self._iqr_example_data[sid][uuid_sha1] = data_elem
 
             #
-            # Re-package service state as a ZIP payload.
+            # Send the re-packaged service state ZIP payload.
             #
-            service_zip_buffer = BytesIO()
-            service_zip = zipfile.ZipFile(service_zip_buffer, 'w',
-                                          IqrSession.STATE_ZIP_COMPRESSION)
-            service_zip.writestr(IqrSession.STATE_ZIP_FILENAME,
-                                 json.dumps(state_dict))
-            service_zip.close()
             service_zip_base64 = \
                 base64.b64encode(service_zip_buffer.getvalue())
 
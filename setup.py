@@ -218,7 +218,13 @@ setuptools.setup(
             'train_itq = smqtk.bin.train_itq:main',
             'smqtk-make-train-test-sets = smqtk.bin.make_train_test_sets:main',
             'smqtk-nearest-neighbors = smqtk.bin.nearest_neighbors:main',
-            'smqtk-check-images = smqtk.bin.check_images:main'
+            'smqtk-check-images = smqtk.bin.check_images:main',
+            'smqtk-benchmark-plugin-discovery = \
+                smqtk.bin.benchmark_plugin_discovery:main',
+            'smqtk-benchmark-image-load = \
+                smqtk.bin.benchmark_image_load:main',
+            'smqtk-benchmark-nn-index = \
+                smqtk.bin.benchmark_nn_index:main',
         ],
     }
 )
@@ -2,6 +2,9 @@ import os
 
 import six
 
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
+
 
 # Centrally add the mock move
 # noinspection PyUnresolvedReferences
@@ -10,3 +13,24 @@ six.add_move(six.MovedModule('mock', 'mock', 'unittest.mock'))
 
 
 TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+def make_descriptors(vectors, offset=0):
+    """
+    Make in-memory descriptor elements of the "random" type for the given
+    vectors, with integer UUIDs counting up from ``offset``.
+
+    :param vectors: Iterable of descriptor vectors.
+    :type vectors: collections.Iterable[numpy.ndarray]
+
+    :param offset: UUID of the first descriptor.
+    :type offset: int
+
+    :rtype: list[smqtk.representation.DescriptorElement]
+    """
+    descriptors = []
+    for i, v in enumerate(vectors):
+        d = DescriptorMemoryElement('random', offset + i)
+        d.set_vector(v)
+        descriptors.append(d)
+    return descriptors
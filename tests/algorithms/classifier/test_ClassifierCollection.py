@@ -330,3 +330,51 @@ class TestClassifierCollection (unittest.TestCase):
         with self.assertRaises(MissingLabelError) as cm:
             ccol.classify(d, labels=['subjectA', 'subjectC', 'subjectD'])
         self.assertSetEqual(cm.exception.labels, {'subjectC', 'subjectD'})
+
+    def test_classify_elements(self):
+        ccol = ClassifierCollection({
+            'subjectA': DummyClassifier(),
+            'subjectB': DummyClassifier(),
+        })
+
+        d_list = [DescriptorMemoryElement('memory', str(i)).set_vector([i, 1])
+                  for i in range(3)]
+        results = ccol.classify_elements(d_list)
+
+        # One result dictionary per descriptor, in input order, containing an
+        # entry for each configured classifier.
+        self.assertEqual(len(results), 3)
+        for i, r in enumerate(results):
+            self.assertSetEqual(set(r), {'subjectA', 'subjectB'})
+            self.assertIsInstance(r['subjectA'], MemoryClassificationElement)
+            self.assertDictEqual(r['subjectA'].get_classification(),
+                                 {'test': i})
+            self.assertDictEqual(r['subjectB'].get_classification(),
+                                 {'test': i})
+
+    def test_classify_elements_subset(self):
+        ccol = ClassifierCollection({
+            'subjectA': DummyClassifier(),
+            'subjectB': DummyClassifier(),
+        })
+
+        classifierB = ccol._label_to_classifier['subjectB']
+        classifierB.classify_elements = mock.Mock()
+
+        d_list = [DescriptorMemoryElement('memory', str(i)).set_vector([i, 1])
+                  for i in range(3)]
+        results = ccol.classify_elements(d_list, labels=['subjectA'])
+
+        self.assertEqual(len(results), 3)
+        for r in results:
+            self.assertSetEqual(set(r), {'subjectA'})
+        classifierB.classify_elements.assert_not_called()
+
+    def test_classify_elements_missing_label(self):
+        ccol = ClassifierCollection({
+            'subjectA': DummyClassifier(),
+        })
+        d = DescriptorMemoryElement('memory', '0').set_vector([0, 1])
+        with self.assertRaises(MissingLabelError) as cm:
+            ccol.classify_elements([d], labels=['subjectA', 'subjectC'])
+        self.assertSetEqual(cm.exception.labels, {'subjectC'})
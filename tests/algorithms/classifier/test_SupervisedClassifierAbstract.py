@@ -81,3 +81,52 @@ class TestSupervisedClassifierAbstractClass (unittest.TestCase):
         # noinspection PyTypeChecker
         m = self.test_classifier.train(class_examples=input_class_examples)
         self.assertEqual(m, input_class_examples)
+
+    #
+    # Testing partial_train abstract function functionality.
+    #
+
+    def test_partial_train_not_supported(self):
+        # Default implementations do not support incremental training.
+        self.test_classifier.EXPECTED_HAS_MODEL = False
+        self.assertFalse(self.test_classifier.supports_partial_train())
+        self.assertRaises(
+            NotImplementedError,
+            self.test_classifier.partial_train,
+            {'label_1': [0], 'label_2': [1]}
+        )
+
+    def test_partial_train_noExamples(self):
+        inst = DummyPartialSupervisedClassifier()
+        inst.EXPECTED_HAS_MODEL = True
+        self.assertRaises(
+            ValueError,
+            inst.partial_train, {}
+        )
+
+    def test_partial_train_noModel_oneExample_classExamples(self):
+        # Initial training requires at least two classes.
+        inst = DummyPartialSupervisedClassifier()
+        inst.EXPECTED_HAS_MODEL = False
+        self.assertRaises(
+            ValueError,
+            inst.partial_train, {'label_1': [0, 1, 2]}
+        )
+
+    def test_partial_train_hasModel_oneExample_classExamples(self):
+        # Updating an existing model may be given only one class.
+        inst = DummyPartialSupervisedClassifier()
+        inst.EXPECTED_HAS_MODEL = True
+        input_class_examples = {'label_1': [0, 1, 2]}
+        # noinspection PyTypeChecker
+        m = inst.partial_train(input_class_examples)
+        self.assertEqual(m, input_class_examples)
+
+
+class DummyPartialSupervisedClassifier (DummySupervisedClassifier):
+
+    def supports_partial_train(self):
+        return True
+
+    def _partial_train(self, class_examples, **extra_params):
+        return class_examples
@@ -1,5 +1,6 @@
 import unittest
 
+import mock
 import numpy
 from six.moves import zip
 
@@ -22,6 +23,7 @@ class TestSklearnLogisticRegressionClassifier (unittest.TestCase):
             intercept_scaling=3, class_weight={0: 2.0, 1: 3.0},
             random_state=456, solver='liblinear', max_iter=99,
             multi_class='multinomial', verbose=1, warm_start=True, n_jobs=2,
+            max_retained_examples=100,
         )
         for inst_i in configuration_test_helper(inst): # type: SkLearnLogisticRegression
             assert inst.penalty == inst_i.penalty == 'l1'
@@ -37,6 +39,8 @@ class TestSklearnLogisticRegressionClassifier (unittest.TestCase):
             assert inst.verbose == inst_i.verbose == 1
             assert inst.warm_start is inst_i.warm_start is True
             assert inst.n_jobs == inst_i.n_jobs == 2
+            assert inst.max_retained_examples == \
+                inst_i.max_retained_examples == 100
 
     def test_simple_classification(self):
         """ Test simple train and classify setup. """
@@ -133,3 +137,87 @@ class TestSklearnLogisticRegressionClassifier (unittest.TestCase):
                 "Incorrect {} label: c_map={} :: test_vector={}".format(
                     LABEL_3, m, v
                 )
+
+    def test_partial_train(self):
+        """
+        Test that incremental training adds to the retained examples and
+        produces a model consistent with training over all examples.
+        """
+        numpy.random.seed(0)
+        POS_LABEL = 'positive'
+        NEG_LABEL = 'negative'
+
+        train1 = numpy.interp(numpy.random.rand(100), [0, 1], [0.0, .45])
+        train2 = numpy.interp(numpy.random.rand(100), [0, 1], [.55, 1.0])
+        elems1 = [DescriptorMemoryElement('test', i).set_vector([v])
+                  for i, v in enumerate(train1)]
+        elems2 = [DescriptorMemoryElement('test', i).set_vector([v])
+                  for i, v in enumerate(train2, start=len(elems1))]
+
+        classifier = SkLearnLogisticRegression(random_state=0,
+                                               solver='lbfgs',
+                                               max_retained_examples=None)
+        assert classifier.supports_partial_train()
+        # Initial partial training with no model trains a new model.
+        classifier.partial_train({
+            POS_LABEL: elems1[:50],
+            NEG_LABEL: elems2[:50],
+        })
+        assert classifier.has_model()
+        # Update with only positive examples.
+        classifier.partial_train({POS_LABEL: elems1[50:]})
+        assert classifier._train_vectors.shape == (150, 1)
+        assert len(classifier._train_labels) == 150
+        # Warm start setting restored after training.
+        assert classifier.warm_start is False
+
+        full = SkLearnLogisticRegression(random_state=0, solver='lbfgs')
+        full.train({
+            POS_LABEL: elems1[:50] + elems1[50:],
+            NEG_LABEL: elems2[:50],
+        })
+        test = numpy.linspace(0, 1, 11)[:, numpy.newaxis]
+        for m_partial, m_full in zip(classifier._classify_arrays(test),
+                                     full._classify_arrays(test)):
+            numpy.testing.assert_allclose(m_partial[POS_LABEL],
+                                          m_full[POS_LABEL], atol=1e-3)
+
+    def test_partial_train_retained_bounded(self):
+        """
+        Test that at most the maximum number of examples are retained, and
+        that by default none are and incremental training is not supported.
+        """
+        numpy.random.seed(0)
+        pos = [DescriptorMemoryElement('test', i).set_vector([v])
+               for i, v in enumerate(numpy.random.rand(30) * .45)]
+        neg = [DescriptorMemoryElement('test', i).set_vector([v])
+               for i, v in enumerate(numpy.random.rand(30) * .45 + .55,
+                                     start=len(pos))]
+
+        classifier = SkLearnLogisticRegression(random_state=0,
+                                               solver='lbfgs',
+                                               max_retained_examples=40)
+        classifier.train({'positive': pos[:20], 'negative': neg[:20]})
+        assert classifier._train_vectors.shape == (40, 1)
+        with mock.patch.object(SkLearnLogisticRegression, '_log') as m_log:
+            classifier.partial_train({'positive': pos[20:],
+                                      'negative': neg[20:]})
+            m_log.warning.assert_called_once()
+        assert classifier._train_vectors.shape == (40, 1)
+        assert len(classifier._train_labels) == 40
+        # Retained examples are a sample of those trained on.
+        trained = {float(d.vector()[0]): label
+                   for label, ds in [('positive', pos), ('negative', neg)]
+                   for d in ds}
+        for v, label in zip(classifier._train_vectors[:, 0],
+                            classifier._train_labels):
+            assert trained[float(v)] == label
+
+        classifier = SkLearnLogisticRegression(random_state=0,
+                                               solver='lbfgs')
+        assert classifier.get_config()['max_retained_examples'] == 0
+        classifier.train({'positive': pos, 'negative': neg})
+        assert classifier._train_vectors is None
+        assert not classifier.supports_partial_train()
+        self.assertRaises(RuntimeError, classifier.partial_train,
+                          {'positive': pos[:1]})
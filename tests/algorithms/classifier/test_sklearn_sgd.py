@@ -0,0 +1,110 @@
+import unittest
+
+import numpy
+from six.moves import zip
+
+from smqtk.algorithms.classifier.sklearn_sgd import SkLearnSGDClassifier
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
+from smqtk.utils.configuration import configuration_test_helper
+
+
+class TestSkLearnSGDClassifier (unittest.TestCase):
+    """
+    Tests for the SkLearnSGDClassifier plugin implementation.
+    """
+
+    POS_LABEL = 'positive'
+    NEG_LABEL = 'negative'
+
+    @classmethod
+    def _make_examples(cls, n, start=0):
+        """
+        Make 1-dimensional, linearly separable positive and negative example
+        descriptors.
+        """
+        pos = numpy.interp(numpy.random.rand(n), [0, 1], [0.0, .45])
+        neg = numpy.interp(numpy.random.rand(n), [0, 1], [.55, 1.0])
+        pos_e = [DescriptorMemoryElement('test', i).set_vector([v])
+                 for i, v in enumerate(pos, start=start)]
+        neg_e = [DescriptorMemoryElement('test', i).set_vector([v])
+                 for i, v in enumerate(neg, start=start + n)]
+        return pos_e, neg_e
+
+    def _assert_separates(self, classifier):
+        test_pos = numpy.linspace(0.0, .30, 10)[:, numpy.newaxis]
+        test_neg = numpy.linspace(.70, 1.0, 10)[:, numpy.newaxis]
+        for v, m in zip(test_pos, classifier._classify_arrays(test_pos)):
+            assert m[self.POS_LABEL] > m[self.NEG_LABEL], \
+                "Found false negative: {} :: {}".format(m, v)
+        for v, m in zip(test_neg, classifier._classify_arrays(test_neg)):
+            assert m[self.NEG_LABEL] > m[self.POS_LABEL], \
+                "Found false positive: {} :: {}".format(m, v)
+
+    def test_configuration(self):
+        """ Standard configuration test. """
+        inst = SkLearnSGDClassifier(
+            loss='modified_huber', penalty='l1', alpha=0.01,
+            fit_intercept=False, max_iter=99, tol=1e-4, random_state=456,
+            warm_start=True,
+        )
+        for inst_i in configuration_test_helper(inst):  # type: SkLearnSGDClassifier
+            assert inst.loss == inst_i.loss == 'modified_huber'
+            assert inst.penalty == inst_i.penalty == 'l1'
+            assert inst.alpha == inst_i.alpha == 0.01
+            assert inst.fit_intercept is inst_i.fit_intercept is False
+            assert inst.max_iter == inst_i.max_iter == 99
+            assert inst.tol == inst_i.tol == 1e-4
+            assert inst.random_state == inst_i.random_state == 456
+            assert inst.warm_start is inst_i.warm_start is True
+
+    def test_simple_classification(self):
+        """ Test simple train and classify setup. """
+        numpy.random.seed(0)
+        pos_e, neg_e = self._make_examples(500)
+        classifier = SkLearnSGDClassifier(loss='modified_huber',
+                                          alpha=1e-4, random_state=0)
+        classifier.train({
+            self.POS_LABEL: pos_e,
+            self.NEG_LABEL: neg_e,
+        })
+        assert sorted(classifier.get_labels()) == [self.NEG_LABEL,
+                                                   self.POS_LABEL]
+        self._assert_separates(classifier)
+
+    def test_classification_no_proba_loss(self):
+        """
+        Test that confidences are produced for a loss without probability
+        estimates.
+        """
+        numpy.random.seed(0)
+        pos_e, neg_e = self._make_examples(500)
+        classifier = SkLearnSGDClassifier(loss='hinge', alpha=1e-4,
+                                          random_state=0)
+        classifier.train({
+            self.POS_LABEL: pos_e,
+            self.NEG_LABEL: neg_e,
+        })
+        self._assert_separates(classifier)
+        for m in classifier._classify_arrays(numpy.array([[0.2], [0.9]])):
+            numpy.testing.assert_allclose(sum(m.values()), 1.0)
+
+    def test_partial_train(self):
+        """
+        Test training incrementally, where updates may contain examples of
+        only one class.
+        """
+        numpy.random.seed(0)
+        pos_e, neg_e = self._make_examples(500)
+        classifier = SkLearnSGDClassifier(loss='modified_huber',
+                                          alpha=1e-4, random_state=0)
+        assert classifier.supports_partial_train()
+        classifier.partial_train({
+            self.POS_LABEL: pos_e[:250],
+            self.NEG_LABEL: neg_e[:250],
+        })
+        assert classifier.has_model()
+        for _ in range(10):
+            classifier.partial_train({self.POS_LABEL: pos_e[250:]})
+            classifier.partial_train({self.NEG_LABEL: neg_e[250:]})
+        self._assert_separates(classifier)
@@ -57,6 +57,15 @@ class DummyDescriptorGenerator (DescriptorGenerator):
         self._post_iterator_check()
 
 
+def set_each_vector(descriptors, vectors):
+    """
+    Stand-in for ``DescriptorElement.set_many_vectors`` setting vectors one at
+    a time, as mock descriptor element types do not provide the batch hook.
+    """
+    for d, v in zip(descriptors, vectors):
+        d.set_vector(v)
+
+
 class TestDescriptorGeneratorAbstract (unittest.TestCase):
     """
     Create mock object (look up mock module?) to test abstract super-class
@@ -69,6 +78,10 @@ class TestDescriptorGeneratorAbstract (unittest.TestCase):
         self.inst = DummyDescriptorGenerator()
         self.inst.valid_content_types = mock.Mock(return_value={'image/png'})
         self.inst._post_iterator_check = mock.Mock()
+        patcher = mock.patch.object(DescriptorElement, 'set_many_vectors',
+                                    side_effect=set_each_vector)
+        self.m_set_many_vectors = patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_generate_arrays_invalid_type(self):
         """ Test that the raise-valid-element method catches an invalid input
@@ -383,6 +396,33 @@ class TestDescriptorGeneratorAbstract (unittest.TestCase):
         # Complete iteration should cause post-yield method to be called.
         self.inst._post_iterator_check.assert_called_once()
 
+    def test_generate_elements_set_batches(self):
+        """ Test that computed vectors are set in batches, yielding elements
+        in order once their batch is set. """
+        data_iter = []
+        for i in range(5):
+            data = mock.Mock(spec=smqtk.representation.DataElement)
+            data.uuid.return_value = i
+            data.content_type.return_value = 'image/png'
+            data_iter.append(data)
+        m_descr_elems = [mock.Mock(spec=DescriptorElement) for _ in range(5)]
+        # Element 1 already has a vector.
+        for i, e in enumerate(m_descr_elems):
+            e.has_vector.return_value = i == 1
+        m_fact = mock.MagicMock(spec=DescriptorElementFactory)
+        m_fact.new_descriptor.side_effect = \
+            lambda _, uuid: m_descr_elems[uuid]
+
+        actual_ret = list(
+            self.inst.generate_elements(data_iter, descr_factory=m_fact,
+                                        d_elem_batch=2)
+        )
+        assert actual_ret == m_descr_elems
+        assert self.m_set_many_vectors.call_args_list == [
+            mock.call([m_descr_elems[0], m_descr_elems[2]], [[0], [1]]),
+            mock.call([m_descr_elems[3], m_descr_elems[4]], [[2], [3]]),
+        ]
+
     def test_generate_one_array(self):
         """ Test that the one-array wrapper performs as expected.
         """
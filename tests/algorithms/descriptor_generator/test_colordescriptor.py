@@ -2,11 +2,15 @@ from __future__ import division, print_function
 import unittest
 
 import mock
+import numpy
 import pytest
 
 from smqtk.algorithms.descriptor_generator import DescriptorGenerator
 from smqtk.algorithms.descriptor_generator.colordescriptor.colordescriptor \
-    import ColorDescriptor_Image_csift  # arbitrary leaf class
+    import ColorDescriptor_Base
+# arbitrary leaf class
+from smqtk.algorithms.descriptor_generator.colordescriptor.colordescriptor \
+    import ColorDescriptor_Image_csift
 from smqtk.utils.configuration import configuration_test_helper
 
 
@@ -42,3 +46,162 @@ class TestColorDescriptor (unittest.TestCase):
             assert inst._rand_seed == 7
             assert inst._use_sp == True
             assert inst.parallel == 3
+
+
+class TestHikNearestCodes (unittest.TestCase):
+    """
+    Tests for direct histogram intersection quantization, which does not
+    require the colorDescriptor executable.
+    """
+
+    def setUp(self):
+        rs = numpy.random.RandomState(0)
+        self.descriptors = rs.rand(50, 8)
+        self.codebook = rs.rand(20, 8)
+        # Expected similarity of every descriptor to every code.
+        self.sim = numpy.array([
+            [numpy.minimum(d, c).sum() for c in self.codebook]
+            for d in self.descriptors
+        ])
+
+    def test_nearest_one(self):
+        idxs = ColorDescriptor_Base._hik_nearest_codes(self.descriptors,
+                                                       self.codebook)
+        assert idxs.shape == (50, 1)
+        numpy.testing.assert_equal(idxs[:, 0], self.sim.argmax(axis=1))
+
+    def test_nearest_many(self):
+        idxs = ColorDescriptor_Base._hik_nearest_codes(self.descriptors,
+                                                       self.codebook, k=5)
+        assert idxs.shape == (50, 5)
+        expected = numpy.argsort(self.sim, axis=1)[:, -5:]
+        for row, exp_row in zip(idxs, expected):
+            assert set(row) == set(exp_row)
+
+    def test_small_blocks(self):
+        # Blocks smaller than one descriptor's worth of values should still
+        # process one descriptor at a time.
+        idxs = ColorDescriptor_Base._hik_nearest_codes(
+            self.descriptors, self.codebook, k=3, block_elements=1
+        )
+        expected = ColorDescriptor_Base._hik_nearest_codes(
+            self.descriptors, self.codebook, k=3
+        )
+        for row, exp_row in zip(idxs, expected):
+            assert set(row) == set(exp_row)
+
+    def test_k_clamped_to_codebook(self):
+        idxs = ColorDescriptor_Base._hik_nearest_codes(self.descriptors,
+                                                       self.codebook, k=100)
+        assert idxs.shape == (50, 20)
+
+
+def _reference_sp_hist(positions, idxs, bins):
+    """
+    Spatial pyramid histograms computed region by region with
+    ``numpy.histogram``.
+    """
+    edges = numpy.arange(bins + 1)
+    x, y = positions[:, 0], positions[:, 1]
+    midx, midy = numpy.ceil(x.max() / 2), numpy.ceil(y.max() / 2)
+    ythird = numpy.ceil(y.max() / 3)
+    masks = [
+        numpy.ones(len(x), dtype=bool),
+        (x < midx) & (y < midy), (x >= midx) & (y < midy),
+        (x < midx) & (y >= midy), (x >= midx) & (y >= midy),
+        y <= ythird, (y > ythird) & (y <= 2 * ythird), y > 2 * ythird,
+    ]
+    return numpy.array([numpy.histogram(idxs[m], bins=edges)[0]
+                        for m in masks])
+
+
+class TestSpatialPyramidHistograms (unittest.TestCase):
+    """
+    Tests for batch histogram construction, which does not require the
+    colorDescriptor executable.
+    """
+
+    def setUp(self):
+        rs = numpy.random.RandomState(0)
+        self.bins = 16
+        self.positions = [rs.randint(0, 100, (n, 2)).astype(float)
+                          for n in (30, 0, 1, 57)]
+        self.idxs = [rs.randint(0, self.bins, (len(p), 3))
+                     for p in self.positions]
+
+    def test_build_sp_hists(self):
+        hists = ColorDescriptor_Base._build_sp_hists(self.positions,
+                                                     self.idxs, self.bins)
+        assert hists.shape == (4, 8, self.bins)
+        for p, i, h in zip(self.positions, self.idxs, hists):
+            if len(p):
+                numpy.testing.assert_equal(
+                    h, _reference_sp_hist(p, i, self.bins)
+                )
+            else:
+                assert not h.any()
+
+    def test_build_sp_hist_single(self):
+        feas = numpy.concatenate([self.positions[0], self.idxs[0]], axis=1)
+        numpy.testing.assert_equal(
+            ColorDescriptor_Base._build_sp_hist(feas, self.bins),
+            _reference_sp_hist(self.positions[0], self.idxs[0], self.bins)
+        )
+
+    def _mock_inst(self, use_sp):
+        m_inst = mock.MagicMock(spec=ColorDescriptor_Base)
+        m_inst._codebook = numpy.zeros((self.bins, 4))
+        m_inst._use_sp = use_sp
+        m_inst._build_sp_hists = ColorDescriptor_Base._build_sp_hists
+        return m_inst
+
+    def test_build_histograms(self):
+        idxs = [i[:, :1] for i in self.idxs]
+        vecs = ColorDescriptor_Base._build_histograms(
+            self._mock_inst(False), self.positions, idxs
+        )
+        assert len(vecs) == 4
+        for i, v in zip(idxs, vecs):
+            assert v.shape == (self.bins,)
+            if len(i):
+                numpy.testing.assert_allclose(
+                    v, numpy.bincount(i[:, 0], minlength=self.bins)
+                    / float(len(i))
+                )
+            else:
+                assert not v.any()
+
+    def test_build_histograms_spatial(self):
+        vecs = ColorDescriptor_Base._build_histograms(
+            self._mock_inst(True), self.positions, self.idxs
+        )
+        assert len(vecs) == 4
+        for p, v in zip(self.positions, vecs):
+            assert v.shape == (4 * self.bins,)
+            if len(p):
+                numpy.testing.assert_allclose(v.sum(), 1.)
+            else:
+                assert not v.any()
+
+
+class TestCodebookDigest (unittest.TestCase):
+    """
+    Tests for the codebook digest keying assignment checkpoints.
+    """
+
+    def _digest(self, codebook, metric='hik'):
+        m_inst = mock.MagicMock(spec=ColorDescriptor_Base)
+        m_inst._codebook = codebook
+        m_inst._codebook_digest = None
+        m_inst._flann_distance_metric = metric
+        return ColorDescriptor_Base._get_codebook_digest(m_inst)
+
+    def test_digest(self):
+        codebook = numpy.arange(12.).reshape(3, 4)
+        d = self._digest(codebook)
+        assert d == self._digest(codebook.copy())
+        # Another codebook, of another size, or metric gives another digest.
+        assert d != self._digest(codebook + 1)
+        assert d != self._digest(codebook[:2])
+        assert d != self._digest(codebook.reshape(4, 3))
+        assert d != self._digest(codebook, 'euclidean')
@@ -12,7 +12,9 @@ from six.moves import mock
 
 from smqtk.algorithms.image_io.gdal_io import (
     osgeo,
+    clear_vsimem_pool,
     get_gdal_driver_supported_mimetypes,
+    load_dataset_direct,
     load_dataset_tempfile,
     load_dataset_vsimem,
     GdalImageReader,
@@ -173,6 +175,91 @@ class TestGdalHelperFunctions (unittest.TestCase):
         e.clean_temp.assert_not_called()
         assert len(e._temp_filepath_stack) == 0
 
+    def test_load_dataset_direct_file(self):
+        """
+        Test that file elements are opened directly by their file path.
+        """
+        e = DataFileElement(GH_IMAGE_FP, readonly=True)
+        e.get_bytes = mock.MagicMock(wraps=e.get_bytes)
+
+        patcher_gdal_open = mock.patch(
+            'smqtk.algorithms.image_io.gdal_io.gdal.Open',
+            wraps=osgeo.gdal.Open,
+        )
+        self.addCleanup(patcher_gdal_open.stop)
+        m_gdal_open = patcher_gdal_open.start()
+
+        with load_dataset_direct(e) as gdal_ds:
+            m_gdal_open.assert_called_once_with(GH_IMAGE_FP)
+            assert gdal_ds.RasterXSize == 512
+            assert gdal_ds.RasterYSize == 600
+
+        # noinspection PyUnresolvedReferences
+        e.get_bytes.assert_not_called()
+        assert len(e._temp_filepath_stack) == 0
+
+    def test_load_dataset_direct_memory(self):
+        """
+        Test that non-file elements are loaded into pooled virtual files that
+        are reused between loads.
+        """
+        if LooseVersion(osgeo.__version__).version[0] < 2:
+            pytest.skip("Skipping VSIMEM test because GDAL version < 2")
+        self.addCleanup(clear_vsimem_pool)
+        clear_vsimem_pool()
+
+        e = DataMemoryElement(GH_FILE_ELEMENT.get_bytes(), 'image/png',
+                              readonly=True)
+        e.write_temp = mock.MagicMock(wraps=e.write_temp)
+
+        with load_dataset_direct(e) as gdal_ds:
+            ds_path = gdal_ds.GetDescription()
+            assert ds_path.startswith('/vsimem/')
+            assert gdal_ds.RasterXSize == 512
+            assert gdal_ds.RasterYSize == 600
+        del gdal_ds
+
+        # A smaller image loaded next reuses the same virtual file.
+        e2 = DataMemoryElement(GH_CROPPED_FILE_ELEMENT.get_bytes(),
+                               'image/png', readonly=True)
+        with load_dataset_direct(e2) as gdal_ds:
+            assert gdal_ds.GetDescription() == ds_path
+            assert gdal_ds.RasterXSize == 100
+            assert gdal_ds.RasterYSize == 100
+        del gdal_ds
+
+        # noinspection PyUnresolvedReferences
+        e.write_temp.assert_not_called()
+
+    def test_load_dataset_direct_memory_release(self):
+        """
+        Test that virtual files are only reused once their dataset is gone,
+        and are not pooled when they held too many bytes.
+        """
+        if LooseVersion(osgeo.__version__).version[0] < 2:
+            pytest.skip("Skipping VSIMEM test because GDAL version < 2")
+        self.addCleanup(clear_vsimem_pool)
+        clear_vsimem_pool()
+
+        e = DataMemoryElement(GH_FILE_ELEMENT.get_bytes(), 'image/png',
+                              readonly=True)
+        with load_dataset_direct(e) as gdal_ds:
+            ds_path = gdal_ds.GetDescription()
+        # The dataset is still referenced, so its virtual file is not reused.
+        with load_dataset_direct(e) as gdal_ds2:
+            assert gdal_ds2.GetDescription() != ds_path
+            assert gdal_ds.RasterXSize == 512
+        del gdal_ds, gdal_ds2
+        assert len(gdal_io._VSIMEM_POOL) == 2
+        clear_vsimem_pool()
+
+        with mock.patch.object(gdal_io, 'VSIMEM_POOL_MAX_BYTES', 16):
+            with load_dataset_direct(e) as gdal_ds:
+                ds_path = gdal_ds.GetDescription()
+            del gdal_ds
+        assert len(gdal_io._VSIMEM_POOL) == 0
+        assert osgeo.gdal.VSIStatL(ds_path) is None
+
     def test_possible_gdal_gci_values_caching(self):
         """
         Test that ``get_possible_gdal_gci_values`` caches correctly.
@@ -261,6 +348,23 @@ class TestGdalImageReader (unittest.TestCase):
         """
         GdalImageReader()
 
+    def test_init_default_load_method(self):
+        """
+        Test that the direct load method is used by default.
+        """
+        assert GdalImageReader()._load_method == \
+            GdalImageReader.LOAD_METHOD_DIRECT
+
+    def test_load_as_matrix_direct_memory_element(self):
+        """
+        Test that a non-file element loads the same image as its file.
+        """
+        e = DataMemoryElement(GH_FILE_ELEMENT.get_bytes(), 'image/png',
+                              readonly=True)
+        reader = GdalImageReader()
+        numpy.testing.assert_allclose(reader.load_as_matrix(e),
+                                      reader.load_as_matrix(GH_FILE_ELEMENT))
+
     def test_init_bad_load_method(self):
         """
         Test that passing a load_method string that is not one of the
@@ -629,3 +733,31 @@ class TestGdalImageReader (unittest.TestCase):
         assert mat_bgrggb.shape == (100, 100, 6)
         numpy.testing.assert_allclose(mat_bgrggb,
                                       mat_rgb[:, :, [2, 1, 0, 1, 1, 2]])
+
+    def test_get_image_size(self):
+        """
+        Test that the image size is read from the dataset.
+        """
+        assert GdalImageReader().get_image_size(GH_FILE_ELEMENT) == (512, 600)
+
+    def test_load_tiles(self):
+        """
+        Test that windowed tile reads match loading the same crop regions.
+        """
+        reader = GdalImageReader(channel_order='brg')
+        tiles = [GH_CROPPED_BBOX, AxisAlignedBoundingBox([0, 0], [512, 600])]
+        mats = list(reader.load_tiles(GH_FILE_ELEMENT, tiles))
+        assert len(mats) == 2
+        for t, m in zip(tiles, mats):
+            numpy.testing.assert_allclose(
+                m, reader.load_as_matrix(GH_FILE_ELEMENT, pixel_crop=t)
+            )
+
+    def test_load_tiles_not_in_bounds(self):
+        """
+        Test that an error is raised for tiles not within the image.
+        """
+        bb = AxisAlignedBoundingBox([400, 400], [513, 600])
+        with pytest.raises(RuntimeError,
+                           match=r"Tile provided not within input image\. "):
+            list(GdalImageReader().load_tiles(GH_FILE_ELEMENT, [bb]))
@@ -182,3 +182,69 @@ def test_load_as_matrix_success():
 
     m_reader._load_as_matrix.assert_called_once_with(m_elem,
                                                      pixel_crop=crop_bb)
+
+
+def test_get_image_size_property_shortcut():
+    """
+    Test that the size of the ``matrix`` property is used when present.
+    """
+    m_elem = MatrixDataElement(np.zeros((3, 5, 2)))
+    reader = DummyImageReader()
+    assert reader.get_image_size(m_elem) == (5, 3)
+
+
+def test_get_image_size_default():
+    """
+    Test that the default image size is that of the loaded image matrix.
+    """
+    m_elem = mock.MagicMock(spec_set=DataElement)
+    reader = DummyImageReader()
+    reader.raise_valid_element = mock.Mock()
+    reader._load_as_matrix = mock.Mock(return_value=np.zeros((3, 5)))
+    assert reader.get_image_size(m_elem) == (5, 3)
+    reader._load_as_matrix.assert_called_once_with(m_elem)
+
+
+def test_load_tiles_property_shortcut():
+    """
+    Test that tiles are cropped from the ``matrix`` property when present.
+    """
+    mat = np.arange(30).reshape(5, 6)
+    tiles = [AxisAlignedBoundingBox([0, 0], [2, 3]),
+             AxisAlignedBoundingBox([4, 2], [6, 5])]
+    reader = DummyImageReader()
+    ret = list(reader.load_tiles(MatrixDataElement(mat), tiles))
+    assert len(ret) == 2
+    np.testing.assert_equal(ret[0], mat[0:3, 0:2])
+    np.testing.assert_equal(ret[1], mat[2:5, 4:6])
+
+
+def test_load_tiles_default():
+    """
+    Test that the default ``_load_tiles`` loads the image matrix once.
+    """
+    mat = np.arange(30).reshape(5, 6)
+    tiles = [AxisAlignedBoundingBox([0, 0], [2, 3]),
+             AxisAlignedBoundingBox([1, 1], [6, 5])]
+    m_elem = mock.MagicMock(spec_set=DataElement)
+    reader = DummyImageReader()
+    reader.raise_valid_element = mock.Mock()
+    reader._load_as_matrix = mock.Mock(return_value=mat)
+    ret = list(reader.load_tiles(m_elem, tiles))
+    reader._load_as_matrix.assert_called_once_with(m_elem)
+    np.testing.assert_equal(ret[0], mat[0:3, 0:2])
+    np.testing.assert_equal(ret[1], mat[1:5, 1:6])
+
+
+def test_load_tiles_invalid():
+    """
+    Test that invalid tiles are rejected.
+    """
+    reader = DummyImageReader()
+    elem = MatrixDataElement(np.zeros((4, 4)))
+    with pytest.raises(ValueError, match=r"Volume of crop bounding box"):
+        list(reader.load_tiles(elem, [AxisAlignedBoundingBox([0, 0],
+                                                             [0, 0])]))
+    with pytest.raises(RuntimeError, match=r"Crop provided not within"):
+        list(reader.load_tiles(elem, [AxisAlignedBoundingBox([0, 0],
+                                                             [5, 5])]))
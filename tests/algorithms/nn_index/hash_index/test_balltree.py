@@ -18,11 +18,13 @@ class TestBallTreeHashIndex (unittest.TestCase):
 
     def test_default_configuration(self):
         c = SkLearnBallTreeHashIndex.get_default_config()
-        self.assertEqual(len(c), 3)
+        self.assertEqual(len(c), 5)
         self.assertIsInstance(c['cache_element'], dict)
         self.assertIsNone(c['cache_element']['type'])
         self.assertEqual(c['leaf_size'], 40)
         self.assertIsNone(c['random_seed'])
+        self.assertEqual(c['delta_merge_threshold'], 0)
+        self.assertFalse(c['delta_merge_background'])
 
     def test_init_without_cache(self):
         i = SkLearnBallTreeHashIndex(cache_element=None, leaf_size=52,
@@ -46,10 +48,12 @@ class TestBallTreeHashIndex (unittest.TestCase):
         bt = SkLearnBallTreeHashIndex()
         bt_c = bt.get_config()
 
-        self.assertEqual(len(bt_c), 3)
+        self.assertEqual(len(bt_c), 5)
         self.assertIn('cache_element', bt_c)
         self.assertIn('leaf_size', bt_c)
         self.assertIn('random_seed', bt_c)
+        self.assertIn('delta_merge_threshold', bt_c)
+        self.assertIn('delta_merge_background', bt_c)
 
         self.assertIsInstance(bt_c['cache_element'], dict)
         self.assertIsNone(bt_c['cache_element']['type'])
@@ -343,3 +347,99 @@ class TestBallTreeHashIndex (unittest.TestCase):
         self.assertIsNot(bt1.bt, bt2.bt)
         np.testing.assert_equal(bt2_neighbors, bt_neighbors)
         np.testing.assert_equal(bt2_dists, bt_dists)
+
+    def test_invalid_delta_merge_threshold(self):
+        self.assertRaises(ValueError, SkLearnBallTreeHashIndex,
+                          delta_merge_threshold=-1)
+
+    def _make_delta_inst(self, threshold=100, **kwargs):
+        bt = SkLearnBallTreeHashIndex(random_seed=0,
+                                      delta_merge_threshold=threshold,
+                                      **kwargs)
+        index = np.ndarray((100, 64), bool)
+        for i in range(100):
+            index[i] = int_to_bit_vector_large(i, 64)
+        bt.build_index(index)
+        return bt, index
+
+    def test_delta_update_buffers(self):
+        bt, index = self._make_delta_inst()
+        bt_data = np.copy(bt.bt.data)
+        new = [int_to_bit_vector_large(i, 64) for i in (200, 201)]
+        # Already indexed hashes are not added again.
+        bt.update_index(new + [index[0], new[0]])
+        self.assertEqual(bt.count(), 102)
+        np.testing.assert_array_equal(bt_data, np.asarray(bt.bt.data))
+
+        neighbors, dists = bt.nn(new[1], 1)
+        np.testing.assert_array_equal(neighbors, [new[1]])
+        np.testing.assert_array_equal(dists, [0.])
+
+    def test_delta_remove_tombstones(self):
+        bt, index = self._make_delta_inst()
+        bt.update_index([int_to_bit_vector_large(200, 64)])
+        bt.remove_from_index([index[42], int_to_bit_vector_large(200, 64)])
+        self.assertEqual(bt.count(), 99)
+        self.assertEqual(bt.bt.data.shape[0], 100)
+        # Removed hashes are not returned, nor can be removed again.
+        neighbors, _ = bt.nn(index[42], 100)
+        self.assertEqual(len(neighbors), 99)
+        self.assertNotIn(tuple(index[42]),
+                         set(tuple(r) for r in neighbors.tolist()))
+        self.assertRaises(KeyError, bt.remove_from_index, [index[42]])
+        # Removed hashes may be added back.
+        bt.update_index([index[42]])
+        neighbors, dists = bt.nn(index[42], 1)
+        np.testing.assert_array_equal(neighbors, [index[42]])
+        self.assertEqual(bt.count(), 100)
+
+    def test_delta_nn_matches_rebuilt(self):
+        bt, index = self._make_delta_inst()
+        new = np.random.randint(0, 2, 20 * 64).reshape(20, 64).astype(bool)
+        bt.update_index(new)
+        bt.remove_from_index(index[:10])
+        rebuilt = SkLearnBallTreeHashIndex(random_seed=0)
+        rebuilt.build_index(np.concatenate([index[10:], new]))
+
+        q = np.random.randint(0, 2, 64).astype(bool)
+        _, dists = bt.nn(q, 15)
+        _, r_dists = rebuilt.nn(q, 15)
+        np.testing.assert_array_almost_equal(dists, r_dists)
+
+    def test_delta_merge_threshold(self):
+        c = DataMemoryElement()
+        bt, index = self._make_delta_inst(threshold=3, cache_element=c)
+        bt.update_index([int_to_bit_vector_large(i, 64) for i in (200, 201)])
+        bt.remove_from_index([index[0]])
+        # Reaching the threshold rebuilds the ball tree with the changes.
+        self.assertEqual(bt._delta.num_changes, 0)
+        self.assertEqual(bt.bt.data.shape[0], 101)
+        self.assertEqual(bt.count(), 101)
+        # The merged model is saved.
+        self.assertEqual(SkLearnBallTreeHashIndex(c).count(), 101)
+
+    def test_delta_merge_background(self):
+        bt, index = self._make_delta_inst(threshold=2,
+                                          delta_merge_background=True)
+        bt.update_index([int_to_bit_vector_large(i, 64) for i in (200, 201)])
+        bt._merge_thread.join()
+        self.assertEqual(bt._delta.num_changes, 0)
+        self.assertEqual(bt.bt.data.shape[0], 102)
+
+    def test_delta_merge_keeps_later_changes(self):
+        bt, index = self._make_delta_inst()
+        bt.update_index([int_to_bit_vector_large(200, 64)])
+        bt.remove_from_index([index[0]])
+        snapshot = bt._delta.snapshot()
+        # Changes made while a merge is building a new ball tree.
+        bt.update_index([int_to_bit_vector_large(201, 64)])
+        bt.remove_from_index([int_to_bit_vector_large(200, 64)])
+        with mock.patch.object(bt._delta, 'snapshot',
+                               return_value=snapshot):
+            bt.merge_delta()
+        self.assertEqual(bt.bt.data.shape[0], 100)
+        self.assertEqual(bt.count(), 100)
+        hashes = set(tuple(r) for r in bt.nn(index[1], 100)[0].tolist())
+        self.assertIn(tuple(int_to_bit_vector_large(201, 64)), hashes)
+        self.assertNotIn(tuple(int_to_bit_vector_large(200, 64)), hashes)
+        self.assertNotIn(tuple(index[0]), hashes)
@@ -1,5 +1,6 @@
 from __future__ import absolute_import, division, print_function
 
+import json
 import random
 import unittest
 
@@ -9,11 +10,17 @@ import six
 from six.moves import range, zip
 
 from smqtk.algorithms import NearestNeighborsIndex
-from smqtk.algorithms.nn_index.faiss import FaissNearestNeighborsIndex
+from smqtk.algorithms.nn_index.faiss import (
+    FaissNearestNeighborsIndex,
+    _reservoir_update,
+)
 from smqtk.exceptions import ReadOnlyError
 from smqtk.representation.data_element.memory_element import (
     DataMemoryElement,
 )
+from smqtk.representation.descriptor_element.lazy_element import (
+    LazyDescriptorElement,
+)
 from smqtk.representation.descriptor_element.local_elements import (
     DescriptorMemoryElement,
 )
@@ -62,6 +69,7 @@ class TestFAISSIndex (unittest.TestCase):
             index_param_element=ex_index_param_elem,
             read_only=True, factory_string=u'some fact str',
             ivf_nprobe=88, use_gpu=False, gpu_id=99, random_seed=8,
+            train_sample_size=1000, build_chunk_size=100,
         )
         for inst in configuration_test_helper(i):
             assert isinstance(inst._descriptor_set, MemoryDescriptorSet)
@@ -76,6 +84,8 @@ class TestFAISSIndex (unittest.TestCase):
             assert inst._use_gpu is False
             assert inst._gpu_id == 99
             assert inst.random_seed == 8
+            assert inst.train_sample_size == 1000
+            assert inst.build_chunk_size == 100
 
     def test_init_invalid_nprobe(self):
         """
@@ -87,6 +97,12 @@ class TestFAISSIndex (unittest.TestCase):
         with pytest.raises(TypeError):
             self._make_inst(ivf_nprobe=None)
 
+    def test_init_invalid_build_sizes(self):
+        with pytest.raises(ValueError, match=r"train_sample_size must be"):
+            self._make_inst(train_sample_size=0)
+        with pytest.raises(ValueError, match=r"build_chunk_size must be"):
+            self._make_inst(build_chunk_size=0)
+
     def test_configuration_null_persistence(self):
         # Make configuration based on default
         c = FaissNearestNeighborsIndex.get_default_config()
@@ -374,6 +390,35 @@ class TestFAISSIndex (unittest.TestCase):
         self.assertEqual(len(nbrs), len(dists))
         self.assertEqual(len(nbrs), 10)
 
+    def test_build_index_chunked(self):
+        n = 1000
+        dim = 16
+        np.random.seed(self.RAND_SEED)
+        d_set = [DescriptorMemoryElement('test', i) for i in range(n)]
+        [d.set_vector(np.random.rand(dim)) for d in d_set]
+
+        index = self._make_inst(factory_string='IVF4,Flat', ivf_nprobe=4,
+                                train_sample_size=300, build_chunk_size=128)
+        index.build_index(d_set)
+        self.assertEqual(index.count(), n)
+        self.assertEqual(len(index._descriptor_set), n)
+        self.assertEqual(len(index._uid2idx_kvs), n)
+        self.assertEqual(len(index._idx2uid_kvs), n)
+        for uid in index._uid2idx_kvs.keys():
+            idx = index._uid2idx_kvs.get(uid)
+            self.assertEqual(index._idx2uid_kvs.get(idx), uid)
+
+        # Indexed descriptors are their own nearest neighbors.
+        for q in d_set[::100]:
+            n_elems, _ = index.nn(q)
+            self.assertEqual(n_elems[0], q)
+
+        # Rebuilding from an iterator over the index's own descriptor set
+        # consumes it before clearing the set.
+        index.build_index(index._descriptor_set.iterdescriptors())
+        self.assertEqual(index.count(), n)
+        self.assertEqual(len(index._descriptor_set), n)
+
     def test_nn_preprocess_index(self):
         faiss_index = self._make_inst(factory_string='PCAR64,IVF1,Flat')
         self.assertEqual(faiss_index.factory_string, 'PCAR64,IVF1,Flat')
@@ -419,6 +464,113 @@ class TestFAISSIndex (unittest.TestCase):
         for d in dists:
             self.assertEqual(d, 1.)
 
+    def test_exact_distances(self):
+        for fs, expected in [('IDMap,Flat', True),
+                             ('IVF256,Flat', True),
+                             ('HNSW32', True),
+                             ('IVF256,PQ8', False),
+                             ('OPQ8,IVF256,PQ8', False),
+                             ('PCAR64,IVF1,Flat', False),
+                             ('IVF256,SQ8', False),
+                             ('IVF256,PQ8,RFlat', True)]:
+            self.assertEqual(
+                self._make_inst(factory_string=fs).exact_distances(),
+                expected, fs
+            )
+
+    def test_nn_exact_lazy_elements(self):
+        np.random.seed(self.RAND_SEED)
+        d_set = [DescriptorMemoryElement('test', i).set_vector(v)
+                 for i, v in enumerate(np.random.rand(100, 8))]
+        index = self._make_inst()
+        index.build_index(d_set)
+
+        q = d_set[0]
+        r, dists = index.nn(q, n=10)
+        self.assertEqual(len(r), 10)
+        self.assertTrue(all(isinstance(e, LazyDescriptorElement) and
+                            not e.is_retrieved() for e in r))
+        self.assertEqual(r[0].uuid(), q.uuid())
+        # The type of the indexed descriptors is known without retrieval.
+        self.assertTrue(all(e.type() == 'test' and not e.is_retrieved()
+                            for e in r))
+        self.assertEqual(list(dists), sorted(dists))
+        # Distances are the exact distances to the returned descriptors.
+        np.testing.assert_allclose(
+            dists, [np.linalg.norm(e.vector() - q.vector()) for e in r],
+            atol=1e-5
+        )
+
+    def test_descriptor_type(self):
+        # The type of indexed descriptors is tracked across builds and
+        # updates, and persisted with the index parameters.
+        np.random.seed(self.RAND_SEED)
+        vectors = np.random.rand(120, 8)
+        d_set = [DescriptorMemoryElement('test', i).set_vector(v)
+                 for i, v in enumerate(vectors[:100])]
+        index_param_element = DataMemoryElement(content_type='text/plain')
+        index = self._make_inst(
+            index_element=DataMemoryElement(
+                content_type='application/octet-stream'),
+            index_param_element=index_param_element)
+        index.build_index(d_set)
+        self.assertEqual(index._descriptor_type, 'test')
+        index.update_index(
+            [DescriptorMemoryElement('test', 100).set_vector(vectors[100])])
+        self.assertEqual(index._descriptor_type, 'test')
+        self.assertEqual(
+            json.loads(index_param_element.get_bytes())['descriptor_type'],
+            'test')
+
+        # Descriptors of another type make the type unknown.
+        index.update_index(
+            [DescriptorMemoryElement('other', 101).set_vector(vectors[101])])
+        self.assertIsNone(index._descriptor_type)
+        r, _ = index.nn(d_set[0], n=5)
+        self.assertTrue(all(e.type() == 'test' for e in r))
+
+        # Chunked builds track the type over all chunks.
+        index = self._make_inst(build_chunk_size=30)
+        index.build_index(d_set)
+        self.assertEqual(index._descriptor_type, 'test')
+        index.build_index(
+            d_set + [DescriptorMemoryElement('other', 101)
+                     .set_vector(vectors[101])])
+        self.assertIsNone(index._descriptor_type)
+
+    def test_nn_reranked_sorted(self):
+        np.random.seed(self.RAND_SEED)
+        d_set = [DescriptorMemoryElement('test', i).set_vector(v)
+                 for i, v in enumerate(np.random.rand(1000, 8))]
+        index = self._make_inst(factory_string='IDMap,PQ4')
+        self.assertFalse(index.exact_distances())
+        index.build_index(d_set)
+
+        q = d_set[0]
+        r, dists = index.nn(q, n=20)
+        self.assertFalse(any(isinstance(e, LazyDescriptorElement)
+                             for e in r))
+        # Returned descriptors are ordered along with their distances.
+        self.assertEqual(list(dists), sorted(dists))
+        np.testing.assert_allclose(
+            dists, [np.linalg.norm(e.vector() - q.vector()) for e in r]
+        )
+
+    def test_nn_many_matches_nn(self):
+        np.random.seed(self.RAND_SEED)
+        d_set = [DescriptorMemoryElement('test', i).set_vector(v)
+                 for i, v in enumerate(np.random.rand(100, 8))]
+        for fs in ['IDMap,Flat', 'PCAR4,IVF1,Flat']:
+            index = self._make_inst(factory_string=fs)
+            index.build_index(d_set)
+            many = index.nn_many(d_set[:5], n=5)
+            self.assertEqual(len(many), 5)
+            for q, (r, dists) in zip(d_set[:5], many):
+                e_r, e_dists = index.nn(q, n=5)
+                self.assertEqual([e.uuid() for e in r],
+                                 [e.uuid() for e in e_r])
+                np.testing.assert_allclose(dists, e_dists)
+
     def test_nn_known_descriptors_nearest(self):
         dim = 5
 
@@ -526,3 +678,29 @@ class TestFAISSIndex (unittest.TestCase):
                                 ivf_nprobe=2)
         index.build_index(descr_elems)
         q_results, q_dists = index.nn(descr_elems[0], n=64)
+
+
+class TestReservoirUpdate (unittest.TestCase):
+
+    def test_fill_then_replace(self):
+        rng = np.random.RandomState(0)
+        sample = np.empty((10, 1))
+        n_seen = 0
+        for start in range(0, 100, 7):
+            data = np.arange(start, min(start + 7, 100))[:, np.newaxis]
+            n_seen = _reservoir_update(sample, n_seen, data, rng)
+        self.assertEqual(n_seen, 100)
+        # Sample rows are distinct rows of the input.
+        values = sample[:, 0]
+        self.assertEqual(len(set(values)), 10)
+        self.assertTrue(((values >= 0) & (values < 100)).all())
+        # Later rows were sampled, not just the first rows.
+        self.assertGreater(values.max(), 10)
+
+    def test_fewer_than_sample(self):
+        rng = np.random.RandomState(0)
+        sample = np.empty((10, 1))
+        n_seen = _reservoir_update(sample, 0, np.arange(4)[:, np.newaxis],
+                                   rng)
+        self.assertEqual(n_seen, 4)
+        np.testing.assert_array_equal(sample[:4, 0], np.arange(4))
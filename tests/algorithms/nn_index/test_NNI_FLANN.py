@@ -21,12 +21,13 @@ class TestFlannIndex (unittest.TestCase):
 
     RAND_SEED = 42
 
-    def _make_inst(self, dist_method):
+    def _make_inst(self, dist_method, **kwargs):
         """
         Make an instance of FlannNearestNeighborsIndex
         """
         return FlannNearestNeighborsIndex(distance_method=dist_method,
-                                          random_seed=self.RAND_SEED)
+                                          random_seed=self.RAND_SEED,
+                                          **kwargs)
 
     def test_impl_findable(self):
         # Already here because the implementation is reporting itself as
@@ -44,6 +45,7 @@ class TestFlannIndex (unittest.TestCase):
             parameters_uri=para_filepath,
             descriptor_cache_uri=descr_cache_fp,
             distance_method='hik', random_seed=42,
+            delta_merge_threshold=10, delta_merge_background=True,
         )
         for inst in configuration_test_helper(c):  # type: FlannNearestNeighborsIndex
             assert inst._index_uri == index_filepath
@@ -51,6 +53,15 @@ class TestFlannIndex (unittest.TestCase):
             assert inst._descr_cache_uri == descr_cache_fp
             assert inst._distance_method == 'hik'
             assert inst._rand_seed == 42
+            assert inst._delta_merge_threshold == 10
+            assert inst._delta_merge_background is True
+
+    def test_invalid_delta_merge_threshold(self):
+        self.assertRaises(ValueError, FlannNearestNeighborsIndex,
+                          delta_merge_threshold=-1)
+        # Distance method without a brute-force equivalent.
+        self.assertRaises(ValueError, FlannNearestNeighborsIndex,
+                          distance_method='kl', delta_merge_threshold=1)
 
     def test_has_model_data_no_uris(self):
         f = FlannNearestNeighborsIndex()
@@ -254,3 +265,76 @@ class TestFlannIndex (unittest.TestCase):
         self.assertGreater(len(f._index_elem.get_bytes()), 0)
         self.assertGreater(len(f._index_param_elem.get_bytes()), 0)
         self.assertGreater(len(f._descr_cache_elem.get_bytes()), 0)
+
+    def _make_ordered_descriptors(self, uuids):
+        descriptors = []
+        for j in uuids:
+            d = DescriptorMemoryElement('ordered', j)
+            d.set_vector(numpy.array([j, j*2], float))
+            descriptors.append(d)
+        return descriptors
+
+    def test_remove_from_index(self):
+        index = self._make_inst('euclidean')
+        index.build_index(self._make_ordered_descriptors(range(5)))
+        index.remove_from_index([1, 3])
+        self.assertEqual(sorted(d.uuid() for d in index._descr_cache),
+                         [0, 2, 4])
+        self.assertRaises(KeyError, index.remove_from_index, [1])
+
+    def test_delta_update_remove(self):
+        index = self._make_inst('euclidean', delta_merge_threshold=100)
+        index.build_index(self._make_ordered_descriptors(range(0, 10, 2)))
+        flann = index._flann
+        index.update_index(self._make_ordered_descriptors([3, 5]))
+        index.remove_from_index([4, 5])
+        # The FLANN index is not rebuilt until the threshold is reached.
+        self.assertIs(index._flann, flann)
+        self.assertEqual(index.count(), 5)
+        self.assertRaises(KeyError, index.remove_from_index, [4])
+
+        q = DescriptorMemoryElement('query', 99)
+        q.set_vector(numpy.array([0, 0], float))
+        r, dists = index.nn(q, 10)
+        self.assertEqual([d.uuid() for d in r], [0, 2, 3, 6, 8])
+        numpy.testing.assert_allclose(dists, [0, 20, 45, 180, 320])
+
+    def test_delta_update_replaces(self):
+        index = self._make_inst('euclidean', delta_merge_threshold=100)
+        index.build_index(self._make_ordered_descriptors(range(5)))
+        d = DescriptorMemoryElement('ordered', 4)
+        d.set_vector(numpy.array([0.5, 0], float))
+        index.update_index([d])
+        self.assertEqual(index.count(), 5)
+
+        q = DescriptorMemoryElement('query', 99)
+        q.set_vector(numpy.array([0, 0], float))
+        r, dists = index.nn(q, 5)
+        self.assertEqual([e.uuid() for e in r], [0, 4, 1, 2, 3])
+        numpy.testing.assert_allclose(dists, [0, 0.25, 5, 20, 45])
+
+    def test_delta_merge_threshold(self):
+        empty_data = 'base64://'
+        index = self._make_inst('hik', delta_merge_threshold=3,
+                                index_uri=empty_data,
+                                parameters_uri=empty_data,
+                                descriptor_cache_uri=empty_data)
+        index.build_index(self._make_ordered_descriptors(range(5)))
+        index.update_index(self._make_ordered_descriptors([5, 6]))
+        cache_bytes = index._descr_cache_elem.get_bytes()
+        index.remove_from_index([0])
+        # Reaching the threshold rebuilds the index with the changes.
+        self.assertEqual(index._delta.num_changes, 0)
+        self.assertEqual(sorted(d.uuid() for d in index._descr_cache),
+                         [1, 2, 3, 4, 5, 6])
+        self.assertNotEqual(index._descr_cache_elem.get_bytes(), cache_bytes)
+        self.assertEqual(index.count(), 6)
+
+    def test_delta_merge_background(self):
+        index = self._make_inst('euclidean', delta_merge_threshold=2,
+                                delta_merge_background=True)
+        index.build_index(self._make_ordered_descriptors(range(5)))
+        index.update_index(self._make_ordered_descriptors([5, 6]))
+        index._merge_thread.join()
+        self.assertEqual(index._delta.num_changes, 0)
+        self.assertEqual(len(index._descr_cache), 7)
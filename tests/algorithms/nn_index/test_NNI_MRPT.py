@@ -2,15 +2,21 @@ from __future__ import absolute_import, division, print_function
 
 import random
 import os.path as osp
+import shutil
+import tempfile
 import unittest
 
 import numpy as np
-from six.moves import range, zip
+from six.moves import cPickle as pickle, range, zip
 
 from smqtk.representation.descriptor_element.local_elements import \
     DescriptorMemoryElement
 from smqtk.algorithms import NearestNeighborsIndex
-from smqtk.algorithms.nn_index.mrpt import MRPTNearestNeighborsIndex
+from smqtk.algorithms.nn_index.mrpt import (
+    MRPTNearestNeighborsIndex,
+    _build_tree,
+    _leaf_indices,
+)
 from smqtk.exceptions import ReadOnlyError
 from smqtk.representation.descriptor_set.memory import MemoryDescriptorSet
 from smqtk.utils.configuration import configuration_test_helper
@@ -20,14 +26,15 @@ class TestMRPTIndex (unittest.TestCase):
 
     RAND_SEED = 42
 
-    def _make_inst(self, **kwargs):
+    def _make_inst(self, descriptor_set=None, **kwargs):
         """
         Make an instance of MRPTNearestNeighborsIndex
         """
         if 'random_seed' not in kwargs:
             kwargs.update(random_seed=self.RAND_SEED)
-        return MRPTNearestNeighborsIndex(
-            MemoryDescriptorSet(), **kwargs)
+        if descriptor_set is None:
+            descriptor_set = MemoryDescriptorSet()
+        return MRPTNearestNeighborsIndex(descriptor_set, **kwargs)
 
     def test_impl_findable(self):
         self.assertIn(MRPTNearestNeighborsIndex,
@@ -42,6 +49,7 @@ class TestMRPTIndex (unittest.TestCase):
             index_filepath=index_filepath, parameters_filepath=para_filepath,
             read_only=True, num_trees=9, depth=2, random_seed=8,
             pickle_protocol=0, use_multiprocessing=True,
+            vectors_filepath=index_filepath + '.npy', vote_threshold=2,
         )
         for inst in configuration_test_helper(i):  # type: MRPTNearestNeighborsIndex
             assert isinstance(inst._descriptor_set, MemoryDescriptorSet)
@@ -53,6 +61,11 @@ class TestMRPTIndex (unittest.TestCase):
             assert inst._rand_seed == 8
             assert inst._pickle_protocol == 0
             assert inst._use_multiprocessing == True
+            assert inst._vectors_filepath == index_filepath + '.npy'
+            assert inst._vote_threshold == 2
+
+    def test_init_invalid_vote_threshold(self):
+        self.assertRaises(ValueError, self._make_inst, vote_threshold=0)
 
     def test_read_only(self):
         v = np.zeros(5, float)
@@ -333,3 +346,145 @@ class TestMRPTIndex (unittest.TestCase):
         for j, d, dist in zip(range(i), r, dists):
             self.assertEqual(d.uuid(), j)
             np.testing.assert_equal(d.vector(), [j, j*2])
+
+    def _random_descriptors(self, n=200, dim=8):
+        np.random.seed(self.RAND_SEED)
+        return [DescriptorMemoryElement('test', i).set_vector(v)
+                for i, v in enumerate(np.random.rand(n, dim))]
+
+    def test_nn_many_matches_nn(self):
+        d_set = self._random_descriptors()
+        index = self._make_inst(num_trees=5, depth=3)
+        index.build_index(d_set)
+        many = index.nn_many(d_set[:10], n=5)
+        self.assertEqual(len(many), 10)
+        for q, (r, dists) in zip(d_set[:10], many):
+            e_r, e_dists = index.nn(q, n=5)
+            self.assertEqual([d.uuid() for d in r], [d.uuid() for d in e_r])
+            np.testing.assert_allclose(dists, e_dists)
+            self.assertEqual(r[0], q)
+            self.assertEqual(list(dists), sorted(dists))
+
+    def test_vote_threshold(self):
+        d_set = self._random_descriptors()
+        index = self._make_inst(num_trees=5, depth=2)
+        index.build_index(d_set)
+        n_union = len(index.nn(d_set[0], n=200)[0])
+
+        index._vote_threshold = 5
+        r, _ = index.nn(d_set[0], n=200)
+        # Candidates are in the query leaf of every tree, so include the
+        # query itself.
+        self.assertLessEqual(len(r), n_union)
+        self.assertIn(d_set[0], r)
+
+    def test_native_dtype(self):
+        # Single precision vectors are indexed and projected without being
+        # upcast.
+        np.random.seed(self.RAND_SEED)
+        d_set = [DescriptorMemoryElement('test', i, dtype='float32')
+                 .set_vector(v)
+                 for i, v in enumerate(np.random.rand(200, 8))]
+        index = self._make_inst(num_trees=5, depth=3)
+        index.build_index(d_set)
+        self.assertEqual(index._vectors.dtype, np.float32)
+        self.assertEqual(index._random_bases.dtype, np.float32)
+        r, dists = index.nn(d_set[0], n=5)
+        self.assertEqual(r[0], d_set[0])
+        self.assertEqual(dists[0], 0)
+
+    def test_persistence_memmap(self):
+        d_set = self._random_descriptors()
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            kwargs = dict(index_filepath=osp.join(tmp_dir, 'index'),
+                          parameters_filepath=osp.join(tmp_dir, 'params'),
+                          vectors_filepath=osp.join(tmp_dir, 'vectors.npy'),
+                          num_trees=5, depth=3)
+            descr_set = MemoryDescriptorSet()
+            index = self._make_inst(descriptor_set=descr_set, **kwargs)
+            index.build_index(d_set)
+            self.assertIsInstance(index._vectors, np.memmap)
+            expected = index.nn(d_set[0], n=10)
+
+            index2 = self._make_inst(descriptor_set=descr_set, **kwargs)
+            self.assertIsInstance(index2._vectors, np.memmap)
+            self.assertEqual(index2.nn(d_set[0], n=10), expected)
+
+            # Without a vectors file, vectors are gathered from the
+            # descriptor set.
+            del kwargs['vectors_filepath']
+            index3 = self._make_inst(descriptor_set=descr_set, **kwargs)
+            self.assertNotIsInstance(index3._vectors, np.memmap)
+            self.assertEqual(index3.nn(d_set[0], n=10), expected)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_load_legacy_trees(self):
+        d_set = self._random_descriptors()
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            kwargs = dict(index_filepath=osp.join(tmp_dir, 'index'),
+                          parameters_filepath=osp.join(tmp_dir, 'params'),
+                          num_trees=5, depth=3)
+            descr_set = MemoryDescriptorSet()
+            index = self._make_inst(descriptor_set=descr_set, **kwargs)
+            index.build_index(d_set)
+            expected = index.nn(d_set[0], n=10)
+
+            # Re-write the index as a list of trees with UID leaves.
+            trees = []
+            for t in range(5):
+                offsets = index._leaf_offsets[t]
+                rows = index._leaf_rows[t]
+                trees.append({
+                    'random_basis': index._random_bases[t],
+                    'splits': index._splits[t],
+                    'leaves': [[index._uuids[r]
+                                for r in rows[offsets[i]:offsets[i + 1]]]
+                               for i in range(len(offsets) - 1)],
+                })
+            with open(kwargs['index_filepath'], 'wb') as f:
+                pickle.dump(trees, f)
+
+            index2 = self._make_inst(descriptor_set=descr_set, **kwargs)
+            self.assertEqual(index2.nn(d_set[0], n=10), expected)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+
+class TestMRPTTrees (unittest.TestCase):
+
+    def test_build_tree(self):
+        np.random.seed(0)
+        depth = 3
+        proj = np.random.randn(101, depth)
+        splits, rows, offsets = _build_tree(proj, depth)
+        self.assertEqual(splits.shape, (7,))
+        self.assertEqual(offsets.shape, (9,))
+        self.assertEqual(offsets[0], 0)
+        self.assertEqual(offsets[-1], 101)
+        # Rows are a permutation of the dataset rows.
+        np.testing.assert_array_equal(np.sort(rows), np.arange(101))
+        # Leaves are balanced.
+        self.assertLessEqual(np.ptp(np.diff(offsets)), 1)
+
+        # Traversing each row's projection leads to the leaf containing it.
+        leaves = _leaf_indices(proj[:, np.newaxis, :], splits[np.newaxis],
+                               depth)[:, 0]
+        for leaf in range(8):
+            leaf_rows = rows[offsets[leaf]:offsets[leaf + 1]]
+            np.testing.assert_array_equal(leaves[leaf_rows], leaf)
+
+    def test_build_tree_empty_leaves(self):
+        # Fewer rows than leaves leaves some leaves empty, while keeping
+        # leaf offsets aligned with the tree.
+        proj = np.random.randn(3, 3)
+        splits, rows, offsets = _build_tree(proj, 3)
+        self.assertEqual(offsets.shape, (9,))
+        self.assertEqual(offsets[-1], 3)
+        leaves = _leaf_indices(proj[:, np.newaxis, :], splits[np.newaxis],
+                               3)[:, 0]
+        for leaf in range(8):
+            leaf_rows = rows[offsets[leaf]:offsets[leaf + 1]]
+            np.testing.assert_array_equal(leaves[leaf_rows], leaf)
@@ -284,3 +284,36 @@ class TestNNIndexAbstract (unittest.TestCase):
         q = DescriptorMemoryElement('q', 0)
         q.set_vector(numpy.random.rand(4))
         self.assertRaises(ValueError, index.nn, q)
+
+    def test_nn_many_no_vector(self):
+        # nn_many should fail if any query descriptor has no vector.
+        index = DummySI()
+        index.count = mock.MagicMock(return_value=1)
+        index._nn = mock.MagicMock()
+        q1 = DescriptorMemoryElement('q', 0).set_vector(numpy.random.rand(4))
+        q2 = DescriptorMemoryElement('q', 1)
+        self.assertRaises(ValueError, index.nn_many, [q1, q2])
+        index._nn.assert_not_called()
+
+    def test_nn_many_empty_index(self):
+        index = DummySI()
+        index._nn = mock.MagicMock()
+        q = DescriptorMemoryElement('q', 0).set_vector(numpy.random.rand(4))
+        self.assertRaises(ValueError, index.nn_many, [q])
+        index._nn.assert_not_called()
+
+    def test_nn_many_no_queries(self):
+        index = DummySI()
+        self.assertEqual(index.nn_many([]), [])
+
+    def test_nn_many_default_impl(self):
+        # The default batch implementation should call ``_nn`` per query,
+        # returning results in query order.
+        index = DummySI()
+        index.count = mock.MagicMock(return_value=1)
+        index._nn = mock.MagicMock(side_effect=lambda d, n: ((d,), (n,)))
+        qs = [DescriptorMemoryElement('q', i).set_vector(numpy.random.rand(4))
+              for i in range(3)]
+        r = index.nn_many(iter(qs), n=2)
+        self.assertEqual(r, [((q,), (2,)) for q in qs])
+        self.assertEqual(index._nn.call_count, 3)
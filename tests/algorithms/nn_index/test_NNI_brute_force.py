@@ -0,0 +1,212 @@
+from __future__ import division, print_function
+
+import os.path as osp
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+from six.moves import mock
+
+from smqtk.algorithms import NearestNeighborsIndex
+from smqtk.algorithms.nn_index.brute_force import (
+    BruteForceNearestNeighborsIndex,
+    _merge_top_k,
+)
+from smqtk.exceptions import ReadOnlyError
+from smqtk.representation.descriptor_set.memory import MemoryDescriptorSet
+from smqtk.utils import metrics
+from smqtk.utils.configuration import configuration_test_helper
+
+from tests import make_descriptors
+
+
+class TestBruteForceIndex (unittest.TestCase):
+
+    METRICS = {
+        'euclidean': metrics.euclidean_distance,
+        'cosine': metrics.cosine_distance,
+        'hik': metrics.histogram_intersection_distance,
+    }
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+
+    def _make_inst(self, descriptor_set=None, **kwargs):
+        if descriptor_set is None:
+            descriptor_set = MemoryDescriptorSet()
+        return BruteForceNearestNeighborsIndex(descriptor_set, **kwargs)
+
+    def test_impl_findable(self):
+        self.assertIn(BruteForceNearestNeighborsIndex,
+                      NearestNeighborsIndex.get_impls())
+
+    def test_configuration(self):
+        index_filepath = osp.abspath(osp.expanduser('index_filepath'))
+        i = BruteForceNearestNeighborsIndex(
+            descriptor_set=MemoryDescriptorSet(),
+            index_filepath=index_filepath,
+            vectors_filepath=index_filepath + '.npy',
+            distance_method='hik', block_size=100, cores=2, read_only=True,
+            pickle_protocol=0,
+        )
+        for inst in configuration_test_helper(i):  # type: BruteForceNearestNeighborsIndex
+            assert isinstance(inst._descriptor_set, MemoryDescriptorSet)
+            assert inst._index_filepath == index_filepath
+            assert inst._vectors_filepath == index_filepath + '.npy'
+            assert inst._distance_method == 'hik'
+            assert inst._block_size == 100
+            assert inst._cores == 2
+            assert inst._read_only is True
+            assert inst._pickle_protocol == 0
+
+    def test_init_invalid(self):
+        self.assertRaises(ValueError, self._make_inst,
+                          distance_method='other')
+        self.assertRaises(ValueError, self._make_inst, block_size=0)
+
+    def test_read_only(self):
+        index = self._make_inst(read_only=True)
+        self.assertRaises(ReadOnlyError, index.build_index,
+                          make_descriptors(self.rng.rand(2, 4)))
+
+    def _check_exact(self, distance_method, block_size):
+        vectors = self.rng.rand(100, 8)
+        queries = self.rng.rand(5, 8)
+        index = self._make_inst(distance_method=distance_method,
+                                block_size=block_size)
+        index.build_index(make_descriptors(vectors))
+        self.assertEqual(index.count(), 100)
+
+        dist_func = self.METRICS[distance_method]
+        results = index.nn_many(make_descriptors(queries), 7)
+        for q, (neighbors, dists) in zip(queries, results):
+            expected = np.array([dist_func(q, v) for v in vectors])
+            order = np.argsort(expected)[:7]
+            self.assertEqual([d.uuid() for d in neighbors], order.tolist())
+            # Vectors are stored as float32.
+            np.testing.assert_allclose(dists, expected[order], atol=1e-3)
+
+    def test_nn_exact_euclidean(self):
+        self._check_exact('euclidean', 16384)
+
+    def test_nn_exact_cosine(self):
+        self._check_exact('cosine', 16384)
+
+    def test_nn_exact_hik(self):
+        self._check_exact('hik', 16384)
+
+    def test_nn_exact_blocks(self):
+        # Results of multiple blocks are merged.
+        self._check_exact('euclidean', 7)
+
+    def test_nn_more_than_indexed(self):
+        index = self._make_inst()
+        index.build_index(make_descriptors(self.rng.rand(3, 4)))
+        q = make_descriptors(self.rng.rand(1, 4))[0]
+        neighbors, dists = index.nn(q, 10)
+        self.assertEqual(len(neighbors), 3)
+        self.assertEqual(len(dists), 3)
+
+    def test_update_index(self):
+        index = self._make_inst()
+        index.update_index(make_descriptors(np.zeros((2, 4))))
+        # Replaces descriptor 1 and adds descriptor 2.
+        index.update_index(make_descriptors(np.ones((2, 4)), offset=1))
+        self.assertEqual(index.count(), 3)
+        self.assertEqual(index._descriptor_set.count(), 3)
+        q = make_descriptors(np.ones((1, 4)))[0]
+        neighbors, dists = index.nn(q, 3)
+        self.assertEqual(sorted(d.uuid() for d in neighbors[:2]), [1, 2])
+        np.testing.assert_allclose(dists, [0, 0, 2])
+
+    def test_update_index_appends(self):
+        # Updates only append new rows and norms, reusing the indexed ones.
+        vectors = self.rng.rand(20, 4)
+        index = self._make_inst()
+        index.build_index(make_descriptors(vectors[:10]))
+        with mock.patch.object(index, '_set_model') as m_set_model:
+            index.update_index(make_descriptors(vectors[10:15], offset=10))
+            buffers = index._buffers
+            index.update_index(make_descriptors(vectors[15:20], offset=15))
+        m_set_model.assert_not_called()
+        # The second update fits in the rows allocated by the first.
+        self.assertIs(index._buffers, buffers)
+        self.assertIs(index._vectors.base, buffers[0])
+        self.assertEqual(index.count(), 20)
+        np.testing.assert_allclose(index._vectors, vectors, rtol=1e-6)
+        np.testing.assert_allclose(index._sq_norms,
+                                   (vectors ** 2).sum(1), rtol=1e-5)
+        neighbors, _ = index.nn(make_descriptors(vectors[17:18])[0], 1)
+        self.assertEqual(neighbors[0].uuid(), 17)
+
+    def test_update_index_replaces_copy(self):
+        # Replacing rows copies the matrix so that a search in progress with
+        # the previous matrix is not affected.
+        vectors = self.rng.rand(10, 4)
+        index = self._make_inst()
+        index.build_index(make_descriptors(vectors))
+        index.update_index(make_descriptors(vectors[:1], offset=10))
+        old_vectors, old_sq_norms = index._vectors, index._sq_norms
+        index.update_index(make_descriptors(np.zeros((1, 4)), offset=3))
+        np.testing.assert_allclose(old_vectors[3], vectors[3], rtol=1e-6)
+        np.testing.assert_allclose(old_sq_norms[3], (vectors[3] ** 2).sum(),
+                                   rtol=1e-5)
+        np.testing.assert_array_equal(index._vectors[3], np.zeros(4))
+        self.assertEqual(index._sq_norms[3], 0)
+        self.assertEqual(index.count(), 11)
+
+    def test_remove_from_index(self):
+        index = self._make_inst()
+        index.build_index(make_descriptors(np.arange(10)[:, None]
+                                           .repeat(2, 1)))
+        self.assertRaises(KeyError, index.remove_from_index, [3, 10])
+        self.assertEqual(index.count(), 10)
+        index.remove_from_index([0, 3])
+        self.assertEqual(index.count(), 8)
+        q = make_descriptors(np.zeros((1, 2)))[0]
+        neighbors, _ = index.nn(q, 3)
+        self.assertEqual([d.uuid() for d in neighbors], [1, 2, 4])
+        index.remove_from_index([1, 2, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(index.count(), 0)
+
+    def test_persistence(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            index_fp = osp.join(tempdir, 'index.pickle')
+            vectors_fp = osp.join(tempdir, 'vectors.npy')
+            vectors = self.rng.rand(20, 4)
+            index = self._make_inst(index_filepath=index_fp,
+                                    vectors_filepath=vectors_fp)
+            index.build_index(make_descriptors(vectors))
+            self.assertIsInstance(index._vectors, np.memmap)
+            q = make_descriptors(self.rng.rand(1, 4))[0]
+            expected = index.nn(q, 5)
+
+            # Loaded with memory-mapped vectors.
+            index2 = self._make_inst(index._descriptor_set,
+                                     index_filepath=index_fp,
+                                     vectors_filepath=vectors_fp)
+            self.assertIsInstance(index2._vectors, np.memmap)
+            self.assertEqual(index2.nn(q, 5), expected)
+
+            # Loaded with vectors from the descriptor set.
+            index3 = self._make_inst(index._descriptor_set,
+                                     index_filepath=index_fp)
+            self.assertNotIsInstance(index3._vectors, np.memmap)
+            self.assertEqual(index3.nn(q, 5), expected)
+        finally:
+            shutil.rmtree(tempdir)
+
+
+class TestMergeTopK (unittest.TestCase):
+
+    def test_merge_top_k(self):
+        rows = np.array([[5, 6, 7, 8], [1, 2, 3, 4]])
+        dists = np.array([[4., 3., 2., 1.], [0., 2., 1., 3.]])
+        r, d = _merge_top_k(rows, dists, 2)
+        np.testing.assert_array_equal(r, [[8, 7], [1, 3]])
+        np.testing.assert_array_equal(d, [[1., 2.], [0., 1.]])
+        # Fewer candidates than k are all returned, sorted.
+        r, d = _merge_top_k(rows, dists, 10)
+        np.testing.assert_array_equal(r[1], [1, 3, 2, 4])
@@ -0,0 +1,161 @@
+from __future__ import division, print_function
+
+import os.path as osp
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from smqtk.algorithms import NearestNeighborsIndex
+from smqtk.algorithms.nn_index.pq import PQNearestNeighborsIndex
+from smqtk.exceptions import ReadOnlyError
+from smqtk.representation.descriptor_set.memory import MemoryDescriptorSet
+from smqtk.utils.configuration import configuration_test_helper
+
+from tests import make_descriptors
+
+
+class TestPQIndex (unittest.TestCase):
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+        self.vectors = self.rng.rand(200, 8)
+        self.queries = self.rng.rand(5, 8)
+
+    def _make_inst(self, descriptor_set=None, **kwargs):
+        if descriptor_set is None:
+            descriptor_set = MemoryDescriptorSet()
+        kwargs.setdefault('num_subspaces', 4)
+        kwargs.setdefault('num_centroids', 16)
+        kwargs.setdefault('random_seed', 0)
+        return PQNearestNeighborsIndex(descriptor_set, **kwargs)
+
+    def test_impl_findable(self):
+        self.assertIn(PQNearestNeighborsIndex,
+                      NearestNeighborsIndex.get_impls())
+
+    def test_configuration(self):
+        index_filepath = osp.abspath(osp.expanduser('index_filepath'))
+        i = PQNearestNeighborsIndex(
+            descriptor_set=MemoryDescriptorSet(),
+            index_filepath=index_filepath,
+            quantizer_filepath=index_filepath + '.npz',
+            num_subspaces=16, num_centroids=64, num_iterations=5,
+            train_sample_size=1000, rerank_factor=4, block_size=100,
+            random_seed=3, read_only=True, pickle_protocol=0,
+        )
+        for inst in configuration_test_helper(i):  # type: PQNearestNeighborsIndex
+            assert isinstance(inst._descriptor_set, MemoryDescriptorSet)
+            assert inst._index_filepath == index_filepath
+            assert inst._quantizer_filepath == index_filepath + '.npz'
+            assert inst._num_subspaces == 16
+            assert inst._num_centroids == 64
+            assert inst._num_iterations == 5
+            assert inst._train_sample_size == 1000
+            assert inst._rerank_factor == 4
+            assert inst._block_size == 100
+            assert inst._random_seed == 3
+            assert inst._read_only is True
+            assert inst._pickle_protocol == 0
+
+    def test_init_invalid(self):
+        self.assertRaises(ValueError, self._make_inst, num_subspaces=0)
+        self.assertRaises(ValueError, self._make_inst, num_centroids=300)
+        self.assertRaises(ValueError, self._make_inst, rerank_factor=-1)
+        self.assertRaises(ValueError, self._make_inst, block_size=0)
+
+    def test_read_only(self):
+        index = self._make_inst(read_only=True)
+        self.assertRaises(ReadOnlyError, index.build_index,
+                          make_descriptors(self.vectors))
+
+    def test_nn_approximate(self):
+        # Small blocks, merged across.
+        index = self._make_inst(block_size=30)
+        index.build_index(make_descriptors(self.vectors))
+        self.assertEqual(index.count(), 200)
+        pq = index._pq
+        decoded = pq.decode(pq.encode(self.vectors))
+        for q, (neighbors, dists) in zip(
+                self.queries,
+                index.nn_many(make_descriptors(self.queries), 5)):
+            # Neighbors by distance to the decoded vectors.
+            expected = np.sqrt(((decoded - q) ** 2).sum(1))
+            np.testing.assert_allclose(
+                dists, np.sort(expected)[:5], atol=1e-4)
+            np.testing.assert_allclose(
+                expected[[d.uuid() for d in neighbors]], dists, atol=1e-4)
+
+    def test_nn_rerank(self):
+        # Re-ranking all indexed vectors is exact.
+        index = self._make_inst(rerank_factor=40)
+        index.build_index(make_descriptors(self.vectors))
+        for q, (neighbors, dists) in zip(
+                self.queries,
+                index.nn_many(make_descriptors(self.queries), 5)):
+            expected = np.sqrt(((self.vectors - q) ** 2).sum(1))
+            order = np.argsort(expected)[:5]
+            self.assertEqual([d.uuid() for d in neighbors], order.tolist())
+            np.testing.assert_allclose(dists, expected[order])
+
+    def test_nn_more_than_indexed(self):
+        index = self._make_inst(rerank_factor=2)
+        index.build_index(make_descriptors(self.vectors[:20]))
+        neighbors, dists = index.nn(make_descriptors(self.queries)[0], 30)
+        self.assertEqual(len(neighbors), 20)
+        self.assertEqual(len(dists), 20)
+
+    def test_build_too_few(self):
+        index = self._make_inst()
+        self.assertRaises(ValueError, index.build_index,
+                          make_descriptors(self.vectors[:10]))
+
+    def test_update_index(self):
+        index = self._make_inst(rerank_factor=10)
+        index.build_index(make_descriptors(self.vectors))
+        # Replaces descriptor 199 and adds descriptor 200.
+        index.update_index(make_descriptors(np.ones((2, 8)) * 2,
+                                            offset=199))
+        self.assertEqual(index.count(), 201)
+        self.assertEqual(index._descriptor_set.count(), 201)
+        q = make_descriptors(np.ones((1, 8)) * 2)[0]
+        neighbors, dists = index.nn(q, 2)
+        self.assertEqual(sorted(d.uuid() for d in neighbors), [199, 200])
+        np.testing.assert_allclose(dists, [0, 0])
+
+    def test_remove_from_index(self):
+        index = self._make_inst(rerank_factor=10)
+        index.build_index(make_descriptors(self.vectors))
+        self.assertRaises(KeyError, index.remove_from_index, [3, 200])
+        self.assertEqual(index.count(), 200)
+        q = make_descriptors(self.vectors[3:4])[0]
+        self.assertEqual(index.nn(q, 1)[0][0].uuid(), 3)
+        index.remove_from_index([0, 3])
+        self.assertEqual(index.count(), 198)
+        self.assertNotEqual(index.nn(q, 1)[0][0].uuid(), 3)
+
+    def test_persistence(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            index_fp = osp.join(tempdir, 'index.pickle')
+            quantizer_fp = osp.join(tempdir, 'pq.npz')
+            index = self._make_inst(index_filepath=index_fp,
+                                    quantizer_filepath=quantizer_fp)
+            index.build_index(make_descriptors(self.vectors))
+            self.assertTrue(osp.isfile(quantizer_fp))
+            q = make_descriptors(self.queries)[0]
+            expected = index.nn(q, 5)
+
+            index2 = self._make_inst(index._descriptor_set,
+                                     index_filepath=index_fp)
+            self.assertEqual(index2.nn(q, 5), expected)
+
+            # Rebuilding reuses the saved quantizer.
+            index3 = self._make_inst(quantizer_filepath=quantizer_fp,
+                                     random_seed=1)
+            index3.build_index(make_descriptors(self.vectors))
+            np.testing.assert_array_equal(index3._pq.centroids,
+                                          index._pq.centroids)
+        finally:
+            shutil.rmtree(tempdir)
@@ -1,7 +1,9 @@
-from six.moves import mock
+import numpy
+from six.moves import mock, range
 
 from smqtk.algorithms import ImageReader, ImageMatrixObjectDetector
-from smqtk.representation import DataElement
+from smqtk.representation import AxisAlignedBoundingBox, DataElement
+from smqtk.representation.data_element.matrix import MatrixDataElement
 
 
 @mock.patch('smqtk.algorithms.object_detection._interface'
@@ -130,3 +132,111 @@ def test_detect_objects():
     m_image_reader.load_as_matrix.assert_called_once_with(expected_de)
     m_inst._detect_objects_matrix.assert_called_once_with(expected_load_mat)
     assert actual_dom_ret == m_inst._detect_objects_matrix()
+
+
+class StubBatchIMOD (ImageMatrixObjectDetector):
+    """
+    CPU stand-in for a detector that processes whole batches of image
+    matrices at once, yielding one whole-image detection per matrix.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        return True
+
+    def get_config(self):
+        return super(StubBatchIMOD, self).get_config()
+
+    def _detect_objects_matrix(self, mat):
+        raise NotImplementedError("Expected batch processing only.")
+
+    def _detect_objects_matrices(self, mats):
+        # Stand-in for a single batched forward pass.
+        stack = numpy.stack(mats)
+        scores = stack.reshape(len(mats), -1).mean(axis=1)
+        for mat, s in zip(mats, scores):
+            yield [(AxisAlignedBoundingBox([0, 0], mat.shape[1::-1]),
+                    {'mean': float(s)})]
+
+
+def test_detect_objects_many_matrices():
+    """
+    Test that ``detect_objects_many`` loads image matrices through the image
+    reader and passes whole batches to ``_detect_objects_matrices``.
+    """
+    mats = [numpy.full((4, 6), i, dtype=float) for i in range(5)]
+    des = []
+    for i in range(5):
+        de = mock.MagicMock(spec=DataElement)
+        de.uuid.return_value = i
+        des.append(de)
+    mat_map = dict(zip(map(id, des), mats))
+
+    m_image_reader = mock.MagicMock(spec=ImageReader)
+    m_image_reader.load_as_matrix.side_effect = lambda d: mat_map[id(d)]
+    inst = StubBatchIMOD(m_image_reader)
+
+    with mock.patch.object(inst, '_detect_objects_matrices',
+                           wraps=inst._detect_objects_matrices) as m_dom:
+        results = list(inst.detect_objects_many(des, batch_size=3))
+
+    assert m_dom.call_count == 2
+    assert [len(c[0][0]) for c in m_dom.call_args_list] == [3, 2]
+    assert m_image_reader.load_as_matrix.call_count == 5
+    assert len(results) == 5
+    for i, dets in enumerate(results):
+        assert len(dets) == 1
+        bbox, ce = dets[0].get_detection()
+        assert bbox == AxisAlignedBoundingBox([0, 0], [6, 4])
+        assert ce.get_classification() == {'mean': float(i)}
+
+
+def test_detect_objects_matrices_default():
+    """
+    Test that the default ``_detect_objects_matrices`` calls
+    ``_detect_objects_matrix`` for each matrix.
+    """
+    m_inst = mock.MagicMock(spec=ImageMatrixObjectDetector)
+    m_inst._detect_objects_matrix.side_effect = lambda m: [m]
+    ret = list(ImageMatrixObjectDetector._detect_objects_matrices(
+        m_inst, ['a', 'b']
+    ))
+    assert ret == [['a'], ['b']]
+    assert m_inst._detect_objects_matrix.call_count == 2
+
+
+def test_detect_objects_tiled():
+    """
+    Test that tiled detection passes batches of tile matrices to
+    ``_detect_objects_matrices`` and returns detections in whole image
+    coordinates.
+    """
+    mat = numpy.arange(24, dtype=float).reshape(4, 6)
+    de = MatrixDataElement(mat)
+
+    m_image_reader = mock.MagicMock(spec=ImageReader)
+    m_image_reader.get_image_size.return_value = (6, 4)
+    m_image_reader.load_tiles.side_effect = \
+        lambda d, tiles: (mat[t.min_vertex[1]:t.max_vertex[1],
+                              t.min_vertex[0]:t.max_vertex[0]]
+                          for t in tiles)
+    inst = StubBatchIMOD(m_image_reader)
+
+    with mock.patch.object(inst, '_detect_objects_matrices',
+                           wraps=inst._detect_objects_matrices) as m_dom:
+        dets = list(inst.detect_objects_tiled(de, 4, 4, overlap=2,
+                                              batch_size=1))
+
+    # Tiles start at x = 0 and 2 along the single row.
+    assert m_dom.call_count == 2
+    assert [d.get_bbox() for d in dets] == [
+        AxisAlignedBoundingBox([0, 0], [4, 4]),
+        AxisAlignedBoundingBox([2, 0], [6, 4]),
+    ]
+    assert dets[0].get_classification().get_classification() == \
+        {'mean': mat[:, 0:4].mean()}
+    assert dets[1].get_classification().get_classification() == \
+        {'mean': mat[:, 2:6].mean()}
+    assert dets[0].uuid == ImageMatrixObjectDetector._gen_detection_uuid(
+        str(de.uuid()), dets[0].get_bbox(), ['mean']
+    )
@@ -1,3 +1,4 @@
+import pytest
 from six.moves import mock, range
 
 from smqtk.algorithms.object_detection import ObjectDetector
@@ -97,3 +98,95 @@ def test_detect_objects():
     assert dets_list[0].get_detection()[1].get_classification() == t_det1[1]
     assert dets_list[1].get_detection()[0] == t_det2[0]
     assert dets_list[1].get_detection()[1].get_classification() == t_det2[1]
+
+
+class StubDetector (ObjectDetector):
+    """
+    Stub detector yielding a fixed number of detections per data element,
+    with bounding boxes offset by the element's UUID.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        return True
+
+    def __init__(self, n_dets=2):
+        super(StubDetector, self).__init__()
+        self.n_dets = n_dets
+
+    def get_config(self):
+        return {'n_dets': self.n_dets}
+
+    def valid_content_types(self):
+        return {'text/plain'}
+
+    def is_valid_element(self, data_element):
+        return True
+
+    def _detect_objects(self, data):
+        o = int(data.uuid())
+        for i in range(self.n_dets):
+            yield (AxisAlignedBoundingBox([o, i], [o + 1, i + 1]),
+                   {'l%d' % i: 1.})
+
+
+def _make_data_elements(n):
+    des = []
+    for i in range(n):
+        de = mock.MagicMock(spec=DataElement)
+        de.uuid.return_value = i
+        des.append(de)
+    return des
+
+
+def test_detect_objects_many():
+    """
+    Test that ``detect_objects_many`` yields the same detections, per input
+    element, as ``detect_objects``.
+    """
+    inst = StubDetector()
+    des = _make_data_elements(5)
+
+    many = list(inst.detect_objects_many(des, batch_size=2))
+    assert len(many) == len(des)
+    for de, dets in zip(des, many):
+        expected = list(inst.detect_objects(de))
+        assert [d.uuid for d in dets] == [d.uuid for d in expected]
+        for d, e in zip(dets, expected):
+            assert d.get_bbox() == e.get_bbox()
+            assert d.get_classification().get_classification() == \
+                e.get_classification().get_classification()
+
+
+def test_detect_objects_many_batches():
+    """
+    Test that data elements are passed to ``_detect_objects_many`` in
+    batches of at most the given size.
+    """
+    inst = StubDetector(n_dets=0)
+    des = _make_data_elements(5)
+    with mock.patch.object(inst, '_detect_objects_many',
+                           wraps=inst._detect_objects_many) as m_dom:
+        many = list(inst.detect_objects_many(des, batch_size=2))
+    assert many == [[]] * 5
+    assert [c[0][0] for c in m_dom.call_args_list] == \
+        [des[0:2], des[2:4], des[4:5]]
+
+
+def test_detect_objects_many_invalid_batch_size():
+    """
+    Test that a batch size less than 1 is rejected.
+    """
+    with pytest.raises(ValueError):
+        list(StubDetector().detect_objects_many([], batch_size=0))
+
+
+def test_detect_objects_many_results_mismatch():
+    """
+    Test that an implementation not producing results for each element of a
+    batch raises an IndexError.
+    """
+    inst = StubDetector()
+    with mock.patch.object(inst, '_detect_objects_many', return_value=[]):
+        with pytest.raises(IndexError):
+            list(inst.detect_objects_many(_make_data_elements(2)))
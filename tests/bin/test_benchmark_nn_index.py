@@ -0,0 +1,62 @@
+from __future__ import division, print_function
+
+import unittest
+
+import numpy
+
+from smqtk.bin.benchmark_nn_index import exact_neighbors, pairwise_distances
+
+
+def naive_distance(a, b, metric):
+    """ Distance between two vectors, one pair of components at a time. """
+    if metric == 'euclidean':
+        return sum((x - y) ** 2 for x, y in zip(a, b))
+    elif metric == 'cosine':
+        return 1. - (sum(x * y for x, y in zip(a, b)) /
+                     (sum(x * x for x in a) ** .5 *
+                      sum(y * y for y in b) ** .5))
+    elif metric == 'hik':
+        return 1. - sum(min(x, y) for x, y in zip(a, b))
+
+
+class TestBenchmarkNNIndex (unittest.TestCase):
+
+    METRICS = ('euclidean', 'cosine', 'hik')
+
+    def setUp(self):
+        self.rng = numpy.random.RandomState(0)
+        self.vectors = self.rng.rand(50, 6)
+        self.queries = self.rng.rand(4, 6)
+
+    def test_pairwise_distances(self):
+        for metric in self.METRICS:
+            d = pairwise_distances(self.queries, self.vectors, metric)
+            self.assertEqual(d.shape, (4, 50))
+            expected = [[naive_distance(q, v, metric) for v in self.vectors]
+                        for q in self.queries]
+            numpy.testing.assert_allclose(d, expected, atol=1e-12)
+
+    def test_pairwise_distances_invalid_metric(self):
+        self.assertRaises(ValueError, pairwise_distances,
+                          self.queries, self.vectors, 'other')
+
+    def test_exact_neighbors(self):
+        for metric in self.METRICS:
+            for block_size in (7, 50, 4096):
+                nn = exact_neighbors(self.vectors, self.queries, 5, metric,
+                                     block_size)
+                self.assertEqual(nn.shape, (4, 5))
+                for q, q_nn in zip(self.queries, nn):
+                    expected = sorted(
+                        range(len(self.vectors)),
+                        key=lambda i: naive_distance(q, self.vectors[i],
+                                                     metric)
+                    )[:5]
+                    self.assertEqual(set(q_nn), set(expected))
+
+    def test_exact_neighbors_k_exceeds_vectors(self):
+        nn = exact_neighbors(self.vectors[:3], self.queries, 5, 'euclidean',
+                             block_size=2)
+        self.assertEqual(nn.shape, (4, 3))
+        for q_nn in nn:
+            self.assertEqual(sorted(q_nn), [0, 1, 2])
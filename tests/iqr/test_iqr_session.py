@@ -1,8 +1,14 @@
+import io
+import json
+import zipfile
+
+import numpy
 import pytest
 from six.moves import mock
 
 from smqtk.algorithms import RelevancyIndex
 from smqtk.iqr import IqrSession
+from smqtk.representation import DescriptorElementFactory
 from smqtk.representation.descriptor_element.local_elements \
     import DescriptorMemoryElement
 
@@ -765,6 +771,118 @@ class TestIqrSession (object):
         assert iqrs._ordered_neg is None
         assert iqrs._ordered_non_adj is None
 
+    def _make_state_session(self):
+        """ Make a session with descriptors in every adjudication group. """
+        iqrs = IqrSession()
+        iqrs.adjudicate(
+            new_positives=[DescriptorMemoryElement('t', 0).set_vector([0, 1]),
+                           DescriptorMemoryElement('t', 1).set_vector([1, 2])],
+            new_negatives=[DescriptorMemoryElement('t', 2).set_vector([2, 3])]
+        )
+        iqrs.external_descriptors(
+            positive=[DescriptorMemoryElement('t', 3).set_vector([3, 4])],
+            negative=[DescriptorMemoryElement('t', 4).set_vector([4, 5])]
+        )
+        return iqrs
+
+    @staticmethod
+    def _uid_vec_set(d_set):
+        return {(d.uuid(), tuple(d.vector())) for d in d_set}
+
+    def _assert_same_state(self, iqrs_a, iqrs_b):
+        for attr in ('positive_descriptors', 'negative_descriptors',
+                     'external_positive_descriptors',
+                     'external_negative_descriptors'):
+            assert self._uid_vec_set(getattr(iqrs_a, attr)) == \
+                self._uid_vec_set(getattr(iqrs_b, attr))
+
+    def test_state_bytes_round_trip(self):
+        """
+        Test that state bytes produced by a session restore the same
+        adjudication state in another session.
+        """
+        iqrs = self._make_state_session()
+        factory = DescriptorElementFactory(DescriptorMemoryElement, {})
+        for compress in (True, False):
+            b = iqrs.get_state_bytes(compress=compress)
+            z = zipfile.ZipFile(io.BytesIO(b))
+            assert set(z.namelist()) == {IqrSession.STATE_MANIFEST_FILENAME,
+                                         IqrSession.STATE_MATRIX_FILENAME}
+            iqrs2 = IqrSession()
+            iqrs2.set_state_bytes(b, factory)
+            self._assert_same_state(iqrs, iqrs2)
+
+    def test_state_bytes_binary_matrix(self):
+        """
+        Test that vectors are stored once per unique descriptor as a single
+        binary matrix aligned to the manifest.
+        """
+        iqrs = self._make_state_session()
+        z = zipfile.ZipFile(io.BytesIO(iqrs.get_state_bytes()))
+        manifest = json.loads(
+            z.read(IqrSession.STATE_MANIFEST_FILENAME).decode())
+        mat = numpy.load(io.BytesIO(z.read(IqrSession.STATE_MATRIX_FILENAME)))
+        assert manifest['version'] == IqrSession.STATE_VERSION
+        assert mat.shape == (5, 2)
+        for (uid, type_str), row in zip(manifest['descriptors'], mat):
+            assert type_str == 't'
+            numpy.testing.assert_equal(row, [uid, uid + 1])
+
+    def test_state_bytes_empty_session(self):
+        """ Test that an empty session state round-trips. """
+        factory = DescriptorElementFactory(DescriptorMemoryElement, {})
+        iqrs = IqrSession()
+        iqrs.set_state_bytes(IqrSession().get_state_bytes(), factory)
+        assert iqrs.positive_descriptors == set()
+        assert iqrs.external_negative_descriptors == set()
+
+    def test_set_state_bytes_legacy_format(self):
+        """
+        Test that state bytes in the legacy zipped JSON format can still be
+        loaded.
+        """
+        z_buffer = io.BytesIO()
+        z = zipfile.ZipFile(z_buffer, 'w', IqrSession.STATE_ZIP_COMPRESSION)
+        z.writestr(IqrSession.STATE_ZIP_FILENAME, json.dumps({
+            'pos': [[0, 't', [0, 1]], [1, 't', [1, 2]]],
+            'neg': [[2, 't', [2, 3]]],
+            'external_pos': [[3, 't', [3, 4]]],
+            'external_neg': [[4, 't', [4, 5]]],
+        }))
+        z.close()
+
+        iqrs = IqrSession()
+        iqrs.set_state_bytes(
+            z_buffer.getvalue(),
+            DescriptorElementFactory(DescriptorMemoryElement, {})
+        )
+        self._assert_same_state(self._make_state_session(), iqrs)
+
+    def test_set_state_bytes_invalid(self):
+        """ Test that unrecognized bytes raise a ValueError. """
+        factory = DescriptorElementFactory(DescriptorMemoryElement, {})
+        with pytest.raises(ValueError):
+            IqrSession().set_state_bytes(b'not a zip', factory)
+
+        z_buffer = io.BytesIO()
+        z = zipfile.ZipFile(z_buffer, 'w')
+        z.writestr('something_else.txt', 'foo')
+        z.close()
+        with pytest.raises(ValueError):
+            IqrSession().set_state_bytes(z_buffer.getvalue(), factory)
+
+    def test_set_state_bytes_existing_mismatch(self):
+        """
+        Test that loading a state whose vector disagrees with an already
+        stored vector of the same UUID raises a ValueError.
+        """
+        b = self._make_state_session().get_state_bytes()
+        m_factory = mock.MagicMock(spec=DescriptorElementFactory)
+        m_factory.new_descriptor.side_effect = \
+            lambda t, u: DescriptorMemoryElement(t, u).set_vector([-1, -1])
+        with pytest.raises(ValueError, match="vectors did not match"):
+            IqrSession().set_state_bytes(b, m_factory)
+
 
 class TestIqrSessionBehavior (object):
     """
@@ -378,3 +378,24 @@ class TestDataElementAbstract (unittest.TestCase):
         # reflect new byte content.
         self.assertNotEqual(de.uuid(), EXPECTED_UUID)
         self.assertEqual(de.uuid(), new_expected_uuid)
+
+    def test_prefetch_default(self):
+        # Default prefetch should do nothing and leave content accessible.
+        de = DummyDataElement()
+        DummyDataElement.prefetch([de])
+        self.assertEqual(de.get_bytes(), EXPECTED_BYTES)
+
+    def test_prefetch_groups_by_type(self):
+        # noinspection PyAbstractClass
+        class OtherDataElement (DummyDataElement):
+            pass
+
+        d1, d2 = DummyDataElement(), DummyDataElement()
+        o1 = OtherDataElement()
+        with mock.patch.object(DummyDataElement, '_prefetch') as m_d_pf, \
+                mock.patch.object(OtherDataElement, '_prefetch') as m_o_pf:
+            smqtk.representation.data_element.DataElement.prefetch(
+                [d1, o1, d2]
+            )
+        m_d_pf.assert_called_once_with([d1, d2])
+        m_o_pf.assert_called_once_with([o1])
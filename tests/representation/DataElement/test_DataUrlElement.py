@@ -19,6 +19,27 @@ except requests.ConnectionError:
     internet_available = False
 
 
+def make_response(status_code=200, headers=None, content=b''):
+    """ Make a simulated response with the given status, headers and
+    content. """
+    r = requests.Response()
+    r.status_code = status_code
+    r.headers.update(headers or {})
+    r._content = content
+    return r
+
+
+def mock_session(head_headers=None, get_response=None):
+    """ Make a mock session whose HEAD requests succeed with the given
+    headers and whose GET requests return the given response. """
+    s = mock.MagicMock()
+    s.head.return_value = make_response(headers=head_headers)
+    if get_response is None:
+        get_response = make_response()
+    s.get.return_value = get_response
+    return s
+
+
 class TestDataUrlElement (unittest.TestCase):
     """
 
@@ -32,13 +53,17 @@ class TestDataUrlElement (unittest.TestCase):
         'https://data.kitware.com/api/v1/file/5820bbeb8d777f10f26efc2f/download'
     EXAMPLE_PTH = os.path.join(TEST_DATA_DIR, 'Lenna.png')
 
+    def setUp(self):
+        DataUrlElement.CONTENT_CACHE.clear()
+
     def test_is_usable(self):
         # Should always be available, because local/intranet networks are a
         # thing.
         self.assertTrue(DataUrlElement.is_usable())
 
-    @mock.patch('smqtk.representation.data_element.url_element.requests.get')
-    def test_configuration(self, m_req_get):
+    @mock.patch('smqtk.representation.data_element.url_element.get_session',
+                new=mock_session)
+    def test_configuration(self):
         # Mocking requests usage to no actually head into the network.
         inst = DataUrlElement(self.EXAMPLE_URL)
         for i in configuration_test_helper(inst):  # type: DataUrlElement
@@ -103,15 +128,17 @@ class TestDataUrlElement (unittest.TestCase):
             'ftp://www.kitware.com'
         )
 
-    @mock.patch('smqtk.representation.data_element.url_element.requests.get')
-    def test_is_empty_zero_bytes(self, _m_requests_get):
+    @mock.patch('smqtk.representation.data_element.url_element.get_session',
+                new=mock_session)
+    def test_is_empty_zero_bytes(self):
         e = DataUrlElement('some-address')
         # simulate no content bytes returned
         e.get_bytes = mock.MagicMock(return_value='')
         self.assertTrue(e.is_empty())
 
-    @mock.patch('smqtk.representation.data_element.url_element.requests.get')
-    def test_is_empty_nonzero_bytes(self, _m_requests_get):
+    @mock.patch('smqtk.representation.data_element.url_element.get_session',
+                new=mock_session)
+    def test_is_empty_nonzero_bytes(self):
         e = DataUrlElement('some-address')
         # simulate some content bytes returned
         e.get_bytes = mock.MagicMock(return_value='some bytes returned')
@@ -123,14 +150,13 @@ class TestDataUrlElement (unittest.TestCase):
         self.assertEqual(e.get_bytes(), open(self.EXAMPLE_PTH, 'rb').read())
         self.assertEqual(e.content_type(), 'image/png')
 
-    @mock.patch('smqtk.representation.data_element.url_element.requests.get')
-    def test_get_bytes_404_return_code(self, m_requests_get):
-        e = DataUrlElement('some-address')
-
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_get_bytes_404_return_code(self, m_get_session):
         sim_rc = 500
-        simulated_r = requests.Response()
-        simulated_r.status_code = sim_rc
-        m_requests_get.return_value = simulated_r
+        m_get_session.return_value = mock_session(
+            get_response=make_response(sim_rc)
+        )
+        e = DataUrlElement('some-address')
 
         self.assertRaisesRegexp(
             requests.HTTPError,
@@ -152,3 +178,126 @@ class TestDataUrlElement (unittest.TestCase):
             ReadOnlyError,
             e.set_bytes, 'foo'
         )
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_new_head_only(self, m_get_session):
+        # Construction should validate the URL without downloading content.
+        m_get_session.return_value = mock_session()
+        DataUrlElement('some-address')
+        m_get_session().head.assert_called_once_with('http://some-address',
+                                                     allow_redirects=True)
+        m_get_session().get.assert_not_called()
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_new_head_not_allowed(self, m_get_session):
+        # Servers not supporting HEAD should be validated with a streamed GET.
+        get_response = make_response(headers={'Content-Type': 'image/png'})
+        get_response.raw = mock.Mock()
+        s = mock_session(get_response=get_response)
+        s.head.return_value = make_response(405)
+        m_get_session.return_value = s
+        e = DataUrlElement('some-address')
+        s.get.assert_called_once_with('http://some-address', stream=True)
+        self.assertEqual(e.content_type(), 'image/png')
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_new_head_error(self, m_get_session):
+        s = mock_session()
+        s.head.return_value = make_response(404)
+        m_get_session.return_value = s
+        self.assertRaises(requests.HTTPError, DataUrlElement, 'some-address')
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_content_type_from_head(self, m_get_session):
+        m_get_session.return_value = mock_session(
+            head_headers={'Content-Type': 'image/png'}
+        )
+        e = DataUrlElement('some-address')
+        self.assertEqual(e.content_type(), 'image/png')
+        m_get_session().get.assert_not_called()
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_is_empty_content_length(self, m_get_session):
+        m_get_session.return_value = mock_session(
+            head_headers={'Content-Length': '0'}
+        )
+        self.assertTrue(DataUrlElement('some-address').is_empty())
+        m_get_session.return_value = mock_session(
+            head_headers={'Content-Length': '42'}
+        )
+        self.assertFalse(DataUrlElement('some-address').is_empty())
+        m_get_session().get.assert_not_called()
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_get_bytes_cached(self, m_get_session):
+        # Content with an ETag should only be downloaded once, even by
+        # different elements for the same URL.
+        headers = {'ETag': '"abc"'}
+        m_get_session.return_value = mock_session(
+            head_headers=headers,
+            get_response=make_response(headers=headers, content=b'content')
+        )
+        e1 = DataUrlElement('some-address')
+        e2 = DataUrlElement('some-address')
+        self.assertEqual(e1.get_bytes(), b'content')
+        self.assertEqual(e1.get_bytes(), b'content')
+        self.assertEqual(e2.get_bytes(), b'content')
+        m_get_session().get.assert_called_once_with('http://some-address')
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_get_bytes_changed_etag(self, m_get_session):
+        # An element constructed after the content changed should not get the
+        # previously cached content.
+        m_get_session.return_value = mock_session(
+            head_headers={'ETag': '"abc"'},
+            get_response=make_response(headers={'ETag': '"abc"'},
+                                       content=b'old content')
+        )
+        self.assertEqual(DataUrlElement('some-address').get_bytes(),
+                         b'old content')
+        m_get_session.return_value = mock_session(
+            head_headers={'ETag': '"def"'},
+            get_response=make_response(headers={'ETag': '"def"'},
+                                       content=b'new content')
+        )
+        self.assertEqual(DataUrlElement('some-address').get_bytes(),
+                         b'new content')
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_get_bytes_not_cached_without_validators(self, m_get_session):
+        m_get_session.return_value = mock_session(
+            get_response=make_response(content=b'content')
+        )
+        e = DataUrlElement('some-address')
+        self.assertEqual(e.get_bytes(), b'content')
+        self.assertEqual(e.get_bytes(), b'content')
+        self.assertEqual(m_get_session().get.call_count, 2)
+        self.assertEqual(len(DataUrlElement.CONTENT_CACHE), 0)
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_prefetch(self, m_get_session):
+        headers = {'ETag': '"abc"'}
+        m_get_session.return_value = mock_session(
+            head_headers=headers,
+            get_response=make_response(headers=headers, content=b'content')
+        )
+        elements = [DataUrlElement('address-%d' % i) for i in range(4)]
+        # The same URL is only fetched once.
+        elements.append(DataUrlElement('address-0'))
+        DataUrlElement.prefetch(elements)
+        self.assertEqual(m_get_session().get.call_count, 4)
+        # Prefetched content is in the shared content cache.
+        self.assertEqual(len(DataUrlElement.CONTENT_CACHE), 4)
+        for e in elements:
+            self.assertEqual(e.get_bytes(), b'content')
+        self.assertEqual(m_get_session().get.call_count, 4)
+
+    @mock.patch('smqtk.representation.data_element.url_element.get_session')
+    def test_prefetch_without_validators(self, m_get_session):
+        # Content that cannot be cached is not fetched ahead of use.
+        m_get_session.return_value = mock_session(
+            get_response=make_response(content=b'content')
+        )
+        elements = [DataUrlElement('address-%d' % i) for i in range(4)]
+        DataUrlElement.prefetch(elements)
+        m_get_session().get.assert_not_called()
@@ -1,5 +1,9 @@
+import hashlib
 import mock
 import os
+import pickle
+import shutil
+import tempfile
 import unittest
 
 import pytest
@@ -66,6 +70,24 @@ class TestGirderDataElement (unittest.TestCase):
         self.assertIsNone(e._content_type)
         self.assertIsInstance(e.gc, girder_client.GirderClient)
 
+    def test_shared_client(self):
+        # Elements of the same server and credentials share a client.
+        e1 = GirderDataElement('id1', api_root='https://a/api/v1')
+        e2 = GirderDataElement('id2', api_root='https://a/api/v1')
+        e3 = GirderDataElement('id3', api_root='https://b/api/v1')
+        self.assertIs(e1._client, e2._client)
+        self.assertIsNot(e1._client, e3._client)
+
+    def test_pickle(self):
+        # Clients are not pickled, but shared clients are used after.
+        e = GirderDataElement('id1', api_root='https://a/api/v1', token='t')
+        _ = e.gc
+        e2 = pickle.loads(pickle.dumps(e))
+        self.assertEqual(e2.file_id, 'id1')
+        self.assertEqual(e2.token, 't')
+        self.assertIsNone(e2._gc)
+        self.assertIs(e2._client, e._client)
+
     @mock.patch('girder_client.GirderClient.authenticate')
     def test_repr(self, _mock_requests):
         expected_file_id = 'some_file id'
@@ -112,7 +134,7 @@ class TestGirderDataElement (unittest.TestCase):
         self.assertRaises(InvalidUriError, GirderDataElement.from_uri,
                           uri='girder://localhost:8080/bad/path')
 
-    @mock.patch('girder_client.GirderClient.getFile')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
     def test_content_type_no_cache(self, m_getFile):
         # Mocking such that we simulate a valid API root and an existing
         # item reference
@@ -133,7 +155,7 @@ class TestGirderDataElement (unittest.TestCase):
         self.assertEqual(e.content_type(), expected_mimetype)
         m_getFile.assert_called_once()
 
-    @mock.patch('girder_client.GirderClient.getFile')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
     def test_get_file_model(self, m_getFile):
         # Check static expected values in model. This happens to be actual
         # return values, however we are mocking out any actual network
@@ -162,10 +184,10 @@ class TestGirderDataElement (unittest.TestCase):
         self.assertEqual(m['sha512'], expected_m['sha512'])
         self.assertEqual(m['size'], expected_m['size'])
 
-    @mock.patch('girder_client.GirderClient.getFile')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
     def test_get_file_model_item_no_exists(self, m_getFile):
         def raise_http_error(*_, **__):
-            raise girder_client.HttpError(None, None, None, None)
+            raise requests.HTTPError()
         m_getFile.side_effect = raise_http_error
 
         e = GirderDataElement('foo', self.EXAMPLE_GIRDER_API_ROOT)
@@ -235,13 +257,155 @@ class TestGirderDataElement (unittest.TestCase):
             side_effect=girder_client.HttpError(500, '', None, None))
         self.assertRaises(girder_client.HttpError, gde.set_bytes, b=b'foo')
 
-    @mock.patch('girder_client.GirderClient.downloadFile')
-    def test_get_bytes(self, _m_downloadFile):
-        """ Test that getting bytes is driven by the girder_client downloadFile
-        method.
+    @mock.patch('smqtk.utils.girder.GirderApiClient.download_file')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
+    def test_get_bytes(self, m_get_file_model, m_download_file):
+        """ Test that getting bytes is driven by the client download_file
+        method, and that content is spooled to disk for later reads.
         """
-        _m_downloadFile.side_effect = lambda fid, buf: buf.write(b'foo')
-
-        e = GirderDataElement('someId')
-        actual_bytes = e.get_bytes()
-        assert actual_bytes == b'foo'
+        m_get_file_model.return_value = {'size': 3, 'mimeType': 'some/type'}
+        m_download_file.side_effect = lambda fid, buf: buf.write(b'foo')
+
+        spool_dir = tempfile.mkdtemp()
+        try:
+            with mock.patch.object(GirderDataElement, 'SPOOL_DIR', spool_dir):
+                e = GirderDataElement('someId')
+                assert e.get_bytes() == b'foo'
+                assert e.get_bytes() == b'foo'
+                m_download_file.assert_called_once()
+                # The file model retrieved for download caches content type.
+                assert e.content_type() == 'some/type'
+
+                # A new version of the file should be downloaded again.
+                m_get_file_model.return_value = {'size': 3, 'sha512': 'x'}
+                m_download_file.side_effect = \
+                    lambda fid, buf: buf.write(b'bar')
+                assert e.get_bytes() == b'bar'
+                assert m_download_file.call_count == 2
+                # Content of the previous version was removed.
+                assert len(os.listdir(e._get_spool_dir())) == 1
+
+                GirderDataElement.clear_spool()
+                assert not os.path.exists(spool_dir)
+        finally:
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+    @mock.patch('smqtk.utils.girder.GirderApiClient.download_file')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
+    def test_spooled_content_reads(self, m_get_file_model, m_download_file):
+        """ Test that checksums and temporary files are from the spooled
+        content. """
+        m_get_file_model.return_value = {'size': 3, 'mimeType': 'some/type'}
+        m_download_file.side_effect = lambda fid, buf: buf.write(b'foo')
+
+        spool_dir = tempfile.mkdtemp()
+        try:
+            with mock.patch.object(GirderDataElement, 'SPOOL_DIR', spool_dir):
+                e = GirderDataElement('someId')
+                with mock.patch.object(GirderDataElement, 'READ_CHUNK_SIZE',
+                                       2):
+                    assert e.sha1() == hashlib.sha1(b'foo').hexdigest()
+                    assert e.md5() == hashlib.md5(b'foo').hexdigest()
+                    assert e.sha512() == hashlib.sha512(b'foo').hexdigest()
+                fp = e.write_temp()
+                assert os.path.dirname(fp) != e._get_spool_dir()
+                with open(fp, 'rb') as f:
+                    assert f.read() == b'foo'
+                # Spooled content is not removed with the temporary file.
+                e.clean_temp()
+                assert not os.path.isfile(fp)
+                assert len(os.listdir(e._get_spool_dir())) == 1
+                m_download_file.assert_called_once()
+        finally:
+            shutil.rmtree(spool_dir)
+
+    @mock.patch('smqtk.utils.girder.GirderApiClient.download_file')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
+    def test_get_bytes_download_error(self, m_get_file_model,
+                                      m_download_file):
+        """ Test that failed downloads leave nothing in the spool. """
+        m_get_file_model.return_value = {'size': 3}
+        m_download_file.side_effect = requests.HTTPError()
+
+        spool_dir = tempfile.mkdtemp()
+        try:
+            with mock.patch.object(GirderDataElement, 'SPOOL_DIR', spool_dir):
+                e = GirderDataElement('someId')
+                self.assertRaises(requests.HTTPError, e.get_bytes)
+                assert os.listdir(e._get_spool_dir()) == []
+        finally:
+            shutil.rmtree(spool_dir)
+
+    @mock.patch('smqtk.utils.girder.GirderApiClient.download_file')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
+    def test_prefetch(self, m_get_file_model, m_download_file):
+        m_get_file_model.return_value = {'size': 3}
+        m_download_file.side_effect = lambda fid, buf: buf.write(b'foo')
+
+        spool_dir = tempfile.mkdtemp()
+        try:
+            with mock.patch.object(GirderDataElement, 'SPOOL_DIR', spool_dir):
+                elements = [GirderDataElement('id%d' % i) for i in range(4)]
+                GirderDataElement.prefetch(elements)
+                assert m_download_file.call_count == 4
+                # Content is read from the spool afterwards.
+                for e in elements:
+                    assert e.get_bytes() == b'foo'
+                assert m_download_file.call_count == 4
+        finally:
+            shutil.rmtree(spool_dir)
+
+    @mock.patch('smqtk.utils.girder.GirderApiClient.download_file')
+    @mock.patch('smqtk.utils.girder.GirderApiClient.get_file_model')
+    def test_spool_eviction(self, m_get_file_model, m_download_file):
+        """ Test that least recently used content is removed from the spool
+        past the maximum spool size. """
+        m_get_file_model.return_value = {'size': 3}
+        m_download_file.side_effect = lambda fid, buf: buf.write(b'foo')
+
+        spool_dir = tempfile.mkdtemp()
+        try:
+            with mock.patch.object(GirderDataElement, 'SPOOL_DIR',
+                                   spool_dir), \
+                    mock.patch.object(GirderDataElement, 'SPOOL_MAX_BYTES',
+                                      6):
+                e1, e2, e3 = [GirderDataElement('id%d' % i)
+                              for i in range(3)]
+                e1.get_bytes()
+                e2.get_bytes()
+                # Using e1 makes e2 the least recently used content.
+                e1.get_bytes()
+                e3.get_bytes()
+                assert m_download_file.call_count == 3
+                assert os.listdir(e1._get_spool_dir())
+                assert not os.listdir(e2._get_spool_dir())
+                assert os.listdir(e3._get_spool_dir())
+                # Evicted content is downloaded again.
+                assert e2.get_bytes() == b'foo'
+                assert m_download_file.call_count == 4
+        finally:
+            GirderDataElement.clear_spool()
+            shutil.rmtree(spool_dir, ignore_errors=True)
+
+    def test_spool_root_private(self):
+        """ Test that the default spool directory is private to this
+        process, and that a configured one must be private to the user. """
+        root = GirderDataElement._get_spool_root()
+        assert root != os.path.join(tempfile.gettempdir(),
+                                    'smqtk_girder_spool')
+        assert os.stat(root).st_mode & 0o077 == 0
+        assert GirderDataElement._get_spool_root() == root
+
+        spool_dir = tempfile.mkdtemp()
+        try:
+            os.chmod(spool_dir, 0o777)
+            with mock.patch.object(GirderDataElement, 'SPOOL_DIR', spool_dir):
+                self.assertRaises(RuntimeError,
+                                  GirderDataElement._get_spool_root)
+            # A configured directory that does not exist is created private.
+            new_dir = os.path.join(spool_dir, 'spool')
+            with mock.patch.object(GirderDataElement, 'SPOOL_DIR', new_dir):
+                assert GirderDataElement._get_spool_root() == new_dir
+                assert os.stat(new_dir).st_mode & 0o077 == 0
+        finally:
+            shutil.rmtree(spool_dir)
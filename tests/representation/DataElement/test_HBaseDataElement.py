@@ -1,4 +1,6 @@
+import hashlib
 import mock
+import struct
 from unittest import TestCase
 
 import smqtk.exceptions
@@ -25,10 +27,15 @@ class TestHBaseDataElement(TestCase):
         # Pretend that the implementation is actually available and mock out
         # dependency functionality.
         e.content_type = mock.MagicMock()
-        e._new_hbase_table_connection = mock.MagicMock()
-        e._new_hbase_table_connection().row.return_value = {
+        e._hbase_table = mock.MagicMock()
+        table = e._hbase_table.return_value.__enter__.return_value
+        table.row.return_value = {
             self.DUMMY_CFG['binary_column']: content
         }
+        # Scanning with a KeyOnlyFilter returns the length of the content.
+        table.scan.return_value = [(self.DUMMY_CFG['element_key'], {
+            self.DUMMY_CFG['binary_column']: struct.pack('>i', len(content))
+        })]
         return e
 
     @classmethod
@@ -57,6 +64,62 @@ class TestHBaseDataElement(TestCase):
         e = self.make_element(expected_bytes)
         self.assertEqual(e.get_bytes(), expected_bytes)
 
+    def test_get_bytes_prefetched(self):
+        # Prefetched bytes should be returned without fetching the row again.
+        e = self.make_element(b'some bytes')
+        e._bytes_cache = b'prefetched bytes'
+        self.assertEqual(e.get_bytes(), b'prefetched bytes')
+        e._hbase_table.assert_not_called()
+        # Prefetched bytes are released once used.
+        self.assertIsNone(e._bytes_cache)
+        self.assertEqual(e.get_bytes(), b'some bytes')
+
+    def test_uuid_prefetched(self):
+        # The UUID is computed from prefetched bytes, leaving them for the
+        # content read that follows, and is not computed again.
+        e = self.make_element(b'some bytes')
+        e._bytes_cache = b'prefetched bytes'
+        self.assertEqual(e.uuid(), hashlib.sha1(b'prefetched bytes')
+                         .hexdigest())
+        self.assertEqual(e.get_bytes(), b'prefetched bytes')
+        self.assertEqual(e.uuid(), hashlib.sha1(b'prefetched bytes')
+                         .hexdigest())
+        e._hbase_table.assert_not_called()
+
+    def test_get_many_bytes(self):
+        e1 = HBaseDataElement(**self.DUMMY_CFG)
+        e2 = HBaseDataElement(**dict(self.DUMMY_CFG, element_key='baz'))
+        e1._hbase_table = mock.MagicMock()
+        table = e1._hbase_table.return_value.__enter__.return_value
+        # Rows are not necessarily returned in requested order.
+        table.rows.return_value = [
+            (b'baz', {b'binary_data': b'second'}),
+            (b'foobar', {b'binary_data': b'first'}),
+        ]
+        self.assertEqual(HBaseDataElement.get_many_bytes([e1, e2]),
+                         [b'first', b'second'])
+        # Both rows are fetched in one request through the first element.
+        table.rows.assert_called_once_with(['foobar', 'baz'],
+                                           columns=['binary_data'])
+
+    def test_get_many_bytes_missing_row(self):
+        e = HBaseDataElement(**self.DUMMY_CFG)
+        e._hbase_table = mock.MagicMock()
+        e._hbase_table.return_value.__enter__.return_value.rows.return_value \
+            = []
+        self.assertRaises(KeyError, HBaseDataElement.get_many_bytes, [e])
+
+    def test_prefetch(self):
+        e = self.make_element(b'')
+        with mock.patch.object(HBaseDataElement, 'get_many_bytes',
+                               return_value=[b'prefetched']) as m_gmb:
+            HBaseDataElement.prefetch([e])
+            m_gmb.assert_called_once_with([e])
+            # Already fetched elements are not fetched again.
+            HBaseDataElement.prefetch([e])
+            m_gmb.assert_called_once_with([e])
+        self.assertEqual(e.get_bytes(), b'prefetched')
+
     def test_is_empty_zero_bytes(self):
         # Simulate empty bytes
         e = self.make_element(b'')
@@ -66,6 +129,26 @@ class TestHBaseDataElement(TestCase):
         # Simulate non-empty bytes
         e = self.make_element(b'some bytes')
         self.assertFalse(e.is_empty())
+        # Only the length of the content should have been requested.
+        table = e._hbase_table.return_value.__enter__.return_value
+        table.row.assert_not_called()
+
+    def test_is_empty_scan_range(self):
+        # The scan range is in bytes for both text and bytes keys.
+        for key in ('foobar', b'foobar'):
+            e = self.make_element(b'some bytes')
+            e.element_key = key
+            e.is_empty()
+            table = e._hbase_table.return_value.__enter__.return_value
+            _, kwargs = table.scan.call_args
+            self.assertEqual(kwargs['row_start'], b'foobar')
+            self.assertEqual(kwargs['row_stop'], b'foobar\0')
+
+    def test_is_empty_no_row(self):
+        e = self.make_element(b'some bytes')
+        e._hbase_table.return_value.__enter__.return_value.scan.return_value \
+            = []
+        self.assertRaises(KeyError, e.is_empty)
 
     def test_writable(self):
         # Read-only element
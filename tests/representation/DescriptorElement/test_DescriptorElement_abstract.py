@@ -2,6 +2,7 @@ from __future__ import division, print_function
 import mock
 import numpy
 import unittest
+import warnings
 
 from smqtk.representation import DescriptorElement
 
@@ -102,6 +103,125 @@ class TestDescriptorElementAbstract (unittest.TestCase):
         for retrieved, expected in zip(retrieved_vectors, [v1, v2]):
             numpy.testing.assert_array_equal(retrieved, expected)
 
+    def test_get_many_vectors_duplicate_uuid(self):
+        # The same UUID requested more than once should have its vector
+        # returned in every requested position.
+        v1 = numpy.random.randint(0, 10, 10)
+        d1 = DummyDescriptorElement('a', 'b')
+        d1.vector = mock.Mock(return_value=v1)
+
+        retrieved_vectors = \
+            DummyDescriptorElement.get_many_vectors([d1, d1, d1])
+        assert len(retrieved_vectors) == 3
+        for retrieved in retrieved_vectors:
+            numpy.testing.assert_array_equal(retrieved, v1)
+
+    def test_get_many_vectors_per_element(self):
+        # Distinct elements sharing a UUID, of the same or another type, each
+        # get their own vector.
+        class OtherDescriptorElement (DummyDescriptorElement):
+            pass
+
+        v1 = numpy.random.randint(0, 10, 10)
+        v3 = numpy.random.randint(0, 10, 10)
+        d1 = DummyDescriptorElement('a', 'b')
+        d1.vector = mock.Mock(return_value=v1)
+        d2 = DummyDescriptorElement('a', 'b')
+        d2.vector = mock.Mock(return_value=None)
+        d3 = OtherDescriptorElement('c', 'b')
+        d3.vector = mock.Mock(return_value=v3)
+
+        retrieved_vectors = DescriptorElement.get_many_vectors([d1, d2, d3])
+        assert len(retrieved_vectors) == 3
+        numpy.testing.assert_array_equal(retrieved_vectors[0], v1)
+        assert retrieved_vectors[1] is None
+        numpy.testing.assert_array_equal(retrieved_vectors[2], v3)
+
+    def test_get_many_vectors_uuid_keyed_override(self):
+        # Subclasses overriding the deprecated UUID-keyed hook are still used,
+        # with a warning.
+        class LegacyDescriptorElement (DummyDescriptorElement):
+            @classmethod
+            def _get_many_vectors(cls, descriptors):
+                for d in descriptors:
+                    yield d.uuid(), numpy.array([len(d.uuid())])
+
+        d1 = LegacyDescriptorElement('a', 'b')
+        d2 = LegacyDescriptorElement('a', 'cc')
+        d3 = DummyDescriptorElement('a', 'b')
+        v3 = numpy.random.randint(0, 10, 10)
+        d3.vector = mock.Mock(return_value=v3)
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            retrieved_vectors = \
+                DescriptorElement.get_many_vectors([d1, d3, d2, d1])
+        assert len(w) == 1
+        assert issubclass(w[0].category, DeprecationWarning)
+        assert len(retrieved_vectors) == 4
+        numpy.testing.assert_array_equal(retrieved_vectors[0], [1])
+        numpy.testing.assert_array_equal(retrieved_vectors[1], v3)
+        numpy.testing.assert_array_equal(retrieved_vectors[2], [2])
+        numpy.testing.assert_array_equal(retrieved_vectors[3], [1])
+
+    def test_get_many_vectors_indexed_override(self):
+        # Overriding the position-keyed hook in a subclass of a legacy
+        # implementation uses the new hook without warning.
+        class LegacyDescriptorElement (DummyDescriptorElement):
+            @classmethod
+            def _get_many_vectors(cls, descriptors):
+                raise AssertionError("legacy hook should not be used")
+
+        class NewDescriptorElement (LegacyDescriptorElement):
+            @classmethod
+            def _get_many_indexed_vectors(cls, descriptors):
+                for i, d in enumerate(descriptors):
+                    yield i, numpy.array([i])
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            retrieved_vectors = DescriptorElement.get_many_vectors(
+                [NewDescriptorElement('a', 'b'),
+                 NewDescriptorElement('a', 'b')])
+        assert not [x for x in w if issubclass(x.category,
+                                               DeprecationWarning)]
+        numpy.testing.assert_array_equal(retrieved_vectors[0], [0])
+        numpy.testing.assert_array_equal(retrieved_vectors[1], [1])
+
+    def test_set_many_vectors(self):
+        v1 = numpy.random.randint(0, 10, 10)
+        v2 = numpy.random.randint(0, 10, 100)
+        d1 = DummyDescriptorElement('a', 'b')
+        d1.set_vector = mock.Mock()
+        d2 = DummyDescriptorElement('a', 'c')
+        d2.set_vector = mock.Mock()
+
+        DummyDescriptorElement.set_many_vectors(iter([d1, d2]),
+                                                iter([v1, v2]))
+        d1.set_vector.assert_called_once_with(v1)
+        d2.set_vector.assert_called_once_with(v2)
+
+    def test_set_many_vectors_batches_by_type(self):
+        class OtherDescriptorElement (DummyDescriptorElement):
+            _set_many_vectors = mock.Mock()
+
+        d1 = DummyDescriptorElement('a', 'b')
+        d1.set_vector = mock.Mock()
+        d2 = OtherDescriptorElement('a', 'c')
+        d3 = OtherDescriptorElement('a', 'd')
+
+        DescriptorElement.set_many_vectors([d2, d1, d3], [[2], [1], [3]])
+        d1.set_vector.assert_called_once_with([1])
+        OtherDescriptorElement._set_many_vectors.assert_called_once_with(
+            [d2, d3], [[2], [3]])
+
+    def test_set_many_vectors_mismatched(self):
+        d1 = DummyDescriptorElement('a', 'b')
+        d1.set_vector = mock.Mock()
+        self.assertRaises(ValueError, DescriptorElement.set_many_vectors,
+                          [d1], [[1], [2]])
+        d1.set_vector.assert_not_called()
+
     def test_hash(self):
         # Hash of a descriptor element is solely based on the UUID value of
         # that element.
@@ -1,4 +1,7 @@
 import mock
+import os
+import shutil
+import tempfile
 import unittest
 
 import numpy
@@ -20,6 +23,14 @@ class TestDescriptorFileElement (unittest.TestCase):
                                            ('test', 'abcd')):
             assert i._save_dir == '/some/path/somewhere'
             assert i._subdir_split == 4
+            assert i._dtype is None
+
+        inst = DescriptorFileElement('test', 'abcd',
+                                     save_dir='/some/path/somewhere',
+                                     dtype='float16')
+        for i in configuration_test_helper(inst, {'type_str', 'uuid'},
+                                           ('test', 'abcd')):
+            assert i._dtype == 'float16'
 
     def test_vec_filepath_generation(self):
         d = DescriptorFileElement('test', 'abcd', '/base', 4)
@@ -61,6 +72,7 @@ class TestDescriptorFileElement (unittest.TestCase):
         self.assertEqual(e1._save_dir, e2._save_dir)
         self.assertEqual(e1._subdir_split, e2._subdir_split)
         self.assertEqual(e1._vec_filepath, e2._vec_filepath)
+        self.assertEqual(e1._dtype, e2._dtype)
 
     @mock.patch('smqtk.representation.descriptor_element.local_elements'
                 '.numpy.save')
@@ -88,3 +100,34 @@ class TestDescriptorFileElement (unittest.TestCase):
         v = numpy.zeros(16)
         mock_load.return_value = v
         numpy.testing.assert_equal(d.vector(), v)
+
+    @mock.patch('smqtk.representation.descriptor_element.local_elements'
+                '.numpy.save')
+    @mock.patch('smqtk.representation.descriptor_element.local_elements'
+                '.safe_create_dir')
+    def test_vector_set_dtype(self, _, mock_save):
+        d = DescriptorFileElement('test', 1234, '/base', dtype='float32')
+        v = numpy.random.rand(16)
+        d.set_vector(v)
+        saved = mock_save.call_args[0][1]
+        self.assertEqual(saved.dtype, numpy.float32)
+        numpy.testing.assert_allclose(saved, v, rtol=1e-6)
+
+    def test_dtype_invalid(self):
+        self.assertRaises(ValueError, DescriptorFileElement, 'test', 1234,
+                          '/base', dtype='uint8')
+
+    def test_set_many_vectors(self):
+        tempdir = tempfile.mkdtemp()
+        try:
+            ds = [DescriptorFileElement('test', uid, tempdir, 2,
+                                        dtype='float32')
+                  for uid in ['ab', 'ac', 'bc']]
+            vs = [numpy.random.rand(4) for _ in ds]
+            DescriptorFileElement.set_many_vectors(ds, vs)
+            self.assertEqual(sorted(os.listdir(tempdir)), ['a', 'b'])
+            for d, v in zip(ds, vs):
+                self.assertEqual(d.vector().dtype, numpy.float32)
+                numpy.testing.assert_allclose(d.vector(), v, rtol=1e-6)
+        finally:
+            shutil.rmtree(tempdir)
@@ -19,6 +19,11 @@ class TestDescriptorMemoryElement (unittest.TestCase):
             assert i.type() == 'test'
             assert i.uuid() == 'abcd'
 
+        inst = DescriptorMemoryElement('test', 'abcd', dtype='float32')
+        for i in configuration_test_helper(inst, {'type_str', 'uuid'},
+                                           ('test', 'abcd')):  # type: DescriptorMemoryElement
+            assert i._dtype == 'float32'
+
     def test_pickle_dump_load(self):
         # Make a couple descriptors
         v1 = numpy.array([1, 2, 3])
@@ -133,3 +138,29 @@ class TestDescriptorMemoryElement (unittest.TestCase):
         d.set_vector(None)
         self.assertFalse(d.has_vector())
         self.assertIs(d.vector(), None)
+
+    def test_storage_dtype(self):
+        v = numpy.random.rand(16)
+        d = DescriptorMemoryElement('test', 0)
+        d.set_vector(v)
+        # Stored as given by default.
+        self.assertEqual(d.vector().dtype, numpy.float64)
+
+        d = DescriptorMemoryElement('test', 0, dtype='float32')
+        d.set_vector(v)
+        self.assertEqual(d.vector().dtype, numpy.float32)
+        numpy.testing.assert_allclose(d.vector(), v, rtol=1e-6)
+        d.set_vector([1, 2, 3])
+        self.assertEqual(d.vector().dtype, numpy.float32)
+
+        # Kept through serialization.
+        d2 = cPickle.loads(cPickle.dumps(d))
+        self.assertEqual(d2._dtype, 'float32')
+        d2.set_vector(v)
+        self.assertEqual(d2.vector().dtype, numpy.float32)
+
+    def test_storage_dtype_invalid(self):
+        self.assertRaises(ValueError, DescriptorMemoryElement, 'test', 0,
+                          dtype='int32')
+        self.assertRaises(ValueError, DescriptorMemoryElement, 'test', 0,
+                          dtype='not-a-type')
@@ -0,0 +1,311 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+from six.moves import cPickle, mock
+
+from smqtk.representation import DescriptorElement
+from smqtk.representation.descriptor_element._shards import (
+    ShardedVectorStore,
+    get_store,
+)
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorShardedFileElement
+from smqtk.utils.configuration import configuration_test_helper
+
+
+class TestShardedVectorStore (unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def test_get_store_shared(self):
+        s = get_store(self.root_dir)
+        self.assertIs(get_store(self.root_dir + '/'), s)
+        self.assertIsNot(get_store(os.path.join(self.root_dir, 'other')), s)
+
+    def test_missing_dir(self):
+        s = ShardedVectorStore(os.path.join(self.root_dir, 'missing'))
+        self.assertEqual(len(s), 0)
+        self.assertIsNone(s.read('test', 0))
+
+    def test_write_read(self):
+        s = ShardedVectorStore(self.root_dir)
+        v = numpy.arange(5, dtype=numpy.float32)
+        s.write('test', 0, v, 1024)
+        s.write('test', 1, numpy.ones(3), 1024)
+        r = s.read('test', 0)
+        numpy.testing.assert_array_equal(r, v)
+        self.assertEqual(r.dtype, numpy.float32)
+        self.assertFalse(r.flags.writeable)
+        # Vectors are aligned in the shard file.
+        self.assertEqual(s.location('test', 1)[1] % 16, 0)
+        # Keys are by type as well as UUID.
+        self.assertIsNone(s.read('other', 0))
+
+    def test_replace(self):
+        s = ShardedVectorStore(self.root_dir)
+        s.write('test', 0, numpy.zeros(4), 1024)
+        s.write('test', 0, numpy.ones(4), 1024)
+        self.assertEqual(len(s), 1)
+        numpy.testing.assert_array_equal(s.read('test', 0), numpy.ones(4))
+
+    def test_shard_rotation(self):
+        s = ShardedVectorStore(self.root_dir)
+        for i in range(10):
+            s.write('test', i, numpy.ones(4) * i, 64)
+        shards = [fn for fn in os.listdir(self.root_dir)
+                  if fn.endswith('.shard')]
+        self.assertEqual(len(shards), 5)
+        for i in range(10):
+            numpy.testing.assert_array_equal(s.read('test', i),
+                                             numpy.ones(4) * i)
+
+    def test_refresh(self):
+        s = ShardedVectorStore(self.root_dir)
+        s.write('test', 0, numpy.zeros(4), 1024)
+        # Another store of the directory, as in another process.
+        s2 = ShardedVectorStore(self.root_dir, refresh_interval=0)
+        numpy.testing.assert_array_equal(s2.read('test', 0), numpy.zeros(4))
+        # Records appended later are found on lookup.
+        s.write('test', 1, numpy.ones(4), 1024)
+        s.write('test', 0, numpy.ones(2), 1024)
+        numpy.testing.assert_array_equal(s2.read('test', 1), numpy.ones(4))
+        numpy.testing.assert_array_equal(s2.read('test', 0), numpy.ones(2))
+
+    def test_refresh_interval(self):
+        s = ShardedVectorStore(self.root_dir)
+        s2 = ShardedVectorStore(self.root_dir, refresh_interval=3600)
+        s.write('test', 0, numpy.zeros(4), 1024)
+        # Lookup misses do not re-read index files within the interval.
+        self.assertIsNone(s2.read('test', 0))
+        s2.refresh()
+        numpy.testing.assert_array_equal(s2.read('test', 0), numpy.zeros(4))
+
+    def test_latest_record_wins(self):
+        s = ShardedVectorStore(self.root_dir)
+        s.write('test', 0, numpy.zeros(4), 1024)
+        s.close()
+        # A later record in another shard whose index file may be listed
+        # before the first one.
+        s.write('test', 0, numpy.ones(4), 1024)
+        s.close()
+        idx_files = sorted(fn for fn in os.listdir(self.root_dir)
+                           if fn.endswith('.idx'))
+        self.assertEqual(len(idx_files), 2)
+        for order in (idx_files, idx_files[::-1]):
+            s2 = ShardedVectorStore(os.path.join(self.root_dir, 'missing'))
+            s2.root_dir = self.root_dir
+            for fn in order:
+                s2._read_index(fn)
+            numpy.testing.assert_array_equal(s2.read('test', 0),
+                                             numpy.ones(4))
+
+    def test_stamps_follow_records_read(self):
+        # Stamps are not wall-clock times, so a writer whose records carry
+        # greater stamps, e.g. from a host with a clock ahead, does not win
+        # over records written after its own.
+        s = ShardedVectorStore(self.root_dir)
+        s2 = ShardedVectorStore(self.root_dir)
+        s._clock = 10 ** 12
+        s.write('test', 0, numpy.zeros(4), 1024)
+        s2.write('test', 0, numpy.ones(4), 1024)
+        self.assertEqual(s2.location('test', 0)[4], 10 ** 12 + 2)
+        s3 = ShardedVectorStore(self.root_dir)
+        numpy.testing.assert_array_equal(s3.read('test', 0), numpy.ones(4))
+
+    def test_concurrent_records_same_stamp(self):
+        # Records of a key with the same stamp, written without seeing each
+        # other, are ordered by shard name for all readers.
+        s = ShardedVectorStore(self.root_dir)
+        s2 = ShardedVectorStore(self.root_dir)
+        s.write('test', 0, numpy.zeros(4), 1024)
+        s2._clock = 0
+        with mock.patch.object(s2, 'refresh'):
+            s2.write('test', 0, numpy.ones(4), 1024)
+        shards = sorted([s._writer[1], s2._writer[1]])
+        expected = numpy.zeros(4) if shards[1] == s._writer[1] \
+            else numpy.ones(4)
+        idx_files = sorted(fn for fn in os.listdir(self.root_dir)
+                           if fn.endswith('.idx'))
+        for order in (idx_files, idx_files[::-1]):
+            s3 = ShardedVectorStore(os.path.join(self.root_dir, 'missing'))
+            s3.root_dir = self.root_dir
+            for fn in order:
+                s3._read_index(fn)
+            self.assertEqual(s3.location('test', 0)[4], 1)
+            numpy.testing.assert_array_equal(s3.read('test', 0), expected)
+
+    def test_uuid_types(self):
+        s = ShardedVectorStore(self.root_dir)
+        s.write_many([('test', 1, numpy.zeros(4)),
+                      ('test', '1', numpy.ones(4))], 1024)
+        self.assertEqual(len(s), 2)
+        # UUID types are kept in index records.
+        s2 = ShardedVectorStore(self.root_dir)
+        self.assertEqual(len(s2), 2)
+        numpy.testing.assert_array_equal(s2.read('test', 1), numpy.zeros(4))
+        numpy.testing.assert_array_equal(s2.read('test', '1'), numpy.ones(4))
+        # Other UUID types are not supported.
+        self.assertRaises(TypeError, s.write, 'test', (1, 2),
+                          numpy.ones(4), 1024)
+        self.assertRaises(TypeError, s.write, 'test', True,
+                          numpy.ones(4), 1024)
+        self.assertRaises(TypeError, s.read, 'test', 1.0)
+        self.assertEqual(len(s), 2)
+
+    def test_close(self):
+        s = ShardedVectorStore(self.root_dir)
+        s.write('test', 0, numpy.zeros(4), 1024)
+        files = s._writer[2:]
+        s.close()
+        self.assertTrue(all(f.closed for f in files))
+        self.assertIsNone(s._writer)
+        # Writing again starts a new shard.
+        s.write('test', 1, numpy.ones(4), 1024)
+        numpy.testing.assert_array_equal(s.read('test', 0), numpy.zeros(4))
+        numpy.testing.assert_array_equal(s.read('test', 1), numpy.ones(4))
+        shards = [fn for fn in os.listdir(self.root_dir)
+                  if fn.endswith('.shard')]
+        self.assertEqual(len(shards), 2)
+        s.close()
+
+    def test_refresh_partial_record(self):
+        s = ShardedVectorStore(self.root_dir)
+        s.write('test', 0, numpy.zeros(4), 1024)
+        idx = [fn for fn in os.listdir(self.root_dir)
+               if fn.endswith('.idx')][0]
+        with open(os.path.join(self.root_dir, idx), 'ab') as f:
+            f.write(b'["test", "1", 3')
+        s2 = ShardedVectorStore(self.root_dir)
+        self.assertEqual(len(s2), 1)
+        self.assertIsNone(s2.location('test', 1))
+
+    def test_write_many(self):
+        s = ShardedVectorStore(self.root_dir)
+        s.write_many([('test', i, numpy.ones(4) * i) for i in range(5)] +
+                     [('test', 0, numpy.ones(2))], 64)
+        self.assertEqual(len(s), 5)
+        numpy.testing.assert_array_equal(s.read('test', 0), numpy.ones(2))
+        # Records written across shards are visible to other stores.
+        s2 = ShardedVectorStore(self.root_dir)
+        for i in range(1, 5):
+            numpy.testing.assert_array_equal(s2.read('test', i),
+                                             numpy.ones(4) * i)
+        numpy.testing.assert_array_equal(s2.read('test', 0), numpy.ones(2))
+
+    def test_read_many(self):
+        s = ShardedVectorStore(self.root_dir)
+        for i in range(6):
+            s.write('test', i, numpy.ones(4) * i, 64)
+        keys = [('test', 4), ('test', 9), ('test', 1), ('test', 0)]
+        r = dict(s.read_many(keys))
+        self.assertEqual(sorted(r), [0, 2, 3])
+        numpy.testing.assert_array_equal(r[0], numpy.ones(4) * 4)
+        numpy.testing.assert_array_equal(r[2], numpy.ones(4))
+        numpy.testing.assert_array_equal(r[3], numpy.zeros(4))
+
+
+class TestDescriptorShardedFileElement (unittest.TestCase):
+
+    def setUp(self):
+        self.root_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root_dir)
+
+    def test_impl_findable(self):
+        self.assertIn(DescriptorShardedFileElement,
+                      DescriptorElement.get_impls())
+
+    def test_configuration(self):
+        """ Test instance standard configuration """
+        inst = DescriptorShardedFileElement('test', 'abcd',
+                                            root_dir='/some/path/somewhere',
+                                            shard_size=4096, dtype='float16')
+        for i in configuration_test_helper(inst, {'type_str', 'uuid'},
+                                           ('test', 'abcd')):
+            assert i._root_dir == '/some/path/somewhere'
+            assert i._shard_size == 4096
+            assert i._dtype == 'float16'
+
+    def test_uuid_invalid(self):
+        self.assertRaises(TypeError, DescriptorShardedFileElement,
+                          'test', ('a', 1), self.root_dir)
+
+    def test_dtype_invalid(self):
+        self.assertRaises(ValueError, DescriptorShardedFileElement, 'test',
+                          1234, self.root_dir, dtype='uint8')
+
+    def test_serialization(self):
+        e1 = DescriptorShardedFileElement('test', 12345, self.root_dir,
+                                          shard_size=512, dtype='float32')
+        e1.set_vector(numpy.arange(3))
+        e2 = cPickle.loads(cPickle.dumps(e1))
+        self.assertEqual(e1.type(), e2.type())
+        self.assertEqual(e1.uuid(), e2.uuid())
+        self.assertEqual(e1._root_dir, e2._root_dir)
+        self.assertEqual(e1._shard_size, e2._shard_size)
+        self.assertEqual(e1._dtype, e2._dtype)
+        numpy.testing.assert_array_equal(e2.vector(), numpy.arange(3))
+
+    def test_vector_set_get(self):
+        d = DescriptorShardedFileElement('test', 1234, self.root_dir)
+        self.assertFalse(d.has_vector())
+        self.assertIsNone(d.vector())
+
+        v = numpy.random.rand(16)
+        d.set_vector(v)
+        self.assertTrue(d.has_vector())
+        numpy.testing.assert_array_equal(d.vector(), v)
+        # Elements of the same directory share vectors.
+        d2 = DescriptorShardedFileElement('test', 1234, self.root_dir)
+        numpy.testing.assert_array_equal(d2.vector(), v)
+        # Few files are created.
+        self.assertEqual(len(os.listdir(self.root_dir)), 2)
+
+    def test_vector_set_dtype(self):
+        d = DescriptorShardedFileElement('test', 1234, self.root_dir,
+                                         dtype='float32')
+        v = numpy.random.rand(16)
+        d.set_vector(v)
+        self.assertEqual(d.vector().dtype, numpy.float32)
+        numpy.testing.assert_allclose(d.vector(), v, rtol=1e-6)
+
+    def test_get_many_vectors(self):
+        other_dir = os.path.join(self.root_dir, 'other')
+        descriptors = []
+        for i in range(6):
+            d = DescriptorShardedFileElement(
+                'test', i, other_dir if i % 2 else self.root_dir,
+                shard_size=64)
+            if i != 3:
+                d.set_vector(numpy.ones(4) * i)
+            descriptors.append(d)
+        descriptors.reverse()
+        vectors = DescriptorElement.get_many_vectors(descriptors)
+        self.assertEqual(len(vectors), 6)
+        for d, v in zip(descriptors, vectors):
+            if d.uuid() == 3:
+                self.assertIsNone(v)
+            else:
+                numpy.testing.assert_array_equal(v, numpy.ones(4) * d.uuid())
+
+    def test_set_many_vectors(self):
+        other_dir = os.path.join(self.root_dir, 'other')
+        descriptors = [
+            DescriptorShardedFileElement(
+                'test', i, other_dir if i % 2 else self.root_dir,
+                dtype='float32')
+            for i in range(4)
+        ]
+        vectors = [numpy.random.rand(4) for _ in descriptors]
+        DescriptorElement.set_many_vectors(descriptors, vectors)
+        for d, v in zip(descriptors, vectors):
+            self.assertEqual(d.vector().dtype, numpy.float32)
+            numpy.testing.assert_allclose(d.vector(), v, rtol=1e-6)
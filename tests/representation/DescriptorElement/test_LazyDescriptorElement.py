@@ -0,0 +1,71 @@
+import unittest
+
+import numpy
+from six.moves import cPickle
+
+from smqtk.representation import DescriptorElement
+from smqtk.representation.descriptor_element.lazy_element import \
+    LazyDescriptorElement
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
+from smqtk.representation.descriptor_set.memory import MemoryDescriptorSet
+from smqtk.utils.configuration import configuration_test_helper
+
+
+class TestLazyDescriptorElement (unittest.TestCase):
+
+    def setUp(self):
+        self.d_set = MemoryDescriptorSet()
+        self.d_set.add_many_descriptors(
+            DescriptorMemoryElement('test', i).set_vector(numpy.arange(3) + i)
+            for i in range(5)
+        )
+
+    def test_impl_findable(self):
+        self.assertIn(LazyDescriptorElement, DescriptorElement.get_impls())
+
+    def test_configuration(self):
+        """ Test instance standard configuration """
+        inst = LazyDescriptorElement('test', 2, self.d_set)
+        for i in configuration_test_helper(inst, {'type_str', 'uuid'},
+                                           ('test', 2)):
+            assert isinstance(i._descriptor_set, MemoryDescriptorSet)
+            assert i.type() == 'test'
+            assert i.uuid() == 2
+
+    def test_retrieve_on_use(self):
+        e = LazyDescriptorElement(None, 2, self.d_set)
+        self.assertFalse(e.is_retrieved())
+        self.assertEqual(e.uuid(), 2)
+        self.assertFalse(e.is_retrieved())
+        self.assertEqual(e.type(), 'test')
+        self.assertTrue(e.is_retrieved())
+        numpy.testing.assert_array_equal(e.vector(), [2, 3, 4])
+        self.assertEqual(e, self.d_set.get_descriptor(2))
+
+    def test_given_type(self):
+        e = LazyDescriptorElement('other', 2, self.d_set)
+        self.assertEqual(e.type(), 'other')
+        self.assertFalse(e.is_retrieved())
+
+    def test_get_many_vectors(self):
+        elems = [LazyDescriptorElement(None, i, self.d_set)
+                 for i in [3, 0, 3]]
+        vectors = DescriptorElement.get_many_vectors(elems)
+        numpy.testing.assert_array_equal(vectors, [[3, 4, 5], [0, 1, 2],
+                                                   [3, 4, 5]])
+        self.assertTrue(all(e.is_retrieved() for e in elems))
+
+    def test_missing(self):
+        e = LazyDescriptorElement(None, 10, self.d_set)
+        self.assertRaises(KeyError, e.vector)
+
+    def test_pickle(self):
+        e = LazyDescriptorElement(None, 2, self.d_set)
+        e2 = cPickle.loads(cPickle.dumps(e))
+        self.assertTrue(e2.is_retrieved())
+        self.assertIsNone(e2._descriptor_set)
+        self.assertEqual(e2.uuid(), 2)
+        self.assertEqual(e2.type(), 'test')
+        numpy.testing.assert_array_equal(e2.vector(), [2, 3, 4])
+        self.assertEqual(e2.get_config(), e.get_config())
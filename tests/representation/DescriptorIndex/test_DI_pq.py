@@ -0,0 +1,224 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy
+from six.moves import mock
+
+from smqtk.representation import DescriptorSet
+from smqtk.representation.data_element.memory_element import \
+    DataMemoryElement
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
+from smqtk.representation.descriptor_set.pq import PQDescriptorSet
+from smqtk.utils.configuration import configuration_test_helper
+
+from tests import make_descriptors
+
+
+class TestPQDescriptorSet (unittest.TestCase):
+
+    def setUp(self):
+        self.rng = numpy.random.RandomState(0)
+        self.vectors = self.rng.rand(100, 8)
+
+    def _make_inst(self, **kwargs):
+        kwargs.setdefault('num_subspaces', 4)
+        kwargs.setdefault('num_centroids', 16)
+        kwargs.setdefault('random_seed', 0)
+        return PQDescriptorSet(**kwargs)
+
+    def _make_trained(self, **kwargs):
+        s = self._make_inst(**kwargs)
+        s.train(make_descriptors(self.vectors))
+        return s
+
+    def test_impl_findable(self):
+        self.assertIn(PQDescriptorSet, DescriptorSet.get_impls())
+
+    def test_configuration(self):
+        i = PQDescriptorSet(cache_element=DataMemoryElement(readonly=True),
+                            quantizer_filepath='/some/pq.npz',
+                            num_subspaces=16, num_centroids=64,
+                            num_iterations=5, train_sample_size=1000,
+                            random_seed=3, cache_fraction=0.5,
+                            pickle_protocol=1)
+        for inst in configuration_test_helper(i):  # type: PQDescriptorSet
+            assert isinstance(inst.cache_element, DataMemoryElement)
+            assert inst.cache_element.is_read_only()
+            assert inst.quantizer_filepath == '/some/pq.npz'
+            assert inst.num_subspaces == 16
+            assert inst.num_centroids == 64
+            assert inst.num_iterations == 5
+            assert inst.train_sample_size == 1000
+            assert inst.random_seed == 3
+            assert inst.cache_fraction == 0.5
+            assert inst.pickle_protocol == 1
+
+    def test_add_untrained(self):
+        # The quantizer is not trained implicitly on the first descriptors.
+        s = self._make_inst()
+        self.assertRaises(RuntimeError, s.add_many_descriptors,
+                          make_descriptors(self.vectors))
+        self.assertFalse(s.quantizer.is_trained)
+        self.assertEqual(s.count(), 0)
+
+    def test_train_too_few(self):
+        s = self._make_inst()
+        self.assertRaises(ValueError, s.train,
+                          make_descriptors(self.vectors[:5]))
+        self.assertFalse(s.quantizer.is_trained)
+
+    def test_train_sample(self):
+        s = self._make_inst(train_sample_size=20)
+        ds = make_descriptors(self.vectors)
+        with mock.patch.object(s.quantizer, 'train') as m_train:
+            s.train(ds)
+        trained_on = m_train.call_args[0][0]
+        self.assertEqual(trained_on.shape, (20, 8))
+        # Sampled from the given descriptors, without replacement.
+        self.assertEqual(
+            len(set(tuple(v) for v in trained_on)), 20)
+        vectors = set(tuple(v) for v in self.vectors)
+        assert all(tuple(v) in vectors for v in trained_on)
+
+    def test_train_non_empty(self):
+        s = self._make_trained()
+        s.add_descriptor(make_descriptors(self.vectors[:1])[0])
+        self.assertRaises(ValueError, s.train,
+                          make_descriptors(self.vectors))
+
+    def test_quantizer_file(self):
+        d = tempfile.mkdtemp()
+        try:
+            fp = os.path.join(d, 'sub', 'pq.npz')
+            s = self._make_inst(quantizer_filepath=fp)
+            self.assertFalse(s.quantizer.is_trained)
+            s.train(make_descriptors(self.vectors))
+            self.assertTrue(os.path.isfile(fp))
+
+            # A new index loads the trained quantizer from the file.
+            s2 = self._make_inst(quantizer_filepath=fp)
+            self.assertTrue(s2.quantizer.is_trained)
+            numpy.testing.assert_array_equal(s2.quantizer.centroids,
+                                             s.quantizer.centroids)
+            s2.add_many_descriptors(make_descriptors(self.vectors))
+            self.assertEqual(s2.count(), 100)
+
+            self.assertRaises(ValueError, self._make_inst,
+                              quantizer_filepath=fp, num_subspaces=2)
+        finally:
+            shutil.rmtree(d)
+
+    def test_add_get(self):
+        s = self._make_trained()
+        s.add_many_descriptors(make_descriptors(self.vectors))
+        self.assertEqual(s.count(), 100)
+        self.assertTrue(s.has_descriptor(7))
+        self.assertFalse(s.has_descriptor(100))
+
+        # Once trained, descriptors may be added singly.
+        s.add_descriptor(make_descriptors(self.vectors[:1], offset=100)[0])
+        self.assertEqual(s.count(), 101)
+
+        d = s.get_descriptor(7)
+        self.assertEqual(d.uuid(), 7)
+        self.assertEqual(d.type(), 'random')
+        # Vectors are approximated from codes.
+        numpy.testing.assert_allclose(
+            d.vector(), s.quantizer.decode(s.quantizer.encode(
+                self.vectors[7]))[0])
+
+        ds = list(s.get_many_descriptors([3, 100, 3]))
+        self.assertEqual([d.uuid() for d in ds], [3, 100, 3])
+        self.assertRaises(KeyError, s.get_descriptor, 101)
+
+    def test_add_replaces(self):
+        s = self._make_trained()
+        s.add_many_descriptors(make_descriptors(self.vectors))
+        new = DescriptorMemoryElement('other', 5)
+        new.set_vector(self.vectors[50])
+        s.add_descriptor(new)
+        self.assertEqual(s.count(), 100)
+        self.assertEqual(s.get_descriptor(5).type(), 'other')
+        numpy.testing.assert_allclose(s.get_descriptor(5).vector(),
+                                      s.get_descriptor(50).vector())
+
+    def test_remove(self):
+        s = self._make_trained()
+        s.add_many_descriptors(make_descriptors(self.vectors))
+        expected = s.get_descriptor(99).vector()
+        self.assertRaises(KeyError, s.remove_many_descriptors, [0, 100])
+        self.assertEqual(s.count(), 100)
+        s.remove_many_descriptors([0, 1])
+        s.remove_descriptor(2)
+        self.assertEqual(s.count(), 97)
+        self.assertEqual(set(s.iterkeys()), set(range(3, 100)))
+        # Moved rows keep their codes.
+        numpy.testing.assert_allclose(s.get_descriptor(99).vector(),
+                                      expected)
+
+    def test_iter(self):
+        s = self._make_trained()
+        s.add_many_descriptors(make_descriptors(self.vectors))
+        items = list(s.iteritems())
+        self.assertEqual([k for k, _ in items], list(range(100)))
+        self.assertEqual([d.uuid() for d in s.iterdescriptors()],
+                         list(range(100)))
+
+    def test_clear(self):
+        s = self._make_trained()
+        s.add_many_descriptors(make_descriptors(self.vectors))
+        s.clear()
+        self.assertEqual(s.count(), 0)
+        # The quantizer stays trained.
+        s.add_descriptor(make_descriptors(self.vectors[:1])[0])
+        self.assertEqual(s.count(), 1)
+
+    def test_cache(self):
+        cache = DataMemoryElement()
+        s = self._make_trained(cache_element=cache, cache_fraction=0)
+        s.add_many_descriptors(make_descriptors(self.vectors))
+        s.remove_descriptor(0)
+        self.assertFalse(cache.is_empty())
+
+        s2 = self._make_inst(cache_element=cache)
+        self.assertTrue(s2.quantizer.is_trained)
+        self.assertEqual(s2.count(), 99)
+        numpy.testing.assert_allclose(s2.get_descriptor(99).vector(),
+                                      s.get_descriptor(99).vector())
+        # Adding after loading grows the loaded codes.
+        s2.add_many_descriptors(make_descriptors(self.vectors[:3],
+                                                 offset=100))
+        self.assertEqual(s2.count(), 102)
+
+    def test_cache_periodic(self):
+        # The index is dumped once the uncached changes reach the cache
+        # fraction of its size, rather than on every change.
+        cache = DataMemoryElement()
+        s = self._make_trained(cache_element=cache, cache_fraction=0.5)
+        with mock.patch.object(s, 'cache_table',
+                               wraps=s.cache_table) as m_cache:
+            s.add_many_descriptors(make_descriptors(self.vectors[:10]))
+            self.assertEqual(m_cache.call_count, 1)
+            for i in range(10, 14):
+                s.add_descriptor(make_descriptors(self.vectors[i:i + 1],
+                                                  offset=i)[0])
+            self.assertEqual(m_cache.call_count, 1)
+            s.add_descriptor(make_descriptors(self.vectors[14:15],
+                                              offset=14)[0])
+            self.assertEqual(m_cache.call_count, 1)
+            # 6 uncached changes of 16 descriptors is under half.
+            s.add_descriptor(make_descriptors(self.vectors[15:16],
+                                              offset=15)[0])
+            self.assertEqual(m_cache.call_count, 1)
+            s.remove_many_descriptors([0, 1])
+            # 8 uncached changes of 14 descriptors.
+            self.assertEqual(m_cache.call_count, 2)
+        self.assertEqual(self._make_inst(cache_element=cache).count(), 14)
+
+        s.add_descriptor(make_descriptors(self.vectors[:1], offset=20)[0])
+        self.assertEqual(self._make_inst(cache_element=cache).count(), 14)
+        s.cache_table()
+        self.assertEqual(self._make_inst(cache_element=cache).count(), 15)
@@ -0,0 +1,245 @@
+import re
+import time
+import unittest
+
+import mock
+import numpy
+import six
+
+from smqtk.representation.descriptor_element.local_elements import \
+    DescriptorMemoryElement
+from smqtk.representation.descriptor_set.solr_index import SolrDescriptorSet
+
+
+class StubSolrResponse (object):
+
+    def __init__(self, results, num_found, next_cursor_mark):
+        self.results = results
+        self.numFound = num_found
+        self.nextCursorMark = next_cursor_mark
+
+
+class StubSolr (object):
+    """
+    Local stand-in for a ``solr.Solr`` connection, supporting only the query
+    forms used by ``SolrDescriptorSet``: ``field:value`` and ``field:*``
+    clauses joined by AND, and ``{!terms}`` queries given as filter queries
+    or as ``_query_`` clauses.
+
+    Connections to the same URL share documents, as connections to the same
+    Solr instance would.
+    """
+
+    # URL to the documents stored there.
+    SERVERS = {}
+
+    TERMS_RE = re.compile(r'\{!terms f=(\w+)\}([^"]*)')
+
+    def __init__(self, url, **kwargs):
+        self.url = url
+        self.docs = self.SERVERS.setdefault(url, {})
+        self.select_calls = []
+
+    def _matcher(self, q):
+        clauses = []
+        for clause in q.split(' AND '):
+            m = self.TERMS_RE.search(clause)
+            if m:
+                values = set(m.group(2).split(','))
+                clauses.append(
+                    lambda d, f=m.group(1), v=values: str(d.get(f)) in v
+                )
+            else:
+                f, _, v = clause.partition(':')
+                if v == '*':
+                    clauses.append(lambda d, f=f: f in d)
+                else:
+                    clauses.append(
+                        lambda d, f=f, v=v: str(d.get(f)) == v
+                    )
+        return lambda d: all(c(d) for c in clauses)
+
+    def select(self, q, fields=None, score=True, sort=None, sort_order='asc',
+               rows=10, fq=None, cursorMark=None):
+        self.select_calls.append(dict(q=q, fq=fq, rows=rows,
+                                      cursorMark=cursorMark))
+        match = self._matcher(q)
+        matches = [d for _, d in sorted(self.docs.items()) if match(d)]
+        if fq is not None:
+            matches = [d for d in matches if self._matcher(fq)(d)]
+        start = 0 if cursorMark in (None, '*') else int(cursorMark)
+        page = matches[start:start + rows]
+        results = [dict((f, d[f]) for f in fields or d if f in d)
+                   for d in page]
+        next_cursor = str(start + len(page)) if page else cursorMark
+        return StubSolrResponse(results, len(matches), next_cursor)
+
+    def add(self, doc, commit=False):
+        self.add_many([doc])
+
+    def add_many(self, docs):
+        for d in docs:
+            self.docs[d['id']] = dict(d)
+
+    def delete_query(self, q):
+        match = self._matcher(q)
+        for k in [k for k, d in self.docs.items() if match(d)]:
+            del self.docs[k]
+
+    def commit(self):
+        pass
+
+
+class SlowFirstBatchStubSolr (StubSolr):
+    """
+    StubSolr whose terms filter queries including UUID "0" are slow, so that
+    batches requested later finish first.
+    """
+
+    def select(self, q, fields=None, score=True, sort=None, sort_order='asc',
+               rows=10, fq=None, cursorMark=None):
+        m = fq and self.TERMS_RE.search(fq)
+        if m and '0' in m.group(2).split(','):
+            time.sleep(0.2)
+        return super(SlowFirstBatchStubSolr, self).select(
+            q, fields, score, sort, sort_order, rows, fq, cursorMark
+        )
+
+
+def random_descriptor(uuid):
+    d = DescriptorMemoryElement('random', uuid)
+    d.set_vector(numpy.random.rand(8))
+    return d
+
+
+@mock.patch('smqtk.representation.descriptor_set.solr_index.solr')
+class TestSolrDescriptorSet (unittest.TestCase):
+
+    def setUp(self):
+        StubSolr.SERVERS.clear()
+
+    def _make_set(self, **kwargs):
+        params = dict(solr_conn_addr='http://localhost:8983/solr',
+                      set_uuid='s1', set_uuid_field='set_s',
+                      d_uid_field='uid_s', descriptor_field='descr_s',
+                      timestamp_field='time_f', rows=3)
+        params.update(kwargs)
+        return SolrDescriptorSet(**params)
+
+    def test_raw_encoding_requires_type_field(self, m_solr):
+        m_solr.Solr = StubSolr
+        self.assertRaises(ValueError, self._make_set, vector_encoding='raw')
+        self.assertRaises(ValueError, self._make_set,
+                          vector_encoding='other')
+
+    def test_invalid_rows(self, m_solr):
+        m_solr.Solr = StubSolr
+        self.assertRaises(ValueError, self._make_set, rows=0)
+
+    def test_get_config(self, m_solr):
+        m_solr.Solr = StubSolr
+        c = self._make_set(vector_encoding='raw', type_field='type_s',
+                           fetch_threads=2).get_config()
+        self.assertEqual(c['rows'], 3)
+        self.assertEqual(c['fetch_threads'], 2)
+        self.assertEqual(c['vector_encoding'], 'raw')
+        self.assertEqual(c['type_field'], 'type_s')
+
+    def _check_round_trip(self, s):
+        descrs = [random_descriptor(str(i)) for i in range(10)]
+        s.add_many_descriptors(descrs)
+        self.assertEqual(s.count(), 10)
+        self.assertTrue(s.has_descriptor('3'))
+        self.assertFalse(s.has_descriptor('10'))
+
+        # Results are in the order requested, across batches and pages.
+        uuids = ['7', '1', '9', '0', '4']
+        r = list(s.get_many_descriptors(*uuids))
+        self.assertEqual([d.uuid() for d in r], uuids)
+        for d in r:
+            numpy.testing.assert_array_equal(
+                d.vector(), descrs[int(d.uuid())].vector()
+            )
+
+        # Iteration pages through all documents.
+        self.assertEqual(sorted(s.iterkeys()), sorted(str(i)
+                                                      for i in range(10)))
+        self.assertEqual(sorted(d.uuid() for d in s.iterdescriptors()),
+                         sorted(str(i) for i in range(10)))
+
+    def test_round_trip_pickle(self, m_solr):
+        m_solr.Solr = StubSolr
+        self._check_round_trip(self._make_set(max_boolean_clauses=2))
+
+    def test_round_trip_raw(self, m_solr):
+        m_solr.Solr = StubSolr
+        s = self._make_set(max_boolean_clauses=2, vector_encoding='raw',
+                           type_field='type_s')
+        self._check_round_trip(s)
+        doc = s.solr.docs['s1-1']
+        self.assertEqual(doc['type_s'], 'random')
+        self.assertIsInstance(doc['descr_s'], six.string_types)
+
+    def test_read_pickled_with_raw_encoding(self, m_solr):
+        # Documents stored pickled remain readable after switching encoding.
+        m_solr.Solr = StubSolr
+        s = self._make_set()
+        d = random_descriptor('a')
+        s.add_descriptor(d)
+        s.vector_encoding = 'raw'
+        s.type_field = 'type_s'
+        self.assertEqual(s.get_descriptor('a'), d)
+
+    def test_get_many_missing(self, m_solr):
+        m_solr.Solr = StubSolr
+        s = self._make_set()
+        s.add_descriptor(random_descriptor('a'))
+        self.assertRaises(KeyError, list, s.get_many_descriptors('a', 'b'))
+
+    def test_cursor_paging(self, m_solr):
+        m_solr.Solr = StubSolr
+        s = self._make_set()
+        s.add_many_descriptors([random_descriptor(str(i)) for i in range(7)])
+        del s.solr.select_calls[:]
+        self.assertEqual(len(list(s.iterkeys())), 7)
+        self.assertEqual([c['cursorMark'] for c in s.solr.select_calls],
+                         ['*', '3', '6', '7'])
+        self.assertTrue(all(c['rows'] == 3 for c in s.solr.select_calls))
+
+    def test_remove_many(self, m_solr):
+        m_solr.Solr = StubSolr
+        s = self._make_set(max_boolean_clauses=2)
+        s.add_many_descriptors([random_descriptor(str(i)) for i in range(5)])
+        s.remove_many_descriptors(['0', '2', '3'])
+        self.assertEqual(sorted(s.iterkeys()), ['1', '4'])
+
+    def test_remove_many_missing(self, m_solr):
+        m_solr.Solr = StubSolr
+        s = self._make_set(max_boolean_clauses=2)
+        s.add_many_descriptors([random_descriptor(str(i)) for i in range(5)])
+        self.assertRaises(KeyError, s.remove_many_descriptors,
+                          ['0', '2', '5'])
+        # Nothing is removed.
+        self.assertEqual(s.count(), 5)
+        self.assertRaises(KeyError, s.remove_descriptor, '5')
+
+    def test_get_many_thread_connections(self, m_solr):
+        # Batches fetched in other threads use their own connections.
+        m_solr.Solr = StubSolr
+        s = self._make_set(max_boolean_clauses=2, fetch_threads=2)
+        s.add_many_descriptors([random_descriptor(str(i)) for i in range(6)])
+        del s.solr.select_calls[:]
+        uuids = [str(i) for i in range(6)]
+        self.assertEqual([d.uuid() for d in s.get_many_descriptors(*uuids)],
+                         uuids)
+        self.assertEqual(s.solr.select_calls, [])
+
+    def test_get_many_ordered_across_threads(self, m_solr):
+        # Batches finishing out of order still yield descriptors in the order
+        # requested.
+        m_solr.Solr = SlowFirstBatchStubSolr
+        s = self._make_set(max_boolean_clauses=2, fetch_threads=4)
+        s.add_many_descriptors([random_descriptor(str(i)) for i in range(8)])
+        uuids = [str(i) for i in range(8)]
+        self.assertEqual([d.uuid() for d in s.get_many_descriptors(*uuids)],
+                         uuids)
@@ -107,7 +107,7 @@ class TestDescriptorElemFactory (unittest.TestCase):
         factory = DescriptorElementFactory.from_config(c)
         self.assertEqual(factory._d_type.__name__,
                          DescriptorMemoryElement.__name__)
-        self.assertEqual(factory._d_type_config, {})
+        self.assertEqual(factory._d_type_config, {'dtype': None})
 
         d = factory.new_descriptor('test', 'foo')
         self.assertEqual(d.type(), 'test')
@@ -126,3 +126,13 @@ class TestDescriptorElemFactory (unittest.TestCase):
         factory_config = factory.get_config()
         assert factory_config == {"type": "DummyElementImpl",
                                   "DummyElementImpl": test_params}
+
+    def test_storage_dtype(self):
+        # Elements produced store vectors as the configured type.
+        factory = DescriptorElementFactory.from_config({
+            'type': 'DescriptorMemoryElement',
+            'DescriptorMemoryElement': {'dtype': 'float16'},
+        })
+        d = factory.new_descriptor('test', 'foo')
+        d.set_vector(numpy.random.rand(8))
+        self.assertEqual(d.vector().dtype, numpy.float16)
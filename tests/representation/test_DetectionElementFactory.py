@@ -161,3 +161,27 @@ def test_new_detection_call_hook():
     assert test_factory(expected_uuid) == expected_from_config_return
 
     elem_type.from_config.assert_called_once_with(elem_config, expected_uuid)
+
+
+def test_new_detections():
+    """
+    Test that bulk creation merges the default configuration once and
+    creates an element per UUID without further merging.
+    """
+    elem_type = mock.MagicMock(spec=DetectionElement)
+    elem_type.get_default_config.return_value = {'a': 0, 'd': 'e'}
+    elem_config = {'a': 1, 'b': 'c'}
+    expected_conf = {'a': 1, 'b': 'c', 'd': 'e'}
+
+    # noinspection PyTypeChecker
+    test_factory = DetectionElementFactory(elem_type, elem_config)
+    ret = test_factory.new_detections(['u1', 'u2'])
+
+    assert ret == [elem_type.from_config.return_value] * 2
+    elem_type.get_default_config.assert_called_once_with()
+    assert elem_type.from_config.call_args_list == [
+        mock.call(expected_conf, 'u1', merge_default=False),
+        mock.call(expected_conf, 'u2', merge_default=False),
+    ]
+    # The factory's configuration is not modified.
+    assert elem_config == {'a': 1, 'b': 'c'}
@@ -6,8 +6,10 @@ import pytest
 
 import smqtk
 from smqtk.compute_functions import (compute_many_descriptors,
+                                     compute_tiled_descriptors,
                                      compute_transformed_descriptors,
                                      _CountedGenerator)
+from smqtk.representation import AxisAlignedBoundingBox
 
 from six.moves import range
 from six import add_move, MovedModule
@@ -192,3 +194,29 @@ def test_compute_transformed_descriptors(mock_compute_many_descriptors,
     assert descriptors_count == 6
 
     assert mock_compute_many_descriptors.call_count == 1
+
+
+def test_compute_tiled_descriptors():
+    """
+    Test that tiles are read from the image reader and described in batches,
+    paired with their regions in the whole image.
+    """
+    mat = numpy.zeros((4, 6), dtype=numpy.uint8)
+    m_reader = mock.Mock(spec=smqtk.algorithms.ImageReader)
+    m_reader.get_image_size.return_value = (6, 4)
+    m_reader.load_tiles.side_effect = \
+        lambda d, tiles: (mat[:4, :4] for _ in tiles)
+
+    m_gen = mock_DescriptorGenerator()
+    m_gen.is_valid_element.return_value = False
+    m_gen.generate_arrays.side_effect = \
+        lambda elems: [numpy.array([len(elems)]) for _ in elems]
+
+    ret = list(compute_tiled_descriptors(mock.sentinel.data, m_reader, m_gen,
+                                         4, 4, overlap=2, batch_size=1))
+    assert [r[0] for r in ret] == [AxisAlignedBoundingBox([0, 0], [4, 4]),
+                                   AxisAlignedBoundingBox([2, 0], [6, 4])]
+    assert m_gen.generate_arrays.call_count == 2
+    # Tiles not valid as matrices are given as PNG images.
+    elems = m_gen.generate_arrays.call_args[0][0]
+    assert elems[0].content_type() == 'image/png'
@@ -0,0 +1,97 @@
+import threading
+import unittest
+
+from six.moves import range
+
+from smqtk.utils.coalesce import RequestCoalescer
+
+
+class TestRequestCoalescer (unittest.TestCase):
+
+    def test_invalid_params(self):
+        with self.assertRaises(ValueError):
+            RequestCoalescer(list, max_batch_size=0)
+        with self.assertRaises(ValueError):
+            RequestCoalescer(list, max_wait=-1)
+
+    def test_submit_single(self):
+        c = RequestCoalescer(lambda items: [i * 2 for i in items])
+        try:
+            self.assertEqual(c.submit(21), 42)
+        finally:
+            c.stop()
+
+    def test_concurrent_batching(self):
+        # Concurrently submitted items should be processed in batches no
+        # larger than the maximum, with each submitter receiving its own
+        # result.
+        batch_sizes = []
+
+        def batch_func(items):
+            batch_sizes.append(len(items))
+            return [i * 2 for i in items]
+
+        c = RequestCoalescer(batch_func, max_batch_size=8, max_wait=0.1)
+        results = {}
+
+        def submit(i):
+            results[i] = c.submit(i)
+
+        threads = [threading.Thread(target=submit, args=(i,))
+                   for i in range(20)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            c.stop()
+
+        self.assertDictEqual(results, dict((i, i * 2) for i in range(20)))
+        self.assertEqual(sum(batch_sizes), 20)
+        self.assertLessEqual(max(batch_sizes), 8)
+        self.assertLess(len(batch_sizes), 20)
+
+    def test_batch_failure_isolated(self):
+        # A failing item should only fail its own submission when its batch
+        # is re-processed per-item.
+        def batch_func(items):
+            if 'bad' in items:
+                raise ValueError("bad item")
+            return [i * 2 for i in items]
+
+        c = RequestCoalescer(batch_func, max_batch_size=4, max_wait=0.1)
+        results = {}
+
+        def submit(i):
+            try:
+                results[i] = c.submit(i)
+            except ValueError as ex:
+                results[i] = ex
+
+        threads = [threading.Thread(target=submit, args=(i,))
+                   for i in [0, 1, 'bad', 2]]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            c.stop()
+
+        self.assertIsInstance(results.pop('bad'), ValueError)
+        self.assertDictEqual(results, {0: 0, 1: 2, 2: 4})
+
+    def test_result_count_mismatch(self):
+        c = RequestCoalescer(lambda items: [])
+        try:
+            with self.assertRaises(IndexError):
+                c.submit(1)
+        finally:
+            c.stop()
+
+    def test_submit_after_stop(self):
+        c = RequestCoalescer(list)
+        c.stop()
+        with self.assertRaises(RuntimeError):
+            c.submit(1)
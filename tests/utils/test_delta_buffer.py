@@ -0,0 +1,74 @@
+import unittest
+
+import numpy
+
+from smqtk.utils.delta_buffer import DeltaBuffer
+
+
+def l1_distances(m, q):
+    return numpy.abs(m - q).sum(axis=1)
+
+
+class TestDeltaBuffer (unittest.TestCase):
+
+    def test_add_nn(self):
+        b = DeltaBuffer(l1_distances)
+        for i in range(5):
+            b.add(i, numpy.array([i, 0.]), 'v%d' % i)
+        self.assertEqual(len(b), 5)
+        self.assertIn(3, b)
+        values, dists = b.nn(numpy.array([2.9, 0.]), 3)
+        self.assertEqual(values, ['v3', 'v2', 'v4'])
+        numpy.testing.assert_allclose(dists, [0.1, 0.9, 1.1])
+        # Asking for more than buffered returns everything.
+        self.assertEqual(len(b.nn(numpy.array([0., 0.]), 10)[0]), 5)
+
+    def test_nn_empty(self):
+        values, dists = DeltaBuffer(l1_distances).nn(numpy.zeros(2), 3)
+        self.assertEqual(values, [])
+        self.assertEqual(len(dists), 0)
+
+    def test_add_replaces(self):
+        b = DeltaBuffer(l1_distances)
+        b.add('a', numpy.array([0.]))
+        b.add('b', numpy.array([5.]))
+        b.add('a', numpy.array([10.]))
+        self.assertEqual(len(b), 2)
+        # Values default to the key.
+        self.assertEqual(b.nn(numpy.array([9.]), 1)[0], ['a'])
+
+    def test_remove(self):
+        b = DeltaBuffer(l1_distances)
+        for k in 'abc':
+            b.add(k, numpy.array([ord(k)]))
+        self.assertTrue(b.remove('b'))
+        self.assertFalse(b.remove('b'))
+        self.assertEqual(b.values(), ['a', 'c'])
+        self.assertEqual(b.nn(numpy.array([ord('c')]), 1)[0], ['c'])
+
+    def test_num_changes(self):
+        b = DeltaBuffer(l1_distances)
+        b.add('a', numpy.array([0.]))
+        b.tombstones.add('x')
+        self.assertEqual(b.num_changes, 2)
+        b.clear()
+        self.assertEqual(b.num_changes, 0)
+
+    def test_discard_snapshot(self):
+        b = DeltaBuffer(l1_distances)
+        for k in 'abc':
+            b.add(k, numpy.array([0.]))
+        b.tombstones.add('x')
+        snapshot = b.snapshot()
+        self.assertEqual(snapshot[0], ['a', 'b', 'c'])
+
+        # Changes while merging the snapshot.
+        b.remove('a')
+        b.add('b', numpy.array([1.]))
+        b.add('d', numpy.array([0.]))
+        b.tombstones.add('y')
+
+        b.discard(snapshot)
+        # The merged 'a' was removed and the merged 'b' replaced since.
+        self.assertEqual(b.tombstones, {'a', 'b', 'y'})
+        self.assertEqual(b.values(), ['b', 'd'])
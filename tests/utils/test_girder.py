@@ -0,0 +1,74 @@
+import unittest
+
+import mock
+import six
+
+from smqtk.utils.girder import GirderApiClient, get_api_client
+
+
+class TestGirderApiClient (unittest.TestCase):
+
+    def test_requests_header(self):
+        self.assertEqual(GirderApiClient().get_requests_header(), {})
+        self.assertEqual(
+            GirderApiClient(token='abc').get_requests_header(),
+            {'Girder-Token': 'abc'}
+        )
+        c = GirderApiClient(api_key='key')
+        with mock.patch.object(c._token_manager, 'get_requests_header',
+                               return_value={'Girder-Token': 'xyz'}):
+            self.assertEqual(c.get_requests_header(), {'Girder-Token': 'xyz'})
+
+    @mock.patch('smqtk.utils.girder.time.time')
+    @mock.patch.object(GirderApiClient, 'request')
+    def test_file_model_ttl(self, m_request, m_time):
+        m_request.return_value.json.return_value = {'_id': 'someId'}
+        c = GirderApiClient(file_model_ttl=10)
+
+        m_time.return_value = 100.
+        self.assertEqual(c.get_file_model('someId'), {'_id': 'someId'})
+        m_time.return_value = 109.
+        c.get_file_model('someId')
+        m_request.assert_called_once_with('GET', 'file/someId')
+
+        # Expired models are requested again.
+        m_time.return_value = 111.
+        c.get_file_model('someId')
+        self.assertEqual(m_request.call_count, 2)
+
+        # Invalidated models are requested again.
+        c.invalidate_file_model('someId')
+        c.get_file_model('someId')
+        self.assertEqual(m_request.call_count, 3)
+
+    @mock.patch.object(GirderApiClient, 'request')
+    def test_file_model_cache_size(self, m_request):
+        m_request.side_effect = lambda method, path: mock.Mock(
+            json=mock.Mock(return_value={'path': path})
+        )
+        c = GirderApiClient()
+        with mock.patch.object(GirderApiClient, 'FILE_MODEL_CACHE_SIZE', 2):
+            c.get_file_model('a')
+            c.get_file_model('b')
+            # Using "a" makes "b" the least recently used model.
+            c.get_file_model('a')
+            c.get_file_model('c')
+        self.assertEqual(list(c._file_models), ['a', 'c'])
+        self.assertEqual(m_request.call_count, 3)
+        c.get_file_model('b')
+        self.assertEqual(m_request.call_count, 4)
+
+    @mock.patch.object(GirderApiClient, 'request')
+    def test_download_file(self, m_request):
+        m_request.return_value.iter_content.return_value = [b'foo', b'bar']
+        buf = six.BytesIO()
+        GirderApiClient().download_file('someId', buf)
+        self.assertEqual(buf.getvalue(), b'foobar')
+        m_request.assert_called_once_with('GET', 'file/someId/download',
+                                          stream=True)
+        m_request.return_value.close.assert_called_once_with()
+
+    def test_get_api_client_shared(self):
+        c = get_api_client('http://a/api/v1', token='t')
+        self.assertIs(get_api_client('http://a/api/v1', token='t'), c)
+        self.assertIsNot(get_api_client('http://a/api/v1', token='u'), c)
@@ -0,0 +1,61 @@
+import unittest
+
+import requests
+
+from smqtk.utils.http_cache import LruByteCache, get_session
+
+
+class TestGetSession (unittest.TestCase):
+
+    def test_shared(self):
+        s = get_session()
+        self.assertIsInstance(s, requests.Session)
+        self.assertIs(get_session(), s)
+
+
+class TestLruByteCache (unittest.TestCase):
+
+    def test_get_missing(self):
+        c = LruByteCache(10)
+        self.assertIsNone(c.get('a'))
+        self.assertEqual(c.get('a', b'default'), b'default')
+
+    def test_put_get(self):
+        c = LruByteCache(10)
+        c.put('a', b'abc')
+        self.assertIn('a', c)
+        self.assertEqual(c.get('a'), b'abc')
+        self.assertEqual(c.nbytes, 3)
+
+    def test_replace(self):
+        c = LruByteCache(10)
+        c.put('a', b'abc')
+        c.put('a', b'abcdef')
+        self.assertEqual(len(c), 1)
+        self.assertEqual(c.nbytes, 6)
+        self.assertEqual(c.get('a'), b'abcdef')
+
+    def test_evict_least_recently_used(self):
+        c = LruByteCache(10)
+        c.put('a', b'1234')
+        c.put('b', b'1234')
+        # Using 'a' makes 'b' the least recently used.
+        c.get('a')
+        c.put('c', b'1234')
+        self.assertIn('a', c)
+        self.assertNotIn('b', c)
+        self.assertIn('c', c)
+        self.assertEqual(c.nbytes, 8)
+
+    def test_value_too_large(self):
+        c = LruByteCache(4)
+        c.put('a', b'12345')
+        self.assertNotIn('a', c)
+        self.assertEqual(c.nbytes, 0)
+
+    def test_clear(self):
+        c = LruByteCache(10)
+        c.put('a', b'abc')
+        c.clear()
+        self.assertEqual(len(c), 0)
+        self.assertEqual(c.nbytes, 0)
@@ -1,4 +1,5 @@
 import mock
+import numpy
 import os
 import sys
 import tempfile
@@ -13,6 +14,7 @@ from smqtk.utils.image import (
     is_loadable_image,
     is_valid_element,
     crop_in_bounds,
+    tile_grid,
 )
 
 from tests import TEST_DATA_DIR
@@ -259,3 +261,54 @@ class TestCropInBounds(object):
         # noinspection PyArgumentList
         bb = AxisAlignedBoundingBox([1, 2], [1, 2])
         assert not crop_in_bounds(bb, 4, 6)
+
+
+class TestTileGrid (unittest.TestCase):
+    """
+    Test using the ``tile_grid`` function.
+    """
+
+    def test_even_division(self):
+        tiles = tile_grid(4, 2, 2, 2)
+        self.assertEqual(tiles, [AxisAlignedBoundingBox([0, 0], [2, 2]),
+                                 AxisAlignedBoundingBox([2, 0], [4, 2])])
+
+    def test_overlap(self):
+        tiles = tile_grid(5, 3, 3, 3, overlap=1)
+        self.assertEqual(tiles, [AxisAlignedBoundingBox([0, 0], [3, 3]),
+                                 AxisAlignedBoundingBox([2, 0], [5, 3])])
+
+    def test_last_tile_shifted_inward(self):
+        # Tiles along x start at 0 and 4, but a tile starting at 4 would
+        # not end on the image edge, so a last tile is shifted in.
+        tiles = tile_grid(10, 4, 4, 4)
+        self.assertEqual([t.min_vertex.tolist() for t in tiles],
+                         [[0, 0], [4, 0], [6, 0]])
+        for t in tiles:
+            self.assertTrue(crop_in_bounds(t, 10, 4))
+            self.assertEqual(t.deltas.tolist(), [4, 4])
+
+    def test_image_smaller_than_tile(self):
+        tiles = tile_grid(3, 10, 5, 4)
+        self.assertEqual(tiles, [AxisAlignedBoundingBox([0, 0], [3, 4]),
+                                 AxisAlignedBoundingBox([0, 4], [3, 8]),
+                                 AxisAlignedBoundingBox([0, 6], [3, 10])])
+
+    def test_image_smaller_than_tile_overlap(self):
+        # Along y, the tile overlap exceeds or equals the image height.
+        tiles = tile_grid(600, 100, 512, 512, overlap=128)
+        self.assertEqual(tiles, [AxisAlignedBoundingBox([0, 0], [512, 100]),
+                                 AxisAlignedBoundingBox([88, 0], [600, 100])])
+        tiles = tile_grid(4, 2, 3, 3, overlap=2)
+        self.assertEqual(tiles, [AxisAlignedBoundingBox([0, 0], [3, 2]),
+                                 AxisAlignedBoundingBox([1, 0], [4, 2])])
+
+    def test_integer_tiles(self):
+        for t in tile_grid(7, 7, 3, 3, overlap=1):
+            self.assertTrue(issubclass(t.dtype.type, numpy.integer))
+
+    def test_invalid_args(self):
+        self.assertRaises(ValueError, tile_grid, 0, 5, 2, 2)
+        self.assertRaises(ValueError, tile_grid, 5, 5, 0, 2)
+        self.assertRaises(ValueError, tile_grid, 5, 5, 2, 2, overlap=2)
+        self.assertRaises(ValueError, tile_grid, 5, 5, 2, 2, overlap=-1)
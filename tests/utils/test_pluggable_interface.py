@@ -4,7 +4,13 @@ import pytest
 # noinspection PyUnresolvedReferences
 from six.moves import mock
 
-from smqtk.utils.plugin import Pluggable, NotUsableError
+from smqtk.utils.plugin import (
+    LAZY_ENV_VAR,
+    LazyPluginSet,
+    NotUsableError,
+    Pluggable,
+    clear_plugin_cache,
+)
 
 
 THIS_DIR = os.path.abspath(os.path.dirname(__file__))
@@ -26,6 +32,16 @@ class DummyImplSub (DummyImpl):
 ###############################################################################
 # Tests
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """
+    Start each test without cached plugin discovery results.
+    """
+    clear_plugin_cache()
+    yield
+    clear_plugin_cache()
+
+
 @mock.patch.object(DummyImpl, 'TEST_USABLE', new_callable=mock.PropertyMock)
 def test_construct_when_usable(m_TEST_USABLE):
     # Construction should happen without incident
@@ -46,7 +62,7 @@ def test_get_impls_expected_defaults():
     Test that the correct package and containing module directory is correct
     for the dummy plugin.
     """
-    mock_return_value = 'mock return'
+    mock_return_value = {'mock return'}
     with mock.patch('smqtk.utils.plugin.get_plugins') as m_get_plugins:
         m_get_plugins.return_value = mock_return_value
         assert DummyImpl.get_impls() == mock_return_value
@@ -63,7 +79,7 @@ def test_get_impls_do_reload():
     """
     Test passing change to ``reload_modules`` argument.
     """
-    mock_return_value = 'mock return'
+    mock_return_value = {'mock return'}
     with mock.patch('smqtk.utils.plugin.get_plugins') as m_get_plugins:
         m_get_plugins.return_value = mock_return_value
         assert DummyImpl.get_impls(reload_modules=True) == mock_return_value
@@ -83,7 +99,7 @@ def test_get_impls_change_vars(m_env_var_prop, m_helper_var_prop):
     Test that changes to env/helper vars propagates to call to underlying
     ``get_plugins`` functional call.
     """
-    expected_return_value = 'mock return'
+    expected_return_value = {'mock return'}
     expected_env_var = m_env_var_prop.return_value = "new test env var"
     expected_helper_var = m_helper_var_prop.return_value = "new test helper var"
     with mock.patch('smqtk.utils.plugin.get_plugins') as m_get_plugins:
@@ -110,3 +126,75 @@ def test_get_impls_implemented_classes():
 
     expected = set()
     assert DummyImplSub.get_impls() == expected
+
+
+def test_get_impls_cached():
+    """
+    Test that discovery happens once and later calls use the cached result
+    until the cache is cleared.
+    """
+    mock_return_value = {'mock return'}
+    with mock.patch('smqtk.utils.plugin.get_plugins') as m_get_plugins:
+        m_get_plugins.return_value = mock_return_value
+        assert DummyImpl.get_impls() == mock_return_value
+        assert DummyImpl.get_impls() == mock_return_value
+        assert m_get_plugins.call_count == 1
+
+        # Returned sets may be modified without affecting the cache.
+        DummyImpl.get_impls().add('other')
+        assert DummyImpl.get_impls() == mock_return_value
+
+        # Other interfaces are not affected by cache of this interface.
+        DummyImplSub.get_impls()
+        assert m_get_plugins.call_count == 2
+
+        clear_plugin_cache(DummyImpl)
+        assert DummyImpl.get_impls() == mock_return_value
+        assert m_get_plugins.call_count == 3
+        DummyImplSub.get_impls()
+        assert m_get_plugins.call_count == 3
+
+
+def test_get_impls_reload_recaches():
+    """
+    Test that requesting a reload re-discovers and re-caches the result.
+    """
+    with mock.patch('smqtk.utils.plugin.get_plugins') as m_get_plugins:
+        m_get_plugins.return_value = {'first'}
+        assert DummyImpl.get_impls() == {'first'}
+        m_get_plugins.return_value = {'second'}
+        assert DummyImpl.get_impls(reload_modules=True) == {'second'}
+        assert DummyImpl.get_impls() == {'second'}
+        assert m_get_plugins.call_count == 2
+
+
+def test_get_impls_cache_env_var_change():
+    """
+    Test that a change to the plugin environment variable value is not
+    served from the cache of another value.
+    """
+    with mock.patch('smqtk.utils.plugin.get_plugins') as m_get_plugins:
+        m_get_plugins.return_value = {'mock return'}
+        with mock.patch.dict(os.environ, {DummyImpl.PLUGIN_ENV_VAR: "a"}):
+            DummyImpl.get_impls()
+        with mock.patch.dict(os.environ, {DummyImpl.PLUGIN_ENV_VAR: "b"}):
+            DummyImpl.get_impls()
+        assert m_get_plugins.call_count == 2
+
+
+@mock.patch.dict(os.environ, {DummyImpl.PLUGIN_ENV_VAR: "",
+                              LAZY_ENV_VAR: "1"})
+def test_get_impls_lazy():
+    """
+    Test that lazy discovery returns a lazy set until discovery has been
+    performed, which then behaves like the discovered set.
+    """
+    impls = DummyImpl.get_impls()
+    assert isinstance(impls, LazyPluginSet)
+    assert impls.get_by_name('DummyImplSub') is DummyImplSub
+    assert impls.get_by_name('NotAPlugin') is None
+    # Full discovery upon iteration, after which the cache is used.
+    assert set(impls) == {DummyImplSub}
+    assert DummyImplSub in impls
+    assert len(impls) == 1
+    assert DummyImpl.get_impls() == {DummyImplSub}
@@ -2,6 +2,7 @@ from __future__ import division, print_function
 
 import os
 import pkg_resources
+import sys
 
 import pytest
 # noinspection PyUnresolvedReferences
@@ -12,6 +13,8 @@ from smqtk.utils.plugin import (
     EXTENSION_NAMESPACE,
     OS_ENV_PATH_SEP,
     _get_extension_plugin_modules,
+    clear_plugin_cache,
+    get_plugin_by_name,
     get_plugins,
 )
 
@@ -436,3 +439,47 @@ class TestExtensionPlugins (object):
         # Thus unusable class should not be discovered in the same extension
         # module.
         assert 'UnusableExtensionPlugin' not in class_dict
+
+
+def test_get_plugin_by_name_imports_defining_module():
+    """
+    Test that getting a plugin by name only imports the sibling modules whose
+    source defines that name.
+    """
+    skip_module = 'tests.utils.test_plugin_dir.internal_plugins.implSkip'
+    clear_plugin_cache(DummyInterface)
+    sys.modules.pop(skip_module, None)
+
+    cls = get_plugin_by_name(DummyInterface, ENV_VAR, HELP_VAR, 'ImplFoo',
+                             warn=False)
+    assert cls is not None
+    assert cls.__name__ == 'ImplFoo'
+    assert skip_module not in sys.modules
+    clear_plugin_cache(DummyInterface)
+
+
+def test_get_plugin_by_name_not_exported():
+    """
+    Test that classes not exported by their module, or not usable, are not
+    returned, as they would not be discovered by ``get_plugins``.
+    """
+    clear_plugin_cache(DummyInterface)
+    for name in ('ImplNoExport', 'ImplNotUsable', 'ImplSkipModule',
+                 'ImplActuallyValid', 'SomethingElse'):
+        assert get_plugin_by_name(DummyInterface, ENV_VAR, HELP_VAR, name,
+                                  warn=False) is None
+    clear_plugin_cache(DummyInterface)
+
+
+@mock.patch.dict(os.environ, {ENV_VAR: EXT_MOD_1})
+def test_get_plugin_by_name_envvar_module():
+    """
+    Test getting a plugin by name from a module specified in the environment
+    variable.
+    """
+    clear_plugin_cache(DummyInterface)
+    cls = get_plugin_by_name(DummyInterface, ENV_VAR, HELP_VAR,
+                             'ImplExternal1', warn=False)
+    assert cls is not None
+    assert cls.__name__ == 'ImplExternal1'
+    clear_plugin_cache(DummyInterface)
@@ -0,0 +1,91 @@
+import io
+import unittest
+
+import numpy
+
+from smqtk.utils.product_quantization import ProductQuantizer, kmeans
+
+
+class TestKMeans (unittest.TestCase):
+
+    def test_converged_centroids(self):
+        rng = numpy.random.RandomState(0)
+        centers = numpy.array([[0., 0.], [10., 10.], [-10., 10.]])
+        x = centers.repeat(20, 0) + rng.normal(scale=0.1, size=(60, 2))
+        c = kmeans(x, 3, 20, rng)
+        self.assertEqual(c.shape, (3, 2))
+        # Once converged, each centroid is the mean of its nearest vectors.
+        assign = ((x[:, None, :] - c[None, :, :]) ** 2).sum(2).argmin(1)
+        for i in range(3):
+            numpy.testing.assert_allclose(c[i], x[assign == i].mean(0))
+
+
+class TestProductQuantizer (unittest.TestCase):
+
+    def setUp(self):
+        self.rng = numpy.random.RandomState(0)
+        self.x = self.rng.rand(300, 8)
+
+    def test_init_invalid(self):
+        self.assertRaises(ValueError, ProductQuantizer, 0)
+        self.assertRaises(ValueError, ProductQuantizer, 2, num_centroids=0)
+        self.assertRaises(ValueError, ProductQuantizer, 2, num_centroids=257)
+
+    def test_train_invalid(self):
+        pq = ProductQuantizer(3, num_centroids=16)
+        # Dimension not divisible by the number of subspaces.
+        self.assertRaises(ValueError, pq.train, self.x)
+        # Too few training vectors.
+        pq = ProductQuantizer(4, num_centroids=16)
+        self.assertRaises(ValueError, pq.train, self.x[:10])
+        self.assertFalse(pq.is_trained)
+
+    def test_untrained(self):
+        pq = ProductQuantizer(4)
+        self.assertIsNone(pq.dimension)
+        self.assertRaises(RuntimeError, pq.encode, self.x)
+
+    def test_encode_decode(self):
+        pq = ProductQuantizer(4, num_centroids=32, random_seed=0)
+        pq.train(self.x)
+        self.assertTrue(pq.is_trained)
+        self.assertEqual(pq.dimension, 8)
+
+        codes = pq.encode(self.x)
+        self.assertEqual(codes.shape, (300, 4))
+        self.assertEqual(codes.dtype, numpy.uint8)
+        self.assertLess(codes.max(), 32)
+
+        decoded = pq.decode(codes)
+        self.assertEqual(decoded.shape, (300, 8))
+        # Reconstruction is much closer than the spread of the data.
+        err = ((decoded - self.x) ** 2).sum(1).mean()
+        spread = ((self.x - self.x.mean(0)) ** 2).sum(1).mean()
+        self.assertLess(err, spread / 4)
+
+        self.assertRaises(ValueError, pq.encode, self.x[:, :4])
+
+    def test_adc(self):
+        pq = ProductQuantizer(2, num_centroids=16, random_seed=0)
+        pq.train(self.x)
+        codes = pq.encode(self.x[:50])
+        q = self.rng.rand(3, 8)
+        d = pq.adc(pq.distance_tables(q), codes)
+        # ADC distances are the exact distances to the decoded vectors.
+        decoded = pq.decode(codes)
+        expected = ((q[:, None, :] - decoded[None, :, :]) ** 2).sum(2)
+        numpy.testing.assert_allclose(d, expected, atol=1e-4)
+
+    def test_save_load(self):
+        pq = ProductQuantizer(4, num_centroids=8, num_iterations=5,
+                              random_seed=0)
+        pq.train(self.x)
+        f = io.BytesIO()
+        pq.save(f)
+        f.seek(0)
+        pq2 = ProductQuantizer.load(f)
+        self.assertEqual(pq2.num_subspaces, 4)
+        self.assertEqual(pq2.num_centroids, 8)
+        self.assertEqual(pq2.num_iterations, 5)
+        numpy.testing.assert_array_equal(pq2.encode(self.x),
+                                         pq.encode(self.x))
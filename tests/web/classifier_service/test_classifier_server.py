@@ -5,6 +5,7 @@ import json
 import math
 import mock
 import os
+import threading
 import unittest
 
 from six.moves import cPickle as pickle
@@ -21,16 +22,20 @@ from .dummy_classifier import DummyClassifier, DummySupervisedClassifier, \
     STUB_CLASSIFIER_MOD_PATH
 
 
+# Environment to discover the dummy plugins used by these tests.
+STUB_PLUGIN_ENV = {
+    Pluggable.PLUGIN_ENV_VAR:
+        OS_ENV_PATH_SEP.join([
+            STUB_CLASSIFIER_MOD_PATH,
+            'tests.web.classifier_service.dummy_descriptor_generator',
+        ])
+}
+
+
 class TestClassifierService (unittest.TestCase):
 
     # noinspection PyUnresolvedReferences
-    @mock.patch.dict(os.environ, {
-        Pluggable.PLUGIN_ENV_VAR:
-            OS_ENV_PATH_SEP.join([
-                STUB_CLASSIFIER_MOD_PATH,
-                'tests.web.classifier_service.dummy_descriptor_generator',
-            ])
-    })
+    @mock.patch.dict(os.environ, STUB_PLUGIN_ENV)
     def setUp(self):
         super(TestClassifierService, self).setUp()
         self.config = SmqtkClassifierService.get_default_config()
@@ -218,6 +223,53 @@ class TestClassifierService (unittest.TestCase):
             self.assertDictEqual(resp_data['result'][old_label], results_exp)
             self.assertDictEqual(resp_data['result'][new_label], results_exp)
 
+    @mock.patch.dict(os.environ, STUB_PLUGIN_ENV)
+    def test_coalesced_classify(self):
+        # Concurrent classify requests to a service with request coalescing
+        # enabled should each get their own results, with a bad label only
+        # failing its own request.
+        self.config['request_coalescing'] = {
+            'enabled': True,
+            'max_batch_size': 4,
+            'max_wait': 0.05,
+        }
+        app = SmqtkClassifierService(json_config=self.config)
+        self.assertIsNotNone(app.classify_coalescer)
+        results_exp = dict(positive=0.5, negative=0.5)
+        responses = {}
+
+        def post(i, label):
+            data = {
+                'content_type': 'text/plain',
+                'bytes_b64':
+                    base64.b64encode(('element %d' % i).encode()).decode(),
+            }
+            if label is not None:
+                data['label'] = label
+            with app.test_client() as cli:
+                responses[i] = cli.post('/classify', data=data)
+
+        labels = [None, 'dummy', 'not_a_label', None, 'dummy', None]
+        threads = [threading.Thread(target=post, args=(i, l))
+                   for i, l in enumerate(labels)]
+        try:
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        finally:
+            app.classify_coalescer.stop()
+
+        for i, label in enumerate(labels):
+            rv = responses[i]
+            if label == 'not_a_label':
+                self.assertStatus(rv, 404)
+            else:
+                self.assertStatus(rv, 200)
+                resp_data = json.loads(rv.data.decode())
+                self.assertDictEqual(resp_data['result']['dummy'],
+                                     results_exp)
+
     def test_get_add_del_classifier(self):
         old_label = 'dummy'
         new_label = 'dummy2'
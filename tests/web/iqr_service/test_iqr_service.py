@@ -2,12 +2,13 @@ import base64
 import json
 import mock
 import os
+import threading
 import unittest
 
+import numpy
+
 from smqtk.iqr import IqrSession
 from smqtk.representation import DescriptorElement
-from smqtk.representation.classification_element.memory \
-    import MemoryClassificationElement
 from smqtk.representation.descriptor_element.local_elements \
     import DescriptorMemoryElement
 from smqtk.utils.plugin import Pluggable
@@ -895,19 +896,12 @@ class TestIqrService (unittest.TestCase):
             return_value=mock_descriptors
         )
         # Mock stub classifier return
-        mock_classifications = [
-            MemoryClassificationElement('', 'a'),
-            MemoryClassificationElement('', 'b'),
-            MemoryClassificationElement('', 'c'),
-        ]
-        mock_classifications[0].set_classification(
-            {'positive': 0.6, 'negative': 0.4})
-        mock_classifications[1].set_classification(
-            {'positive': 0.5, 'negative': 0.5})
-        mock_classifications[2].set_classification(
-            {'positive': 0.4, 'negative': 0.6})
-        StubClassifier.classify_elements = mock.MagicMock(
-            return_value=iter(mock_classifications)
+        StubClassifier.classify_arrays = mock.MagicMock(
+            return_value=iter([
+                {'positive': 0.6, 'negative': 0.4},
+                {'positive': 0.5, 'negative': 0.5},
+                {'positive': 0.4, 'negative': 0.6},
+            ])
         )
 
         with self.app.test_client() as tc:
@@ -948,6 +942,251 @@ class TestIqrService (unittest.TestCase):
             assert r_json['sid'] == '0'
             assert r_json['uuids'] == ['a', 'b', 'c']
             assert r_json['proba'] == [0.6, 0.5, 0.4]
+            assert r_json['model_version'] == 1
+            assert r_json['proba_model_version'] == [1, 1, 1]
+            assert r_json['stale'] is False
+            # Vectors were classified together in one batch.
+            StubClassifier.classify_arrays.assert_called_once()
+            numpy.testing.assert_array_equal(
+                StubClassifier.classify_arrays.call_args[0][0],
+                [[0.4], [0.5], [0.6]]
+            )
+
+    def _setup_classify_session(self, sid):
+        """
+        Initialize a session with positive and negative adjudications and a
+        descriptor set lookup for the descriptors of UUIDs 'a' and 'b'.
+        """
+        descriptors = {
+            'a': DescriptorMemoryElement('', 'a').set_vector([0.4]),
+            'b': DescriptorMemoryElement('', 'b').set_vector([0.5]),
+        }
+        self.app.descriptor_set.get_many_descriptors = mock.MagicMock(
+            side_effect=lambda uuids: [descriptors[u] for u in uuids]
+        )
+        self.app.test_client().post("/session", data=dict(sid=sid))
+        iqrs = self.app.controller.get_session(sid)
+        iqrs.positive_descriptors.add(
+            DescriptorMemoryElement('', 0).set_vector([0.1])
+        )
+        iqrs.negative_descriptors.add(
+            DescriptorMemoryElement('', 1).set_vector([0.9])
+        )
+        return iqrs
+
+    @mock.patch('smqtk.web.iqr_service.iqr_server.SupervisedClassifier'
+                '.get_impls')
+    def test_classify_cached_until_retrain(self, m_sc_get_impls):
+        """
+        Test that results from the current classifier version are reused and
+        that results are recomputed, rather than purged, after retraining.
+        """
+        m_sc_get_impls.return_value = {StubClassifier}
+        StubClassifier.classify_arrays = mock.MagicMock(
+            side_effect=lambda vecs: [{'positive': v[0], 'negative': 0}
+                                      for v in vecs]
+        )
+        iqrs = self._setup_classify_session("0")
+
+        tc = self.app.test_client()
+        r = tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a'])
+        ))
+        self.assertStatusCode(r, 200)
+        assert r.json['proba_model_version'] == [1]
+
+        # Only the UUID not yet classified by this version is classified.
+        r = tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a', 'b'])
+        ))
+        self.assertStatusCode(r, 200)
+        assert r.json['proba'] == [0.4, 0.5]
+        assert StubClassifier.classify_arrays.call_count == 2
+        assert list(StubClassifier.classify_arrays.call_args[0][0][0]) \
+            == [0.5]
+
+        # A new adjudication causes a new classifier version to re-classify
+        # cached UUIDs.
+        iqrs.negative_descriptors.add(
+            DescriptorMemoryElement('', 2).set_vector([0.8])
+        )
+        self.app.session_classifier_dirty["0"] = True
+        r = tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a', 'b'])
+        ))
+        self.assertStatusCode(r, 200)
+        assert r.json['model_version'] == 2
+        assert r.json['proba_model_version'] == [2, 2]
+        assert StubClassifier.classify_arrays.call_count == 3
+        assert len(self.app.session_classification_results["0"]) == 2
+
+    @mock.patch('smqtk.web.iqr_service.iqr_server.SupervisedClassifier'
+                '.get_impls')
+    def test_classify_background_retrain(self, m_sc_get_impls):
+        """
+        Test that with background retraining enabled, a dirty session keeps
+        serving from the previous classifier, flagged as stale, until the new
+        classifier is trained.
+        """
+        m_sc_get_impls.return_value = {StubClassifier}
+        StubClassifier.classify_arrays = mock.MagicMock(
+            side_effect=lambda vecs: [{'positive': v[0], 'negative': 0}
+                                      for v in vecs]
+        )
+        self.app.background_retrain = True
+        iqrs = self._setup_classify_session("0")
+        tc = self.app.test_client()
+
+        # First classifier is always trained synchronously.
+        r = tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a'])
+        ))
+        assert r.json['model_version'] == 1
+        assert r.json['stale'] is False
+
+        iqrs.negative_descriptors.add(
+            DescriptorMemoryElement('', 2).set_vector([0.8])
+        )
+        self.app.session_classifier_dirty["0"] = True
+        train_event = threading.Event()
+        # Block background training until released below.
+        with mock.patch.object(StubClassifier, '_train',
+                               side_effect=lambda *a, **kw:
+                               train_event.wait()):
+            r = tc.get('/classify', query_string=dict(
+                sid="0", uuids=json.dumps(['a'])
+            ))
+            self.assertStatusCode(r, 200)
+            assert r.json['model_version'] == 1
+            assert r.json['proba_model_version'] == [1]
+            assert r.json['stale'] is True
+            # Cached result from the previous version was reused.
+            assert StubClassifier.classify_arrays.call_count == 1
+
+            t = self.app.session_classifier_training["0"]
+            train_event.set()
+            t.join()
+
+        r = tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a'])
+        ))
+        assert r.json['model_version'] == 2
+        assert r.json['proba_model_version'] == [2]
+        assert r.json['stale'] is False
+
+    @mock.patch('smqtk.web.iqr_service.iqr_server.SupervisedClassifier'
+                '.get_impls')
+    def test_classify_unchanged_examples_no_retrain(self, m_sc_get_impls):
+        """
+        Test that a dirty session whose examples are the same as those the
+        current classifier was trained with does not train a new classifier.
+        """
+        m_sc_get_impls.return_value = {StubClassifier}
+        StubClassifier.classify_arrays = mock.MagicMock(
+            side_effect=lambda vecs: [{'positive': v[0], 'negative': 0}
+                                      for v in vecs]
+        )
+        self._setup_classify_session("0")
+        tc = self.app.test_client()
+        tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a'])
+        ))
+
+        self.app.session_classifier_dirty["0"] = True
+        r = tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a'])
+        ))
+        self.assertStatusCode(r, 200)
+        assert r.json['model_version'] == 1
+        assert r.json['stale'] is False
+        assert StubClassifier.classify_arrays.call_count == 1
+
+    @mock.patch('smqtk.web.iqr_service.iqr_server.SupervisedClassifier'
+                '.get_impls')
+    def test_classify_incremental_train(self, m_sc_get_impls):
+        """
+        Test that a classifier supporting incremental training is updated with
+        only new examples, and is trained anew when examples are removed.
+        """
+        m_sc_get_impls.return_value = {StubClassifier}
+        StubClassifier.classify_arrays = mock.MagicMock(
+            side_effect=lambda vecs: [{'positive': v[0], 'negative': 0}
+                                      for v in vecs]
+        )
+        iqrs = self._setup_classify_session("0")
+        tc = self.app.test_client()
+
+        with mock.patch.object(StubClassifier, 'supports_partial_train',
+                               return_value=True), \
+                mock.patch.object(StubClassifier, 'partial_train') \
+                as m_partial_train:
+            tc.get('/classify', query_string=dict(
+                sid="0", uuids=json.dumps(['a'])
+            ))
+            classifier = self.app.session_classifiers["0"]
+            m_partial_train.assert_not_called()
+
+            new_pos = DescriptorMemoryElement('', 4).set_vector([0.2])
+            iqrs.positive_descriptors.add(new_pos)
+            self.app.session_classifier_dirty["0"] = True
+            r = tc.get('/classify', query_string=dict(
+                sid="0", uuids=json.dumps(['a'])
+            ))
+            assert r.json['model_version'] == 2
+            # Same classifier updated with only the new positive example.
+            assert self.app.session_classifiers["0"] is classifier
+            m_partial_train.assert_called_once_with(
+                {'positive': frozenset([new_pos])}
+            )
+
+            # Removing an example requires a new classifier.
+            iqrs.positive_descriptors.remove(new_pos)
+            self.app.session_classifier_dirty["0"] = True
+            r = tc.get('/classify', query_string=dict(
+                sid="0", uuids=json.dumps(['a'])
+            ))
+            assert r.json['model_version'] == 3
+            assert self.app.session_classifiers["0"] is not classifier
+            assert m_partial_train.call_count == 1
+
+    @mock.patch('smqtk.web.iqr_service.iqr_server.SupervisedClassifier'
+                '.get_impls')
+    def test_classify_incremental_train_failure(self, m_sc_get_impls):
+        """
+        Test that a classifier whose incremental training fails is discarded,
+        and a new classifier trained upon the next request.
+        """
+        m_sc_get_impls.return_value = {StubClassifier}
+        StubClassifier.classify_arrays = mock.MagicMock(
+            side_effect=lambda vecs: [{'positive': v[0], 'negative': 0}
+                                      for v in vecs]
+        )
+        iqrs = self._setup_classify_session("0")
+        tc = self.app.test_client()
+
+        with mock.patch.object(StubClassifier, 'supports_partial_train',
+                               return_value=True), \
+                mock.patch.object(StubClassifier, 'partial_train',
+                                  side_effect=RuntimeError("failed")):
+            tc.get('/classify', query_string=dict(
+                sid="0", uuids=json.dumps(['a'])
+            ))
+            iqrs.positive_descriptors.add(
+                DescriptorMemoryElement('', 4).set_vector([0.2])
+            )
+            self.app.session_classifier_dirty["0"] = True
+            r = tc.get('/classify', query_string=dict(
+                sid="0", uuids=json.dumps(['a'])
+            ))
+            self.assertStatusCode(r, 400)
+            assert self.app.session_classifiers["0"] is None
+            assert self.app.session_classifier_examples["0"] is None
+
+        r = tc.get('/classify', query_string=dict(
+            sid="0", uuids=json.dumps(['a'])
+        ))
+        self.assertStatusCode(r, 200)
+        assert r.json['model_version'] == 2
 
     def test_get_iqr_state_no_sid(self):
         # Test that calling GET /state with no SID results in error.
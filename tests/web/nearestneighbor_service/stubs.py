@@ -0,0 +1,79 @@
+"""
+Stub abstract class implementations.
+"""
+import numpy
+
+from smqtk.algorithms import DescriptorGenerator, NearestNeighborsIndex
+
+
+STUB_MODULE_PATH = __name__
+
+
+class StubDescrGenerator (DescriptorGenerator):
+    """
+    DescriptorGenerator stub for testing NearestNeighborServiceServer.
+
+    Text content is described by its length. Content of b'fail' fails
+    description.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        return True
+
+    def get_config(self):
+        return {}
+
+    def valid_content_types(self):
+        return {'text/plain'}
+
+    def _generate_arrays(self, data_iter):
+        for d in data_iter:
+            b = d.get_bytes()
+            if b == b'fail':
+                raise RuntimeError("Stub description failure")
+            yield numpy.array([float(len(b))])
+
+
+class StubNearestNeighborIndex (NearestNeighborsIndex):
+    """
+    NearestNeighborIndex stub for testing NearestNeighborServiceServer.
+
+    Neighbors are found by brute force, and the number of descriptors in each
+    ``_nn_many`` query is recorded.
+    """
+
+    @classmethod
+    def is_usable(cls):
+        return True
+
+    def __init__(self):
+        super(StubNearestNeighborIndex, self).__init__()
+        self.descriptors = []
+        self.nn_many_batch_sizes = []
+
+    def get_config(self):
+        return {}
+
+    def count(self):
+        return len(self.descriptors)
+
+    def _build_index(self, descriptors):
+        self.descriptors = list(descriptors)
+
+    def _update_index(self, descriptors):
+        self.descriptors.extend(descriptors)
+
+    def _remove_from_index(self, uids):
+        pass
+
+    def _nn(self, d, n=1):
+        dists = [float(numpy.linalg.norm(d.vector() - e.vector()))
+                 for e in self.descriptors]
+        order = numpy.argsort(dists, kind='mergesort')[:n]
+        return (tuple(self.descriptors[i] for i in order),
+                tuple(dists[i] for i in order))
+
+    def _nn_many(self, descriptors, n=1):
+        self.nn_many_batch_sizes.append(len(descriptors))
+        return [self._nn(d, n) for d in descriptors]
@@ -0,0 +1,196 @@
+import base64
+import json
+import mock
+import os
+import unittest
+
+from smqtk.representation.descriptor_element.local_elements \
+    import DescriptorMemoryElement
+from smqtk.utils.plugin import Pluggable
+from smqtk.web.nearestneighbor_service import NearestNeighborServiceServer
+
+from tests.web.nearestneighbor_service.stubs import \
+    STUB_MODULE_PATH, \
+    StubDescrGenerator, StubNearestNeighborIndex
+
+
+def b64_uri(b):
+    """ Make a "base64://" URI of the given bytes. """
+    return 'base64://' + base64.b64encode(b).decode('utf-8')
+
+
+class TestNearestNeighborServiceBulk (unittest.TestCase):
+
+    # Patch in this module for stub implementation access.
+    # noinspection PyUnresolvedReferences
+    @mock.patch.dict(os.environ, {
+        Pluggable.PLUGIN_ENV_VAR: STUB_MODULE_PATH
+    })
+    def setUp(self):
+        """
+        Make an instance of the NearestNeighborServiceServer flask application
+        with stub algorithms and an index of descriptors "u0" to "u4" whose
+        vectors are [0] to [4].
+        """
+        config = NearestNeighborServiceServer.get_default_config()
+        config['descriptor_factory']['type'] = 'DescriptorMemoryElement'
+        config['descriptor_set']['type'] = 'MemoryDescriptorSet'
+        config['descriptor_generator']['type'] = 'StubDescrGenerator'
+        config['nn_index']['type'] = 'StubNearestNeighborIndex'
+        config['update_descriptor_set'] = True
+        config['bulk_batch_size'] = 2
+
+        self.app = NearestNeighborServiceServer(config)
+        self.descriptors = [
+            DescriptorMemoryElement('test', 'u%d' % i).set_vector([i])
+            for i in range(5)
+        ]
+        self.app.nn_index.build_index(self.descriptors)
+        self.app.descr_index.add_many_descriptors(self.descriptors)
+
+    def post_bulk(self, path, body):
+        """
+        :return: Response and its parsed newline-delimited JSON lines.
+        :rtype: (flask.wrappers.Response, list[dict])
+        """
+        r = self.app.test_client().post(path, data=json.dumps(body),
+                                        content_type='application/json')
+        lines = []
+        if r.status_code == 200:
+            self.assertEqual(r.mimetype, 'application/x-ndjson')
+            lines = [json.loads(line) for line
+                     in r.data.decode('utf-8').splitlines()]
+        return r, lines
+
+    def test_config(self):
+        self.assertIsInstance(self.app.descriptor_generator_inst,
+                              StubDescrGenerator)
+        self.assertIsInstance(self.app.nn_index, StubNearestNeighborIndex)
+        self.assertEqual(self.app.bulk_batch_size, 2)
+        self.assertEqual(
+            NearestNeighborServiceServer.get_default_config()
+            ['bulk_batch_size'], 128
+        )
+
+    def test_bulk_request_uris(self):
+        with self.app.test_request_context(
+                data=json.dumps({'uris': ['file:///a', 'b'],
+                                 'uuids': ['u0', 1]}),
+                content_type='application/json'):
+            self.assertEqual(self.app._bulk_request_uris(),
+                             ['file:///a', 'b', 'uuid://u0', 'uuid://1'])
+
+    def test_bulk_request_uris_invalid(self):
+        for body in [None, [], {}, {'uris': []}, {'uris': 'a'},
+                     {'uris': ['a'], 'uuids': 'u0'}]:
+            with self.app.test_request_context(
+                    data=json.dumps(body), content_type='application/json'):
+                self.assertIsNone(self.app._bulk_request_uris(), body)
+        # Not JSON.
+        with self.app.test_request_context(data='uris',
+                                           content_type='text/plain'):
+            self.assertIsNone(self.app._bulk_request_uris())
+
+    def test_iter_bulk_descriptors(self):
+        uris = ['uuid://u%d' % i for i in range(5)]
+        with self.app.test_request_context(
+                data=json.dumps({'uris': uris}),
+                content_type='application/json'):
+            batches = list(self.app._iter_bulk_descriptors(uris))
+        self.assertEqual([b for b, _ in batches],
+                         [uris[0:2], uris[2:4], uris[4:5]])
+        for uri_batch, d_batch in batches:
+            self.assertEqual(len(uri_batch), len(d_batch))
+            for uri, (d, message) in zip(uri_batch, d_batch):
+                self.assertEqual(d.uuid(), uri[7:])
+                self.assertEqual(message, "descriptor retrieved")
+
+    def test_bulk_compute(self):
+        uris = [b64_uri(b'a'), b64_uri(b'abc'), 'uuid://u4']
+        r, lines = self.post_bulk('/bulk/compute', {
+            'uris': uris[:2], 'uuids': ['u4'], 'content_type': 'text/plain',
+        })
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([d['reference_uri'] for d in lines], uris)
+        self.assertTrue(all(d['success'] for d in lines))
+        self.assertEqual([d['descriptor'] for d in lines],
+                         [[1.], [3.], [4.]])
+        # Computed descriptors are added to the descriptor set.
+        self.assertEqual(self.app.descr_index.count(), 7)
+
+    def test_bulk_compute_failures(self):
+        uris = [b64_uri(b'fail'), b64_uri(b'ab'), 'file:///no/such/file',
+                'uuid://missing']
+        r, lines = self.post_bulk('/bulk/compute', {
+            'uris': uris, 'content_type': 'text/plain',
+        })
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([d['reference_uri'] for d in lines], uris)
+        self.assertEqual([d['success'] for d in lines],
+                         [False, True, False, False])
+        self.assertRegexpMatches(lines[0]['message'],
+                                 "Descriptor generation failure")
+        self.assertEqual(lines[1]['descriptor'], [2.])
+        self.assertRegexpMatches(lines[2]['message'], "Input data issue")
+        self.assertRegexpMatches(lines[3]['message'],
+                                 "No descriptor for UUID 'missing'")
+        for d in (lines[0], lines[2], lines[3]):
+            self.assertIsNone(d['descriptor'])
+
+    def test_bulk_compute_bad_request(self):
+        for body in [{}, {'uris': []}, {'uuids': 'u0'}]:
+            r, _ = self.post_bulk('/bulk/compute', body)
+            self.assertEqual(r.status_code, 400)
+            self.assertFalse(json.loads(r.data.decode())['success'])
+
+    def test_bulk_nn(self):
+        uris = [b64_uri(b'a'), b64_uri(b'abc'), 'uuid://u4']
+        r, lines = self.post_bulk('/bulk/nn', {
+            'uris': uris[:2], 'uuids': ['u4'], 'n': 2,
+            'content_type': 'text/plain',
+        })
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([d['reference_uri'] for d in lines], uris)
+        self.assertTrue(all(d['success'] for d in lines))
+        self.assertEqual([d['neighbors'] for d in lines],
+                         [['u1', 'u0'], ['u3', 'u2'], ['u4', 'u3']])
+        self.assertEqual([d['distances'] for d in lines],
+                         [[0., 1.], [0., 1.], [0., 1.]])
+        # Descriptors are queried in batches of the configured size.
+        self.assertEqual(self.app.nn_index.nn_many_batch_sizes, [2, 1])
+
+    def test_bulk_nn_default_n(self):
+        r, lines = self.post_bulk('/bulk/nn', {'uuids': ['u0']})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(lines[0]['neighbors']), 5)
+
+    def test_bulk_nn_failures(self):
+        uris = ['uuid://missing', 'uuid://u2', b64_uri(b'fail')]
+        r, lines = self.post_bulk('/bulk/nn', {
+            'uris': uris, 'n': 1, 'content_type': 'text/plain',
+        })
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([d['reference_uri'] for d in lines], uris)
+        self.assertEqual([d['success'] for d in lines], [False, True, False])
+        self.assertEqual([d['neighbors'] for d in lines], [[], ['u2'], []])
+        self.assertEqual(lines[0]['distances'], [])
+        # Only descriptors found are queried.
+        self.assertEqual(self.app.nn_index.nn_many_batch_sizes, [1])
+
+    def test_bulk_nn_empty_index(self):
+        self.app.nn_index.descriptors = []
+        r, lines = self.post_bulk('/bulk/nn', {'uuids': ['u0', 'u1']})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual([d['success'] for d in lines], [False, False])
+        for d in lines:
+            self.assertRegexpMatches(d['message'],
+                                     "Descriptor or index related issue")
+
+    def test_bulk_nn_bad_request(self):
+        for body in [{}, {'uris': []}, {'uris': 'u0'}]:
+            r, _ = self.post_bulk('/bulk/nn', body)
+            self.assertEqual(r.status_code, 400)
+        r, _ = self.post_bulk('/bulk/nn', {'uuids': ['u0'], 'n': 'many'})
+        self.assertEqual(r.status_code, 400)
+        self.assertRegexpMatches(json.loads(r.data.decode())['message'],
+                                 'Invalid value for "n"')